@@ -0,0 +1,46 @@
+"""
+Clase de ruta de los routers de servicios SOAP
+"""
+import asyncio
+from functools import wraps
+from typing import Any, Callable
+
+from fastapi import status
+from fastapi.routing import APIRoute
+
+from app.utils.fast_json import FastJSONResponse
+from app.utils.field_selection import current_selection
+
+
+class GatewayRoute(APIRoute):
+    """
+    APIRoute con serialización directa del modelo de respuesta.
+
+    Cuando el endpoint retorna una instancia exacta de su response_model, el
+    modelo ya está validado: se serializa con orjson (FastJSONResponse) sin
+    la validación y el jsonable_encoder que FastAPI repite con response_model.
+    Con ?fields= / ?exclude= (ver app.middleware.field_selection) solo se
+    serializan los campos seleccionados. Cualquier otro resultado (ej: un
+    JSONResponse de error) sigue el camino normal de FastAPI.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        # include_router vuelve a crear la ruta con el endpoint ya envuelto
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "gateway_route", False):
+            endpoint = self._wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _wrap(self, endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            if self.response_model is None or type(result) is not self.response_model:
+                return result
+            status_code = self.status_code or status.HTTP_200_OK
+            selection = current_selection(self.response_model)
+            if selection is not None:
+                return FastJSONResponse(selection.dump(result), status_code=status_code)
+            return FastJSONResponse(result, status_code=status_code)
+
+        wrapper.gateway_route = True
+        return wrapper
@@ -0,0 +1,57 @@
+"""
+Endpoints de administración de la inyección de fallas y latencia
+
+Solo se montan con CHAOS_ENABLED=true.
+"""
+from fastapi import APIRouter
+from loguru import logger
+
+from app.models.chaos import ConfiguracionCaos, EstadoCaos
+from app.utils.chaos import chaos_injector
+
+
+router = APIRouter(
+    prefix="/admin/chaos",
+    tags=["Administración"]
+)
+
+
+def _estado() -> EstadoCaos:
+    return EstadoCaos(rules=chaos_injector.rules, injected=chaos_injector.injected())
+
+
+@router.get(
+    "",
+    response_model=EstadoCaos,
+    summary="Reglas de caos activas",
+    description="Reglas de inyección de fallas y latencia vigentes y cantidad de inyecciones por servicio/operación/tipo"
+)
+async def get_chaos() -> EstadoCaos:
+    """Reglas activas y contadores de inyecciones"""
+    return _estado()
+
+
+@router.put(
+    "",
+    response_model=EstadoCaos,
+    summary="Reemplazar reglas de caos",
+    description="Reemplaza todas las reglas en caliente y reinicia los contadores de inyecciones"
+)
+async def put_chaos(config: ConfiguracionCaos) -> EstadoCaos:
+    """Reemplaza las reglas de caos"""
+    chaos_injector.configure(config.rules)
+    logger.warning(f"Reglas de caos reemplazadas: {len(config.rules)} reglas activas")
+    return _estado()
+
+
+@router.delete(
+    "",
+    response_model=EstadoCaos,
+    summary="Desactivar reglas de caos",
+    description="Elimina todas las reglas; las llamadas SOAP vuelven a ejecutarse sin inyecciones"
+)
+async def delete_chaos() -> EstadoCaos:
+    """Elimina todas las reglas de caos"""
+    chaos_injector.configure([])
+    logger.warning("Reglas de caos eliminadas")
+    return _estado()
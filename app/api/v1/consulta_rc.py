@@ -24,12 +24,15 @@ from app.models.consulta_rc import (
     ErrorResponse
 )
 from app.services.consulta_rc_soap_client import ConsultaRcSoapClientService, consulta_rc_soap_client
+from app.api.routing import GatewayRoute
+from app.utils.errors import RetryLaterError
 
 
 # Crear router
 router = APIRouter(
     prefix="/rc",
     tags=["Consulta Registro Civil"],
+    route_class=GatewayRoute,
     responses={
         502: {"model": ErrorResponse, "description": "Error del servicio SOAP"}
     }
@@ -89,6 +92,8 @@ async def consulta_run(
                 detalle=str(fault)
             ).model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_run: {str(e)}")
         return JSONResponse(
@@ -155,6 +160,8 @@ async def consulta_nro_serie_nro_documento(
                 detalle=str(fault)
             ).model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_nro_serie_nro_documento: {str(e)}")
         return JSONResponse(
@@ -215,6 +222,8 @@ async def consulta_certificado_nacimiento(
                 detalle=str(fault)
             ).model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_certificado_nacimiento: {str(e)}")
         return JSONResponse(
@@ -275,6 +284,8 @@ async def consulta_discapacidad(
                 detalle=str(fault)
             ).model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_discapacidad: {str(e)}")
         return JSONResponse(
@@ -327,6 +338,8 @@ async def verify(
                 detalle=str(fault)
             ).model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en verify: {str(e)}")
         return JSONResponse(
@@ -383,6 +396,8 @@ async def verificar_huella_dactilar(
                 detalle=str(fault)
             ).model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en verificar_huella_dactilar: {str(e)}")
         return JSONResponse(
@@ -13,10 +13,13 @@ from app.models.firma import (
     ErrorResponse
 )
 from app.services.firma_soap_client import FirmaSoapClientService, firma_soap_client
+from app.api.routing import GatewayRoute
+from app.utils.errors import RetryLaterError
 
 router = APIRouter(
     prefix="/firma",
     tags=["Firma Desatendida SENCE"],
+    route_class=GatewayRoute,
     responses={
         502: {
             "model": ErrorResponse,
@@ -124,6 +127,8 @@ async def firma_desatendida(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en firma_desatendida: {str(e)}")
         error_response = ErrorResponse(
@@ -3,9 +3,13 @@ Endpoints de salud de la aplicación
 """
 from datetime import datetime
 from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
 from loguru import logger
 from app.models.responses import HealthResponse
 from app.config.settings import settings
+from app.utils.loop_monitor import event_loop_monitor
+from app.utils.admission import admission_controller
+from app.services.upstream_probe import upstream_prober
 import time
 
 
@@ -66,26 +70,46 @@ async def readiness_check():
     """
     Endpoint de verificación de preparación.
     
-    Verifica que todos los servicios dependientes estén disponibles.
+    Verifica que todos los servicios dependientes estén disponibles y que el
+    worker no esté saturado (latencia del event loop y cola del pool SOAP).
+    El estado de los servicios SOAP proviene del último sondeo de fondo; este
+    endpoint nunca consulta a los upstreams directamente.
+    Retorna 503 si se supera algún umbral.
     """
     try:
-        # Aquí puedes agregar verificaciones adicionales:
-        # - Conexión a base de datos
-        # - Servicios externos
-        # - Etc.
-        
         logger.info("Readiness check requested")
         
-        return {
-            "status": "ready",
-            "timestamp": datetime.now(),
+        runtime = event_loop_monitor.snapshot()
+        runtime["admission"] = admission_controller.snapshot()
+        reasons = event_loop_monitor.saturation_reasons(runtime)
+        runtime_status = "saturated" if reasons else "ok"
+        
+        upstreams = upstream_prober.snapshot()
+        soap_status = upstream_prober.overall_status(upstreams)
+        if settings.readiness_require_upstreams and soap_status == "degraded":
+            down = [name for name, result in upstreams.items() if result["status"] == "down"]
+            reasons.append(f"upstreams caídos: {', '.join(down)}")
+        
+        content = {
+            "status": "not_ready" if reasons else "ready",
+            "timestamp": datetime.now().isoformat(),
             "checks": {
                 "database": "ok",  # Placeholder para futuras verificaciones
-                "soap_services": "ok",  # Placeholder para futuras verificaciones
-                "external_apis": "ok"  # Placeholder para futuras verificaciones
-            }
+                "soap_services": soap_status,
+                "external_apis": "ok",  # Placeholder para futuras verificaciones
+                "runtime": runtime_status
+            },
+            "runtime": runtime,
+            "upstreams": upstreams
         }
         
+        if reasons:
+            logger.warning(f"Readiness check: no listo ({'; '.join(reasons)})")
+            content["reasons"] = reasons
+            return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+        
+        return content
+        
     except Exception as e:
         logger.error(f"Error en readiness check: {str(e)}")
         raise
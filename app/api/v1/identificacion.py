@@ -17,12 +17,15 @@ from app.models.identificacion import (
     ErrorResponse
 )
 from app.services.soap_client import SoapClientService, soap_client
+from app.api.routing import GatewayRoute
+from app.utils.errors import RetryLaterError
 
 
 # Crear router
 router = APIRouter(
     prefix="/auth",
     tags=["Identificación SENCE"],
+    route_class=GatewayRoute,
     responses={
         502: {"model": ErrorResponse, "description": "Error del servicio SOAP"}
     }
@@ -79,6 +82,8 @@ async def iniciar_sesion(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en iniciar_sesion: {str(e)}")
         return JSONResponse(
@@ -132,6 +137,8 @@ async def iniciar_sesion_por_guid(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en iniciar_sesion_por_guid: {str(e)}")
         return JSONResponse(
@@ -185,6 +192,8 @@ async def iniciar_sesion_token(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en iniciar_sesion_token: {str(e)}")
         return JSONResponse(
@@ -238,6 +247,8 @@ async def obtener_listado_url_por_rut(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en obtener_listado_url_por_rut: {str(e)}")
         return JSONResponse(
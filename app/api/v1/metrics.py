@@ -0,0 +1,38 @@
+"""
+Endpoint de métricas en formato Prometheus
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import metrics
+from app.utils.rate_limit import rate_limiter
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Health"]
+)
+
+
+@router.get(
+    "",
+    response_class=PlainTextResponse,
+    summary="Métricas de la aplicación",
+    description="Expone contadores y gauges internos (circuit breakers, pools, etc.) en formato de texto de Prometheus"
+)
+async def get_metrics() -> PlainTextResponse:
+    """Métricas en formato de exposición de Prometheus"""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get(
+    "/rate-limits",
+    summary="Uso de rate limits por idSistema",
+    description="Uso del día, tokens disponibles y límites aplicables por idSistema y endpoint"
+)
+async def get_rate_limit_usage() -> dict:
+    """Contadores de uso del rate limiting por idSistema y endpoint"""
+    return {"usage": rate_limiter.usage()}
@@ -15,10 +15,13 @@ from app.models.notificacion import (
     EnvioExitosoResponse, RespuestaMailBe, ErrorResponse
 )
 from app.services.notificacion_soap_client import NotificacionSoapClientService, notificacion_soap_client
+from app.api.routing import GatewayRoute
+from app.utils.errors import RetryLaterError
 
 router = APIRouter(
     prefix="/notificacion",
     tags=["Notificación SENCE"],
+    route_class=GatewayRoute,
     responses={
         502: {
             "model": ErrorResponse,
@@ -73,6 +76,8 @@ async def enviar_sms(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en enviar_sms: {str(e)}")
         error_response = ErrorResponse(
@@ -126,6 +131,8 @@ async def enviar_correo_publico(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en enviar_correo_publico: {str(e)}")
         error_response = ErrorResponse(
@@ -179,6 +186,8 @@ async def enviar_lista_correo_publico(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en enviar_lista_correo_publico: {str(e)}")
         error_response = ErrorResponse(
@@ -235,6 +244,8 @@ async def enviar_correo_publico_rm(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en enviar_correo_publico_rm: {str(e)}")
         error_response = ErrorResponse(
@@ -12,10 +12,13 @@ from app.models.perfiles import (
     AsignarPerfilRequest, ErrorResponse, ETipoPersona, ERegion
 )
 from app.services.perfiles_soap_client import PerfilesSoapClientService, perfiles_soap_client
+from app.api.routing import GatewayRoute
+from app.utils.errors import RetryLaterError
 
 router = APIRouter(
     prefix="/perfiles",
     tags=["Perfiles SENCE"],
+    route_class=GatewayRoute,
     responses={
         502: {
             "model": ErrorResponse,
@@ -86,6 +89,8 @@ async def consulta_usuarios_por_perfil_sistema(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_usuarios_por_perfil_sistema: {str(e)}")
         error_response = ErrorResponse(
@@ -160,6 +165,8 @@ async def consulta_perfil_usuario_sistema_por_rut(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_perfil_usuario_sistema_por_rut: {str(e)}")
         error_response = ErrorResponse(
@@ -228,6 +235,8 @@ async def consulta_perfil_por_sistema(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_perfil_por_sistema: {str(e)}")
         error_response = ErrorResponse(
@@ -293,6 +302,8 @@ async def consulta_funciones_por_sistema(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_funciones_por_sistema: {str(e)}")
         error_response = ErrorResponse(
@@ -362,6 +373,8 @@ async def consulta_funciones_por_perfil_sistema(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_funciones_por_perfil_sistema: {str(e)}")
         error_response = ErrorResponse(
@@ -430,6 +443,8 @@ async def consulta_empresas_por_perfil_sistema(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consulta_empresas_por_perfil_sistema: {str(e)}")
         error_response = ErrorResponse(
@@ -486,6 +501,8 @@ async def solicitar_perfil_usuario(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en solicitar_perfil_usuario: {str(e)}")
         error_response = ErrorResponse(
@@ -542,6 +559,8 @@ async def bloquear_perfil_sistema_usuario_por_rut(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en bloquear_perfil_sistema_usuario_por_rut: {str(e)}")
         error_response = ErrorResponse(
@@ -598,6 +617,8 @@ async def asignar_perfil_sistema_usuario_por_rut(
             status_code=status.HTTP_502_BAD_GATEWAY,
             content=error_response.model_dump()
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en asignar_perfil_sistema_usuario_por_rut: {str(e)}")
         error_response = ErrorResponse(
@@ -1,11 +1,16 @@
 """
 Endpoints REST para el servicio de Registro de SENCE (WsRegistroCUS)
 """
-from typing import Union
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+import asyncio
+import inspect
+from typing import AsyncIterator, Dict, List, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse, StreamingResponse
 from loguru import logger
 
+from app.config.settings import settings
+
 from app.models.registro import (
     # Request models
     RegistroPersonaRequest,
@@ -18,18 +23,27 @@ from app.models.registro import (
     ActualizarTipoEntidadRequest,
     CambioCusEmpresaRequest,
     RegistroEmpresaOracleRequest,
+    ActualizacionMasivaEmpresasRequest,
+    EmpresaRut,
+    OperacionActualizacionEmpresa,
     # Response models
+    ResultadoActualizacionEmpresa,
     RespuestaProcesoBe,
     ErrorResponse,
     TipoEstado
 )
 from app.services.registro_soap_client import RegistroSoapClientService, registro_soap_client
+from app.api.routing import GatewayRoute
+from app.middleware.rate_limit import charge_rate_limit, normalize_id_sistema
+from app.utils.errors import RetryLaterError
+from app.utils.rate_limit import RateLimitExceededError
 
 
 # Crear router
 router = APIRouter(
     prefix="/registro",
     tags=["Registro SENCE"],
+    route_class=GatewayRoute,
     responses={
         502: {"model": ErrorResponse, "description": "Error del servicio SOAP"}
     }
@@ -86,6 +100,8 @@ async def registro_persona(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en registro_persona: {str(e)}")
         return JSONResponse(
@@ -142,6 +158,8 @@ async def registro_persona_crm(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en registro_persona_crm: {str(e)}")
         return JSONResponse(
@@ -198,6 +216,8 @@ async def registrar_persona_siac_oirs(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en registrar_persona_siac_oirs: {str(e)}")
         return JSONResponse(
@@ -254,6 +274,8 @@ async def registro_empresa(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en registro_empresa: {str(e)}")
         return JSONResponse(
@@ -280,6 +302,7 @@ async def registro_empresa(
 )
 async def actualizar_empresa(
     request: ActualizarEmpresaRequest,
+    force: bool = Query(False, description="Enviar la actualización aunque no tenga cambios respecto de la última exitosa"),
     soap_client: RegistroSoapClientService = Depends(get_registro_soap_client)
 ) -> Union[RespuestaProcesoBe, JSONResponse]:
     """
@@ -287,6 +310,7 @@ async def actualizar_empresa(
     
     - **idSistema**: ID del sistema que realiza la actualización
     - **datosEmpresa**: Datos actualizados de la empresa
+    - **force**: Enviar aunque el payload sea igual al último enviado con éxito
     
     Retorna el resultado del proceso de actualización.
     """
@@ -295,7 +319,8 @@ async def actualizar_empresa(
         
         response = await soap_client.actualizar_empresa(
             id_sistema=request.idSistema,
-            datos_empresa=request.datosEmpresa
+            datos_empresa=request.datosEmpresa,
+            force=force
         )
         
         if response.estadoProceso in [TipoEstado.ERROR, TipoEstado.EXCEPCION] and response.codigoProceso in [500, 502]:
@@ -310,6 +335,8 @@ async def actualizar_empresa(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en actualizar_empresa: {str(e)}")
         return JSONResponse(
@@ -336,6 +363,7 @@ async def actualizar_empresa(
 )
 async def actualizar_razon_social(
     request: ActualizarRazonSocialRequest,
+    force: bool = Query(False, description="Enviar la actualización aunque no tenga cambios respecto de la última exitosa"),
     soap_client: RegistroSoapClientService = Depends(get_registro_soap_client)
 ) -> Union[RespuestaProcesoBe, JSONResponse]:
     """
@@ -344,6 +372,7 @@ async def actualizar_razon_social(
     - **idSistema**: ID del sistema que realiza la actualización
     - **rutEmpresa**: RUT de la empresa
     - **dvEmpresa**: Dígito verificador de la empresa
+    - **force**: Enviar aunque el payload sea igual al último enviado con éxito
     
     Retorna el resultado del proceso de actualización.
     """
@@ -353,7 +382,8 @@ async def actualizar_razon_social(
         response = await soap_client.actualizar_razon_social(
             id_sistema=request.idSistema,
             rut_empresa=request.rutEmpresa,
-            dv_empresa=request.dvEmpresa
+            dv_empresa=request.dvEmpresa,
+            force=force
         )
         
         if response.estadoProceso in [TipoEstado.ERROR, TipoEstado.EXCEPCION] and response.codigoProceso in [500, 502]:
@@ -368,6 +398,8 @@ async def actualizar_razon_social(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en actualizar_razon_social: {str(e)}")
         return JSONResponse(
@@ -394,6 +426,7 @@ async def actualizar_razon_social(
 )
 async def actualizar_rep_legales(
     request: ActualizarRepLegalesRequest,
+    force: bool = Query(False, description="Enviar la actualización aunque no tenga cambios respecto de la última exitosa"),
     soap_client: RegistroSoapClientService = Depends(get_registro_soap_client)
 ) -> Union[RespuestaProcesoBe, JSONResponse]:
     """
@@ -402,6 +435,7 @@ async def actualizar_rep_legales(
     - **idSistema**: ID del sistema que realiza la actualización
     - **rutEmpresa**: RUT de la empresa
     - **dvEmpresa**: Dígito verificador de la empresa
+    - **force**: Enviar aunque el payload sea igual al último enviado con éxito
     
     Retorna el resultado del proceso de actualización.
     """
@@ -411,7 +445,8 @@ async def actualizar_rep_legales(
         response = await soap_client.actualizar_rep_legales(
             id_sistema=request.idSistema,
             rut_empresa=request.rutEmpresa,
-            dv_empresa=request.dvEmpresa
+            dv_empresa=request.dvEmpresa,
+            force=force
         )
         
         if response.estadoProceso in [TipoEstado.ERROR, TipoEstado.EXCEPCION] and response.codigoProceso in [500, 502]:
@@ -426,6 +461,8 @@ async def actualizar_rep_legales(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en actualizar_rep_legales: {str(e)}")
         return JSONResponse(
@@ -452,6 +489,7 @@ async def actualizar_rep_legales(
 )
 async def actualizar_tipo_entidad(
     request: ActualizarTipoEntidadRequest,
+    force: bool = Query(False, description="Enviar la actualización aunque no tenga cambios respecto de la última exitosa"),
     soap_client: RegistroSoapClientService = Depends(get_registro_soap_client)
 ) -> Union[RespuestaProcesoBe, JSONResponse]:
     """
@@ -461,6 +499,7 @@ async def actualizar_tipo_entidad(
     - **rutEmpresa**: RUT de la empresa
     - **dvEmpresa**: Dígito verificador de la empresa
     - **tipoEntidad**: Nuevo tipo de entidad (EMPRESA, OTEC, OTIC)
+    - **force**: Enviar aunque el payload sea igual al último enviado con éxito
     
     Retorna el resultado del proceso de actualización.
     """
@@ -471,7 +510,8 @@ async def actualizar_tipo_entidad(
             id_sistema=request.idSistema,
             rut_empresa=request.rutEmpresa,
             dv_empresa=request.dvEmpresa,
-            tipo_entidad=request.tipoEntidad
+            tipo_entidad=request.tipoEntidad,
+            force=force
         )
         
         if response.estadoProceso in [TipoEstado.ERROR, TipoEstado.EXCEPCION] and response.codigoProceso in [500, 502]:
@@ -486,6 +526,8 @@ async def actualizar_tipo_entidad(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en actualizar_tipo_entidad: {str(e)}")
         return JSONResponse(
@@ -542,6 +584,8 @@ async def registro_empresa_con_cus(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en registro_empresa_con_cus: {str(e)}")
         return JSONResponse(
@@ -604,6 +648,8 @@ async def cambio_cus_empresa(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en cambio_cus_empresa: {str(e)}")
         return JSONResponse(
@@ -660,6 +706,8 @@ async def registro_empresa_oracle(
         
         return response
         
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en registro_empresa_oracle: {str(e)}")
         return JSONResponse(
@@ -669,4 +717,161 @@ async def registro_empresa_oracle(
                 codigo_error="INTERNAL_ERROR",
                 detalle=str(e)
             ).model_dump()
-        ) 
\ No newline at end of file
+        ) 
+
+
+# Endpoint individual de cada operación de la actualización masiva
+_ENDPOINTS_INDIVIDUALES = {
+    OperacionActualizacionEmpresa.RAZON_SOCIAL: actualizar_razon_social,
+    OperacionActualizacionEmpresa.REP_LEGALES: actualizar_rep_legales,
+}
+
+
+def _endpoints_rate_limit(http_request: Request) -> Dict[OperacionActualizacionEmpresa, str]:
+    """Endpoint ("MÉTODO ruta") cuyo bucket de rate limit carga cada operación"""
+    endpoints = {}
+    for route in http_request.app.routes:
+        if isinstance(route, APIRoute):
+            # GatewayRoute envuelve el endpoint con functools.wraps
+            funcion = inspect.unwrap(route.endpoint)
+            for operacion, endpoint in _ENDPOINTS_INDIVIDUALES.items():
+                if funcion is endpoint:
+                    endpoints[operacion] = f"{next(iter(route.methods))} {route.path}"
+    return endpoints
+
+
+async def _actualizar_empresa(
+    soap_client: RegistroSoapClientService,
+    request: ActualizacionMasivaEmpresasRequest,
+    empresa: EmpresaRut,
+    endpoints: Dict[OperacionActualizacionEmpresa, str],
+    rechazos: List[RateLimitExceededError]
+) -> ResultadoActualizacionEmpresa:
+    """
+    Ejecuta las operaciones pedidas para una empresa de la actualización masiva
+
+    Cada operación se carga al bucket de rate limit de su endpoint individual,
+    como si se hubiera llamado por separado. Tras el primer rechazo por rate
+    limit (en rechazos) las operaciones restantes se informan rechazadas sin
+    enviarse.
+    """
+    resultado = ResultadoActualizacionEmpresa(rutEmpresa=empresa.rutEmpresa, dvEmpresa=empresa.dvEmpresa)
+    id_sistema = normalize_id_sistema(request.idSistema)
+    for operacion in request.operaciones:
+        if rechazos:
+            resultado.error = rechazos[0].code
+            resultado.retryAfter = round(rechazos[0].retry_after, 3)
+            break
+        if operacion == OperacionActualizacionEmpresa.RAZON_SOCIAL:
+            metodo = soap_client.actualizar_razon_social
+        else:
+            metodo = soap_client.actualizar_rep_legales
+        try:
+            if id_sistema is not None and operacion in endpoints:
+                await charge_rate_limit(id_sistema, endpoints[operacion])
+            resultado.resultados[operacion.value] = await metodo(
+                id_sistema=request.idSistema,
+                rut_empresa=empresa.rutEmpresa,
+                dv_empresa=empresa.dvEmpresa,
+                force=request.force
+            )
+        except RateLimitExceededError as e:
+            rechazos.append(e)
+            resultado.error = e.code
+            resultado.retryAfter = round(e.retry_after, 3)
+            break
+        except RetryLaterError as e:
+            # Rechazo del gateway (circuito abierto, saturación, deadline): se informa y se sigue con la próxima empresa
+            resultado.error = e.code
+            break
+        except Exception as e:
+            logger.error(f"Error inesperado en actualización masiva para RUT {empresa.rutEmpresa}: {str(e)}")
+            resultado.resultados[operacion.value] = RespuestaProcesoBe(
+                estadoProceso=TipoEstado.EXCEPCION,
+                codigoProceso=500,
+                respuestaProceso=f"Error interno: {str(e)}"
+            )
+    return resultado
+
+
+async def _stream_actualizacion_masiva(
+    soap_client: RegistroSoapClientService,
+    request: ActualizacionMasivaEmpresasRequest,
+    endpoints: Dict[OperacionActualizacionEmpresa, str]
+) -> AsyncIterator[str]:
+    """
+    Procesa las empresas con concurrencia acotada y emite una línea NDJSON por
+    empresa a medida que terminan (el orden puede diferir del recibido).
+    """
+    resultados: asyncio.Queue = asyncio.Queue()
+    pendientes = iter(request.empresas)
+    rechazos: List[RateLimitExceededError] = []
+    
+    async def worker() -> None:
+        for empresa in pendientes:
+            await resultados.put(await _actualizar_empresa(soap_client, request, empresa, endpoints, rechazos))
+    
+    concurrencia = max(1, min(settings.registro_bulk_concurrency, len(request.empresas)))
+    workers = [asyncio.create_task(worker()) for _ in range(concurrencia)]
+    try:
+        for _ in range(len(request.empresas)):
+            resultado = await resultados.get()
+            yield resultado.model_dump_json() + "\n"
+    finally:
+        # Si el cliente se desconecta, no se siguen enviando actualizaciones
+        for task in workers:
+            task.cancel()
+
+
+@router.post(
+    "/empresa/masivo",
+    response_model=None,
+    status_code=status.HTTP_200_OK,
+    summary="Actualización masiva de empresas",
+    description="Actualiza razón social y/o representantes legales de una lista de empresas, emitiendo un resultado NDJSON por empresa",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Una línea JSON (ResultadoActualizacionEmpresa) por empresa, en orden de término"
+        },
+        422: {"model": ErrorResponse, "description": "Datos de entrada inválidos o demasiadas empresas"}
+    }
+)
+async def actualizacion_masiva_empresas(
+    request: ActualizacionMasivaEmpresasRequest,
+    http_request: Request,
+    soap_client: RegistroSoapClientService = Depends(get_registro_soap_client)
+) -> Union[StreamingResponse, JSONResponse]:
+    """
+    Actualiza razón social y/o representantes legales de muchas empresas en un solo request.
+    
+    - **idSistema**: ID del sistema que realiza la actualización
+    - **empresas**: Lista de rutEmpresa/dvEmpresa
+    - **operaciones**: razon_social y/o rep_legales (por defecto ambas)
+    - **force**: Enviar aunque la actualización no tenga cambios
+    
+    Las empresas se procesan con concurrencia acotada (REGISTRO_BULK_CONCURRENCY)
+    y cada resultado se emite apenas termina, como una línea NDJSON. Cada
+    operación consume el rate limit de su endpoint individual; desde el primer
+    rechazo las empresas restantes se emiten con error RATE_LIMITED o
+    QUOTA_EXCEEDED y retryAfter, sin enviarse.
+    """
+    if len(request.empresas) > settings.registro_bulk_max_items:
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content=ErrorResponse(
+                mensaje=f"Se permiten hasta {settings.registro_bulk_max_items} empresas por request",
+                codigo_error="TOO_MANY_ITEMS",
+                detalle=f"Se recibieron {len(request.empresas)} empresas"
+            ).model_dump()
+        )
+    
+    logger.info(
+        f"Actualización masiva de {len(request.empresas)} empresas "
+        f"({', '.join(op.value for op in request.operaciones)})"
+    )
+    return StreamingResponse(
+        _stream_actualizacion_masiva(soap_client, request, _endpoints_rate_limit(http_request)),
+        media_type="application/x-ndjson"
+    )
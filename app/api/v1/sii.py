@@ -9,10 +9,13 @@ from loguru import logger
 
 from app.models.sii import *
 from app.services.sii_soap_client import SiiSoapClientService, sii_soap_client
+from app.api.routing import GatewayRoute
+from app.utils.errors import RetryLaterError
 
 router = APIRouter(
     prefix="/sii",
     tags=["SII - Servicio de Impuestos Internos"],
+    route_class=GatewayRoute,
     responses={
         502: {
             "model": ErrorResponse,
@@ -49,6 +52,8 @@ async def consultar_representante_legal(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_representante_legal: {str(e)}")
         raise HTTPException(
@@ -79,6 +84,8 @@ async def consultar_relacion_contribuyente_empresa(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_relacion_contribuyente_empresa: {str(e)}")
         raise HTTPException(
@@ -109,6 +116,8 @@ async def consultar_movimiento_contribuyente(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_movimiento_contribuyente: {str(e)}")
         raise HTTPException(
@@ -139,6 +148,8 @@ async def consultar_numero_empleados(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_numero_empleados: {str(e)}")
         raise HTTPException(
@@ -169,6 +180,8 @@ async def consultar_categoria_empresa(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_categoria_empresa: {str(e)}")
         raise HTTPException(
@@ -199,6 +212,8 @@ async def consultar_datos_contribuyente(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_datos_contribuyente: {str(e)}")
         raise HTTPException(
@@ -229,6 +244,8 @@ async def consultar_actividad_economica(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_actividad_economica: {str(e)}")
         raise HTTPException(
@@ -259,6 +276,8 @@ async def consultar_estado_giro(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_estado_giro: {str(e)}")
         raise HTTPException(
@@ -289,6 +308,8 @@ async def consultar_fecha_inicio_actividad(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(fault)
         )
+    except RetryLaterError:
+        raise
     except Exception as e:
         logger.error(f"Error inesperado en consultar_fecha_inicio_actividad: {str(e)}")
         raise HTTPException(
@@ -2,39 +2,102 @@
 Configuración de logging estructurado con loguru
 """
 import sys
-import os
+import random
+import logging as std_logging
+from contextvars import ContextVar
 from pathlib import Path
 from loguru import logger
 from .settings import settings
 
 
-def setup_logging():
-    """Configurar el sistema de logging"""
-    
+# Indica si los logs emitidos durante el request actual deben escribirse.
+# El middleware de requests lo ajusta según la tasa de muestreo de la ruta.
+_request_sampled: ContextVar[bool] = ContextVar("request_sampled", default=True)
+
+# Evita configurar los handlers más de una vez por proceso
+_configured = False
+
+
+def _sampling_filter(record) -> bool:
+    """Descartar logs de requests no muestreados (WARNING o superior siempre pasa)"""
+    return record["level"].no >= std_logging.WARNING or _request_sampled.get()
+
+
+def get_sample_rate(path: str) -> float:
+    """Obtener la tasa de muestreo configurada para una ruta (prefijo más largo)"""
+    rate = 1.0
+    matched = -1
+    for prefix, prefix_rate in settings.log_sample_rates.items():
+        if path.startswith(prefix) and len(prefix) > matched:
+            rate = prefix_rate
+            matched = len(prefix)
+    return rate
+
+
+def sample_request(path: str) -> bool:
+    """
+    Decidir si los logs del request actual se escriben y marcarlo en el contexto.
+
+    Retorna True si el request quedó muestreado.
+    """
+    rate = get_sample_rate(path)
+    sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+    _request_sampled.set(sampled)
+    return sampled
+
+
+def setup_logging(force: bool = False):
+    """
+    Configurar el sistema de logging.
+
+    Es idempotente: llamadas posteriores retornan el logger ya configurado
+    salvo que se indique force=True.
+
+    En modo asíncrono (log_enqueue) los mensajes pasan por una cola y la
+    escritura, rotación y compresión de archivos ocurren en un hilo aparte,
+    fuera del camino del request.
+    """
+    global _configured
+    if _configured and not force:
+        return logger
+
     # Remover el handler por defecto de loguru
     logger.remove()
-    
+
     # Configurar handler para stdout (siempre activo)
-    logger.add(
-        sys.stdout,
-        format=settings.log_format,
-        level=settings.log_level,
-        colorize=True,
-        backtrace=True,
-        diagnose=True,
-    )
-    
+    if settings.log_json:
+        logger.add(
+            sys.stdout,
+            level=settings.log_level,
+            serialize=True,
+            enqueue=settings.log_enqueue,
+            backtrace=settings.log_diagnose,
+            diagnose=settings.log_diagnose,
+            filter=_sampling_filter,
+        )
+    else:
+        logger.add(
+            sys.stdout,
+            format=settings.log_format,
+            level=settings.log_level,
+            colorize=True,
+            enqueue=settings.log_enqueue,
+            backtrace=settings.log_diagnose,
+            diagnose=settings.log_diagnose,
+            filter=_sampling_filter,
+        )
+
     # Configurar handler para archivos (opcional, solo si el directorio existe y hay permisos)
     try:
         # Crear directorio de logs si no existe
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
-        
+
         # Verificar permisos de escritura
         test_file = log_dir / ".test_write"
         test_file.touch()
         test_file.unlink()
-        
+
         # Si llegamos aquí, tenemos permisos, configurar logs en archivo
         logger.add(
             "logs/app.log",
@@ -43,10 +106,13 @@ def setup_logging():
             rotation="10 MB",
             retention="7 days",
             compression="zip",
-            backtrace=True,
-            diagnose=True,
+            serialize=settings.log_json,
+            enqueue=settings.log_enqueue,
+            backtrace=settings.log_diagnose,
+            diagnose=settings.log_diagnose,
+            filter=_sampling_filter,
         )
-        
+
         logger.add(
             "logs/access.log",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}",
@@ -54,17 +120,25 @@ def setup_logging():
             rotation="10 MB",
             retention="7 days",
             compression="zip",
-            filter=lambda record: "access" in record["name"].lower(),
+            serialize=settings.log_json,
+            enqueue=settings.log_enqueue,
+            filter=lambda record: record["extra"].get("access", False) and _sampling_filter(record),
         )
-        
+
         logger.info("Logs en archivo habilitados en directorio 'logs/'")
-        
+
     except (PermissionError, OSError) as e:
         # Si no hay permisos o el directorio no se puede crear, solo usar stdout
         logger.warning(f"No se pueden crear logs en archivo: {e}. Usando solo stdout.")
-    
+
+    _configured = True
     return logger
 
 
-# Instancia global del logger
-app_logger = setup_logging() 
\ No newline at end of file
+async def shutdown_logging():
+    """Vaciar las colas de los sinks asíncronos antes de cerrar la aplicación"""
+    await logger.complete()
+
+
+# Logger para el access log (los registros llevan extra["access"]=True)
+access_logger = logger.bind(access=True)
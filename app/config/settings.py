@@ -26,6 +26,13 @@ class Settings(BaseSettings):
         default="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         description="Formato de logging"
     )
+    log_json: bool = Field(default=False, description="Emitir logs en formato JSON (una línea por registro)")
+    log_enqueue: bool = Field(default=True, description="Escribir logs de forma asíncrona mediante una cola")
+    log_diagnose: bool = Field(default=False, description="Incluir backtrace extendido y variables en los errores")
+    log_sample_rates: dict[str, float] = Field(
+        default={"/api/v1/health": 0.01},
+        description="Tasa de muestreo de logs por prefijo de ruta (0.0 a 1.0)"
+    )
     
     # Configuración de CORS
     allow_origins: list[str] = Field(default=["*"], description="Orígenes permitidos para CORS")
@@ -38,12 +45,148 @@ class Settings(BaseSettings):
     # Configuración para servicios SOAP
     soap_timeout: int = Field(default=30, description="Timeout para llamadas SOAP en segundos")
     soap_retry_attempts: int = Field(default=3, description="Número de intentos de reintento para SOAP")
+    soap_retry_backoff_base: float = Field(default=0.1, description="Backoff base (s) entre reintentos SOAP")
+    soap_retry_backoff_max: float = Field(default=2.0, description="Backoff máximo (s) entre reintentos SOAP")
+    soap_retry_budget_ratio: float = Field(default=0.2, description="Reintentos permitidos por llamada original (presupuesto)")
+    soap_retry_budget_max_tokens: float = Field(default=10.0, description="Reintentos acumulables como máximo en el presupuesto")
+    soap_max_workers: int = Field(default=32, description="Hilos del pool dedicado a llamadas SOAP")
+    
+    # Configuración del límite adaptativo de concurrencia (AIMD por servicio SOAP)
+    soap_adaptive_concurrency_enabled: bool = Field(default=True, description="Ajustar el límite de llamadas concurrentes por servicio según la latencia")
+    soap_concurrency_initial_limit: int = Field(default=10, description="Límite inicial de llamadas concurrentes por servicio")
+    soap_concurrency_min_limit: int = Field(default=1, description="Límite mínimo de llamadas concurrentes por servicio")
+    soap_concurrency_max_limit: int = Field(default=32, description="Límite máximo de llamadas concurrentes por servicio")
+    soap_concurrency_backoff_ratio: float = Field(default=0.9, description="Factor de reducción del límite ante lentitud o errores")
+    soap_concurrency_latency_threshold: float = Field(default=5.0, description="Latencia (s) a partir de la cual una respuesta reduce el límite")
+    soap_concurrency_queue_timeout: float = Field(default=0.5, description="Espera máxima en cola por un cupo antes de rechazar con 503")
+    soap_concurrency_max_queue: int = Field(default=50, description="Llamadas en cola máximas por servicio antes de rechazar de inmediato")
+    
+    # Configuración de requests hedged (lecturas idempotentes)
+    soap_hedging_enabled: bool = Field(default=False, description="Enviar una segunda llamada idéntica cuando la primera supera el p95 observado")
+    soap_hedge_services: list[str] = Field(default=["consulta_rc", "sii"], description="Servicios cuyas lecturas idempotentes pueden enviarse hedged")
+    soap_hedge_percentile: float = Field(default=95.0, description="Percentil de latencia observada tras el cual se envía la segunda llamada")
+    soap_hedge_min_samples: int = Field(default=20, description="Latencias observadas mínimas antes de empezar a enviar hedges")
+    soap_hedge_min_delay: float = Field(default=0.05, description="Espera mínima en segundos antes de enviar la segunda llamada")
+    soap_hedge_budget_ratio: float = Field(default=0.05, description="Hedges permitidos por llamada original (0.05 = 5% de carga extra)")
+    soap_hedge_budget_max_tokens: float = Field(default=5.0, description="Hedges acumulables como máximo en el presupuesto")
+    
+    # Configuración de deadlines por request (headers X-Request-Timeout / X-Request-Deadline)
+    request_timeout_default: Optional[float] = Field(default=None, description="Tiempo máximo por request en segundos cuando el cliente no envía deadline")
+    request_timeout_max: float = Field(default=120.0, description="Tope para el tiempo disponible que puede pedir un cliente en segundos")
+    
+    # Configuración de circuit breakers (por servicio y operación SOAP)
+    circuit_breaker_enabled: bool = Field(default=True, description="Habilitar circuit breakers en llamadas SOAP")
+    circuit_failure_rate_threshold: float = Field(default=0.5, description="Tasa de errores que abre el circuito")
+    circuit_slow_call_threshold: float = Field(default=10.0, description="Duración (s) a partir de la cual una llamada se considera lenta")
+    circuit_slow_call_rate_threshold: float = Field(default=0.8, description="Tasa de llamadas lentas que abre el circuito")
+    circuit_minimum_calls: int = Field(default=10, description="Llamadas mínimas en la ventana antes de evaluar umbrales")
+    circuit_window_seconds: float = Field(default=60.0, description="Ventana deslizante de evaluación en segundos")
+    circuit_open_seconds: float = Field(default=30.0, description="Tiempo que el circuito permanece abierto antes de probar")
+    circuit_half_open_max_calls: int = Field(default=1, description="Llamadas de prueba permitidas en estado half-open")
+    
+    # Configuración del control de admisión (/api/v1)
+    admission_control_enabled: bool = Field(default=True, description="Rechazar requests con 503 cuando el worker está sobrecargado")
+    admission_max_in_flight: int = Field(default=200, description="Requests interactive + bulk en curso máximos por worker")
+    admission_bulk_ratio: float = Field(default=0.5, description="Fracción de la capacidad que puede usar el tráfico bulk")
+    admission_queue_timeout: float = Field(default=1.0, description="Espera máxima en cola de admisión en segundos")
+    admission_max_queue: int = Field(default=100, description="Requests en cola de admisión máximos antes de rechazar de inmediato")
+    admission_max_queue_wait: float = Field(default=0.25, description="Espera promedio en cola (s) sobre la que se rechaza el tráfico bulk sin encolar")
+    admission_max_loop_lag_ms: float = Field(default=200.0, description="Latencia del event loop (ms) sobre la que se rechaza bulk; el doble rechaza interactive")
+    admission_critical_paths: list[str] = Field(default=["/api/v1/health", "/api/v1/metrics"], description="Prefijos de ruta siempre admitidos")
+    admission_bulk_paths: list[str] = Field(default=["/api/v1/registro/empresa/masivo"], description="Prefijos de ruta tratados como tráfico bulk")
+    
+    # Configuración de rate limiting y cuotas por idSistema y endpoint
+    rate_limit_enabled: bool = Field(default=True, description="Aplicar token bucket y cuota diaria por idSistema y endpoint")
+    rate_limit_rate: float = Field(default=20.0, description="Requests por segundo sostenidos por idSistema y endpoint (0 = sin límite)")
+    rate_limit_burst: float = Field(default=40.0, description="Ráfaga máxima de requests por idSistema y endpoint")
+    rate_limit_daily_quota: int = Field(default=0, description="Requests diarios por idSistema y endpoint (0 = sin cuota)")
+    rate_limit_overrides: dict[str, dict[str, float]] = Field(default={}, description="Límites por idSistema, ej: {\"12\": {\"rate\": 5, \"burst\": 10, \"daily_quota\": 1000}}")
+    rate_limit_known_systems: list[str] = Field(default=[], description="idSistema con etiqueta propia en las métricas (además de los de rate_limit_overrides); el resto se agrupa como other")
+    rate_limit_max_buckets: int = Field(default=10000, description="Buckets máximos del backend en memoria (se descartan los de uso más antiguo)")
+    rate_limit_idle_ttl: float = Field(default=3600.0, description="Segundos sin requests tras los cuales un bucket recargado y sin cuota usada se descarta")
+    rate_limit_backend: str = Field(default="memory", description="Backend del estado: memory (por worker) o sqlite (compartido entre workers del host)")
+    rate_limit_sqlite_path: str = Field(default="data/rate_limits.sqlite", description="Archivo SQLite del backend compartido")
+    
+    # Configuración de Idempotency-Key en escrituras de registro
+    idempotency_enabled: bool = Field(default=True, description="Repetir la respuesta guardada a requests con la misma Idempotency-Key")
+    idempotency_paths: list[str] = Field(
+        default=["/api/v1/registro/persona", "/api/v1/registro/empresa", "/api/v1/registro/empresa/con-cus"],
+        description="Rutas POST que aceptan Idempotency-Key"
+    )
+    idempotency_ttl: float = Field(default=86400.0, description="Tiempo en segundos que se guarda la respuesta de cada clave")
+    idempotency_max_entries: int = Field(default=10000, description="Claves guardadas como máximo por worker")
+    idempotency_wait_timeout: float = Field(default=60.0, description="Espera máxima de un duplicado a que termine el request en curso")
+    
+    # Configuración de omisión de actualizaciones de Registro sin cambios
+    registro_skip_unchanged_enabled: bool = Field(default=True, description="Omitir actualizaciones de empresa iguales a la última enviada con éxito")
+    registro_unchanged_ttl: float = Field(default=604800.0, description="Tiempo en segundos que una actualización exitosa se considera vigente (mayor que el intervalo de sincronización)")
+    registro_skip_sii_refresh_enabled: bool = Field(default=False, description="Omitir también ActualizarRazonSocial/ActualizarRepLegales repetidas (solo envían el RUT: limita la frecuencia por RUT aunque SII haya cambiado)")
+    registro_sii_refresh_ttl: float = Field(default=43200.0, description="Intervalo mínimo en segundos entre actualizaciones desde SII de un mismo RUT, con registro_skip_sii_refresh_enabled")
+    registro_unchanged_max_entries: int = Field(default=100000, description="Actualizaciones recordadas como máximo por worker")
+    
+    # Configuración de la actualización masiva de empresas de Registro
+    registro_bulk_concurrency: int = Field(default=8, description="Empresas procesadas en paralelo por request de actualización masiva")
+    registro_bulk_max_items: int = Field(default=5000, description="Empresas máximas por request de actualización masiva")
+    
+    # Configuración de compresión de respuestas (Accept-Encoding)
+    compression_enabled: bool = Field(default=True, description="Comprimir las respuestas con gzip o brotli según Accept-Encoding")
+    compression_minimum_size: int = Field(default=1024, description="Tamaño mínimo en bytes de la respuesta para comprimirla")
+    compression_gzip_level: int = Field(default=5, description="Nivel de compresión gzip (1 = más rápido, 9 = más compacto)")
+    compression_brotli_enabled: bool = Field(default=True, description="Preferir brotli cuando el cliente lo acepta y el paquete brotli está instalado")
+    compression_brotli_quality: int = Field(default=4, description="Calidad de compresión brotli (0 a 11)")
+    
+    # Configuración de decodificación directa de respuestas y plantillas de sobres SOAP
+    soap_fast_decode_enabled: bool = Field(default=True, description="Decodificar ConsultaRun, ConsultaDatosContribuyente y consultas de Perfiles directo del XML al modelo (con fallback a zeep)")
+    soap_envelope_templates_enabled: bool = Field(default=True, description="Armar el sobre de ConsultaRun, IniciarSesionToken y ConsultaEstadoGiro con plantillas precompiladas en lugar del serializador de zeep")
+    
+    # Configuración del pool de procesos para respuestas SOAP grandes
+    soap_process_pool_enabled: bool = Field(default=False, description="Parsear y decodificar en procesos aparte las respuestas con decodificación directa que superan el umbral")
+    soap_process_pool_threshold_bytes: int = Field(default=1_000_000, description="Tamaño mínimo en bytes de la respuesta para enviarla al pool de procesos")
+    soap_process_pool_workers: int = Field(default=2, description="Procesos del pool de parseo de XML grandes")
+    
+    # Configuración de grabación y replay de tráfico SOAP
+    soap_record_enabled: bool = Field(default=False, description="Grabar request y respuesta de cada operación SOAP para replay")
+    soap_record_dir: str = Field(default="data/soap_recordings", description="Directorio de los archivos de grabaciones (.jsonl.gz por servicio y día)")
+    soap_record_sample_rate: float = Field(default=1.0, description="Fracción de llamadas SOAP que se graban (0 a 1)")
+    soap_record_batch_size: int = Field(default=50, description="Grabaciones acumuladas en memoria antes de escribirlas al archivo")
+    soap_record_scrub_fields: list[str] = Field(
+        default=[
+            "rut.*", "run.*", "dv.*", "nombre(?!sistema|perfil|funcion|categoria|archivo).*",
+            "apellido.*", "a(p(ellido)?)?(paterno|materno).*", "razonsocial.*", "fecha(nac|def).*",
+            "lugarnacimiento", "(id)?sexo", ".*mail.*", ".*telefono.*", ".*celular.*", ".*direccion.*",
+            "domicilio.*", "clave", "password.*", "credencial", "token", "guid",
+        ],
+        description="Patrones (regex, sin distinguir mayúsculas) de elementos cuyo texto se seudonimiza al grabar"
+    )
+    soap_record_scrub_salt: str = Field(default="", description="Clave de los seudónimos; vacía = aleatoria por proceso")
+    soap_replay_dir: Optional[str] = Field(default=None, description="Directorio de grabaciones a servir en lugar de los servicios SOAP reales")
+    soap_replay_speed: float = Field(default=1.0, description="Factor de velocidad del replay (2 = la mitad de la latencia grabada, 0 = sin espera)")
+    
+    # Configuración de inyección de fallas y latencia (caos) en llamadas SOAP
+    chaos_enabled: bool = Field(default=False, description="Inyectar fallas y latencia en las llamadas SOAP y exponer /api/v1/admin/chaos")
+    chaos_rules: list[dict] = Field(default=[], description="Reglas iniciales, ej: [{\"service\": \"sii\", \"kind\": \"fault\", \"percentage\": 10}]")
+    chaos_seed: Optional[int] = Field(default=None, description="Semilla para que las inyecciones sean reproducibles")
+    
+    # Configuración de monitoreo y readiness
+    monitor_interval: float = Field(default=0.5, description="Intervalo de muestreo del monitor de event loop en segundos")
+    readiness_max_loop_lag_ms: float = Field(default=500.0, description="Latencia máxima del event loop (ms) antes de reportar no listo")
+    readiness_max_executor_queue: int = Field(default=64, description="Llamadas SOAP en cola máximas antes de reportar no listo")
+    upstream_probe_enabled: bool = Field(default=True, description="Sondear periódicamente los WSDL upstream")
+    upstream_probe_interval: float = Field(default=30.0, description="Intervalo entre sondeos de upstreams en segundos")
+    upstream_probe_timeout: float = Field(default=5.0, description="Timeout de cada sondeo de upstream en segundos")
+    readiness_require_upstreams: bool = Field(default=False, description="Reportar no listo si algún upstream está caído")
     
     # Configuración específica para SENCE
     sence_wsdl_url: str = Field(
         default="https://wsdesa.sence.cl/WsComponentes/WsIdentificacion.asmx?wsdl",
         description="URL del WSDL de SENCE"
     )
+    registro_wsdl_url: str = Field(default="http://srv-ws-ora:8090/WsRegistroCUS/Autenticacion.asmx?wsdl", description="URL del WSDL de Registro (WsRegistroCUS)")
+    consulta_rc_wsdl_url: str = Field(default="https://wsdesa.sence.cl/WsMiddleware/WsConsulta_SRCeI.asmx?wsdl", description="URL del WSDL de Consulta Registro Civil (WsConsulta_SRCeI)")
+    perfiles_wsdl_url: str = Field(default="https://wsdesa.sence.cl/WSComponentes/WsPerfiles.asmx?wsdl", description="URL del WSDL de Perfiles (WsPerfiles)")
+    notificacion_wsdl_url: str = Field(default="https://wsdesa.sence.cl/wscomponentes/wsnotificacion.asmx?wsdl", description="URL del WSDL de Notificación (WsNotificacion)")
+    sii_wsdl_url: str = Field(default="https://wsdesa.sence.cl/WsMiddleware/WsConsulta_SII.asmx?wsdl", description="URL del WSDL de SII (WsConsulta_SII)")
+    firma_wsdl_url: str = Field(default="https://wsdesa.sence.cl/wsfirmadocs/wsfirmadocs.asmx?wsdl", description="URL del WSDL de Firma (WsFirmaDocs)")
     use_soap_mocks: bool = Field(default=True, description="Usar mocks en lugar del servicio SOAP real")
     
     class Config:
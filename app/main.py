@@ -3,14 +3,26 @@ Aplicación principal FastAPI
 """
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from loguru import logger
 
 from app.config.settings import settings
-from app.config.logging import setup_logging
-from app.middleware.error_handler import ErrorHandlerMiddleware
+from app.config.logging import setup_logging, shutdown_logging, sample_request, access_logger
+from app.middleware.error_handler import ErrorHandlerMiddleware, retry_later_handler
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.rate_limit import enforce_rate_limit
+from app.middleware.field_selection import select_fields
+from app.utils.errors import RetryLaterError
+from app.utils.fast_json import FastJSONResponse
+from app.utils.loop_monitor import event_loop_monitor
+from app.services.upstream_probe import upstream_prober
+from app.services.soap_recording import soap_recorder
+from app.services.soap_process_pool import soap_process_pool
 from app.api.v1 import health
 
 
@@ -30,11 +42,22 @@ async def lifespan(app: FastAPI):
     logger.info(f"Iniciando {settings.app_name} v{settings.app_version}")
     logger.info(f"Modo debug: {settings.debug}")
     logger.info(f"Servidor configurado en {settings.host}:{settings.port}")
+    if settings.chaos_enabled:
+        logger.warning("Inyección de fallas y latencia activa en /api/v1/admin/chaos")
+        if settings.use_soap_mocks:
+            logger.warning("Con USE_SOAP_MOCKS=true las respuestas mock no pasan por el pool SOAP: el caos no tiene efecto")
+    event_loop_monitor.start()
+    upstream_prober.start()
     
     yield
     
     # Shutdown
     logger.info(f"Cerrando {settings.app_name}")
+    await upstream_prober.stop()
+    await event_loop_monitor.stop()
+    soap_recorder.flush()
+    soap_process_pool.shutdown()
+    await shutdown_logging()
 
 
 # Crear la aplicación FastAPI
@@ -66,6 +89,7 @@ app = FastAPI(
         "url": "https://opensource.org/licenses/MIT",
     },
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json"
@@ -83,56 +107,84 @@ app.add_middleware(
 # Agregar middleware de manejo de errores
 app.add_middleware(ErrorHandlerMiddleware)
 
+# Repetir respuestas de escrituras de registro con la misma Idempotency-Key
+app.add_middleware(IdempotencyMiddleware)
+
+# Control de admisión con prioridades para /api/v1 (503 + Retry-After bajo sobrecarga)
+app.add_middleware(AdmissionControlMiddleware)
+
+# Propagar el deadline del request (X-Request-Timeout / X-Request-Deadline)
+app.add_middleware(DeadlineMiddleware)
+
+# Compresión gzip/brotli según Accept-Encoding (por fuera de Idempotency-Key, que guarda el cuerpo sin comprimir)
+app.add_middleware(CompressionMiddleware)
+
+# Rechazos rápidos (circuito abierto, sobrecarga) con Retry-After
+app.add_exception_handler(RetryLaterError, retry_later_handler)
+
 # Incluir routers
 app.include_router(health.router, prefix="/api/v1")
 
+# Dependencias de los routers de servicios SOAP: rate limiting y cuotas por idSistema
+# (429 + Retry-After) y selección de campos de la respuesta (?fields= / ?exclude=)
+soap_dependencies = [Depends(enforce_rate_limit), Depends(select_fields)]
+
 # Importar y agregar router de identificación
 from app.api.v1 import identificacion
-app.include_router(identificacion.router, prefix="/api/v1")
+app.include_router(identificacion.router, prefix="/api/v1", dependencies=soap_dependencies)
 
 # Importar y agregar router de registro
 from app.api.v1 import registro
-app.include_router(registro.router, prefix="/api/v1")
+app.include_router(registro.router, prefix="/api/v1", dependencies=soap_dependencies)
 
 # Importar y agregar router de consulta registro civil
 from app.api.v1 import consulta_rc
-app.include_router(consulta_rc.router, prefix="/api/v1")
+app.include_router(consulta_rc.router, prefix="/api/v1", dependencies=soap_dependencies)
 
 # Importar y agregar router de perfiles
 from app.api.v1 import perfiles
-app.include_router(perfiles.router, prefix="/api/v1")
+app.include_router(perfiles.router, prefix="/api/v1", dependencies=soap_dependencies)
 
 # Importar y agregar router de notificación
 from app.api.v1 import notificacion
-app.include_router(notificacion.router, prefix="/api/v1")
+app.include_router(notificacion.router, prefix="/api/v1", dependencies=soap_dependencies)
 
 # Importar y agregar router de SII
 from app.api.v1 import sii
-app.include_router(sii.router, prefix="/api/v1")
+app.include_router(sii.router, prefix="/api/v1", dependencies=soap_dependencies)
 
 # Importar y agregar router de Firma
 from app.api.v1 import firma
-app.include_router(firma.router, prefix="/api/v1")
+app.include_router(firma.router, prefix="/api/v1", dependencies=soap_dependencies)
+
+# Importar y agregar router de métricas
+from app.api.v1 import metrics
+app.include_router(metrics.router, prefix="/api/v1")
+
+# Importar y agregar router de administración de caos (solo para pruebas de resiliencia)
+if settings.chaos_enabled:
+    from app.api.v1 import chaos
+    app.include_router(chaos.router, prefix="/api/v1")
 
 
 # Middleware para logging de requests
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Middleware para logging de requests"""
-    start_time = time.time()
+    """Middleware para logging de requests (una línea de acceso por request, con muestreo por ruta)"""
+    start_time = time.perf_counter()
+    path = request.url.path
     
-    # Log del request
-    logger.info(f"Request: {request.method} {request.url.path}")
+    # Decidir si los logs de este request se escriben según la ruta
+    sample_request(path)
     
     # Procesar el request
     response = await call_next(request)
     
     # Log del response
-    process_time = time.time() - start_time
-    logger.info(
-        f"Response: {request.method} {request.url.path} "
-        f"Status: {response.status_code} "
-        f"Time: {process_time:.4f}s"
+    process_time = time.perf_counter() - start_time
+    access_logger.info(
+        "Response: {} {} Status: {} Time: {:.4f}s",
+        request.method, path, response.status_code, process_time
     )
     
     return response
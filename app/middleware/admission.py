@@ -0,0 +1,47 @@
+"""
+Middleware de control de admisión para /api/v1
+"""
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.middleware.error_handler import retry_later_handler
+from app.utils.admission import AdmissionRejectedError, admission_controller, classify
+
+
+PRIORITY_HEADER = b"x-request-priority"
+
+
+class AdmissionControlMiddleware:
+    """
+    Admite o rechaza los requests de /api/v1 antes de llegar a los routers.
+
+    Los rechazos responden 503 + Retry-After con código OVERLOADED. Ver
+    app.utils.admission para las clases de prioridad y los umbrales.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.admission_control_enabled
+            or not scope["path"].startswith("/api/v1")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope["headers"]).get(PRIORITY_HEADER)
+        priority = classify(scope["path"], header.decode("latin-1") if header else None)
+        try:
+            await admission_controller.acquire(priority)
+        except AdmissionRejectedError as exc:
+            response = await retry_later_handler(Request(scope), exc)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(priority)
@@ -0,0 +1,181 @@
+"""
+Middleware de compresión de respuestas (gzip y brotli)
+
+Las respuestas con XML embebido y las listas de Perfiles comprimen 5-10x. La
+codificación se negocia con Accept-Encoding (brotli solo si el paquete
+`brotli` está instalado) y solo se comprimen tipos de texto, JSON y XML sobre
+COMPRESSION_MINIMUM_SIZE. Las respuestas en streaming (ej: NDJSON de la
+actualización masiva) se comprimen por chunk con flush, de modo que cada
+línea llega al cliente sin esperar al resto.
+
+El costo se registra en métricas (bytes antes/después y segundos de CPU por
+codificación) para ajustar el nivel contra el ahorro de ancho de banda.
+"""
+import time
+import zlib
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.utils.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin el paquete solo se ofrece gzip
+    brotli = None
+
+
+metrics.describe("http_compression_responses_total", "Respuestas comprimidas por codificación")
+metrics.describe("http_compression_skipped_total", "Respuestas no comprimidas por motivo (small, type, encoded, status)")
+metrics.describe("http_compression_bytes_in_total", "Bytes de respuesta antes de comprimir por codificación")
+metrics.describe("http_compression_bytes_out_total", "Bytes de respuesta comprimidos por codificación")
+metrics.describe("http_compression_cpu_seconds_total", "Segundos de CPU usados en comprimir por codificación")
+
+# Chunks sobre este tamaño se comprimen en el threadpool para no bloquear el event loop
+THREADPOOL_MIN_BYTES = 256 * 1024
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Codificación a usar según Accept-Encoding: "br", "gzip" o None (sin comprimir)"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+
+    candidates = ("br", "gzip") if brotli is not None and settings.compression_brotli_enabled else ("gzip",)
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Tipos de texto, JSON y XML (no imágenes ni contenido ya comprimido)"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith(("json", "xml"))
+
+
+class Encoder:
+    """Compresor incremental de una respuesta que registra su costo en métricas"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.compression_brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Comprime un chunk; sin final se hace flush para que el cliente pueda decodificarlo ya"""
+        start = time.thread_time()
+        if self.encoding == "br":
+            out = self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+        else:
+            out = self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        metrics.inc("http_compression_cpu_seconds_total", time.thread_time() - start, encoding=self.encoding)
+        metrics.inc("http_compression_bytes_in_total", len(data), encoding=self.encoding)
+        metrics.inc("http_compression_bytes_out_total", len(out), encoding=self.encoding)
+        return out
+
+
+class _CompressingSend:
+    """send del response: retiene el start hasta ver el primer chunk y decide si comprimir"""
+
+    def __init__(self, send: Send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.encoder: Optional[Encoder] = None
+        self.passthrough = False
+
+    def _skip_reason(self, headers: Headers, body: bytes, more_body: bool) -> Optional[str]:
+        status = self.start["status"]
+        if status < 200 or status in (204, 304):
+            return "status"
+        if "content-encoding" in headers:
+            return "encoded"
+        if not is_compressible(headers.get("content-type", "")):
+            return "type"
+        if not more_body and len(body) < settings.compression_minimum_size:
+            return "small"
+        return None
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREADPOOL_MIN_BYTES:
+            return await run_in_threadpool(self.encoder.compress, body, final)
+        return self.encoder.compress(body, final)
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            headers = MutableHeaders(raw=list(self.start["headers"]))
+            reason = self._skip_reason(headers, body, more_body)
+            if reason is not None:
+                metrics.inc("http_compression_skipped_total", reason=reason)
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            self.encoder = Encoder(self.encoding)
+            metrics.inc("http_compression_responses_total", encoding=self.encoding)
+            body = await self._compress(body, not more_body)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.send({**self.start, "headers": headers.raw})
+        else:
+            body = await self._compress(body, not more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas según Accept-Encoding.
+
+    Sin Accept-Encoding compatible, bajo el tamaño mínimo, con tipos no
+    comprimibles o con Content-Encoding ya definido, la respuesta pasa intacta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(send, encoding))
@@ -0,0 +1,105 @@
+"""
+Middleware de deadline por request
+"""
+import asyncio
+import json
+import time
+from typing import Optional
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.utils.deadline import reset_deadline, set_deadline
+
+
+TIMEOUT_HEADER = b"x-request-timeout"
+DEADLINE_HEADER = b"x-request-deadline"
+
+
+def parse_timeout(headers: dict) -> Optional[float]:
+    """
+    Obtener el tiempo disponible del request a partir de sus headers.
+
+    - X-Request-Timeout: segundos disponibles (ej: "2.5")
+    - X-Request-Deadline: instante límite como epoch Unix en segundos
+
+    Si ambos están presentes se usa el más restrictivo. El resultado se acota a
+    settings.request_timeout_max; sin headers se usa settings.request_timeout_default.
+    """
+    candidates = []
+    raw_timeout = headers.get(TIMEOUT_HEADER)
+    if raw_timeout:
+        try:
+            candidates.append(float(raw_timeout))
+        except ValueError:
+            logger.warning(f"Header X-Request-Timeout inválido: {raw_timeout!r}")
+    raw_deadline = headers.get(DEADLINE_HEADER)
+    if raw_deadline:
+        try:
+            candidates.append(float(raw_deadline) - time.time())
+        except ValueError:
+            logger.warning(f"Header X-Request-Deadline inválido: {raw_deadline!r}")
+
+    if not candidates:
+        return settings.request_timeout_default
+    return min(min(candidates), settings.request_timeout_max)
+
+
+class DeadlineMiddleware:
+    """
+    Propaga el deadline del request y corta el trabajo cuando se agota.
+
+    El deadline queda disponible vía app.utils.deadline para acotar la espera
+    en el pool SOAP, los reintentos y el operation_timeout de zeep. Si el
+    deadline vence antes de responder, el handler se cancela y se responde 504.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = parse_timeout(dict(scope["headers"]))
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        token = set_deadline(timeout)
+        try:
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+            await asyncio.wait_for(self.app(scope, receive, send_wrapper), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Deadline agotado ({timeout:.3f}s) en {scope['method']} {scope['path']}")
+            if not response_started:
+                await self._send_timeout(send)
+        finally:
+            reset_deadline(token)
+
+    async def _send_timeout(self, send: Send) -> None:
+        body = json.dumps({
+            "error": "Gateway Timeout",
+            "message": "El tiempo disponible para el request se agotó",
+            "code": "DEADLINE_EXCEEDED"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,6 +1,7 @@
 """
 Middleware para manejo global de errores
 """
+import math
 import traceback
 from typing import Any, Dict
 from fastapi import Request, Response, status
@@ -8,6 +9,8 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.utils.errors import RetryLaterError
+
 
 class ErrorHandlerMiddleware(BaseHTTPMiddleware):
     """Middleware para manejo global de errores"""
@@ -89,4 +92,18 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
                     "message": "Ha ocurrido un error interno del servidor",
                     "code": "INTERNAL_ERROR"
                 }
-            } 
\ No newline at end of file
+            } 
+
+async def retry_later_handler(request: Request, exc: RetryLaterError) -> JSONResponse:
+    """Responder a un rechazo rápido del gateway con su status y header Retry-After"""
+    logger.warning(f"Rechazo en {request.method} {request.url.path}: {exc.code} - {exc.message}")
+    
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "error": exc.error,
+            "message": exc.message,
+            "code": exc.code
+        },
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
@@ -0,0 +1,40 @@
+"""
+Selección de campos de la respuesta en los routers SOAP (?fields= / ?exclude=)
+"""
+from typing import Optional
+
+from fastapi import HTTPException, Query, Request, status
+from pydantic import BaseModel
+
+from app.utils.field_selection import FieldSelectionError, build_selection, set_selection
+
+
+async def select_fields(
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Campos a incluir en la respuesta, separados por coma (ej: cabecera,respuesta.nombres)"
+    ),
+    exclude: Optional[str] = Query(
+        None,
+        description="Campos a omitir en la respuesta, separados por coma (ej: xmlRespuesta)"
+    ),
+) -> None:
+    """
+    Valida fields/exclude contra el response_model del endpoint y deja la selección en contexto.
+
+    Los endpoints sin modelo de respuesta (ej: la actualización masiva NDJSON)
+    ignoran los parámetros. Una ruta inexistente responde 400.
+    """
+    if not fields and not exclude:
+        return
+    route = request.scope.get("route")
+    model = getattr(route, "response_model", None)
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        return
+    try:
+        selection = build_selection(model, fields, exclude)
+    except FieldSelectionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_selection(selection)
+
@@ -0,0 +1,144 @@
+"""
+Middleware de Idempotency-Key para los POST de registro
+"""
+import hashlib
+import json
+
+from loguru import logger
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.middleware.error_handler import retry_later_handler
+from app.utils.idempotency import (
+    IdempotencyInProgressError,
+    IdempotencyKeyReusedError,
+    StoredResponse,
+    idempotency_store,
+)
+
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+
+# Status < 500 que no son un resultado definitivo y no se guardan
+TRANSIENT_STATUS = {408, 409, 429}
+
+
+class IdempotencyMiddleware:
+    """
+    Repite la respuesta guardada para requests con la misma Idempotency-Key.
+
+    Aplica a los POST de settings.idempotency_paths que traen el header. La
+    clave se asocia a la ruta y al hash del cuerpo: reutilizarla con otro cuerpo
+    responde 422. Solo se guardan resultados definitivos (status < 500, salvo
+    408/409/429); ante errores del upstream o rechazos del gateway la clave se
+    libera para permitir reintentos.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.idempotency_enabled
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in settings.idempotency_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        raw_key = dict(scope["headers"]).get(IDEMPOTENCY_HEADER)
+        if not raw_key:
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = raw_key.decode("latin-1")
+        body = await self._read_body(receive)
+        key = f"{scope['path'].rstrip('/')}:{idempotency_key}"
+        fingerprint = self._fingerprint(body)
+
+        try:
+            stored = await idempotency_store.begin(key, fingerprint)
+        except IdempotencyInProgressError as exc:
+            response = await retry_later_handler(Request(scope), exc)
+            await response(scope, receive, send)
+            return
+        except IdempotencyKeyReusedError as exc:
+            await self._send_json(send, 422, {
+                "error": "Unprocessable Entity",
+                "message": exc.message,
+                "code": "IDEMPOTENCY_KEY_REUSED"
+            })
+            return
+
+        if stored is not None:
+            logger.info(f"Repitiendo respuesta para Idempotency-Key {idempotency_key} en {scope['path']}")
+            await send({
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": stored.headers + [REPLAYED_HEADER],
+            })
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+
+        status_code = 500
+        headers = []
+        chunks = []
+
+        async def replay_receive() -> Message:
+            nonlocal body
+            if body is None:
+                return await receive()
+            message = {"type": "http.request", "body": body, "more_body": False}
+            body = None
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        completed = None
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+            if status_code < 500 and status_code not in TRANSIENT_STATUS:
+                completed = StoredResponse(status_code, headers, b"".join(chunks))
+        finally:
+            idempotency_store.complete(key, completed)
+
+    @staticmethod
+    def _fingerprint(body: bytes) -> str:
+        """Hash del cuerpo, normalizando el JSON para ignorar espacios y orden de claves"""
+        try:
+            canonical = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        except ValueError:
+            canonical = body
+        return hashlib.sha256(canonical).hexdigest()
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send_json(send: Send, status_code: int, content: dict) -> None:
+        body = json.dumps(content).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,87 @@
+"""
+Dependencia de rate limiting por idSistema para los routers SOAP
+"""
+from typing import Any, Optional
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import settings
+from app.utils.rate_limit import Decision, rate_limiter
+
+
+QUERY_PARAMS = ("id_sistema", "idSistema")
+BODY_FIELDS = ("idSistema", "IdSistema")
+# idSistema es un entero en todos los modelos de request
+MAX_ID_SISTEMA_DIGITS = 10
+
+
+def normalize_id_sistema(value: Any) -> Optional[str]:
+    """idSistema como entero canónico ("007" -> "7"), None si no es un entero válido"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not (value.isascii() and value.isdigit()) or len(value) > MAX_ID_SISTEMA_DIGITS:
+        return None
+    return str(int(value))
+
+
+async def get_id_sistema(request: Request) -> Optional[str]:
+    """
+    idSistema del request, desde los query params o el cuerpo JSON.
+
+    Retorna None si el request no lo informa (ej: Identificación, Firma) o si
+    no es un entero (la validación del endpoint lo rechaza con 422).
+    """
+    for name in QUERY_PARAMS:
+        value = normalize_id_sistema(request.query_params.get(name))
+        if value is not None:
+            return value
+    if "application/json" not in request.headers.get("content-type", ""):
+        return None
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict):
+        for name in BODY_FIELDS:
+            value = normalize_id_sistema(body.get(name))
+            if value is not None:
+                return value
+    return None
+
+
+async def enforce_rate_limit(request: Request) -> None:
+    """
+    Aplica el token bucket y la cuota diaria del idSistema en el endpoint.
+
+    El endpoint se identifica por método y ruta declarada (sin valores de path
+    params). Si se supera el límite se lanza RateLimitExceededError (429 +
+    Retry-After). Los requests sin idSistema no se limitan.
+    """
+    if not settings.rate_limit_enabled:
+        return
+    id_sistema = await get_id_sistema(request)
+    if id_sistema is None:
+        return
+    route = request.scope.get("route")
+    await charge_rate_limit(id_sistema, f"{request.method} {route.path if route else request.url.path}")
+
+
+async def charge_rate_limit(id_sistema: str, endpoint: str) -> Optional[Decision]:
+    """
+    Consume un request del bucket (idSistema, endpoint) fuera de la dependencia.
+
+    Lo usan los endpoints que ejecutan varias operaciones por request (ej:
+    actualización masiva) para cargar cada una al bucket de su endpoint
+    individual. Lanza RateLimitExceededError; None si está deshabilitado.
+    """
+    if not settings.rate_limit_enabled:
+        return None
+    if settings.rate_limit_backend == "sqlite":
+        return await run_in_threadpool(rate_limiter.check, id_sistema, endpoint)
+    return rate_limiter.check(id_sistema, endpoint)
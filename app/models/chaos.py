@@ -0,0 +1,75 @@
+"""
+Modelos Pydantic para la inyección de fallas y latencia en las llamadas SOAP
+"""
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class EDistribucionLatencia(str, Enum):
+    """Distribución de la latencia inyectada"""
+    FIXED = "fixed"
+    UNIFORM = "uniform"
+    LOGNORMAL = "lognormal"
+    EXPONENTIAL = "exponential"
+
+
+class ETipoFalla(str, Enum):
+    """Efecto de una regla de caos"""
+    LATENCY = "latency"
+    TIMEOUT = "timeout"
+    FAULT = "fault"
+    CONNECTION_ERROR = "connection_error"
+
+
+class LatenciaCaos(BaseModel):
+    """Distribución de latencia en segundos"""
+    distribution: EDistribucionLatencia = Field(EDistribucionLatencia.FIXED, description="Distribución de la latencia")
+    value: Optional[float] = Field(None, ge=0, description="Latencia fija (fixed)")
+    min: Optional[float] = Field(None, ge=0, description="Mínimo (uniform)")
+    max: Optional[float] = Field(None, ge=0, description="Máximo (uniform)")
+    median: Optional[float] = Field(None, gt=0, description="Mediana (lognormal)")
+    sigma: float = Field(0.5, ge=0, description="Dispersión (lognormal)")
+    mean: Optional[float] = Field(None, gt=0, description="Media (exponential)")
+
+    @model_validator(mode="after")
+    def validar_parametros(self) -> "LatenciaCaos":
+        required = {
+            EDistribucionLatencia.FIXED: ("value",),
+            EDistribucionLatencia.UNIFORM: ("min", "max"),
+            EDistribucionLatencia.LOGNORMAL: ("median",),
+            EDistribucionLatencia.EXPONENTIAL: ("mean",),
+        }[self.distribution]
+        missing = [name for name in required if getattr(self, name) is None]
+        if missing:
+            raise ValueError(f"La distribución {self.distribution.value} requiere {', '.join(missing)}")
+        if self.distribution == EDistribucionLatencia.UNIFORM and self.min > self.max:
+            raise ValueError("min no puede ser mayor que max")
+        return self
+
+
+class ReglaCaos(BaseModel):
+    """Falla o latencia a inyectar en un porcentaje de las llamadas de un servicio y operación"""
+    service: str = Field("*", description="Servicio SOAP (ej: sii, registro) o * para todos")
+    operation: str = Field("*", description="Operación SOAP (ej: ConsultaRun) o * para todas")
+    kind: ETipoFalla = Field(..., description="Efecto a inyectar")
+    percentage: float = Field(..., ge=0, le=100, description="Porcentaje de llamadas afectadas")
+    latency: Optional[LatenciaCaos] = Field(None, description="Latencia a agregar (requerida para kind=latency)")
+    message: str = Field("Falla inyectada", description="Mensaje del Fault o error inyectado")
+
+    @model_validator(mode="after")
+    def validar_latencia(self) -> "ReglaCaos":
+        if self.kind == ETipoFalla.LATENCY and self.latency is None:
+            raise ValueError("Las reglas de latencia requieren latency")
+        return self
+
+
+class ConfiguracionCaos(BaseModel):
+    """Reglas de caos activas"""
+    rules: List[ReglaCaos] = Field(default_factory=list, description="Reglas evaluadas en cada llamada SOAP")
+
+
+class EstadoCaos(ConfiguracionCaos):
+    """Reglas de caos activas y fallas inyectadas desde que se configuraron"""
+    injected: dict[str, int] = Field(default_factory=dict, description="Inyecciones por servicio/operación/tipo")
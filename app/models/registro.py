@@ -18,6 +18,12 @@ class TipoEstado(str, Enum):
     EXCEPCION = "EXCEPCION"
 
 
+class OperacionActualizacionEmpresa(str, Enum):
+    """Operaciones disponibles en la actualización masiva de empresas"""
+    RAZON_SOCIAL = "razon_social"
+    REP_LEGALES = "rep_legales"
+
+
 class TipoEmpresa(str, Enum):
     """Enumeración para eTipoEmpresa"""
     EMPRESA = "EMPRESA"
@@ -215,6 +221,33 @@ class RegistroEmpresaOracleRequest(BaseModel):
     datosEmpresa: DatosEmpresaOracle = Field(..., description="Datos de la empresa Oracle")
 
 
+class EmpresaRut(BaseModel):
+    """RUT de una empresa a actualizar"""
+    rutEmpresa: int = Field(..., description="RUT de la empresa")
+    dvEmpresa: Optional[str] = Field(None, description="DV de la empresa")
+
+
+class ActualizacionMasivaEmpresasRequest(BaseModel):
+    """Modelo para request de actualización masiva de razón social y representantes legales"""
+    idSistema: int = Field(..., description="ID del sistema")
+    empresas: List[EmpresaRut] = Field(..., min_length=1, description="Empresas a actualizar")
+    operaciones: List[OperacionActualizacionEmpresa] = Field(
+        default=[OperacionActualizacionEmpresa.RAZON_SOCIAL, OperacionActualizacionEmpresa.REP_LEGALES],
+        min_length=1,
+        description="Operaciones a ejecutar por empresa"
+    )
+    force: bool = Field(default=False, description="Enviar aunque la actualización no tenga cambios")
+
+
+class ResultadoActualizacionEmpresa(BaseModel):
+    """Resultado de la actualización masiva para una empresa (una línea NDJSON)"""
+    rutEmpresa: int = Field(..., description="RUT de la empresa")
+    dvEmpresa: Optional[str] = Field(None, description="DV de la empresa")
+    resultados: Dict[str, RespuestaProcesoBe] = Field(default_factory=dict, description="Respuesta por operación")
+    error: Optional[str] = Field(None, description="Código de rechazo del gateway si la empresa no se procesó completa")
+    retryAfter: Optional[float] = Field(None, description="Segundos antes de reintentar si el rechazo fue por rate limit o cuota (429)")
+
+
 # Modelo genérico para errores
 class ErrorResponse(BaseModel):
     """Modelo para respuestas de error"""
@@ -3,13 +3,16 @@ Cliente SOAP para el servicio de Consulta Registro Civil de SENCE
 """
 from typing import Optional
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from zeep.settings import Settings
 from requests import Session
 from loguru import logger
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_fast_decode import fast_operation
+from app.services.soap_recording import build_transport, soap_plugins
+from app.utils.errors import RetryLaterError
 from app.models.consulta_rc import (
     RespuestaConsultaRunBe,
     RespuestaConsultaNroSerieNroDocBe,
@@ -38,7 +41,7 @@ class ConsultaRcSoapClientService:
         self.use_mocks = settings.use_soap_mocks
         
         # URL del WSDL de consulta registro civil
-        self.wsdl_url = "https://wsdesa.sence.cl/WsMiddleware/WsConsulta_SRCeI.asmx?wsdl"
+        self.wsdl_url = settings.consulta_rc_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -51,7 +54,8 @@ class ConsultaRcSoapClientService:
             session.verify = True
             
             # Configurar transporte
-            transport = Transport(
+            transport = build_transport(
+                "consulta_rc",
                 session=session,
                 timeout=settings.soap_timeout,
                 operation_timeout=settings.soap_timeout,
@@ -71,6 +75,7 @@ class ConsultaRcSoapClientService:
             self.client = Client(
                 wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("consulta_rc"),
                 settings=zeep_settings
             )
             
@@ -265,7 +270,8 @@ class ConsultaRcSoapClientService:
         try:
             logger.info(f"Llamando a ConsultaRun SOAP para RUT: {rut}")
             
-            result = self.client.service.ConsultaRun(
+            result = await run_soap_call(
+                "consulta_rc", "ConsultaRun", fast_operation(self.client, "consulta_rc", "ConsultaRun", RespuestaConsultaRunBe),
                 idSistema=id_sistema,
                 rut=rut,
                 dv=dv
@@ -276,6 +282,8 @@ class ConsultaRcSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaRun: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaRun: {str(e)}")
             raise
@@ -291,7 +299,8 @@ class ConsultaRcSoapClientService:
         try:
             logger.info(f"Llamando a ConsultaNroSerieNroDocumento SOAP para RUT: {rut}")
             
-            result = self.client.service.ConsultaNroSerieNroDocumento(
+            result = await run_soap_call(
+                "consulta_rc", "ConsultaNroSerieNroDocumento", self.client.service.ConsultaNroSerieNroDocumento,
                 idSistema=id_sistema,
                 rut=rut,
                 dv=dv,
@@ -304,6 +313,8 @@ class ConsultaRcSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaNroSerieNroDocumento: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaNroSerieNroDocumento: {str(e)}")
             raise
@@ -317,7 +328,8 @@ class ConsultaRcSoapClientService:
         try:
             logger.info(f"Llamando a ConsultaCertificadoNacimiento SOAP para RUT: {rut}")
             
-            result = self.client.service.ConsultaCertificadoNacimiento(
+            result = await run_soap_call(
+                "consulta_rc", "ConsultaCertificadoNacimiento", self.client.service.ConsultaCertificadoNacimiento,
                 idSistema=id_sistema,
                 rut=rut,
                 dv=dv
@@ -328,6 +340,8 @@ class ConsultaRcSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaCertificadoNacimiento: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaCertificadoNacimiento: {str(e)}")
             raise
@@ -341,7 +355,8 @@ class ConsultaRcSoapClientService:
         try:
             logger.info(f"Llamando a ConsultaDiscapacidad SOAP para RUN: {run}")
             
-            result = self.client.service.ConsultaDiscapacidad(
+            result = await run_soap_call(
+                "consulta_rc", "ConsultaDiscapacidad", self.client.service.ConsultaDiscapacidad,
                 idSistema=id_sistema,
                 run=run,
                 dv=dv
@@ -352,6 +367,8 @@ class ConsultaRcSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaDiscapacidad: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaDiscapacidad: {str(e)}")
             raise
@@ -365,13 +382,15 @@ class ConsultaRcSoapClientService:
         try:
             logger.info(f"Llamando a Verify SOAP")
             
-            result = self.client.service.Verify(xmlparamin=xml_param_in)
+            result = await run_soap_call("consulta_rc", "Verify", self.client.service.Verify, xmlparamin=xml_param_in)
             
             return VerifyResponse.model_validate(result)
             
         except Fault as fault:
             logger.error(f"Error SOAP en Verify: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en Verify: {str(e)}")
             raise
@@ -385,7 +404,8 @@ class ConsultaRcSoapClientService:
         try:
             logger.info(f"Llamando a VerificarHuellaDactilar SOAP para RUT: {datos.RutPersona}")
             
-            result = self.client.service.VerificarHuellaDactilar(
+            result = await run_soap_call(
+                "consulta_rc", "VerificarHuellaDactilar", self.client.service.VerificarHuellaDactilar,
                 IdSistema=id_sistema,
                 Datos=datos.model_dump()
             )
@@ -395,6 +415,8 @@ class ConsultaRcSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en VerificarHuellaDactilar: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en VerificarHuellaDactilar: {str(e)}")
             raise
@@ -3,7 +3,6 @@ Cliente SOAP para el servicio de Firma Desatendida de SENCE
 """
 from typing import Optional
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from zeep.settings import Settings
 from zeep.helpers import serialize_object
@@ -11,6 +10,9 @@ from requests import Session
 from loguru import logger
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_recording import build_transport, soap_plugins
+from app.utils.errors import RetryLaterError
 from app.models.firma import (
     FirmaDesatendidaRequest,
     FirmaDesatendidaResponse,
@@ -26,7 +28,7 @@ class FirmaSoapClientService:
         self.client: Optional[Client] = None
         self.use_mocks = settings.use_soap_mocks
         # URL del WSDL del servicio de firma (ajustar según la URL real)
-        self.wsdl_url = "https://wsdesa.sence.cl/wsfirmadocs/wsfirmadocs.asmx?wsdl"
+        self.wsdl_url = settings.firma_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -36,7 +38,7 @@ class FirmaSoapClientService:
         try:
             session = Session()
             session.timeout = settings.soap_timeout
-            transport = Transport(session=session)
+            transport = build_transport("firma", session=session, operation_timeout=settings.soap_timeout)
             
             soap_settings = Settings(
                 strict=False,
@@ -46,6 +48,7 @@ class FirmaSoapClientService:
             self.client = Client(
                 wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("firma"),
                 settings=soap_settings
             )
             
@@ -103,7 +106,8 @@ class FirmaSoapClientService:
                 documentos_soap.append(documento_soap)
             
             # Llamar al servicio SOAP
-            result = self.client.service.FirmaDesatendida(
+            result = await run_soap_call(
+                "firma", "FirmaDesatendida", self.client.service.FirmaDesatendida,
                 parametros={
                     'Documentos': {
                         'Documento': documentos_soap
@@ -144,6 +148,8 @@ class FirmaSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en FirmaDesatendida: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en FirmaDesatendida: {str(e)}")
             raise
@@ -3,7 +3,6 @@ Cliente SOAP para el servicio de Notificación de SENCE
 """
 from typing import Optional, List, Union
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from zeep.settings import Settings
 from requests import Session
@@ -11,6 +10,9 @@ from loguru import logger
 import base64
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_recording import build_transport, soap_plugins
+from app.utils.errors import RetryLaterError
 from app.models.notificacion import (
     RespuestaMailBe, RespuestaProcesoBe, ETipoEstado, EnvioExitosoResponse,
     EnviarSMSRequest, EnviarCorreoPublicoRequest, EnviarListaCorreoPublicoRequest,
@@ -24,7 +26,7 @@ class NotificacionSoapClientService:
     def __init__(self):
         self.client: Optional[Client] = None
         self.use_mocks = settings.use_soap_mocks
-        self.wsdl_url = "https://wsdesa.sence.cl/wscomponentes/wsnotificacion.asmx?wsdl"
+        self.wsdl_url = settings.notificacion_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -34,7 +36,7 @@ class NotificacionSoapClientService:
         try:
             session = Session()
             session.timeout = settings.soap_timeout
-            transport = Transport(session=session)
+            transport = build_transport("notificacion", session=session, operation_timeout=settings.soap_timeout)
             
             soap_settings = Settings(
                 strict=False,
@@ -44,6 +46,7 @@ class NotificacionSoapClientService:
             self.client = Client(
                 wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("notificacion"),
                 settings=soap_settings
             )
             
@@ -78,7 +81,8 @@ class NotificacionSoapClientService:
             return self._get_mock_response_exitoso("SMS")
         
         try:
-            result = self.client.service.EnviarSMS(
+            result = await run_soap_call(
+                "notificacion", "EnviarSMS", self.client.service.EnviarSMS,
                 idSistema=request.idSistema,
                 ambiente=request.ambiente,
                 celular=request.celular,
@@ -94,6 +98,8 @@ class NotificacionSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en EnviarSMS: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en EnviarSMS: {str(e)}")
             raise
@@ -106,7 +112,8 @@ class NotificacionSoapClientService:
             return self._get_mock_response_exitoso("Correo público")
         
         try:
-            result = self.client.service.EnviarCorreoPublico(
+            result = await run_soap_call(
+                "notificacion", "EnviarCorreoPublico", self.client.service.EnviarCorreoPublico,
                 idSistema=request.idSistema,
                 ambiente=request.ambiente,
                 mail=request.mail,
@@ -123,6 +130,8 @@ class NotificacionSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en EnviarCorreoPublico: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en EnviarCorreoPublico: {str(e)}")
             raise
@@ -134,7 +143,8 @@ class NotificacionSoapClientService:
             return self._get_mock_response_exitoso("Lista de correos públicos")
         
         try:
-            result = self.client.service.EnviarListaCorreoPublico(
+            result = await run_soap_call(
+                "notificacion", "EnviarListaCorreoPublico", self.client.service.EnviarListaCorreoPublico,
                 idSistema=request.idSistema,
                 ambiente=request.ambiente,
                 lstMails=request.lstMails,
@@ -151,6 +161,8 @@ class NotificacionSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en EnviarListaCorreoPublico: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en EnviarListaCorreoPublico: {str(e)}")
             raise
@@ -162,7 +174,8 @@ class NotificacionSoapClientService:
             return self._get_mock_response_mail_be("Correo público RM")
         
         try:
-            result = self.client.service.EnviarCorreoPublicoRm(
+            result = await run_soap_call(
+                "notificacion", "EnviarCorreoPublicoRm", self.client.service.EnviarCorreoPublicoRm,
                 idSistema=request.idSistema,
                 ambiente=request.ambiente,
                 mail=request.mail,
@@ -176,6 +189,8 @@ class NotificacionSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en EnviarCorreoPublicoRm: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en EnviarCorreoPublicoRm: {str(e)}")
             raise
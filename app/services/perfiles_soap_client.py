@@ -3,13 +3,16 @@ Cliente SOAP para el servicio de Perfiles de SENCE
 """
 from typing import Optional, List
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from zeep.settings import Settings
 from requests import Session
 from loguru import logger
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_fast_decode import fast_operation
+from app.services.soap_recording import build_transport, soap_plugins
+from app.utils.errors import RetryLaterError
 from app.models.perfiles import (
     RespuestaPerfilesBe, AutorizacionBe, UsuarioBe, PerfilBe, FuncionBe,
     UsuarioEmpresaBe, PerfilSistemaBe, EstadoAcceso, ETipoPersona, EEstado,
@@ -24,7 +27,7 @@ class PerfilesSoapClientService:
     def __init__(self):
         self.client: Optional[Client] = None
         self.use_mocks = settings.use_soap_mocks
-        self.wsdl_url = "https://wsdesa.sence.cl/WSComponentes/WsPerfiles.asmx?wsdl"
+        self.wsdl_url = settings.perfiles_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -35,7 +38,7 @@ class PerfilesSoapClientService:
             # Configurar transport con timeout
             session = Session()
             session.timeout = settings.soap_timeout
-            transport = Transport(session=session)
+            transport = build_transport("perfiles", session=session, operation_timeout=settings.soap_timeout)
             
             # Configurar settings para manejo de XML grandes
             soap_settings = Settings(
@@ -47,6 +50,7 @@ class PerfilesSoapClientService:
             self.client = Client(
                 wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("perfiles"),
                 settings=soap_settings
             )
             
@@ -141,7 +145,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("ConsultaUsuariosPorPerfilSistema")
         
         try:
-            result = self.client.service.ConsultaUsuariosPorPerfilSistema(
+            result = await run_soap_call(
+                "perfiles", "ConsultaUsuariosPorPerfilSistema", fast_operation(self.client, "perfiles", "ConsultaUsuariosPorPerfilSistema", RespuestaPerfilesBe),
                 idSistema=id_sistema,
                 idPerfil=id_perfil
             )
@@ -152,6 +157,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaUsuariosPorPerfilSistema: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaUsuariosPorPerfilSistema: {str(e)}")
             raise
@@ -163,7 +170,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("ConsultaPerfilUsuarioSistemaPorRut")
         
         try:
-            result = self.client.service.ConsultaPerfilUsuarioSistemaPorRut(
+            result = await run_soap_call(
+                "perfiles", "ConsultaPerfilUsuarioSistemaPorRut", fast_operation(self.client, "perfiles", "ConsultaPerfilUsuarioSistemaPorRut", RespuestaPerfilesBe),
                 rutPersona=rut_persona,
                 idSistema=id_sistema,
                 tipoPersona=tipo_persona
@@ -175,6 +183,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaPerfilUsuarioSistemaPorRut: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaPerfilUsuarioSistemaPorRut: {str(e)}")
             raise
@@ -186,7 +196,7 @@ class PerfilesSoapClientService:
             return self._get_mock_response("ConsultaPerfilPorSistema", include_users=False)
         
         try:
-            result = self.client.service.ConsultaPerfilPorSistema(idSistema=id_sistema)
+            result = await run_soap_call("perfiles", "ConsultaPerfilPorSistema", fast_operation(self.client, "perfiles", "ConsultaPerfilPorSistema", RespuestaPerfilesBe), idSistema=id_sistema)
             
             logger.info(f"Respuesta exitosa de ConsultaPerfilPorSistema")
             return RespuestaPerfilesBe.model_validate(result)
@@ -194,6 +204,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaPerfilPorSistema: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaPerfilPorSistema: {str(e)}")
             raise
@@ -205,7 +217,7 @@ class PerfilesSoapClientService:
             return self._get_mock_response("ConsultaFuncionesPorSistema", include_users=False)
         
         try:
-            result = self.client.service.ConsultaFuncionesPorSistema(idSistema=id_sistema)
+            result = await run_soap_call("perfiles", "ConsultaFuncionesPorSistema", fast_operation(self.client, "perfiles", "ConsultaFuncionesPorSistema", RespuestaPerfilesBe), idSistema=id_sistema)
             
             logger.info(f"Respuesta exitosa de ConsultaFuncionesPorSistema")
             return RespuestaPerfilesBe.model_validate(result)
@@ -213,6 +225,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaFuncionesPorSistema: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaFuncionesPorSistema: {str(e)}")
             raise
@@ -224,7 +238,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("ConsultaFuncionesPorPerfilSistema", include_users=False)
         
         try:
-            result = self.client.service.ConsultaFuncionesPorPerfilSistema(
+            result = await run_soap_call(
+                "perfiles", "ConsultaFuncionesPorPerfilSistema", fast_operation(self.client, "perfiles", "ConsultaFuncionesPorPerfilSistema", RespuestaPerfilesBe),
                 idPerfil=id_perfil,
                 idSistema=id_sistema
             )
@@ -235,6 +250,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaFuncionesPorPerfilSistema: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaFuncionesPorPerfilSistema: {str(e)}")
             raise
@@ -246,7 +263,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("ConsultaEmpresasPorPerfilSistema", include_users=False)
         
         try:
-            result = self.client.service.ConsultaEmpresasPorPerfilSistema(
+            result = await run_soap_call(
+                "perfiles", "ConsultaEmpresasPorPerfilSistema", fast_operation(self.client, "perfiles", "ConsultaEmpresasPorPerfilSistema", RespuestaPerfilesBe),
                 idSistema=id_sistema,
                 idPerfil=id_perfil
             )
@@ -257,6 +275,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaEmpresasPorPerfilSistema: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaEmpresasPorPerfilSistema: {str(e)}")
             raise
@@ -268,7 +288,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("SolicitarPerfilUsuario", include_users=False)
         
         try:
-            result = self.client.service.SolicitarPerfilUsuario(
+            result = await run_soap_call(
+                "perfiles", "SolicitarPerfilUsuario", self.client.service.SolicitarPerfilUsuario,
                 idSistema=request.idSistema,
                 idPerfil=request.idPerfil,
                 rutUsuario=request.rutUsuario,
@@ -284,6 +305,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en SolicitarPerfilUsuario: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en SolicitarPerfilUsuario: {str(e)}")
             raise
@@ -295,7 +318,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("BloquearPerfilSistemaUsuarioPorRut", include_users=False)
         
         try:
-            result = self.client.service.BloquearPerfilSistemaUsuarioPorRut(
+            result = await run_soap_call(
+                "perfiles", "BloquearPerfilSistemaUsuarioPorRut", self.client.service.BloquearPerfilSistemaUsuarioPorRut,
                 idSistema=request.idSistema,
                 idPerfil=request.idPerfil,
                 rutUsuario=request.rutUsuario,
@@ -309,6 +333,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en BloquearPerfilSistemaUsuarioPorRut: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en BloquearPerfilSistemaUsuarioPorRut: {str(e)}")
             raise
@@ -320,7 +346,8 @@ class PerfilesSoapClientService:
             return self._get_mock_response("AsignarPerfilSistemaUsuarioPorRut", include_users=False)
         
         try:
-            result = self.client.service.AsignarPerfilSistemaUsuarioPorRut(
+            result = await run_soap_call(
+                "perfiles", "AsignarPerfilSistemaUsuarioPorRut", self.client.service.AsignarPerfilSistemaUsuarioPorRut,
                 idSistema=request.idSistema,
                 idPerfil=request.idPerfil,
                 region=request.region,
@@ -335,6 +362,8 @@ class PerfilesSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en AsignarPerfilSistemaUsuarioPorRut: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en AsignarPerfilSistemaUsuarioPorRut: {str(e)}")
             raise
@@ -3,13 +3,16 @@ Cliente SOAP para el servicio de Registro de SENCE (WsRegistroCUS)
 """
 from typing import Optional
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from zeep.settings import Settings
 from requests import Session
 from loguru import logger
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_recording import build_transport, soap_plugins
+from app.utils.errors import RetryLaterError
+from app.utils.unchanged import unchanged_updates
 from app.models.registro import (
     RespuestaProcesoBe,
     TipoEstado,
@@ -32,7 +35,7 @@ class RegistroSoapClientService:
         self.use_mocks = settings.use_soap_mocks
         
         # URL del WSDL de registro
-        self.wsdl_url = "http://srv-ws-ora:8090/WsRegistroCUS/Autenticacion.asmx?wsdl"
+        self.wsdl_url = settings.registro_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -45,7 +48,8 @@ class RegistroSoapClientService:
             session.verify = True
             
             # Configurar transporte
-            transport = Transport(
+            transport = build_transport(
+                "registro",
                 session=session,
                 timeout=settings.soap_timeout,
                 operation_timeout=settings.soap_timeout,
@@ -65,6 +69,7 @@ class RegistroSoapClientService:
             self.client = Client(
                 wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("registro"),
                 settings=zeep_settings
             )
             
@@ -100,7 +105,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a RegistroPersona SOAP para RUT: {datos_persona.Rut}")
             
-            result = self.client.service.RegistroPersona(
+            result = await run_soap_call(
+                "registro", "RegistroPersona", self.client.service.RegistroPersona,
                 idSistema=id_sistema,
                 datosPersona=datos_persona.model_dump()
             )
@@ -118,6 +124,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en RegistroPersona: {str(e)}")
             return RespuestaProcesoBe(
@@ -136,7 +144,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a RegistroPersonaCrm SOAP para RUT: {datos_persona.Rut}")
             
-            result = self.client.service.RegistroPersonaCrm(
+            result = await run_soap_call(
+                "registro", "RegistroPersonaCrm", self.client.service.RegistroPersonaCrm,
                 idSistema=id_sistema,
                 datosPersona=datos_persona.model_dump()
             )
@@ -154,6 +163,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en RegistroPersonaCrm: {str(e)}")
             return RespuestaProcesoBe(
@@ -172,7 +183,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a RegistrarPersonaSiacOirs SOAP para RUT: {datos_persona.Rut}")
             
-            result = self.client.service.RegistrarPersonaSiacOirs(
+            result = await run_soap_call(
+                "registro", "RegistrarPersonaSiacOirs", self.client.service.RegistrarPersonaSiacOirs,
                 idSistema=id_sistema,
                 datosPersona=datos_persona.model_dump()
             )
@@ -190,6 +202,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en RegistrarPersonaSiacOirs: {str(e)}")
             return RespuestaProcesoBe(
@@ -208,7 +222,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a RegistroEmpresa SOAP para RUT: {datos_empresa.RutEmpresa}")
             
-            result = self.client.service.RegistroEmpresa(
+            result = await run_soap_call(
+                "registro", "RegistroEmpresa", self.client.service.RegistroEmpresa,
                 idSistema=id_sistema,
                 datosEmpresa=datos_empresa.model_dump()
             )
@@ -226,6 +241,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en RegistroEmpresa: {str(e)}")
             return RespuestaProcesoBe(
@@ -234,26 +251,36 @@ class RegistroSoapClientService:
                 respuestaProceso=f"Error de conexión: {str(e)}"
             )
     
-    async def actualizar_empresa(self, id_sistema: int, datos_empresa: DatosEmpresaRudo) -> RespuestaProcesoBe:
+    async def actualizar_empresa(self, id_sistema: int, datos_empresa: DatosEmpresaRudo, force: bool = False) -> RespuestaProcesoBe:
         """Actualiza una empresa"""
+        payload = {"idSistema": id_sistema, "datosEmpresa": datos_empresa.model_dump()}
+        if not force:
+            cached = unchanged_updates.get("ActualizarEmpresa", datos_empresa.RutEmpresa, payload)
+            if cached is not None:
+                return cached
+        
         if self.use_mocks:
             logger.info(f"Usando mock para ActualizarEmpresa con RUT: {datos_empresa.RutEmpresa}")
             success = datos_empresa.RutEmpresa != 11111111
-            return self._get_mock_response("ActualizarEmpresa", success)
+            response = self._get_mock_response("ActualizarEmpresa", success)
+            unchanged_updates.remember("ActualizarEmpresa", datos_empresa.RutEmpresa, payload, response)
+            return response
         
         try:
             logger.info(f"Llamando a ActualizarEmpresa SOAP para RUT: {datos_empresa.RutEmpresa}")
             
-            result = self.client.service.ActualizarEmpresa(
-                idSistema=id_sistema,
-                datosEmpresa=datos_empresa.model_dump()
+            result = await run_soap_call(
+                "registro", "ActualizarEmpresa", self.client.service.ActualizarEmpresa,
+                **payload
             )
             
-            return RespuestaProcesoBe(
+            response = RespuestaProcesoBe(
                 estadoProceso=TipoEstado(result.estadoProceso),
                 codigoProceso=result.codigoProceso,
                 respuestaProceso=result.respuestaProceso
             )
+            unchanged_updates.remember("ActualizarEmpresa", datos_empresa.RutEmpresa, payload, response)
+            return response
             
         except Fault as fault:
             logger.error(f"Error SOAP en ActualizarEmpresa: {fault}")
@@ -262,6 +289,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ActualizarEmpresa: {str(e)}")
             return RespuestaProcesoBe(
@@ -270,27 +299,36 @@ class RegistroSoapClientService:
                 respuestaProceso=f"Error de conexión: {str(e)}"
             )
     
-    async def actualizar_razon_social(self, id_sistema: int, rut_empresa: int, dv_empresa: Optional[str] = None) -> RespuestaProcesoBe:
+    async def actualizar_razon_social(self, id_sistema: int, rut_empresa: int, dv_empresa: Optional[str] = None, force: bool = False) -> RespuestaProcesoBe:
         """Actualiza la razón social de una empresa"""
+        payload = {"idSistema": id_sistema, "rutEmpresa": rut_empresa, "dvEmpresa": dv_empresa}
+        if not force:
+            cached = unchanged_updates.get("ActualizarRazonSocial", rut_empresa, payload)
+            if cached is not None:
+                return cached
+        
         if self.use_mocks:
             logger.info(f"Usando mock para ActualizarRazonSocial con RUT: {rut_empresa}")
             success = rut_empresa != 11111111
-            return self._get_mock_response("ActualizarRazonSocial", success)
+            response = self._get_mock_response("ActualizarRazonSocial", success)
+            unchanged_updates.remember("ActualizarRazonSocial", rut_empresa, payload, response)
+            return response
         
         try:
             logger.info(f"Llamando a ActualizarRazonSocial SOAP para RUT: {rut_empresa}")
             
-            result = self.client.service.ActualizarRazonSocial(
-                idSistema=id_sistema,
-                rutEmpresa=rut_empresa,
-                dvEmpresa=dv_empresa
+            result = await run_soap_call(
+                "registro", "ActualizarRazonSocial", self.client.service.ActualizarRazonSocial,
+                **payload
             )
             
-            return RespuestaProcesoBe(
+            response = RespuestaProcesoBe(
                 estadoProceso=TipoEstado(result.estadoProceso),
                 codigoProceso=result.codigoProceso,
                 respuestaProceso=result.respuestaProceso
             )
+            unchanged_updates.remember("ActualizarRazonSocial", rut_empresa, payload, response)
+            return response
             
         except Fault as fault:
             logger.error(f"Error SOAP en ActualizarRazonSocial: {fault}")
@@ -299,6 +337,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ActualizarRazonSocial: {str(e)}")
             return RespuestaProcesoBe(
@@ -307,27 +347,36 @@ class RegistroSoapClientService:
                 respuestaProceso=f"Error de conexión: {str(e)}"
             )
     
-    async def actualizar_rep_legales(self, id_sistema: int, rut_empresa: int, dv_empresa: Optional[str] = None) -> RespuestaProcesoBe:
+    async def actualizar_rep_legales(self, id_sistema: int, rut_empresa: int, dv_empresa: Optional[str] = None, force: bool = False) -> RespuestaProcesoBe:
         """Actualiza los representantes legales de una empresa"""
+        payload = {"idSistema": id_sistema, "rutEmpresa": rut_empresa, "dvEmpresa": dv_empresa}
+        if not force:
+            cached = unchanged_updates.get("ActualizarRepLegales", rut_empresa, payload)
+            if cached is not None:
+                return cached
+        
         if self.use_mocks:
             logger.info(f"Usando mock para ActualizarRepLegales con RUT: {rut_empresa}")
             success = rut_empresa != 11111111
-            return self._get_mock_response("ActualizarRepLegales", success)
+            response = self._get_mock_response("ActualizarRepLegales", success)
+            unchanged_updates.remember("ActualizarRepLegales", rut_empresa, payload, response)
+            return response
         
         try:
             logger.info(f"Llamando a ActualizarRepLegales SOAP para RUT: {rut_empresa}")
             
-            result = self.client.service.ActualizarRepLegales(
-                idSistema=id_sistema,
-                rutEmpresa=rut_empresa,
-                dvEmpresa=dv_empresa
+            result = await run_soap_call(
+                "registro", "ActualizarRepLegales", self.client.service.ActualizarRepLegales,
+                **payload
             )
             
-            return RespuestaProcesoBe(
+            response = RespuestaProcesoBe(
                 estadoProceso=TipoEstado(result.estadoProceso),
                 codigoProceso=result.codigoProceso,
                 respuestaProceso=result.respuestaProceso
             )
+            unchanged_updates.remember("ActualizarRepLegales", rut_empresa, payload, response)
+            return response
             
         except Fault as fault:
             logger.error(f"Error SOAP en ActualizarRepLegales: {fault}")
@@ -336,6 +385,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ActualizarRepLegales: {str(e)}")
             return RespuestaProcesoBe(
@@ -344,28 +395,41 @@ class RegistroSoapClientService:
                 respuestaProceso=f"Error de conexión: {str(e)}"
             )
     
-    async def actualizar_tipo_entidad(self, id_sistema: int, rut_empresa: int, dv_empresa: Optional[str], tipo_entidad: TipoEmpresa) -> RespuestaProcesoBe:
+    async def actualizar_tipo_entidad(self, id_sistema: int, rut_empresa: int, dv_empresa: Optional[str], tipo_entidad: TipoEmpresa, force: bool = False) -> RespuestaProcesoBe:
         """Actualiza el tipo de entidad de una empresa"""
+        payload = {
+            "idSistema": id_sistema,
+            "rutEmpresa": rut_empresa,
+            "dvEmpresa": dv_empresa,
+            "tipoEntidad": tipo_entidad.value
+        }
+        if not force:
+            cached = unchanged_updates.get("ActualizarTipoEntidad", rut_empresa, payload)
+            if cached is not None:
+                return cached
+        
         if self.use_mocks:
             logger.info(f"Usando mock para ActualizarTipoEntidad con RUT: {rut_empresa}")
             success = rut_empresa != 11111111
-            return self._get_mock_response("ActualizarTipoEntidad", success)
+            response = self._get_mock_response("ActualizarTipoEntidad", success)
+            unchanged_updates.remember("ActualizarTipoEntidad", rut_empresa, payload, response)
+            return response
         
         try:
             logger.info(f"Llamando a ActualizarTipoEntidad SOAP para RUT: {rut_empresa}")
             
-            result = self.client.service.ActualizarTipoEntidad(
-                idSistema=id_sistema,
-                rutEmpresa=rut_empresa,
-                dvEmpresa=dv_empresa,
-                tipoEntidad=tipo_entidad.value
+            result = await run_soap_call(
+                "registro", "ActualizarTipoEntidad", self.client.service.ActualizarTipoEntidad,
+                **payload
             )
             
-            return RespuestaProcesoBe(
+            response = RespuestaProcesoBe(
                 estadoProceso=TipoEstado(result.estadoProceso),
                 codigoProceso=result.codigoProceso,
                 respuestaProceso=result.respuestaProceso
             )
+            unchanged_updates.remember("ActualizarTipoEntidad", rut_empresa, payload, response)
+            return response
             
         except Fault as fault:
             logger.error(f"Error SOAP en ActualizarTipoEntidad: {fault}")
@@ -374,6 +438,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ActualizarTipoEntidad: {str(e)}")
             return RespuestaProcesoBe(
@@ -392,7 +458,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a RegistroEmpresaConCus SOAP para RUT: {datos_empresa.RutEmpresa}")
             
-            result = self.client.service.RegistroEmpresaConCus(
+            result = await run_soap_call(
+                "registro", "RegistroEmpresaConCus", self.client.service.RegistroEmpresaConCus,
                 idSistema=id_sistema,
                 datosEmpresa=datos_empresa.model_dump()
             )
@@ -410,6 +477,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en RegistroEmpresaConCus: {str(e)}")
             return RespuestaProcesoBe(
@@ -428,7 +497,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a CambioCusEmpresa SOAP para RUT: {rut_empresa}")
             
-            result = self.client.service.CambioCusEmpresa(
+            result = await run_soap_call(
+                "registro", "CambioCusEmpresa", self.client.service.CambioCusEmpresa,
                 idSistema=id_sistema,
                 rutEmpresa=rut_empresa,
                 dvRutEmpresa=dv_rut_empresa,
@@ -449,6 +519,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en CambioCusEmpresa: {str(e)}")
             return RespuestaProcesoBe(
@@ -467,7 +539,8 @@ class RegistroSoapClientService:
         try:
             logger.info(f"Llamando a RegistroEmpresaOracle SOAP")
             
-            result = self.client.service.RegistroEmpresaOracle(
+            result = await run_soap_call(
+                "registro", "RegistroEmpresaOracle", self.client.service.RegistroEmpresaOracle,
                 idSistema=id_sistema,
                 datosEmpresa=datos_empresa.model_dump()
             )
@@ -486,6 +559,8 @@ class RegistroSoapClientService:
                 codigoProceso=502,
                 respuestaProceso=f"Error SOAP: {str(fault)}"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en RegistroEmpresaOracle: {str(e)}")
             return RespuestaProcesoBe(
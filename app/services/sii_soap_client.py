@@ -3,7 +3,6 @@ Cliente SOAP para el servicio SII (Servicio de Impuestos Internos)
 """
 from typing import Optional
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from zeep.settings import Settings
 from requests import Session
@@ -11,6 +10,11 @@ from loguru import logger
 from datetime import datetime
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_fast_decode import fast_operation
+from app.services.soap_recording import build_transport, soap_plugins
+from app.services.soap_templates import template_operation
+from app.utils.errors import RetryLaterError
 from app.models.sii import *
 
 
@@ -20,7 +24,7 @@ class SiiSoapClientService:
     def __init__(self):
         self.client: Optional[Client] = None
         self.use_mocks = settings.use_soap_mocks
-        self.wsdl_url = "https://wsdesa.sence.cl/WsMiddleware/WsConsulta_SII.asmx?wsdl"
+        self.wsdl_url = settings.sii_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -30,7 +34,7 @@ class SiiSoapClientService:
         try:
             session = Session()
             session.timeout = settings.soap_timeout
-            transport = Transport(session=session)
+            transport = build_transport("sii", session=session, operation_timeout=settings.soap_timeout)
             
             soap_settings = Settings(
                 strict=False,
@@ -40,6 +44,7 @@ class SiiSoapClientService:
             self.client = Client(
                 wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("sii"),
                 settings=soap_settings
             )
             
@@ -87,7 +92,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaRepresentanteLegal(
+            result = await run_soap_call(
+                "sii", "ConsultaRepresentanteLegal", self.client.service.ConsultaRepresentanteLegal,
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv
@@ -99,6 +105,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaRepresentanteLegal: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaRepresentanteLegal: {str(e)}")
             raise
@@ -114,7 +122,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaRelacionContribuyenteEmpresa(
+            result = await run_soap_call(
+                "sii", "ConsultaRelacionContribuyenteEmpresa", self.client.service.ConsultaRelacionContribuyenteEmpresa,
                 idSistema=request.idSistema,
                 rutEmp=request.rutEmp,
                 dvEmp=request.dvEmp,
@@ -128,6 +137,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaRelacionContribuyenteEmpresa: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaRelacionContribuyenteEmpresa: {str(e)}")
             raise
@@ -143,7 +154,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaMovimientoContribuyente(
+            result = await run_soap_call(
+                "sii", "ConsultaMovimientoContribuyente", self.client.service.ConsultaMovimientoContribuyente,
                 idSistema=request.idSistema,
                 rutCont=request.rutCont,
                 dvCont=request.dvCont,
@@ -156,6 +168,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaMovimientoContribuyente: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaMovimientoContribuyente: {str(e)}")
             raise
@@ -176,7 +190,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaNumeroEmpleados(
+            result = await run_soap_call(
+                "sii", "ConsultaNumeroEmpleados", self.client.service.ConsultaNumeroEmpleados,
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv,
@@ -189,6 +204,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaNumeroEmpleados: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaNumeroEmpleados: {str(e)}")
             raise
@@ -211,7 +228,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaCategoriaEmpresa(
+            result = await run_soap_call(
+                "sii", "ConsultaCategoriaEmpresa", self.client.service.ConsultaCategoriaEmpresa,
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv,
@@ -225,6 +243,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaCategoriaEmpresa: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaCategoriaEmpresa: {str(e)}")
             raise
@@ -248,7 +268,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaDatosContribuyente(
+            result = await run_soap_call(
+                "sii", "ConsultaDatosContribuyente", fast_operation(self.client, "sii", "ConsultaDatosContribuyente", RespuestaSiiDatosContribuyenteBe),
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv
@@ -260,6 +281,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaDatosContribuyente: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaDatosContribuyente: {str(e)}")
             raise
@@ -287,7 +310,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaActividadEconomica(
+            result = await run_soap_call(
+                "sii", "ConsultaActividadEconomica", self.client.service.ConsultaActividadEconomica,
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv
@@ -299,6 +323,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaActividadEconomica: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaActividadEconomica: {str(e)}")
             raise
@@ -314,7 +340,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaEstadoGiro(
+            result = await run_soap_call(
+                "sii", "ConsultaEstadoGiro", template_operation(self.client, "ConsultaEstadoGiro"),
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv
@@ -326,6 +353,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaEstadoGiro: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaEstadoGiro: {str(e)}")
             raise
@@ -341,7 +370,8 @@ class SiiSoapClientService:
             )
         
         try:
-            result = self.client.service.ConsultaFechaInicioActividad(
+            result = await run_soap_call(
+                "sii", "ConsultaFechaInicioActividad", self.client.service.ConsultaFechaInicioActividad,
                 idSistema=request.idSistema,
                 rut=request.rut,
                 dv=request.dv
@@ -353,6 +383,8 @@ class SiiSoapClientService:
         except Fault as fault:
             logger.error(f"Error SOAP en ConsultaFechaInicioActividad: {fault}")
             raise
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ConsultaFechaInicioActividad: {str(e)}")
             raise
@@ -3,12 +3,15 @@ Cliente SOAP para el servicio de Identificación de SENCE
 """
 from typing import Optional, List, Dict, Any
 from zeep import Client
-from zeep.transports import Transport
 from zeep.exceptions import Fault
 from requests import Session
 from loguru import logger
 
 from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.services.soap_recording import build_transport, soap_plugins
+from app.services.soap_templates import template_operation
+from app.utils.errors import RetryLaterError
 from app.models.identificacion import (
     IniciarSesionResponse, 
     IniciarSesionPorGuidResponse, 
@@ -25,6 +28,7 @@ class SoapClientService:
     def __init__(self):
         self.client: Optional[Client] = None
         self.use_mocks = settings.use_soap_mocks
+        self.wsdl_url = settings.sence_wsdl_url
         
         if not self.use_mocks:
             self._initialize_client()
@@ -37,7 +41,8 @@ class SoapClientService:
             session.verify = True
             
             # Configurar transporte con timeouts y configuraciones para XML grandes
-            transport = Transport(
+            transport = build_transport(
+                "identificacion",
                 session=session,
                 timeout=settings.soap_timeout,
                 operation_timeout=settings.soap_timeout,
@@ -47,15 +52,16 @@ class SoapClientService:
             
             # Crear cliente SOAP
             self.client = Client(
-                wsdl=settings.sence_wsdl_url,
+                wsdl=self.wsdl_url,
                 transport=transport,
+                plugins=soap_plugins("identificacion"),
             )
             
             # Configurar settings para árboles XML grandes
             self.client.settings.strict = False
             self.client.settings.xml_huge_tree = True
             
-            logger.info(f"Cliente SOAP inicializado correctamente para: {settings.sence_wsdl_url}")
+            logger.info(f"Cliente SOAP inicializado correctamente para: {self.wsdl_url}")
             
         except Exception as e:
             logger.error(f"Error al inicializar cliente SOAP: {str(e)}")
@@ -150,7 +156,8 @@ class SoapClientService:
         
         try:
             logger.info(f"Llamando a IniciarSesion SOAP para usuario: {usuario}")
-            result = self.client.service.IniciarSesion(
+            result = await run_soap_call(
+                "identificacion", "IniciarSesion", self.client.service.IniciarSesion,
                 usuario=usuario,
                 clave=clave
             )
@@ -172,6 +179,8 @@ class SoapClientService:
                 mensaje=str(fault),
                 codigo_error="SOAP_FAULT"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en IniciarSesion: {str(e)}")
             return IniciarSesionResponse(
@@ -190,7 +199,7 @@ class SoapClientService:
         
         try:
             logger.info(f"Llamando a IniciarSesionPorGuid SOAP para GUID: {guid}")
-            result = self.client.service.IniciarSesionPorGuid(guid=guid)
+            result = await run_soap_call("identificacion", "IniciarSesionPorGuid", self.client.service.IniciarSesionPorGuid, guid=guid)
             
             return IniciarSesionPorGuidResponse(
                 success=True,
@@ -207,6 +216,8 @@ class SoapClientService:
                 mensaje=str(fault),
                 codigo_error="SOAP_FAULT"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en IniciarSesionPorGuid: {str(e)}")
             return IniciarSesionPorGuidResponse(
@@ -224,7 +235,7 @@ class SoapClientService:
         
         try:
             logger.info(f"Llamando a IniciarSesionToken SOAP para token: {token[:10]}...")
-            result = self.client.service.IniciarSesionToken(token=token)
+            result = await run_soap_call("identificacion", "IniciarSesionToken", template_operation(self.client, "IniciarSesionToken"), token=token)
             
             return IniciarSesionTokenResponse(
                 success=True,
@@ -241,6 +252,8 @@ class SoapClientService:
                 mensaje=str(fault),
                 codigo_error="SOAP_FAULT"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en IniciarSesionToken: {str(e)}")
             return IniciarSesionTokenResponse(
@@ -258,7 +271,7 @@ class SoapClientService:
         
         try:
             logger.info(f"Llamando a ObtenerListadoURLporRut SOAP para RUT: {rut}")
-            result = self.client.service.ObtenerListadoURLporRut(rut=rut)
+            result = await run_soap_call("identificacion", "ObtenerListadoURLporRut", self.client.service.ObtenerListadoURLporRut, rut=rut)
             
             # Procesar la respuesta del SOAP
             sistemas = []
@@ -285,6 +298,8 @@ class SoapClientService:
                 mensaje=str(fault),
                 codigo_error="SOAP_FAULT"
             )
+        except RetryLaterError:
+            raise
         except Exception as e:
             logger.error(f"Error general en ObtenerListadoURLporRut: {str(e)}")
             return ObtenerListadoURLporRutResponse(
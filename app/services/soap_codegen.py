@@ -0,0 +1,182 @@
+"""
+Generador de stubs de las operaciones SOAP con camino directo
+
+Para las operaciones que los clientes llaman con template_operation o
+fast_operation (OPERATIONS), lee los WSDL incluidos en SOAP/ y escribe
+app/services/soap_stubs.py con, por operación:
+
+- request: clase con __slots__ y parámetros tipados con la SOAPAction, el
+  orden de los parámetros y los fragmentos fijos del sobre; render()
+  concatena los fragmentos con los valores escapados. En runtime reemplaza
+  la compilación de la plantilla con zeep (ver soap_templates.template_for).
+- respuesta: ruta Response/Result dentro del Body, que la decodificación
+  directa usa para ubicar el resultado sin recorrer el sobre.
+
+Si el request tiene parámetros que la plantilla no admite (p. ej. enums en
+ConsultaPerfilUsuarioSistemaPorRut) solo se genera la ruta de respuesta y el
+request se sigue armando con zeep.
+
+Las claves son el nombre calificado del elemento de request, de modo que un
+WSDL en runtime con otro namespace simplemente no encuentra su stub.
+
+Uso:
+    python -m app.services.soap_codegen          # regenera soap_stubs.py
+    python -m app.services.soap_codegen --check  # termina con código 1 si está desactualizado
+"""
+import argparse
+import keyword
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from zeep import Client
+from zeep.settings import Settings
+from zeep.xsd.types import builtins
+
+from app.services.soap_templates import EnvelopeTemplate, TemplateError
+
+
+SOAP_DIR = Path(__file__).resolve().parents[2] / "SOAP"
+STUBS_PATH = Path(__file__).resolve().parent / "soap_stubs.py"
+
+# WSDL en SOAP/ y operaciones con plantilla o decodificación directa por servicio
+OPERATIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "identificacion": ("Clave única.xml", ("IniciarSesionToken",)),
+    "consulta_rc": ("Registro civil.xml", ("ConsultaRun",)),
+    "perfiles": ("Sadper.xml", (
+        "ConsultaEmpresasPorPerfilSistema",
+        "ConsultaFuncionesPorPerfilSistema",
+        "ConsultaFuncionesPorSistema",
+        "ConsultaPerfilPorSistema",
+        "ConsultaPerfilUsuarioSistemaPorRut",
+        "ConsultaUsuariosPorPerfilSistema",
+    )),
+    "sii": ("SII.xml", ("ConsultaDatosContribuyente", "ConsultaEstadoGiro")),
+}
+
+_PYTHON_KINDS = {builtins.String: str, builtins.Integer: int, builtins.Boolean: bool}
+_ENCODER_NAMES = {str: "_string", int: "_integer", bool: "_boolean"}
+
+HEADER = '''"""
+Stubs de las operaciones SOAP con camino directo, generados desde SOAP/
+
+Generado por python -m app.services.soap_codegen; no editar a mano.
+"""
+from typing import Dict
+from xml.sax.saxutils import escape
+
+
+def _string(value: str) -> bytes:
+    return escape(value).encode("utf-8")
+
+
+def _integer(value: int) -> bytes:
+    return str(value).encode("ascii")
+
+
+def _boolean(value: bool) -> bytes:
+    return b"true" if value else b"false"
+'''
+
+
+def _class_name(service: str, operation: str) -> str:
+    prefix = "".join(part.capitalize() for part in service.split("_"))
+    return f"{prefix}{operation[0].upper()}{operation[1:]}Request"
+
+
+def _request_stub(service: str, operation: str, client: Client) -> Tuple[str, str]:
+    """(elemento de request, código de la clase) de una operación"""
+    template = EnvelopeTemplate(client, operation)
+    operation_obj = client.service._binding.get(operation)
+    params = []
+    for name, _, kind in template.params:
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise TemplateError(f"{name} no es un identificador válido")
+        params.append((name, _PYTHON_KINDS[kind]))
+    names = [name for name, _ in params]
+    arguments = ", ".join(f"{name}: {kind.__name__}" for name, kind in params)
+    lines = [
+        "",
+        "",
+        f"class {_class_name(service, operation)}:",
+        f'    """{service}.{operation}"""',
+        "",
+        f"    __slots__ = {tuple(names)!r}",
+        "",
+        f"    soap_action = {operation_obj.soapaction!r}",
+        f"    params = ({', '.join(f'({name!r}, {kind.__name__})' for name, kind in params)}{',' if len(params) == 1 else ''})",
+        f"    headers = {template.headers!r}",
+        "    fragments = (",
+        *(f"        {fragment!r}," for fragment in template.fragments),
+        "    )",
+        "",
+        f"    def __init__(self{', ' if arguments else ''}{arguments}):",
+        *(f"        self.{name} = {name}" for name in names),
+        *(["        pass"] if not names else []),
+        "",
+        "    def render(self) -> bytes:",
+        "        fragments = self.fragments",
+        "        return b\"\".join((",
+        "            fragments[0],",
+    ]
+    for index, (name, kind) in enumerate(params, start=1):
+        lines.append(f"            {_ENCODER_NAMES[kind]}(self.{name}),")
+        lines.append(f"            fragments[{index}],")
+    lines.append("        ))")
+    return operation_obj.input.body.qname.text, "\n".join(lines)
+
+
+def _result_path(client: Client, operation: str) -> str:
+    """Ruta Response/Result del resultado dentro del Body"""
+    body = client.service._binding.get(operation).output.body
+    [(_, result)] = body.type.elements
+    return f"{body.qname.text}/{result.qname.text}"
+
+
+def generate(soap_dir: Path = SOAP_DIR) -> str:
+    """Código fuente de soap_stubs.py"""
+    stubs: List[str] = []
+    requests: List[Tuple[str, str]] = []
+    results: List[Tuple[str, str]] = []
+    for service, (filename, operations) in OPERATIONS.items():
+        client = Client(str(soap_dir / filename), settings=Settings(strict=False))
+        for operation in operations:
+            element = client.service._binding.get(operation).input.body.qname.text
+            try:
+                _, code = _request_stub(service, operation, client)
+            except TemplateError as e:
+                print(f"{service}.{operation}: sin stub de request ({e})", file=sys.stderr)
+            else:
+                stubs.append(code)
+                requests.append((element, _class_name(service, operation)))
+            results.append((element, _result_path(client, operation)))
+
+    lines = [HEADER.rstrip("\n"), *stubs, "", "", "# Clase de request por elemento de request calificado"]
+    lines.append("REQUESTS: Dict[str, type] = {")
+    lines.extend(f"    {key!r}: {name}," for key, name in requests)
+    lines.append("}")
+    lines.extend(["", "# Ruta Response/Result dentro del Body por elemento de request calificado"])
+    lines.append("RESULTS: Dict[str, str] = {")
+    lines.extend(f"    {key!r}: {path!r}," for key, path in results)
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera app/services/soap_stubs.py desde los WSDL de SOAP/")
+    parser.add_argument("--check", action="store_true", help="Solo verificar que soap_stubs.py esté al día")
+    args = parser.parse_args()
+
+    source = generate()
+    if args.check:
+        if not STUBS_PATH.exists() or STUBS_PATH.read_text(encoding="utf-8") != source:
+            print(f"{STUBS_PATH} está desactualizado; ejecutar python -m app.services.soap_codegen")
+            sys.exit(1)
+        print(f"{STUBS_PATH} al día")
+        return
+    STUBS_PATH.write_text(source, encoding="utf-8")
+    print(f"Stubs escritos en {STUBS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Ejecución de llamadas SOAP en un pool de hilos dedicado
+
+Las llamadas de zeep son bloqueantes; ejecutarlas directamente dentro de los
+métodos async bloquea el event loop. Este módulo las envía a un pool de hilos
+propio y lleva la cuenta de llamadas en cola y en curso por servicio.
+
+run_soap_call es el punto único por el que pasan todas las operaciones SOAP y
+aplica las protecciones comunes (reintentos, hedging, circuit breaker por
+operación y límite adaptativo de concurrencia por servicio).
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+from zeep.exceptions import Fault
+
+from app.config.settings import settings
+from app.utils.chaos import chaos_injector
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.concurrency import adaptive_limiters
+from app.utils.deadline import DeadlineExceededError, check_deadline, remaining
+from app.utils.errors import RetryLaterError
+from app.utils.hedging import hedge_budgets, hedge_delay
+from app.utils.latency import latency_trackers
+from app.utils.metrics import metrics
+from app.utils.retry import backoff_delay, is_idempotent, is_retryable_error, retry_budgets
+
+
+def _call_within_deadline(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Descarta la llamada si el deadline del request venció mientras esperaba en cola"""
+    check_deadline()
+    return func(*args, **kwargs)
+
+
+class SoapExecutor:
+    """Pool de hilos para llamadas SOAP con contadores de saturación"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="soap")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._in_flight: Dict[str, int] = defaultdict(int)
+
+    def _run_tracked(self, func: Callable[[], Any]) -> Any:
+        """Ejecuta la llamada en el hilo del pool actualizando los contadores"""
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _on_done(self, future) -> None:
+        """Descuenta de la cola las llamadas canceladas antes de comenzar"""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, service: str, operation: str, func: Callable[..., Any], *args,
+                  on_done: Optional[Callable[[Future], None]] = None, **kwargs) -> Any:
+        """
+        Ejecuta una operación SOAP bloqueante en el pool y espera su resultado
+
+        Args:
+            service: Nombre lógico del servicio (ej: "registro", "sii")
+            operation: Nombre de la operación SOAP
+            func: Callable bloqueante (ej: self.client.service.ConsultaRun)
+            on_done: Se invoca con el Future del pool cuando el hilo termina la
+                llamada (o si se cancela antes de comenzar), aunque quien espera
+                ya se haya ido por cancelación o deadline
+        """
+        loop = asyncio.get_running_loop()
+        if settings.chaos_enabled:
+            func = chaos_injector.wrap(service, operation, func)
+        # Propagar contextvars (ej: muestreo de logs) al hilo del pool
+        ctx = contextvars.copy_context()
+        call = partial(ctx.run, _call_within_deadline, func, *args, **kwargs)
+
+        with self._lock:
+            self._queued += 1
+            self._in_flight[service] += 1
+        try:
+            try:
+                future = self._executor.submit(self._run_tracked, call)
+            except RuntimeError:
+                # Pool cerrado: la llamada nunca comienza
+                if on_done is not None:
+                    cancelled: Future = Future()
+                    cancelled.cancel()
+                    on_done(cancelled)
+                raise
+            future.add_done_callback(self._on_done)
+            if on_done is not None:
+                # Antes de wrap_future: corre antes de despertar a quien espera
+                future.add_done_callback(on_done)
+            wrapped = asyncio.wrap_future(future, loop=loop)
+            left = remaining()
+            if left is None:
+                return await wrapped
+            try:
+                # No esperar más allá del deadline del request
+                return await asyncio.wait_for(wrapped, timeout=max(left, 0))
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError()
+        finally:
+            with self._lock:
+                self._in_flight[service] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot de la saturación del pool"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "in_flight": {name: count for name, count in self._in_flight.items() if count},
+            }
+
+
+# Instancia global del pool SOAP
+soap_executor = SoapExecutor(max_workers=settings.soap_max_workers)
+
+
+async def _call_limited(service: str, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta la llamada dentro del límite adaptativo de concurrencia del servicio
+
+    El cupo se libera cuando el hilo del pool termina la llamada, no cuando
+    deja de esperarla quien la hizo: una llamada hedged perdedora o vencida por
+    deadline sigue ocupando al upstream y cuenta hasta que responde. Un Fault
+    cuenta como respuesta normal; los demás errores del upstream reducen el
+    límite. Los rechazos del gateway y llamadas canceladas antes de comenzar
+    no lo modifican.
+    """
+    if not settings.soap_adaptive_concurrency_enabled:
+        return await soap_executor.run(service, operation, func, *args, **kwargs)
+    
+    limiter = adaptive_limiters.get(service)
+    timeout = settings.soap_concurrency_queue_timeout
+    left = remaining()
+    if left is not None:
+        timeout = min(timeout, left)
+    await limiter.acquire(timeout, settings.soap_concurrency_max_queue)
+    start = time.monotonic()
+
+    def release(future: Future) -> None:
+        if future.cancelled():
+            limiter.release()
+            return
+        exc = future.exception()
+        if isinstance(exc, RetryLaterError):
+            limiter.release()
+        elif exc is None or isinstance(exc, Fault):
+            limiter.release(time.monotonic() - start)
+        else:
+            limiter.release(time.monotonic() - start, dropped=True)
+
+    return await soap_executor.run(service, operation, func, *args, on_done=release, **kwargs)
+
+
+async def _call_with_breaker(service: str, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta un intento de la operación SOAP protegido por su circuit breaker
+
+    Un Fault de zeep cuenta como éxito para el breaker (el upstream respondió);
+    los errores de transporte y timeouts cuentan como fallo. Con el circuito
+    abierto lanza CircuitOpenError sin llamar al upstream. La latencia de cada
+    respuesta del upstream se registra en app.utils.latency.
+    """
+    breaker = circuit_breakers.get(service, operation) if settings.circuit_breaker_enabled else None
+    permit = breaker.before_call() if breaker else None
+    tracker = latency_trackers.get(service, operation)
+    start = time.monotonic()
+    try:
+        result = await _call_limited(service, operation, func, *args, **kwargs)
+    except Fault:
+        elapsed = time.monotonic() - start
+        tracker.record(elapsed)
+        if breaker:
+            breaker.record(True, elapsed, permit)
+        raise
+    except (asyncio.CancelledError, RetryLaterError):
+        # Sin resultado del upstream: no cuenta ni como éxito ni como fallo
+        if breaker:
+            breaker.release(permit)
+        raise
+    except Exception:
+        if breaker:
+            breaker.record(False, time.monotonic() - start, permit)
+        raise
+    elapsed = time.monotonic() - start
+    tracker.record(elapsed)
+    if breaker:
+        breaker.record(True, elapsed, permit)
+    return result
+
+
+async def _call_hedged(service: str, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta un intento de la operación, enviando una segunda llamada idéntica si
+    la primera no responde dentro del p95 observado (ver app.utils.hedging).
+
+    Gana la primera respuesta exitosa (un Fault también es una respuesta); la
+    otra se cancela. El hilo de la llamada perdedora no puede interrumpirse y
+    termina en segundo plano, ocupando su cupo del límite de concurrencia hasta
+    entonces. Si ambas fallan se propaga el error de la original.
+    """
+    delay = hedge_delay(service, operation)
+    if delay is None:
+        return await _call_with_breaker(service, operation, func, *args, **kwargs)
+    
+    budget = hedge_budgets.get(service)
+    budget.deposit()
+    primary = asyncio.ensure_future(_call_with_breaker(service, operation, func, *args, **kwargs))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+        if not budget.withdraw():
+            metrics.inc("soap_hedge_budget_exhausted_total", service=service, operation=operation)
+            return await primary
+        
+        metrics.inc("soap_hedged_requests_total", service=service, operation=operation)
+        logger.debug(f"Enviando llamada hedged a {service}.{operation} tras {delay:.3f}s sin respuesta")
+        hedge = asyncio.ensure_future(_call_with_breaker(service, operation, func, *args, **kwargs))
+        pending.add(hedge)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None or isinstance(task.exception(), Fault):
+                    if task is hedge:
+                        metrics.inc("soap_hedge_wins_total", service=service, operation=operation)
+                    return task.result()
+        return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def run_soap_call(service: str, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta una operación SOAP en el pool global
+
+    Las operaciones de lectura idempotentes se reintentan ante errores
+    transitorios de transporte, hasta settings.soap_retry_attempts veces, con
+    backoff exponencial con jitter y sujeto al presupuesto de reintentos del
+    servicio. Cada intento pasa por el circuit breaker de la operación y, si
+    está habilitado, las lecturas lentas se envían hedged.
+    
+    Si el request tiene deadline (ver app.middleware.deadline), la espera en
+    cola, los reintentos y el operation_timeout de zeep se acotan al tiempo
+    restante, y se lanza DeadlineExceededError cuando se agota.
+    """
+    retryable_operation = is_idempotent(service, operation)
+    budget = retry_budgets.get(service)
+    budget.deposit()
+    
+    attempt = 0
+    while True:
+        try:
+            return await _call_hedged(service, operation, func, *args, **kwargs)
+        except Exception as exc:
+            if (
+                not retryable_operation
+                or attempt >= settings.soap_retry_attempts
+                or not is_retryable_error(exc)
+            ):
+                raise
+            if not budget.withdraw():
+                metrics.inc("soap_retry_budget_exhausted_total", service=service, operation=operation)
+                raise
+            attempt += 1
+            delay = backoff_delay(attempt, settings.soap_retry_backoff_base, settings.soap_retry_backoff_max)
+            left = remaining()
+            if left is not None and left <= delay:
+                # El reintento no alcanzaría a completarse dentro del deadline
+                raise
+            metrics.inc("soap_retries_total", service=service, operation=operation)
+            logger.warning(
+                f"Reintento {attempt}/{settings.soap_retry_attempts} de {service}.{operation} "
+                f"en {delay:.2f}s tras error: {exc}"
+            )
+            await asyncio.sleep(delay)
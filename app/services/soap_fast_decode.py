@@ -0,0 +1,226 @@
+"""
+Decodificación directa de respuestas SOAP a modelos pydantic
+
+Para las operaciones de mayor volumen, zeep construye un árbol de objetos
+genérico a partir del XML que luego se vuelve a recorrer para validar el
+modelo de respuesta. ModelDecoder precompila, por modelo, un mapa de nombres
+de elemento a campos y convierte el Result de la respuesta en un dict que se
+valida de una vez con pydantic, sin pasar por los tipos xsd de zeep.
+
+Ante cualquier sorpresa de esquema (elemento desconocido, estructura distinta
+o error de validación) se vuelve a zeep sobre el mismo documento ya parseado,
+por lo que el resultado nunca es peor que el camino normal.
+
+Las operaciones con stub generado (soap_stubs.RESULTS) ubican el Result con
+la ruta del WSDL en vez de tomar el primer hijo de cada nivel, de modo que
+una respuesta con otro elemento no se decodifica como si fuera el Result.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from loguru import logger
+from lxml import etree
+from lxml.etree import XMLSyntaxError
+from pydantic import BaseModel, ValidationError
+from zeep import Client
+from zeep import plugins
+from zeep.loader import parse_xml
+from zeep.utils import get_media_type
+
+from app.config.settings import settings
+from app.services.soap_process_pool import soap_process_pool
+from app.services.soap_stubs import RESULTS
+from app.services.soap_templates import request_element, send_raw
+from app.utils.field_selection import FieldSelection, current_selection, field_type
+from app.utils.metrics import metrics
+
+
+metrics.describe("soap_fast_decode_total", "Respuestas SOAP decodificadas directamente (fast) o con zeep (fallback)")
+
+_XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+_SOAP_NAMESPACES = ("http://schemas.xmlsoap.org/soap/envelope/", "http://www.w3.org/2003/05/soap-envelope")
+
+
+class FastDecodeError(Exception):
+    """La respuesta no calza con el modelo y debe decodificarse con zeep"""
+
+
+class _Field(NamedTuple):
+    name: str
+    many: bool
+    decoder: Optional["ModelDecoder"]
+    optional: bool
+
+
+def _local_name(tag: str) -> str:
+    return tag[tag.rfind("}") + 1:]
+
+
+class ModelDecoder:
+    """Mapa precompilado de elementos XML a los campos de un modelo pydantic"""
+
+    def __init__(self, model: type):
+        self.model = model
+        self.fields: Dict[str, _Field] = {}
+        for name, info in model.model_fields.items():
+            many, inner = field_type(info.annotation)
+            nested = decoder_for(inner) if isinstance(inner, type) and issubclass(inner, BaseModel) else None
+            field = _Field(name, many, nested, not info.is_required())
+            # Los WSDL no siempre coinciden en mayúsculas con los modelos (Estado / estado)
+            self.fields[name] = field
+            self.fields[name.lower()] = field
+
+    def _field(self, local: str) -> _Field:
+        field = self.fields.get(local) or self.fields.get(local.lower())
+        if field is None:
+            raise FastDecodeError(f"Elemento inesperado {local} en {self.model.__name__}")
+        return field
+
+    def values(self, element, selection: Optional[FieldSelection] = None) -> Dict[str, Any]:
+        """
+        dict con los valores del elemento, listo para model_validate
+
+        Con selection se omiten los campos opcionales que la respuesta no va
+        a incluir (los obligatorios se decodifican igual para validar).
+        """
+        values: Dict[str, Any] = {}
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue
+            field = self._field(_local_name(child.tag))
+            if selection is not None and field.optional and selection.skips(field.name):
+                continue
+            if child.get(_XSI_NIL) in ("true", "1"):
+                values.setdefault(field.name, [] if field.many else None)
+                continue
+            nested = selection.child(field.name) if selection is not None else None
+            if field.many:
+                values.setdefault(field.name, []).extend(self._items(field, child, nested))
+            elif field.decoder is not None:
+                values[field.name] = field.decoder.values(child, nested)
+            elif len(child):
+                raise FastDecodeError(f"Elemento complejo inesperado en {self.model.__name__}.{field.name}")
+            else:
+                values[field.name] = child.text
+        return values
+
+    def _items(self, field: _Field, element, selection: Optional[FieldSelection] = None) -> list:
+        """Elementos de una lista: el propio elemento (maxOccurs > 1) o los hijos de un ArrayOf"""
+        children = [child for child in element if isinstance(child.tag, str)]
+        if field.decoder is None:
+            return [child.text for child in children] if children else [element.text]
+        if children and any(_local_name(child.tag).lower() in field.decoder.fields for child in children):
+            return [field.decoder.values(element, selection)]
+        return [field.decoder.values(child, selection) for child in children]
+
+    def decode(self, envelope, selection: Optional[FieldSelection] = None, *,
+               result_path: Optional[str] = None) -> BaseModel:
+        """
+        Modelo a partir del sobre de respuesta (Body > *Response > *Result)
+
+        Con selection (?fields= / ?exclude=) los campos opcionales descartados
+        no se construyen ni se validan. Con result_path (ruta Response/Result
+        de soap_stubs.RESULTS) el Result se busca por nombre calificado.
+        """
+        body = next((child for child in envelope if child.tag in {f"{{{ns}}}Body" for ns in _SOAP_NAMESPACES}), None)
+        if result_path is not None:
+            result = body.find(result_path) if body is not None else None
+            if result is None:
+                raise FastDecodeError(f"El Body no tiene {result_path}")
+            return self._validate(result, selection)
+        response = next((child for child in body if isinstance(child.tag, str)), None) if body is not None else None
+        result = next((child for child in response if isinstance(child.tag, str)), None) if response is not None else None
+        if result is None:
+            raise FastDecodeError("El Body no tiene la forma Response/Result")
+        return self._validate(result, selection)
+
+    def _validate(self, result, selection: Optional[FieldSelection]) -> BaseModel:
+        try:
+            return self.model.model_validate(self.values(result, selection))
+        except ValidationError as e:
+            raise FastDecodeError(f"{self.model.__name__} no valida: {e.error_count()} errores") from e
+
+
+@lru_cache(maxsize=None)
+def decoder_for(model: type) -> ModelDecoder:
+    """ModelDecoder compilado una vez por modelo"""
+    return ModelDecoder(model)
+
+
+def decode_in_process(content: bytes, model: type, huge_tree: bool,
+                      selection: Optional[FieldSelection] = None,
+                      result_path: Optional[str] = None) -> Optional[BaseModel]:
+    """
+    Parseo y decodificación de una respuesta en un proceso de soap_process_pool
+
+    Retorna None si la respuesta tiene DTD, es un Fault o no calza con el
+    modelo; el llamador la procesa entonces en su proceso con zeep.
+    """
+    parser = etree.XMLParser(remove_comments=True, resolve_entities=False, no_network=True, huge_tree=huge_tree)
+    try:
+        doc = etree.fromstring(content, parser=parser)
+    except XMLSyntaxError:
+        return None
+    if doc.getroottree().docinfo.doctype:
+        return None
+    if any(doc.find(f"{{{ns}}}Body/{{{ns}}}Fault") is not None for ns in _SOAP_NAMESPACES):
+        return None
+    try:
+        return decoder_for(model).decode(doc, selection, result_path=result_path)
+    except FastDecodeError:
+        return None
+
+
+def fast_operation(client: Client, service: str, operation: str, model: type) -> Callable[..., Any]:
+    """
+    Callable equivalente a client.service.<operation> que retorna el modelo decodificado
+
+    Envía el request (con plantilla de sobre si la operación la admite),
+    parsea el XML con la configuración de zeep, aplica los plugins de ingreso
+    y los Fault como zeep, y decodifica el resultado con ModelDecoder. Si el
+    decodificador no puede, retorna el objeto de zeep construido desde el
+    mismo documento; los llamadores siguen usando model.model_validate(result),
+    que acepta ambos. Las respuestas sobre el umbral de soap_process_pool se
+    parsean y decodifican en otro proceso cuando el cliente no tiene plugins.
+    """
+    if not settings.soap_fast_decode_enabled:
+        return getattr(client.service, operation)
+
+    decoder = decoder_for(model)
+    result_path = RESULTS.get(request_element(client, operation))
+
+    def call(**kwargs):
+        binding = client.service._binding
+        response = send_raw(client, operation, **kwargs)
+        operation_obj = binding.get(operation)
+
+        media_type = get_media_type(response.headers.get("Content-Type", "text/xml"))
+        if response.status_code != 200 or not response.content or media_type == "multipart/related" or client.wsse:
+            return binding.process_reply(client, operation_obj, response)
+        selection = current_selection(model)
+        if soap_process_pool.accepts(len(response.content)) and not client.plugins:
+            result = soap_process_pool.run(service, operation, decode_in_process, response.content,
+                                           model, client.settings.xml_huge_tree, selection, result_path)
+            if result is not None:
+                metrics.inc("soap_fast_decode_total", service=service, operation=operation, result="fast")
+                return result
+        try:
+            doc = parse_xml(response.content, client.transport, settings=client.settings)
+        except XMLSyntaxError:
+            # zeep genera el TransportError con el detalle del contenido
+            return binding.process_reply(client, operation_obj, response)
+
+        doc, _ = plugins.apply_ingress(client, doc, response.headers, operation_obj)
+        if doc.find("soap-env:Body/soap-env:Fault", namespaces=binding.nsmap) is not None:
+            return binding.process_error(doc, operation_obj)
+
+        try:
+            result = decoder.decode(doc, selection, result_path=result_path)
+        except FastDecodeError as e:
+            logger.debug(f"Decodificación directa de {service}.{operation} no aplicable, usando zeep: {e}")
+            metrics.inc("soap_fast_decode_total", service=service, operation=operation, result="fallback")
+            return operation_obj.process_reply(doc)
+        metrics.inc("soap_fast_decode_total", service=service, operation=operation, result="fast")
+        return result
+
+    return call
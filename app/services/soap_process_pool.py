@@ -0,0 +1,103 @@
+"""
+Pool de procesos para parsear respuestas SOAP muy grandes
+
+Las respuestas de Perfiles con miles de usuarios o los xmlRespuesta del SII
+pueden pesar varios MB. Parsearlas y validar el modelo dentro del pool de
+hilos SOAP mantiene el GIL durante cientos de milisegundos y frena a los demás
+requests del worker. SoapProcessPool envía ese trabajo a procesos aparte y el
+hilo que espera el resultado libera el GIL mientras tanto.
+
+Los procesos se crean con "spawn" (el worker tiene hilos y un fork los
+copiaría a medio usar) y solo al primer uso. Si un proceso muere, el pool se
+recrea y la llamada se resuelve en el propio proceso.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.utils.metrics import metrics
+
+
+metrics.describe("soap_process_pool_total", "Respuestas SOAP enviadas al pool de procesos por resultado (ok, fallback, error)")
+metrics.describe("soap_process_pool_seconds_total", "Segundos de espera de respuestas procesadas en el pool de procesos")
+
+
+class SoapProcessPool:
+    """Pool de procesos perezoso para parseo y decodificación de XML grandes"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._running = 0
+
+    def accepts(self, size: int) -> bool:
+        """La respuesta supera el umbral configurado para enviarse al pool"""
+        return settings.soap_process_pool_enabled and size >= settings.soap_process_pool_threshold_bytes
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Pool de procesos para XML grandes iniciado ({self.max_workers} procesos)")
+            return self._executor
+
+    def run(self, service: str, operation: str, func: Callable[..., Any], *args) -> Optional[Any]:
+        """
+        Ejecuta func(*args) en un proceso del pool y espera el resultado
+
+        func y sus argumentos deben poder serializarse con pickle. Retorna None
+        si func retorna None (el llamador sigue en el proceso) o si el pool
+        falló.
+        """
+        executor = self._get_executor()
+        with self._lock:
+            self._running += 1
+        start = time.monotonic()
+        try:
+            result = executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            logger.error(f"El pool de procesos XML se cayó procesando {service}.{operation}; se recrea")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            metrics.inc("soap_process_pool_total", service=service, operation=operation, result="error")
+            return None
+        finally:
+            with self._lock:
+                self._running -= 1
+            metrics.inc("soap_process_pool_seconds_total", time.monotonic() - start, service=service, operation=operation)
+        metrics.inc("soap_process_pool_total", service=service, operation=operation,
+                    result="fallback" if result is None else "ok")
+        return result
+
+    def shutdown(self) -> None:
+        """Termina los procesos del pool (se vuelve a crear si se usa de nuevo)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot del pool"""
+        with self._lock:
+            return {
+                "enabled": settings.soap_process_pool_enabled,
+                "started": self._executor is not None,
+                "max_workers": self.max_workers,
+                "running": self._running,
+            }
+
+
+# Instancia global del pool de procesos XML
+soap_process_pool = SoapProcessPool(max_workers=settings.soap_process_pool_workers)
@@ -0,0 +1,291 @@
+"""
+Grabación y replay de tráfico SOAP
+
+Con SOAP_RECORD_ENABLED cada cliente zeep registra un plugin que guarda el
+sobre de request y de respuesta de cada operación, con su latencia, en un
+archivo JSON Lines comprimido con gzip por servicio y día. Antes de escribir,
+los RUT, nombres, contactos y credenciales se reemplazan por seudónimos
+deterministas del mismo largo y forma.
+
+Con SOAP_REPLAY_DIR los clientes usan ReplayTransport, que responde cada POST
+con una grabación de la misma operación respetando la latencia original, sin
+acceso a los servicios reales.
+"""
+import gzip
+import hashlib
+import itertools
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import requests
+from loguru import logger
+from lxml import etree
+from zeep import Plugin
+
+from app.config.settings import settings
+from app.services.soap_transport import DeadlineAwareTransport
+from app.utils.deadline import effective_timeout
+
+
+_RUT_PATTERN = re.compile(r"\b\d{1,2}\.?\d{3}\.?\d{3}-[\dkK]\b")
+# Fecha xsd:date / xsd:dateTime (ej: fechaNacimiento)
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _local_name(element: etree._Element) -> str:
+    return etree.QName(element).localname if isinstance(element.tag, str) else ""
+
+
+def _body_element(envelope: etree._Element) -> str:
+    """Nombre local del primer elemento del Body (la operación en document/literal)"""
+    for child in envelope:
+        if _local_name(child) == "Body":
+            for element in child:
+                if isinstance(element.tag, str):
+                    return _local_name(element)
+    return ""
+
+
+class PiiScrubber:
+    """
+    Reemplaza datos personales de un sobre SOAP por seudónimos deterministas.
+
+    Se seudonimiza el texto de los elementos hoja cuyo nombre calza con alguno
+    de los patrones (sin distinguir mayúsculas) y cualquier RUT que aparezca en
+    texto libre. Las hojas cuyo texto es un documento XML (xmlRespuesta) se
+    parsean y se seudonimizan con las mismas reglas. Las fechas se reemplazan
+    por otra fecha válida. Dígitos se reemplazan por dígitos y letras por letras, de modo
+    que el payload conserva su largo y forma. Con el mismo salt, un mismo valor
+    produce siempre el mismo seudónimo.
+    """
+
+    def __init__(self, patterns: List[str], salt: str = ""):
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        # Sin salt cualquiera podría revertir un RUT probando los 10^8 posibles
+        self.salt = (salt or secrets.token_hex(16)).encode()
+
+    def pseudonym(self, value: str) -> str:
+        digest = hashlib.blake2b(value.encode(), key=self.salt[:64]).digest()
+        if _DATE_PATTERN.match(value):
+            # Una fecha válida, para que el replay la siga pudiendo parsear
+            return f"{1940 + digest[0] % 70:04d}-{1 + digest[1] % 12:02d}-{1 + digest[2] % 28:02d}{value[10:]}"
+        stream = itertools.cycle(digest)
+        chars = []
+        for char in value:
+            if char.isdigit():
+                chars.append(str(next(stream) % 10))
+            elif char.isalpha():
+                letter = chr(ord("a") + next(stream) % 26)
+                chars.append(letter.upper() if char.isupper() else letter)
+            else:
+                chars.append(char)
+        return "".join(chars)
+
+    def is_sensitive(self, name: str) -> bool:
+        return any(pattern.fullmatch(name) for pattern in self.patterns)
+
+    def scrub(self, envelope: etree._Element) -> etree._Element:
+        """Copia del sobre con los datos personales reemplazados"""
+        envelope = etree.fromstring(etree.tostring(envelope))
+        self._scrub_tree(envelope)
+        return envelope
+
+    def _scrub_tree(self, root: etree._Element) -> None:
+        for element in root.iter():
+            if not isinstance(element.tag, str) or not element.text:
+                continue
+            if len(element) == 0 and element.text.lstrip().startswith("<"):
+                # XML escapado dentro de una hoja (ej: xmlRespuesta del SII y RC)
+                element.text = self._scrub_embedded(element.text)
+            elif len(element) == 0 and self.is_sensitive(_local_name(element)):
+                element.text = self.pseudonym(element.text)
+            else:
+                element.text = _RUT_PATTERN.sub(lambda match: self.pseudonym(match.group()), element.text)
+
+    def _scrub_embedded(self, text: str) -> str:
+        """
+        Seudonimiza un documento XML guardado como texto con las mismas reglas
+        que el sobre. Si no se puede parsear se seudonimiza completo: nunca se
+        graba en claro.
+        """
+        parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+        try:
+            root = etree.fromstring(text.strip().encode(), parser)
+        except (etree.XMLSyntaxError, ValueError):
+            return self.pseudonym(text)
+        self._scrub_tree(root)
+        return etree.tostring(root, encoding="unicode")
+
+
+class SoapRecorder:
+    """
+    Archivo de grabaciones SOAP: un .jsonl.gz por servicio y día.
+
+    Las grabaciones se acumulan en memoria y se escriben como un miembro gzip
+    por lote, lo que comprime bastante mejor que un miembro por registro. Los
+    archivos con varios miembros se leen como uno solo con gzip.open.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 50):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self._pending: Dict[Path, List[str]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        path = self.directory / f"{entry['service']}-{datetime.now(timezone.utc):%Y%m%d}.jsonl.gz"
+        with self._lock:
+            pending = self._pending[path]
+            pending.append(json.dumps(entry, ensure_ascii=False))
+            if len(pending) >= self.batch_size:
+                self._write(path)
+
+    def flush(self) -> None:
+        with self._lock:
+            for path in list(self._pending):
+                self._write(path)
+
+    def _write(self, path: Path) -> None:
+        lines = self._pending.pop(path, [])
+        if not lines:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(path, "at", encoding="utf-8") as archive:
+                archive.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar {len(lines)} grabaciones SOAP en {path}: {e}")
+
+
+class SoapRecorderPlugin(Plugin):
+    """Plugin zeep que graba request y respuesta de cada operación de un servicio"""
+
+    def __init__(self, service: str, recorder: SoapRecorder, scrubber: PiiScrubber, sample_rate: float = 1.0):
+        self.service = service
+        self.recorder = recorder
+        self.scrubber = scrubber
+        self.sample_rate = sample_rate
+        # egress e ingress de una misma llamada corren en el mismo hilo del pool SOAP
+        self._local = threading.local()
+
+    def egress(self, envelope, http_headers, operation, binding_options):
+        self._local.pending = None
+        if random.random() < self.sample_rate:
+            request = etree.tostring(self.scrubber.scrub(envelope), encoding="unicode")
+            self._local.pending = (time.perf_counter(), _body_element(envelope), request)
+        return envelope, http_headers
+
+    def ingress(self, envelope, http_headers, operation):
+        pending = getattr(self._local, "pending", None)
+        self._local.pending = None
+        if pending is None:
+            return envelope, http_headers
+
+        started, element, request = pending
+        elapsed = time.perf_counter() - started
+        response = self.scrubber.scrub(envelope)
+        fault = any(_local_name(node) == "Fault" for node in response.iter())
+        self.recorder.record({
+            "service": self.service,
+            "operation": operation.name,
+            "element": element,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "elapsed": round(elapsed, 6),
+            "status": 500 if fault else 200,
+            "content_type": http_headers.get("Content-Type", "text/xml; charset=utf-8"),
+            "request": request,
+            "response": etree.tostring(response, encoding="unicode"),
+        })
+        return envelope, http_headers
+
+
+def load_recordings(directory: str, service: str) -> Iterator[Dict[str, Any]]:
+    """Grabaciones de un servicio en el directorio, en orden de archivo"""
+    for path in sorted(Path(directory).glob(f"{service}-*.jsonl.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ReplayTransport(DeadlineAwareTransport):
+    """
+    Transporte zeep que responde con grabaciones en lugar de llamar al servicio.
+
+    Cada POST se resuelve por el elemento del Body del request, rotando entre
+    las grabaciones de esa operación, y espera la latencia grabada dividida por
+    speed (0 = sin espera). Si la latencia supera el timeout efectivo se
+    espera solo el timeout y se lanza ReadTimeout, igual que el servicio real.
+    El WSDL se sigue cargando desde *_WSDL_URL, que puede apuntar a SOAP/*.xml.
+    """
+
+    def __init__(self, service: str, directory: str, speed: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.service = service
+        self.speed = speed
+        self._lock = threading.Lock()
+
+        by_element: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entry in load_recordings(directory, service):
+            by_element[entry["element"]].append(entry)
+        self._recordings: Dict[str, Iterator[Dict[str, Any]]] = {
+            element: itertools.cycle(entries) for element, entries in by_element.items()
+        }
+        logger.info(
+            f"Replay SOAP de {service}: {sum(len(e) for e in by_element.values())} grabaciones "
+            f"de {len(by_element)} operaciones desde {directory}"
+        )
+
+    def post(self, address, message, headers):
+        element = _body_element(etree.fromstring(message))
+        with self._lock:
+            recordings = self._recordings.get(element)
+            entry = next(recordings) if recordings else None
+
+        response = requests.Response()
+        response.url = address
+        if entry is None:
+            logger.warning(f"Replay SOAP de {self.service}: sin grabaciones para {element}")
+            response.status_code = 404
+            response._content = b""
+            return response
+
+        delay = entry["elapsed"] / self.speed if self.speed > 0 else 0.0
+        timeout = effective_timeout(self.operation_timeout or settings.soap_timeout)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise requests.exceptions.ReadTimeout(f"Replay de {element} excede el timeout de {timeout:.3f}s")
+        time.sleep(delay)
+
+        response.status_code = entry["status"]
+        response.headers["Content-Type"] = entry["content_type"]
+        response._content = entry["response"].encode("utf-8")
+        response.encoding = "utf-8"
+        return response
+
+
+def build_transport(service: str, **kwargs) -> DeadlineAwareTransport:
+    """Transporte del cliente zeep del servicio: replay si hay SOAP_REPLAY_DIR, real en otro caso"""
+    if settings.soap_replay_dir:
+        return ReplayTransport(service, settings.soap_replay_dir, settings.soap_replay_speed, **kwargs)
+    return DeadlineAwareTransport(**kwargs)
+
+
+def soap_plugins(service: str) -> List[Plugin]:
+    """Plugins zeep del servicio: el grabador si SOAP_RECORD_ENABLED"""
+    if not settings.soap_record_enabled:
+        return []
+    scrubber = PiiScrubber(settings.soap_record_scrub_fields, settings.soap_record_scrub_salt)
+    return [SoapRecorderPlugin(service, soap_recorder, scrubber, settings.soap_record_sample_rate)]
+
+
+# Instancia global del archivo de grabaciones
+soap_recorder = SoapRecorder(settings.soap_record_dir, settings.soap_record_batch_size)
@@ -0,0 +1,312 @@
+"""
+Stubs de las operaciones SOAP con camino directo, generados desde SOAP/
+
+Generado por python -m app.services.soap_codegen; no editar a mano.
+"""
+from typing import Dict
+from xml.sax.saxutils import escape
+
+
+def _string(value: str) -> bytes:
+    return escape(value).encode("utf-8")
+
+
+def _integer(value: int) -> bytes:
+    return str(value).encode("ascii")
+
+
+def _boolean(value: bool) -> bytes:
+    return b"true" if value else b"false"
+
+
+class IdentificacionIniciarSesionTokenRequest:
+    """identificacion.IniciarSesionToken"""
+
+    __slots__ = ('idSistema', 'token')
+
+    soap_action = 'http://webservices/WsComponentes/IniciarSesionToken'
+    params = (('idSistema', int), ('token', str))
+    headers = {'SOAPAction': '"http://webservices/WsComponentes/IniciarSesionToken"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:IniciarSesionToken xmlns:ns0="http://webservices/WsComponentes/"><ns0:idSistema>',
+        b'</ns0:idSistema><ns0:token>',
+        b'</ns0:token></ns0:IniciarSesionToken></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int, token: str):
+        self.idSistema = idSistema
+        self.token = token
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+            _string(self.token),
+            fragments[2],
+        ))
+
+
+class ConsultaRcConsultaRunRequest:
+    """consulta_rc.ConsultaRun"""
+
+    __slots__ = ('idSistema', 'rut', 'dv')
+
+    soap_action = 'http://webservices/WsMiddleware/ConsultaRun'
+    params = (('idSistema', int), ('rut', int), ('dv', str))
+    headers = {'SOAPAction': '"http://webservices/WsMiddleware/ConsultaRun"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaRun xmlns:ns0="http://webservices/WsMiddleware/"><ns0:idSistema>',
+        b'</ns0:idSistema><ns0:rut>',
+        b'</ns0:rut><ns0:dv>',
+        b'</ns0:dv></ns0:ConsultaRun></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int, rut: int, dv: str):
+        self.idSistema = idSistema
+        self.rut = rut
+        self.dv = dv
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+            _integer(self.rut),
+            fragments[2],
+            _string(self.dv),
+            fragments[3],
+        ))
+
+
+class PerfilesConsultaEmpresasPorPerfilSistemaRequest:
+    """perfiles.ConsultaEmpresasPorPerfilSistema"""
+
+    __slots__ = ('idSistema', 'idPerfil')
+
+    soap_action = 'http://webservices/WsComponentes/ConsultaEmpresasPorPerfilSistema'
+    params = (('idSistema', int), ('idPerfil', int))
+    headers = {'SOAPAction': '"http://webservices/WsComponentes/ConsultaEmpresasPorPerfilSistema"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaEmpresasPorPerfilSistema xmlns:ns0="http://webservices/WsComponentes/"><ns0:idSistema>',
+        b'</ns0:idSistema><ns0:idPerfil>',
+        b'</ns0:idPerfil></ns0:ConsultaEmpresasPorPerfilSistema></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int, idPerfil: int):
+        self.idSistema = idSistema
+        self.idPerfil = idPerfil
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+            _integer(self.idPerfil),
+            fragments[2],
+        ))
+
+
+class PerfilesConsultaFuncionesPorPerfilSistemaRequest:
+    """perfiles.ConsultaFuncionesPorPerfilSistema"""
+
+    __slots__ = ('idPerfil', 'idSistema')
+
+    soap_action = 'http://webservices/WsComponentes/ConsultaFuncionesPorPerfilSistema'
+    params = (('idPerfil', int), ('idSistema', int))
+    headers = {'SOAPAction': '"http://webservices/WsComponentes/ConsultaFuncionesPorPerfilSistema"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaFuncionesPorPerfilSistema xmlns:ns0="http://webservices/WsComponentes/"><ns0:idPerfil>',
+        b'</ns0:idPerfil><ns0:idSistema>',
+        b'</ns0:idSistema></ns0:ConsultaFuncionesPorPerfilSistema></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idPerfil: int, idSistema: int):
+        self.idPerfil = idPerfil
+        self.idSistema = idSistema
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idPerfil),
+            fragments[1],
+            _integer(self.idSistema),
+            fragments[2],
+        ))
+
+
+class PerfilesConsultaFuncionesPorSistemaRequest:
+    """perfiles.ConsultaFuncionesPorSistema"""
+
+    __slots__ = ('idSistema',)
+
+    soap_action = 'http://webservices/WsComponentes/ConsultaFuncionesPorSistema'
+    params = (('idSistema', int),)
+    headers = {'SOAPAction': '"http://webservices/WsComponentes/ConsultaFuncionesPorSistema"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaFuncionesPorSistema xmlns:ns0="http://webservices/WsComponentes/"><ns0:idSistema>',
+        b'</ns0:idSistema></ns0:ConsultaFuncionesPorSistema></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int):
+        self.idSistema = idSistema
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+        ))
+
+
+class PerfilesConsultaPerfilPorSistemaRequest:
+    """perfiles.ConsultaPerfilPorSistema"""
+
+    __slots__ = ('idSistema',)
+
+    soap_action = 'http://webservices/WsComponentes/ConsultaPerfilPorSistema'
+    params = (('idSistema', int),)
+    headers = {'SOAPAction': '"http://webservices/WsComponentes/ConsultaPerfilPorSistema"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaPerfilPorSistema xmlns:ns0="http://webservices/WsComponentes/"><ns0:idSistema>',
+        b'</ns0:idSistema></ns0:ConsultaPerfilPorSistema></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int):
+        self.idSistema = idSistema
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+        ))
+
+
+class PerfilesConsultaUsuariosPorPerfilSistemaRequest:
+    """perfiles.ConsultaUsuariosPorPerfilSistema"""
+
+    __slots__ = ('idSistema', 'idPerfil')
+
+    soap_action = 'http://webservices/WsComponentes/ConsultaUsuariosPorPerfilSistema'
+    params = (('idSistema', int), ('idPerfil', int))
+    headers = {'SOAPAction': '"http://webservices/WsComponentes/ConsultaUsuariosPorPerfilSistema"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaUsuariosPorPerfilSistema xmlns:ns0="http://webservices/WsComponentes/"><ns0:idSistema>',
+        b'</ns0:idSistema><ns0:idPerfil>',
+        b'</ns0:idPerfil></ns0:ConsultaUsuariosPorPerfilSistema></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int, idPerfil: int):
+        self.idSistema = idSistema
+        self.idPerfil = idPerfil
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+            _integer(self.idPerfil),
+            fragments[2],
+        ))
+
+
+class SiiConsultaDatosContribuyenteRequest:
+    """sii.ConsultaDatosContribuyente"""
+
+    __slots__ = ('idSistema', 'rut', 'dv')
+
+    soap_action = 'http://webservices/WsMiddleware/ConsultaDatosContribuyente'
+    params = (('idSistema', int), ('rut', int), ('dv', str))
+    headers = {'SOAPAction': '"http://webservices/WsMiddleware/ConsultaDatosContribuyente"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaDatosContribuyente xmlns:ns0="http://webservices/WsMiddleware/"><ns0:idSistema>',
+        b'</ns0:idSistema><ns0:rut>',
+        b'</ns0:rut><ns0:dv>',
+        b'</ns0:dv></ns0:ConsultaDatosContribuyente></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int, rut: int, dv: str):
+        self.idSistema = idSistema
+        self.rut = rut
+        self.dv = dv
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+            _integer(self.rut),
+            fragments[2],
+            _string(self.dv),
+            fragments[3],
+        ))
+
+
+class SiiConsultaEstadoGiroRequest:
+    """sii.ConsultaEstadoGiro"""
+
+    __slots__ = ('idSistema', 'rut', 'dv')
+
+    soap_action = 'http://webservices/WsMiddleware/ConsultaEstadoGiro'
+    params = (('idSistema', int), ('rut', int), ('dv', str))
+    headers = {'SOAPAction': '"http://webservices/WsMiddleware/ConsultaEstadoGiro"', 'Content-Type': 'text/xml; charset=utf-8'}
+    fragments = (
+        b'<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body><ns0:ConsultaEstadoGiro xmlns:ns0="http://webservices/WsMiddleware/"><ns0:idSistema>',
+        b'</ns0:idSistema><ns0:rut>',
+        b'</ns0:rut><ns0:dv>',
+        b'</ns0:dv></ns0:ConsultaEstadoGiro></soap-env:Body></soap-env:Envelope>',
+    )
+
+    def __init__(self, idSistema: int, rut: int, dv: str):
+        self.idSistema = idSistema
+        self.rut = rut
+        self.dv = dv
+
+    def render(self) -> bytes:
+        fragments = self.fragments
+        return b"".join((
+            fragments[0],
+            _integer(self.idSistema),
+            fragments[1],
+            _integer(self.rut),
+            fragments[2],
+            _string(self.dv),
+            fragments[3],
+        ))
+
+
+# Clase de request por elemento de request calificado
+REQUESTS: Dict[str, type] = {
+    '{http://webservices/WsComponentes/}IniciarSesionToken': IdentificacionIniciarSesionTokenRequest,
+    '{http://webservices/WsMiddleware/}ConsultaRun': ConsultaRcConsultaRunRequest,
+    '{http://webservices/WsComponentes/}ConsultaEmpresasPorPerfilSistema': PerfilesConsultaEmpresasPorPerfilSistemaRequest,
+    '{http://webservices/WsComponentes/}ConsultaFuncionesPorPerfilSistema': PerfilesConsultaFuncionesPorPerfilSistemaRequest,
+    '{http://webservices/WsComponentes/}ConsultaFuncionesPorSistema': PerfilesConsultaFuncionesPorSistemaRequest,
+    '{http://webservices/WsComponentes/}ConsultaPerfilPorSistema': PerfilesConsultaPerfilPorSistemaRequest,
+    '{http://webservices/WsComponentes/}ConsultaUsuariosPorPerfilSistema': PerfilesConsultaUsuariosPorPerfilSistemaRequest,
+    '{http://webservices/WsMiddleware/}ConsultaDatosContribuyente': SiiConsultaDatosContribuyenteRequest,
+    '{http://webservices/WsMiddleware/}ConsultaEstadoGiro': SiiConsultaEstadoGiroRequest,
+}
+
+# Ruta Response/Result dentro del Body por elemento de request calificado
+RESULTS: Dict[str, str] = {
+    '{http://webservices/WsComponentes/}IniciarSesionToken': '{http://webservices/WsComponentes/}IniciarSesionTokenResponse/{http://webservices/WsComponentes/}IniciarSesionTokenResult',
+    '{http://webservices/WsMiddleware/}ConsultaRun': '{http://webservices/WsMiddleware/}ConsultaRunResponse/{http://webservices/WsMiddleware/}ConsultaRunResult',
+    '{http://webservices/WsComponentes/}ConsultaEmpresasPorPerfilSistema': '{http://webservices/WsComponentes/}ConsultaEmpresasPorPerfilSistemaResponse/{http://webservices/WsComponentes/}ConsultaEmpresasPorPerfilSistemaResult',
+    '{http://webservices/WsComponentes/}ConsultaFuncionesPorPerfilSistema': '{http://webservices/WsComponentes/}ConsultaFuncionesPorPerfilSistemaResponse/{http://webservices/WsComponentes/}ConsultaFuncionesPorPerfilSistemaResult',
+    '{http://webservices/WsComponentes/}ConsultaFuncionesPorSistema': '{http://webservices/WsComponentes/}ConsultaFuncionesPorSistemaResponse/{http://webservices/WsComponentes/}ConsultaFuncionesPorSistemaResult',
+    '{http://webservices/WsComponentes/}ConsultaPerfilPorSistema': '{http://webservices/WsComponentes/}ConsultaPerfilPorSistemaResponse/{http://webservices/WsComponentes/}ConsultaPerfilPorSistemaResult',
+    '{http://webservices/WsComponentes/}ConsultaPerfilUsuarioSistemaPorRut': '{http://webservices/WsComponentes/}ConsultaPerfilUsuarioSistemaPorRutResponse/{http://webservices/WsComponentes/}ConsultaPerfilUsuarioSistemaPorRutResult',
+    '{http://webservices/WsComponentes/}ConsultaUsuariosPorPerfilSistema': '{http://webservices/WsComponentes/}ConsultaUsuariosPorPerfilSistemaResponse/{http://webservices/WsComponentes/}ConsultaUsuariosPorPerfilSistemaResult',
+    '{http://webservices/WsMiddleware/}ConsultaDatosContribuyente': '{http://webservices/WsMiddleware/}ConsultaDatosContribuyenteResponse/{http://webservices/WsMiddleware/}ConsultaDatosContribuyenteResult',
+    '{http://webservices/WsMiddleware/}ConsultaEstadoGiro': '{http://webservices/WsMiddleware/}ConsultaEstadoGiroResponse/{http://webservices/WsMiddleware/}ConsultaEstadoGiroResult',
+}
@@ -0,0 +1,204 @@
+"""
+Plantillas precompiladas de sobres SOAP para operaciones simples
+
+Operaciones como ConsultaRun(idSistema, rut, dv) tienen un sobre de request
+fijo de pocos elementos simples, pero cada llamada pasa por el serializador
+genérico de zeep (validación por schema, construcción del árbol lxml y
+serialización). EnvelopeTemplate genera el sobre una vez con zeep a partir
+del WSDL, lo parte en fragmentos de bytes y en cada llamada solo intercala
+los valores escapados.
+
+La plantilla solo se compila si todos los parámetros son tipos simples
+builtin (string, enteros, boolean) y si el sobre renderizado es idéntico
+byte a byte al que genera zeep. En la llamada se usa zeep si falta algún
+parámetro, si un valor no es del tipo esperado o si el cliente tiene plugins
+o WS-Security, que necesitan ver el sobre como árbol.
+
+Las operaciones con stub generado (app/services/soap_stubs.py, ver
+soap_codegen) usan GeneratedTemplate: los fragmentos vienen del stub y en el
+primer uso solo se comparan la SOAPAction y los parámetros con el WSDL del
+cliente, sin generar ni comparar sobres con zeep.
+"""
+import re
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+import requests
+from loguru import logger
+from lxml import etree
+from zeep import Client
+from zeep.wsdl.bindings.soap import Soap11Binding
+from zeep.wsdl.utils import etree_to_string
+from zeep.xsd.types import builtins
+
+from app.config.settings import settings
+from app.services.soap_stubs import REQUESTS
+
+
+# Caracteres que lxml no escribe tal cual en el texto de un elemento
+_UNSAFE_TEXT = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\r]")
+
+_SAMPLES = {builtins.String: "x", builtins.Integer: 1, builtins.Boolean: True}
+
+
+class TemplateError(Exception):
+    """La operación no admite plantilla"""
+
+
+def _kind(xsd_type: Any) -> type:
+    """Tipo builtin soportado al que pertenece el tipo xsd del parámetro"""
+    if type(xsd_type).__module__ == builtins.__name__:
+        for kind in _SAMPLES:
+            if isinstance(xsd_type, kind):
+                return kind
+    raise TemplateError(f"Tipo no soportado: {type(xsd_type).__name__}")
+
+
+class EnvelopeTemplate:
+    """Sobre de request de una operación con huecos para cada parámetro"""
+
+    def __init__(self, client: Client, operation: str):
+        self.operation = operation
+        binding = client.service._binding
+        binding_options = client.service._binding_options
+        self.address = binding_options["address"]
+
+        body = binding.get(operation).input.body
+        if body is None:
+            raise TemplateError("La operación no tiene body")
+        self.params: List[Tuple[str, Any, type]] = []
+        for name, element in body.type.elements:
+            if element.max_occurs != 1:
+                raise TemplateError(f"{name} admite varias ocurrencias")
+            self.params.append((name, element.type, _kind(element.type)))
+
+        sample = {name: _SAMPLES[kind] for name, _, kind in self.params}
+        envelope, self.headers = binding._create(operation, (), sample, client=client, options=binding_options)
+        wrapper = envelope.find("soap-env:Body", namespaces=binding.nsmap)[0]
+        for child in wrapper:
+            child.text = f"\x7f{etree.QName(child).localname}\x7f"
+        parts = etree_to_string(envelope).split(b"\x7f")
+        # Fragmentos fijos en posiciones pares, nombres de parámetro en las impares
+        self.fragments: List[bytes] = parts[0::2]
+        if [name.decode() for name in parts[1::2]] != [name for name, _, _ in self.params]:
+            raise TemplateError("El orden de los elementos no coincide con los parámetros")
+
+        expected, _ = binding._create(operation, (), sample, client=client, options=binding_options)
+        if self.render(sample) != etree_to_string(expected):
+            raise TemplateError("El sobre renderizado no coincide con el de zeep")
+
+    def accepts(self, kwargs: Dict[str, Any]) -> bool:
+        """Los argumentos se pueden renderizar con la plantilla"""
+        if len(kwargs) != len(self.params):
+            return False
+        for name, _, kind in self.params:
+            value = kwargs.get(name)
+            if kind is builtins.String:
+                if not isinstance(value, str) or _UNSAFE_TEXT.search(value):
+                    return False
+            elif kind is builtins.Integer:
+                if not isinstance(value, int) or isinstance(value, bool):
+                    return False
+            elif not isinstance(value, bool):
+                return False
+        return True
+
+    def render(self, kwargs: Dict[str, Any]) -> bytes:
+        chunks = [self.fragments[0]]
+        for (name, xsd_type, _), fragment in zip(self.params, self.fragments[1:]):
+            chunks.append(escape(xsd_type.xmlvalue(kwargs[name])).encode("utf-8"))
+            chunks.append(fragment)
+        return b"".join(chunks)
+
+
+class GeneratedTemplate:
+    """Plantilla de una operación desde su stub generado (mismo uso que EnvelopeTemplate)"""
+
+    def __init__(self, client: Client, operation: str, stub: type):
+        self.operation = operation
+        self.stub = stub
+        binding = client.service._binding
+        operation_obj = binding.get(operation)
+        # Los fragmentos del stub son de un sobre SOAP 1.1 (text/xml)
+        if not isinstance(binding, Soap11Binding):
+            raise TemplateError("El stub es de SOAP 1.1")
+        if operation_obj.soapaction != stub.soap_action:
+            raise TemplateError(f"La SOAPAction del WSDL ({operation_obj.soapaction}) no coincide con el stub")
+        if [name for name, _ in operation_obj.input.body.type.elements] != [name for name, _ in stub.params]:
+            raise TemplateError("Los parámetros del WSDL no coinciden con el stub")
+        self.address = client.service._binding_options["address"]
+        self.headers: Dict[str, str] = dict(stub.headers)
+
+    def accepts(self, kwargs: Dict[str, Any]) -> bool:
+        """Los argumentos se pueden renderizar con el stub"""
+        if len(kwargs) != len(self.stub.params):
+            return False
+        for name, kind in self.stub.params:
+            value = kwargs.get(name)
+            if type(value) is not kind:
+                return False
+            if kind is str and _UNSAFE_TEXT.search(value):
+                return False
+        return True
+
+    def render(self, kwargs: Dict[str, Any]) -> bytes:
+        return self.stub(**kwargs).render()
+
+
+Template = Union[EnvelopeTemplate, GeneratedTemplate]
+
+# Plantillas por cliente zeep; None si la operación no admite plantilla
+_templates: "weakref.WeakKeyDictionary[Client, Dict[str, Optional[Template]]]" = weakref.WeakKeyDictionary()
+_templates_lock = threading.Lock()
+
+
+def request_element(client: Client, operation: str) -> Optional[str]:
+    """Nombre calificado del elemento de request de la operación (clave de soap_stubs)"""
+    body = client.service._binding.get(operation).input.body
+    return body.qname.text if body is not None else None
+
+
+def _compile(client: Client, operation: str) -> Template:
+    stub = REQUESTS.get(request_element(client, operation))
+    if stub is not None:
+        try:
+            return GeneratedTemplate(client, operation, stub)
+        except TemplateError as e:
+            logger.warning(f"Stub de {operation} no aplicable al WSDL del cliente, se compila con zeep: {e}")
+    return EnvelopeTemplate(client, operation)
+
+
+def template_for(client: Client, operation: str) -> Optional[Template]:
+    """Plantilla de la operación: el stub generado o, si no hay, compilada con zeep en el primer uso"""
+    if not settings.soap_envelope_templates_enabled or client.plugins or client.wsse:
+        return None
+    with _templates_lock:
+        templates = _templates.setdefault(client, {})
+        if operation not in templates:
+            try:
+                templates[operation] = _compile(client, operation)
+            except (TemplateError, LookupError, TypeError, ValueError) as e:
+                logger.warning(f"Sin plantilla de sobre para {operation}, se usa zeep: {e}")
+                templates[operation] = None
+        return templates[operation]
+
+
+def send_raw(client: Client, operation: str, **kwargs) -> requests.Response:
+    """POST de la operación con la plantilla si aplica, o con zeep, y retorna la respuesta HTTP sin procesar"""
+    template = template_for(client, operation)
+    if template is not None and template.accepts(kwargs):
+        return client.transport.post(template.address, template.render(kwargs), template.headers)
+    with client.settings(raw_response=True):
+        return getattr(client.service, operation)(**kwargs)
+
+
+def template_operation(client: Client, operation: str) -> Callable[..., Any]:
+    """Callable equivalente a client.service.<operation> que arma el request con plantilla"""
+    def call(**kwargs):
+        response = send_raw(client, operation, **kwargs)
+        binding = client.service._binding
+        return binding.process_reply(client, binding.get(operation), response)
+
+    return call
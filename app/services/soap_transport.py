@@ -0,0 +1,22 @@
+"""
+Transporte zeep que respeta el deadline del request
+"""
+from zeep.transports import Transport
+
+from app.config.settings import settings
+from app.utils.deadline import effective_timeout
+
+
+class DeadlineAwareTransport(Transport):
+    """
+    Transporte zeep cuyo operation_timeout se acota al tiempo restante del request.
+
+    El timeout se calcula en cada POST a partir de la contextvar de deadline,
+    que el pool SOAP propaga al hilo de ejecución, por lo que es seguro
+    compartir el transporte entre hilos.
+    """
+
+    def post(self, address, message, headers):
+        timeout = effective_timeout(self.operation_timeout or settings.soap_timeout)
+        self.logger.debug("HTTP Post to %s (timeout %.3fs)", address, timeout)
+        return self.session.post(address, data=message, headers=headers, timeout=timeout)
@@ -0,0 +1,130 @@
+"""
+Sondeo periódico de disponibilidad de los servicios SOAP upstream
+
+Una tarea de fondo consulta cada WSDL configurado con una petición liviana
+(HEAD) y guarda latencia y disponibilidad. Los health checks sirven el último
+snapshot y nunca sondean en línea.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from requests import Session
+
+from app.config.settings import settings
+from app.services.soap_client import soap_client
+from app.services.registro_soap_client import registro_soap_client
+from app.services.consulta_rc_soap_client import consulta_rc_soap_client
+from app.services.perfiles_soap_client import perfiles_soap_client
+from app.services.notificacion_soap_client import notificacion_soap_client
+from app.services.sii_soap_client import sii_soap_client
+from app.services.firma_soap_client import firma_soap_client
+
+
+# Servicios SOAP sondeados (nombre lógico -> cliente con wsdl_url)
+UPSTREAM_CLIENTS = {
+    "identificacion": soap_client,
+    "registro": registro_soap_client,
+    "consulta_rc": consulta_rc_soap_client,
+    "perfiles": perfiles_soap_client,
+    "notificacion": notificacion_soap_client,
+    "sii": sii_soap_client,
+    "firma": firma_soap_client,
+}
+
+
+class UpstreamProber:
+    """Sondea los WSDL upstream en segundo plano y cachea el resultado"""
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self._session = Session()
+        self._task: Optional[asyncio.Task] = None
+        self._results: Dict[str, Dict[str, Any]] = {
+            name: {"status": "unknown", "url": client.wsdl_url} for name, client in UPSTREAM_CLIENTS.items()
+        }
+
+    def _probe(self, name: str, url: str) -> Dict[str, Any]:
+        """Sondeo bloqueante de un WSDL (se ejecuta en un hilo)"""
+        start = time.perf_counter()
+        previous = self._results.get(name, {})
+        result: Dict[str, Any] = {"url": url, "checked_at": datetime.now().isoformat()}
+        try:
+            response = self._session.head(url, timeout=self.timeout, allow_redirects=True)
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            result["http_status"] = response.status_code
+            result["status"] = "up" if response.status_code < 500 else "down"
+        except Exception as e:
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            result["status"] = "down"
+            result["error"] = str(e)
+
+        if result["status"] == "down":
+            result["consecutive_failures"] = previous.get("consecutive_failures", 0) + 1
+        else:
+            result["consecutive_failures"] = 0
+        return result
+
+    async def probe_all(self) -> None:
+        """Sondea todos los servicios en paralelo y actualiza el snapshot"""
+        names = list(UPSTREAM_CLIENTS)
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._probe, name, UPSTREAM_CLIENTS[name].wsdl_url) for name in names
+        ))
+        for name, result in zip(names, results):
+            if result["status"] != self._results[name].get("status"):
+                logger.info(f"Upstream {name}: {self._results[name].get('status')} -> {result['status']}")
+            self._results[name] = result
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Error en sondeo de upstreams: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Inicia el sondeo de fondo (no aplica con mocks activos)"""
+        if settings.use_soap_mocks or not settings.upstream_probe_enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="upstream-prober")
+            logger.info(f"Sondeo de upstreams iniciado (intervalo {self.interval}s)")
+
+    async def stop(self) -> None:
+        """Detiene el sondeo de fondo"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Último resultado conocido por servicio"""
+        if settings.use_soap_mocks:
+            return {name: {"status": "mock"} for name in UPSTREAM_CLIENTS}
+        return {name: dict(result) for name, result in self._results.items()}
+
+    def overall_status(self, snapshot: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Resumen: ok, degraded (algún servicio caído), unknown o mock"""
+        statuses = {result["status"] for result in (snapshot or self.snapshot()).values()}
+        if statuses == {"mock"}:
+            return "mock"
+        if "down" in statuses:
+            return "degraded"
+        if "unknown" in statuses:
+            return "unknown"
+        return "ok"
+
+
+# Instancia global del sondeo de upstreams
+upstream_prober = UpstreamProber(
+    interval=settings.upstream_probe_interval,
+    timeout=settings.upstream_probe_timeout
+)
@@ -0,0 +1,204 @@
+"""
+Control de admisión de requests con clases de prioridad
+
+Cuando el worker está sobrecargado conviene rechazar temprano parte del
+trabajo en lugar de aceptarlo todo y dejar que todo expire junto. El
+controlador limita los requests en curso, los hace esperar brevemente en una
+cola por prioridad y rechaza primero el tráfico bulk cuando crecen la espera
+en cola o la latencia del event loop.
+
+- critical: health checks y métricas, siempre admitidos.
+- interactive: consultas por defecto; se atienden antes que bulk.
+- bulk: rutas en settings.admission_bulk_paths o requests con
+  "X-Request-Priority: bulk"; pueden usar solo una fracción de la capacidad.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.utils.errors import RetryLaterError
+from app.utils.loop_monitor import event_loop_monitor
+from app.utils.metrics import metrics
+
+
+metrics.describe("admission_in_flight", "Requests admitidos en curso por prioridad")
+metrics.describe("admission_queued", "Requests esperando admisión por prioridad")
+metrics.describe("admission_rejected_total", "Requests rechazados por el control de admisión")
+metrics.describe("admission_queue_wait_seconds", "Promedio móvil de la espera en cola de admisión")
+
+
+class Priority(str, Enum):
+    """Clases de prioridad de admisión"""
+    CRITICAL = "critical"
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
+class AdmissionRejectedError(RetryLaterError):
+    """El worker está sobrecargado y el request no fue admitido"""
+
+    code = "OVERLOADED"
+
+    def __init__(self, priority: Priority, reason: str, retry_after: float = 1.0):
+        super().__init__(
+            f"Servicio sobrecargado, request {priority.value} rechazado ({reason})",
+            retry_after=retry_after,
+        )
+        self.priority = priority
+        self.reason = reason
+
+
+def classify(path: str, priority_header: Optional[str] = None) -> Priority:
+    """
+    Clase de prioridad de un request según su ruta y el header X-Request-Priority.
+
+    El header solo permite bajar la prioridad a bulk; no eleva un request.
+    """
+    if any(path.startswith(prefix) for prefix in settings.admission_critical_paths):
+        return Priority.CRITICAL
+    if any(path.startswith(prefix) for prefix in settings.admission_bulk_paths):
+        return Priority.BULK
+    if priority_header and priority_header.strip().lower() == Priority.BULK.value:
+        return Priority.BULK
+    return Priority.INTERACTIVE
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdmissionController:
+    """Cupos de requests en curso con colas por prioridad"""
+
+    def __init__(self):
+        self.in_flight: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.queue_wait: float = 0.0
+        self._waiters: Dict[Priority, Deque[asyncio.Future]] = {
+            Priority.INTERACTIVE: deque(),
+            Priority.BULK: deque(),
+        }
+        self._lock = threading.Lock()
+
+    def _active(self) -> int:
+        return self.in_flight[Priority.INTERACTIVE] + self.in_flight[Priority.BULK]
+
+    def _has_capacity(self, priority: Priority) -> bool:
+        if self._active() >= settings.admission_max_in_flight:
+            return False
+        if priority is Priority.BULK:
+            bulk_limit = max(1, int(settings.admission_max_in_flight * settings.admission_bulk_ratio))
+            return self.in_flight[Priority.BULK] < bulk_limit
+        return True
+
+    def _overload_reason(self, priority: Priority) -> Optional[str]:
+        """Motivo para rechazar sin encolar, o None"""
+        lag_ms = event_loop_monitor.lag_ms
+        threshold = settings.admission_max_loop_lag_ms
+        if priority is Priority.BULK:
+            if lag_ms > threshold:
+                return "event_loop_lag"
+            if self.queue_wait > settings.admission_max_queue_wait:
+                return "queue_wait"
+        elif lag_ms > threshold * 2:
+            return "event_loop_lag"
+        return None
+
+    def _publish(self) -> None:
+        for priority, count in self.in_flight.items():
+            metrics.set("admission_in_flight", count, priority=priority.value)
+        for priority, waiters in self._waiters.items():
+            metrics.set("admission_queued", len(waiters), priority=priority.value)
+        metrics.set("admission_queue_wait_seconds", round(self.queue_wait, 4))
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.queue_wait = 0.8 * self.queue_wait + 0.2 * seconds
+            self._publish()
+
+    def _reject(self, priority: Priority, reason: str) -> AdmissionRejectedError:
+        metrics.inc("admission_rejected_total", priority=priority.value, reason=reason)
+        logger.warning(f"Request {priority.value} rechazado por sobrecarga: {reason}")
+        return AdmissionRejectedError(priority, reason, retry_after=max(1.0, settings.admission_queue_timeout))
+
+    def _queued_ahead(self, priority: Priority) -> int:
+        if priority is Priority.INTERACTIVE:
+            return len(self._waiters[Priority.INTERACTIVE])
+        return len(self._waiters[Priority.INTERACTIVE]) + len(self._waiters[Priority.BULK])
+
+    async def acquire(self, priority: Priority) -> None:
+        """Admite el request o lanza AdmissionRejectedError"""
+        if priority is Priority.CRITICAL:
+            with self._lock:
+                self.in_flight[priority] += 1
+                self._publish()
+            return
+
+        reason = self._overload_reason(priority)
+        if reason:
+            raise self._reject(priority, reason)
+
+        with self._lock:
+            if not self._queued_ahead(priority) and self._has_capacity(priority):
+                self.in_flight[priority] += 1
+                admitted = True
+            else:
+                admitted = False
+                queued = sum(len(waiters) for waiters in self._waiters.values())
+                if queued >= settings.admission_max_queue:
+                    raise self._reject(priority, "queue_full")
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters[priority].append(waiter)
+                self._publish()
+        if admitted:
+            self._record_wait(0.0)
+            return
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, settings.admission_queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                granted = waiter not in self._waiters[priority]
+                if not granted:
+                    self._waiters[priority].remove(waiter)
+                    self._publish()
+            self._record_wait(time.monotonic() - start)
+            if isinstance(exc, asyncio.CancelledError):
+                if granted:
+                    self.release(priority)
+                raise
+            if not granted:
+                raise self._reject(priority, "queue_timeout")
+            return
+        self._record_wait(time.monotonic() - start)
+
+    def release(self, priority: Priority) -> None:
+        """Libera el cupo y admite a los siguientes en cola, interactive primero"""
+        with self._lock:
+            self.in_flight[priority] -= 1
+            for queued_priority in (Priority.INTERACTIVE, Priority.BULK):
+                waiters = self._waiters[queued_priority]
+                while waiters and self._has_capacity(queued_priority):
+                    waiter = waiters.popleft()
+                    self.in_flight[queued_priority] += 1
+                    waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            self._publish()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": {priority.value: count for priority, count in self.in_flight.items()},
+                "queued": {priority.value: len(waiters) for priority, waiters in self._waiters.items()},
+                "queue_wait_seconds": round(self.queue_wait, 4),
+            }
+
+
+# Instancia global del control de admisión
+admission_controller = AdmissionController()
@@ -0,0 +1,121 @@
+"""
+Inyección de fallas y latencia en las llamadas SOAP
+
+Con CHAOS_ENABLED el pool SOAP pasa cada llamada por chaos_injector antes de
+ejecutarla. Cada regla que calza con el servicio y la operación se activa en
+su porcentaje de llamadas: las de latencia esperan dentro del hilo del pool
+(ocupándolo como un upstream lento) y las de falla lanzan la misma excepción
+que produciría el upstream real, por lo que reintentos, hedging, circuit
+breakers y el límite de concurrencia reaccionan igual que en producción.
+"""
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from requests.exceptions import ConnectionError as RequestsConnectionError, ReadTimeout
+from zeep.exceptions import Fault
+
+from app.config.settings import settings
+from app.models.chaos import EDistribucionLatencia, ETipoFalla, LatenciaCaos, ReglaCaos
+from app.utils.deadline import effective_timeout
+from app.utils.metrics import metrics
+
+
+metrics.describe("soap_chaos_injected_total", "Fallas y latencias inyectadas por servicio, operación y tipo")
+
+
+def sample_latency(spec: LatenciaCaos, rng: random.Random) -> float:
+    """Latencia en segundos según la distribución de la regla"""
+    if spec.distribution == EDistribucionLatencia.FIXED:
+        return spec.value
+    if spec.distribution == EDistribucionLatencia.UNIFORM:
+        return rng.uniform(spec.min, spec.max)
+    if spec.distribution == EDistribucionLatencia.LOGNORMAL:
+        return rng.lognormvariate(math.log(spec.median), spec.sigma)
+    return rng.expovariate(1.0 / spec.mean)
+
+
+class ChaosInjector:
+    """Reglas de caos activas, reemplazables en caliente"""
+
+    def __init__(self, rules: List[ReglaCaos], seed=None):
+        self._rules = list(rules)
+        self._injected: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def rules(self) -> List[ReglaCaos]:
+        return list(self._rules)
+
+    def configure(self, rules: List[ReglaCaos]) -> None:
+        """Reemplaza las reglas y reinicia los contadores"""
+        with self._lock:
+            self._rules = list(rules)
+            self._injected.clear()
+
+    def injected(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._injected)
+
+    def _triggered(self, service: str, operation: str) -> List[ReglaCaos]:
+        with self._lock:
+            return [
+                rule for rule in self._rules
+                if rule.service in ("*", service) and rule.operation in ("*", operation)
+                and self._rng.random() * 100 < rule.percentage
+            ]
+
+    def _count(self, service: str, operation: str, kind: ETipoFalla) -> None:
+        with self._lock:
+            self._injected[f"{service}/{operation}/{kind.value}"] += 1
+        metrics.inc("soap_chaos_injected_total", service=service, operation=operation, kind=kind.value)
+
+    def inject(self, service: str, operation: str) -> None:
+        """
+        Aplica las reglas activadas en esta llamada; se ejecuta en el hilo del pool
+
+        Las latencias de todas las reglas activadas se suman. Si superan el
+        timeout efectivo, la llamada espera el timeout y falla con ReadTimeout
+        como lo haría el transporte. Luego se lanza la primera falla activada.
+        """
+        triggered = self._triggered(service, operation)
+        if not triggered:
+            return
+
+        timeout = effective_timeout(settings.soap_timeout)
+        delay = 0.0
+        for rule in triggered:
+            if rule.kind == ETipoFalla.LATENCY:
+                with self._lock:
+                    delay += sample_latency(rule.latency, self._rng)
+                self._count(service, operation, rule.kind)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise ReadTimeout(f"Latencia inyectada de {delay:.3f}s excede el timeout de {timeout:.3f}s")
+        time.sleep(delay)
+
+        for rule in triggered:
+            if rule.kind == ETipoFalla.LATENCY:
+                continue
+            self._count(service, operation, rule.kind)
+            if rule.kind == ETipoFalla.TIMEOUT:
+                time.sleep(max(timeout - delay, 0.0))
+                raise ReadTimeout(rule.message)
+            if rule.kind == ETipoFalla.FAULT:
+                raise Fault(rule.message, code="soap:Server")
+            raise RequestsConnectionError(rule.message)
+
+    def wrap(self, service: str, operation: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """func precedida por la inyección de las reglas"""
+        def call(*args, **kwargs):
+            self.inject(service, operation)
+            return func(*args, **kwargs)
+        return call
+
+
+# Instancia global de reglas de caos
+chaos_injector = ChaosInjector([ReglaCaos.model_validate(rule) for rule in settings.chaos_rules], settings.chaos_seed)
@@ -0,0 +1,218 @@
+"""
+Circuit breakers por servicio y operación SOAP
+"""
+import math
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.utils.errors import RetryLaterError
+from app.utils.metrics import metrics
+
+
+class CircuitState(str, Enum):
+    """Estados del circuit breaker"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+# Valor numérico del gauge soap_circuit_state
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+metrics.describe("soap_circuit_state", "Estado del circuit breaker (0=closed, 1=half_open, 2=open)")
+metrics.describe("soap_circuit_transitions_total", "Cambios de estado del circuit breaker")
+metrics.describe("soap_circuit_rejected_total", "Llamadas rechazadas con el circuito abierto")
+
+
+class CircuitOpenError(RetryLaterError):
+    """El circuito de la operación está abierto: se falla rápido sin llamar al upstream"""
+
+    code = "CIRCUIT_OPEN"
+
+    def __init__(self, service: str, operation: str, retry_after: float):
+        super().__init__(
+            f"Servicio {service} no disponible temporalmente ({operation}): circuito abierto",
+            retry_after=retry_after,
+        )
+        self.service = service
+        self.operation = operation
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker con ventana deslizante por tiempo.
+
+    - closed: las llamadas pasan; si en la ventana hay al menos `minimum_calls`
+      y la tasa de errores o de llamadas lentas supera su umbral, se abre.
+    - open: las llamadas fallan rápido hasta que transcurre `open_seconds`.
+    - half_open: se dejan pasar hasta `half_open_max_calls` llamadas de prueba;
+      si todas resultan bien se cierra, ante cualquier fallo vuelve a abrirse.
+
+    before_call retorna el permiso de la llamada (el número de half_open en que
+    tomó un cupo de prueba, o None), que se pasa a record/release: en half_open
+    solo cuentan y liberan cupo las llamadas de prueba de ese mismo half_open,
+    no las que quedaron en curso desde closed o desde un half_open anterior.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        operation: str,
+        failure_rate_threshold: float,
+        slow_call_threshold: float,
+        slow_call_rate_threshold: float,
+        minimum_calls: int,
+        window_seconds: float,
+        open_seconds: float,
+        half_open_max_calls: int,
+    ):
+        self.service = service
+        self.operation = operation
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CircuitState.CLOSED
+        self._lock = threading.Lock()
+        # (timestamp, fallo, lenta)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._half_open_generation = 0
+        metrics.set("soap_circuit_state", 0, service=service, operation=operation)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        old_state = self.state
+        self.state = new_state
+        if new_state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if new_state == CircuitState.HALF_OPEN:
+            self._half_open_generation += 1
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+        if new_state == CircuitState.CLOSED:
+            self._calls.clear()
+        metrics.set("soap_circuit_state", _STATE_VALUES[new_state], service=self.service, operation=self.operation)
+        metrics.inc(
+            "soap_circuit_transitions_total",
+            service=self.service, operation=self.operation, from_state=old_state.value, to_state=new_state.value
+        )
+        logger.warning(f"Circuit breaker {self.service}.{self.operation}: {old_state.value} -> {new_state.value}")
+
+    def retry_after(self) -> float:
+        """Segundos restantes hasta el próximo intento permitido"""
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def before_call(self) -> Optional[int]:
+        """Reserva el paso de una llamada y retorna su permiso, o lanza CircuitOpenError"""
+        with self._lock:
+            if self.state == CircuitState.OPEN and self.retry_after() <= 0:
+                self._transition(CircuitState.HALF_OPEN)
+
+            if self.state == CircuitState.OPEN or (
+                self.state == CircuitState.HALF_OPEN and self._half_open_in_flight >= self.half_open_max_calls
+            ):
+                metrics.inc("soap_circuit_rejected_total", service=self.service, operation=self.operation)
+                raise CircuitOpenError(self.service, self.operation, max(1.0, math.ceil(self.retry_after())))
+
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight += 1
+                return self._half_open_generation
+            return None
+
+    def _is_probe(self, permit: Optional[int]) -> bool:
+        return permit is not None and permit == self._half_open_generation
+
+    def release(self, permit: Optional[int] = None) -> None:
+        """Libera la reserva de una llamada cancelada antes de tener resultado"""
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN and self._is_probe(permit):
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def record(self, success: bool, duration: float, permit: Optional[int] = None) -> None:
+        """Registra el resultado de una llamada con el permiso que le dio before_call"""
+        slow = duration >= self.slow_call_threshold
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                if not self._is_probe(permit):
+                    # Admitida antes del half_open actual: no es una llamada de prueba
+                    return
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if not success or slow:
+                    self._transition(CircuitState.OPEN)
+                else:
+                    self._half_open_successes += 1
+                    if self._half_open_successes >= self.half_open_max_calls:
+                        self._transition(CircuitState.CLOSED)
+                return
+
+            if self.state == CircuitState.OPEN:
+                return
+
+            now = time.monotonic()
+            self._calls.append((now, not success, slow))
+            while self._calls and self._calls[0][0] < now - self.window_seconds:
+                self._calls.popleft()
+
+            total = len(self._calls)
+            if total < self.minimum_calls:
+                return
+            failure_rate = sum(1 for _, failed, _ in self._calls if failed) / total
+            slow_rate = sum(1 for _, _, was_slow in self._calls if was_slow) / total
+            if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._transition(CircuitState.OPEN)
+
+
+class CircuitBreakerRegistry:
+    """Crea y guarda un circuit breaker por (servicio, operación)"""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str, operation: str) -> CircuitBreaker:
+        key = (service, operation)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        service,
+                        operation,
+                        failure_rate_threshold=settings.circuit_failure_rate_threshold,
+                        slow_call_threshold=settings.circuit_slow_call_threshold,
+                        slow_call_rate_threshold=settings.circuit_slow_call_rate_threshold,
+                        minimum_calls=settings.circuit_minimum_calls,
+                        window_seconds=settings.circuit_window_seconds,
+                        open_seconds=settings.circuit_open_seconds,
+                        half_open_max_calls=settings.circuit_half_open_max_calls,
+                    )
+                    self._breakers[key] = breaker
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        """Estado actual de cada breaker creado ("servicio.operación" -> estado)"""
+        return {f"{service}.{operation}": breaker.state.value for (service, operation), breaker in self._breakers.items()}
+
+    def reset(self) -> None:
+        """Descarta todos los breakers (útil en tests)"""
+        with self._lock:
+            self._breakers.clear()
+
+
+# Instancia global del registro de circuit breakers
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,173 @@
+"""
+Límite adaptativo de llamadas concurrentes por servicio SOAP
+
+Cada servicio tiene un límite de llamadas en curso que se ajusta con AIMD
+según la latencia observada: crece de a una llamada mientras el upstream
+responde bien con el límite en uso, y se reduce multiplicativamente ante
+respuestas lentas o errores de transporte. Al alcanzar el límite las llamadas
+esperan brevemente en cola y luego se rechazan con 503 + Retry-After.
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.utils.errors import RetryLaterError
+from app.utils.metrics import metrics
+
+
+metrics.describe("soap_concurrency_limit", "Límite actual de llamadas SOAP concurrentes por servicio")
+metrics.describe("soap_concurrency_in_flight", "Llamadas SOAP en curso contadas por el limitador")
+metrics.describe("soap_concurrency_rejected_total", "Llamadas SOAP rechazadas por límite de concurrencia")
+
+
+class ConcurrencyLimitError(RetryLaterError):
+    """El servicio alcanzó su límite de concurrencia y la cola de espera no se liberó a tiempo"""
+
+    code = "CONCURRENCY_LIMIT"
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(
+            f"Servicio {service} saturado: límite de llamadas concurrentes alcanzado",
+            retry_after=retry_after,
+        )
+        self.service = service
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveLimiter:
+    """
+    Limitador AIMD de llamadas en curso para un servicio.
+
+    - Éxito rápido con al menos la mitad del límite en uso: límite + 1.
+    - Respuesta más lenta que `latency_threshold` o error: límite × `backoff_ratio`.
+
+    El límite se mantiene entre `min_limit` y `max_limit`. Los cupos liberados se
+    entregan a las llamadas en cola por orden de llegada.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        backoff_ratio: float,
+        latency_threshold: float,
+    ):
+        self.service = service
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set("soap_concurrency_limit", int(self.limit), service=self.service)
+        metrics.set("soap_concurrency_in_flight", self.in_flight, service=self.service)
+
+    def _reject(self, retry_after: float) -> ConcurrencyLimitError:
+        metrics.inc("soap_concurrency_rejected_total", service=self.service)
+        logger.warning(
+            f"Llamada a {self.service} rechazada: {self.in_flight} en curso con límite {int(self.limit)}"
+        )
+        return ConcurrencyLimitError(self.service, retry_after=retry_after)
+
+    async def acquire(self, timeout: float, max_queue: int) -> None:
+        """Obtiene un cupo, esperando hasta `timeout` segundos en cola si no hay disponible"""
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self._publish()
+                return
+            if timeout <= 0 or len(self._waiters) >= max_queue:
+                raise self._reject(retry_after=max(timeout, 1.0))
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.CancelledError):
+                if granted:
+                    self.release()
+                raise
+            if not granted:
+                raise self._reject(retry_after=max(timeout, 1.0))
+
+    def release(self, latency: Optional[float] = None, dropped: bool = False) -> None:
+        """
+        Libera el cupo y ajusta el límite.
+
+        Sin `latency` (llamada cancelada o rechazada antes de llegar al upstream)
+        el límite no se modifica.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if latency is not None:
+                if dropped or latency > self.latency_threshold:
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                elif (self.in_flight + 1) * 2 >= self.limit:
+                    self.limit = min(self.max_limit, self.limit + 1)
+            while self._waiters and self.in_flight < int(self.limit):
+                waiter = self._waiters.popleft()
+                self.in_flight += 1
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            self._publish()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+            }
+
+
+class AdaptiveLimiterRegistry:
+    """Un AdaptiveLimiter por servicio"""
+
+    def __init__(self):
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str) -> AdaptiveLimiter:
+        with self._lock:
+            if service not in self._limiters:
+                self._limiters[service] = AdaptiveLimiter(
+                    service,
+                    initial_limit=settings.soap_concurrency_initial_limit,
+                    min_limit=settings.soap_concurrency_min_limit,
+                    max_limit=settings.soap_concurrency_max_limit,
+                    backoff_ratio=settings.soap_concurrency_backoff_ratio,
+                    latency_threshold=settings.soap_concurrency_latency_threshold,
+                )
+            return self._limiters[service]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.service: limiter.snapshot() for limiter in limiters}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+
+# Instancia global de limitadores de concurrencia
+adaptive_limiters = AdaptiveLimiterRegistry()
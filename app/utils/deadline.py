@@ -0,0 +1,63 @@
+"""
+Deadline del request propagado hasta las llamadas SOAP
+
+El middleware de deadline fija el instante límite del request en una
+contextvar. Como las contextvars se copian a las tareas asyncio y al pool SOAP
+(ver app.services.soap_executor), cualquier código del request puede consultar
+el tiempo restante y acotar sus esperas y timeouts.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.utils.errors import RetryLaterError
+
+
+# Instante límite del request actual (time.monotonic) o None si no tiene
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(RetryLaterError):
+    """El tiempo disponible del request se agotó antes de completar la operación"""
+
+    status_code = 504
+    error = "Gateway Timeout"
+    code = "DEADLINE_EXCEEDED"
+
+    def __init__(self, message: str = "El tiempo disponible para el request se agotó"):
+        super().__init__(message, retry_after=1.0)
+
+
+def set_deadline(timeout: Optional[float]):
+    """Fija el deadline del contexto actual a `timeout` segundos desde ahora"""
+    return _deadline.set(None if timeout is None else time.monotonic() + timeout)
+
+
+def reset_deadline(token) -> None:
+    """Restaura el deadline previo"""
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos restantes hasta el deadline (None si el request no tiene deadline)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    """Lanza DeadlineExceededError si el deadline del request ya pasó"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError()
+
+
+def effective_timeout(default: float) -> float:
+    """Timeout a usar en una operación: el menor entre `default` y el tiempo restante"""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceededError()
+    return min(default, left)
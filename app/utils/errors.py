@@ -0,0 +1,25 @@
+"""
+Excepciones de rechazo rápido del gateway
+"""
+from typing import Optional
+
+
+class RetryLaterError(Exception):
+    """
+    Rechazo rápido de un request que el cliente puede reintentar más tarde.
+
+    Se traduce a una respuesta HTTP con el status indicado y el header
+    Retry-After (ver app.middleware.error_handler.retry_later_handler).
+    Los clientes SOAP y routers la dejan propagar sin convertirla en 502.
+    """
+
+    status_code: int = 503
+    error: str = "Service Unavailable"
+    code: str = "SERVICE_UNAVAILABLE"
+
+    def __init__(self, message: str, retry_after: float = 1.0, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+        if code is not None:
+            self.code = code
@@ -0,0 +1,38 @@
+"""
+Serialización JSON rápida de las respuestas con orjson
+
+FastAPI pasa cada respuesta por jsonable_encoder (o por la serialización
+"json" de pydantic) y luego por json.dumps de la biblioteca estándar.
+FastJSONResponse serializa con orjson, que maneja datetime, enums y dicts
+anidados de forma nativa; los modelos pydantic se vuelcan con model_dump()
+sin convertir antes cada valor a tipos JSON.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+
+# Fechas UTC con "Z" como pydantic; claves no string (ej: int) como json.dumps
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    """Tipos que orjson no conoce: modelos pydantic y el resto (Decimal, UUID, ...) como lo haría pydantic"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    return to_jsonable_python(value)
+
+
+def dumps(content: Any) -> bytes:
+    """JSON en bytes del contenido (dicts, listas, modelos pydantic)"""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada con orjson; acepta modelos pydantic como contenido"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,157 @@
+"""
+Selección de campos de la respuesta (?fields= / ?exclude=)
+
+Los llamadores que solo necesitan algunos campos pueden pedirlos con
+fields=cabecera,respuesta.nombres o descartar los pesados con
+exclude=xmlRespuesta. Las rutas son nombres de campo del modelo de respuesta
+separados por punto; en los campos de lista la ruta aplica a cada elemento.
+
+La selección del request vive en una contextvar que se copia al pool SOAP
+(ver app.services.soap_executor): la decodificación directa no construye los
+campos opcionales descartados y la serialización del router omite el resto.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+
+# Árbol de rutas: {"respuesta": {"nombres": True}, "cabecera": True}
+Tree = Dict[str, Union[bool, "Tree"]]
+
+_selection: ContextVar[Optional["FieldSelection"]] = ContextVar("field_selection", default=None)
+
+
+class FieldSelectionError(ValueError):
+    """Ruta de fields/exclude que no existe en el modelo de respuesta"""
+
+
+def field_type(annotation: Any) -> Tuple[bool, Any]:
+    """(es lista, tipo interno) de una anotación Optional[...] / List[...]"""
+    def strip_optional(tp: Any) -> Any:
+        if get_origin(tp) is Union:
+            args = [arg for arg in get_args(tp) if arg is not type(None)]
+            if len(args) == 1:
+                return args[0]
+        return tp
+
+    annotation = strip_optional(annotation)
+    if get_origin(annotation) is list:
+        return True, strip_optional(get_args(annotation)[0])
+    return False, annotation
+
+
+def _is_model(tp: Any) -> bool:
+    return isinstance(tp, type) and issubclass(tp, BaseModel)
+
+
+def parse_paths(raw: Optional[str]) -> Optional[Tree]:
+    """Árbol de rutas de "a,b.c" (una ruta más corta cubre a las más largas)"""
+    if not raw:
+        return None
+    tree: Tree = {}
+    for path in raw.split(","):
+        parts = [part.strip() for part in path.split(".")]
+        if not any(parts):
+            continue
+        if not all(parts):
+            raise FieldSelectionError(f"Ruta de campo inválida: {path.strip()!r}")
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree or None
+
+
+def _spec(tree: Tree, model: type, prefix: str = "") -> Dict[str, Any]:
+    """Valida el árbol contra el modelo y lo traduce al include/exclude de pydantic"""
+    spec: Dict[str, Any] = {}
+    for name, sub in tree.items():
+        info = model.model_fields.get(name)
+        if info is None:
+            raise FieldSelectionError(f"{model.__name__} no tiene el campo {prefix}{name}")
+        if sub is True:
+            spec[name] = True
+            continue
+        many, inner = field_type(info.annotation)
+        if not _is_model(inner):
+            raise FieldSelectionError(f"El campo {prefix}{name} no tiene subcampos")
+        nested = _spec(sub, inner, f"{prefix}{name}.")
+        spec[name] = {"__all__": nested} if many else nested
+    return spec
+
+
+class FieldSelection:
+    """Campos pedidos (include) y descartados (exclude) de un modelo de respuesta"""
+
+    __slots__ = ("model", "include", "exclude", "_include_spec", "_exclude_spec")
+
+    def __init__(self, model: Optional[type], include: Optional[Tree], exclude: Optional[Tree],
+                 include_spec: Optional[Dict[str, Any]] = None, exclude_spec: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.include = include
+        self.exclude = exclude
+        self._include_spec = include_spec
+        self._exclude_spec = exclude_spec
+
+    def skips(self, name: str) -> bool:
+        """El campo queda fuera completo de la respuesta"""
+        if self.exclude is not None and self.exclude.get(name) is True:
+            return True
+        return self.include is not None and name not in self.include
+
+    def child(self, name: str) -> Optional["FieldSelection"]:
+        """Selección dentro del campo (None si se devuelve completo)"""
+        include = self.include.get(name) if self.include is not None else None
+        exclude = self.exclude.get(name) if self.exclude is not None else None
+        include = include if isinstance(include, dict) else None
+        exclude = exclude if isinstance(exclude, dict) else None
+        if include is None and exclude is None:
+            return None
+        return FieldSelection(None, include, exclude)
+
+    def dump(self, instance: BaseModel) -> Dict[str, Any]:
+        """dict del modelo con solo los campos seleccionados (para FastJSONResponse)"""
+        return instance.model_dump(by_alias=True, include=self._include_spec, exclude=self._exclude_spec)
+
+
+def build_selection(model: type, fields: Optional[str], exclude: Optional[str]) -> Optional[FieldSelection]:
+    """
+    Selección validada contra el modelo de respuesta
+
+    Retorna None si no se pidió selección. Lanza FieldSelectionError si una
+    ruta no existe en el modelo.
+    """
+    include_tree = parse_paths(fields)
+    exclude_tree = parse_paths(exclude)
+    if include_tree is None and exclude_tree is None:
+        return None
+    return FieldSelection(
+        model,
+        include_tree,
+        exclude_tree,
+        _spec(include_tree, model) if include_tree is not None else None,
+        _spec(exclude_tree, model) if exclude_tree is not None else None,
+    )
+
+
+def set_selection(selection: Optional[FieldSelection]):
+    """Fija la selección de campos del contexto actual"""
+    return _selection.set(selection)
+
+
+def current_selection(model: Optional[type] = None) -> Optional[FieldSelection]:
+    """
+    Selección de campos del request actual (None si devuelve todo)
+
+    Con model, solo se retorna si la selección se armó para ese modelo de
+    respuesta; un resultado intermedio de otro tipo se construye completo.
+    """
+    selection = _selection.get()
+    if selection is not None and model is not None and selection.model is not model:
+        return None
+    return selection
@@ -0,0 +1,58 @@
+"""
+Requests hedged para lecturas SOAP idempotentes
+
+Si la primera llamada no responde dentro del percentil configurado (p95) de
+las latencias observadas para la operación, se envía una segunda llamada
+idéntica y se usa la primera respuesta exitosa. Un presupuesto por servicio
+acota la carga extra que generan los hedges.
+"""
+from typing import Optional
+
+from app.config.settings import settings
+from app.utils.deadline import remaining
+from app.utils.latency import latency_trackers
+from app.utils.metrics import metrics
+from app.utils.retry import RetryBudgetRegistry, is_idempotent
+
+
+metrics.describe("soap_hedged_requests_total", "Segundas llamadas SOAP enviadas por superar el p95 observado")
+metrics.describe("soap_hedge_wins_total", "Llamadas hedged que respondieron antes que la original")
+metrics.describe("soap_hedge_budget_exhausted_total", "Hedges descartados por presupuesto agotado")
+
+
+def is_hedgeable(service: str, operation: str) -> bool:
+    """Indica si la operación puede enviarse hedged según la configuración"""
+    return (
+        settings.soap_hedging_enabled
+        and service in settings.soap_hedge_services
+        and is_idempotent(service, operation)
+    )
+
+
+def hedge_delay(service: str, operation: str) -> Optional[float]:
+    """
+    Espera antes de enviar la segunda llamada, o None si no corresponde hedgear.
+
+    Sin suficientes latencias observadas no se hedgea. Tampoco si el deadline del
+    request se agotaría antes de enviar el hedge.
+    """
+    if not is_hedgeable(service, operation):
+        return None
+    tracker = latency_trackers.get(service, operation)
+    if tracker.count < settings.soap_hedge_min_samples:
+        return None
+    observed = tracker.percentile(settings.soap_hedge_percentile)
+    if observed is None:
+        return None
+    delay = max(observed, settings.soap_hedge_min_delay)
+    left = remaining()
+    if left is not None and left <= delay:
+        return None
+    return delay
+
+
+# Instancia global de presupuestos de hedging
+hedge_budgets = RetryBudgetRegistry(
+    ratio_setting="soap_hedge_budget_ratio",
+    max_tokens_setting="soap_hedge_budget_max_tokens",
+)
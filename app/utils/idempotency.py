@@ -0,0 +1,133 @@
+"""
+Almacén de respuestas para requests con Idempotency-Key
+
+La primera respuesta a una clave se guarda durante settings.idempotency_ttl
+segundos y se repite a los requests posteriores con la misma clave. Mientras
+la primera está en curso, los duplicados concurrentes esperan su resultado en
+lugar de llamar de nuevo al upstream.
+
+El almacén es en memoria por worker.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils.errors import RetryLaterError
+from app.utils.metrics import metrics
+
+
+metrics.describe("idempotency_replays_total", "Respuestas repetidas desde el almacén de Idempotency-Key")
+metrics.describe("idempotency_waits_total", "Requests duplicados que esperaron a la llamada en curso")
+
+
+class IdempotencyInProgressError(RetryLaterError):
+    """Un request con la misma Idempotency-Key sigue en curso tras la espera máxima"""
+
+    status_code = 409
+    error = "Conflict"
+    code = "IDEMPOTENCY_IN_PROGRESS"
+
+    def __init__(self, key: str):
+        super().__init__(f"Hay un request en curso con la Idempotency-Key {key}", retry_after=1.0)
+
+
+class IdempotencyKeyReusedError(Exception):
+    """La Idempotency-Key ya se usó con un cuerpo de request distinto"""
+
+    def __init__(self, key: str):
+        super().__init__(f"La Idempotency-Key {key} ya se usó con un request distinto")
+        self.message = str(self)
+
+
+class StoredResponse(NamedTuple):
+    """Respuesta HTTP completa guardada para repetirla"""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class _Entry:
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.response: Optional[StoredResponse] = None
+        self.expires_at = float("inf")
+        self.done = asyncio.Event()
+
+
+class IdempotencyStore:
+    """
+    Respuestas e intentos en curso por clave, con TTL y tamaño acotado
+
+    Las respuestas guardadas se mantienen en orden de guardado, que con un TTL
+    fijo es también el orden de vencimiento: la purga solo mira la cabeza. Los
+    requests en curso van aparte y no se purgan hasta que terminan.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._pending: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= settings.idempotency_max_entries:
+                break
+            del self._entries[key]
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """
+        Registra el inicio de un request con la clave.
+
+        Retorna la respuesta guardada si existe; None si el request debe
+        procesarse (y luego informarse con complete). Si hay otro en curso con la
+        misma clave, espera a que termine.
+        """
+        while True:
+            with self._lock:
+                self._purge(time.monotonic())
+                entry = self._entries.get(key) or self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = _Entry(fingerprint)
+                    return None
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyKeyReusedError(key)
+                if entry.response is not None:
+                    metrics.inc("idempotency_replays_total")
+                    return entry.response
+                done = entry.done
+
+            metrics.inc("idempotency_waits_total")
+            try:
+                await asyncio.wait_for(done.wait(), settings.idempotency_wait_timeout)
+            except asyncio.TimeoutError:
+                raise IdempotencyInProgressError(key)
+
+    def complete(self, key: str, response: Optional[StoredResponse]) -> None:
+        """
+        Cierra el request en curso de la clave.
+
+        Con response=None (error del gateway o del upstream) la clave se libera
+        para que un reintento vuelva a procesarse.
+        """
+        with self._lock:
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return
+            if response is not None:
+                entry.response = response
+                entry.expires_at = time.monotonic() + settings.idempotency_ttl
+                self._entries[key] = entry
+        entry.done.set()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+
+# Instancia global del almacén de Idempotency-Key
+idempotency_store = IdempotencyStore()
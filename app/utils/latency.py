@@ -0,0 +1,56 @@
+"""
+Seguimiento de latencias recientes por servicio y operación SOAP
+"""
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class LatencyTracker:
+    """Ventana de las últimas N latencias observadas (en segundos)"""
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentil q (0-100) de la ventana, o None si no hay muestras"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(q / 100 * len(samples)) - 1))
+        return samples[index]
+
+
+class LatencyTrackerRegistry:
+    """Un LatencyTracker por (servicio, operación)"""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str, operation: str) -> LatencyTracker:
+        key = (service, operation)
+        with self._lock:
+            if key not in self._trackers:
+                self._trackers[key] = LatencyTracker(self.size)
+            return self._trackers[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._trackers.clear()
+
+
+# Instancia global de latencias por operación
+latency_trackers = LatencyTrackerRegistry()
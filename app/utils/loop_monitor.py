@@ -0,0 +1,80 @@
+"""
+Monitor de latencia del event loop y saturación del pool SOAP
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.services.soap_executor import soap_executor
+from app.services.soap_process_pool import soap_process_pool
+
+
+class EventLoopMonitor:
+    """
+    Tarea de fondo que mide el retraso de planificación del event loop.
+
+    Cada intervalo duerme un tiempo conocido y registra cuánto tarde despertó;
+    ese exceso es el tiempo que el loop estuvo ocupado con otro trabajo.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag_ms: float = 0.0
+        self.max_lag_ms: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, (loop.time() - expected) * 1000)
+            # Media móvil exponencial para suavizar picos aislados
+            self.lag_ms = lag if self.lag_ms == 0.0 else 0.8 * self.lag_ms + 0.2 * lag
+            self.max_lag_ms = max(self.max_lag_ms, lag)
+
+    def start(self) -> None:
+        """Inicia la tarea de fondo en el loop actual"""
+        if self._task is None or self._task.done():
+            self.lag_ms = 0.0
+            self.max_lag_ms = 0.0
+            self._task = asyncio.create_task(self._run(), name="event-loop-monitor")
+            logger.info(f"Monitor de event loop iniciado (intervalo {self.interval}s)")
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas actuales del loop y de los pools SOAP"""
+        return {
+            "event_loop_lag_ms": round(self.lag_ms, 2),
+            "event_loop_max_lag_ms": round(self.max_lag_ms, 2),
+            "soap_executor": soap_executor.stats(),
+            "soap_process_pool": soap_process_pool.stats(),
+        }
+
+    def saturation_reasons(self, snapshot: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Lista de umbrales superados (vacía si el worker no está saturado)"""
+        snapshot = snapshot or self.snapshot()
+        reasons = []
+        if snapshot["event_loop_lag_ms"] > settings.readiness_max_loop_lag_ms:
+            reasons.append(
+                f"event_loop_lag_ms {snapshot['event_loop_lag_ms']} > {settings.readiness_max_loop_lag_ms}"
+            )
+        queued = snapshot["soap_executor"]["queued"]
+        if queued > settings.readiness_max_executor_queue:
+            reasons.append(f"soap_executor.queued {queued} > {settings.readiness_max_executor_queue}")
+        return reasons
+
+
+# Instancia global del monitor
+event_loop_monitor = EventLoopMonitor(interval=settings.monitor_interval)
@@ -0,0 +1,63 @@
+"""
+Registro de métricas en memoria con exportación en formato Prometheus
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    """Contadores y gauges etiquetados, seguros entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: Dict[str, Dict[LabelKey, float]] = defaultdict(dict)
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Registra el texto de ayuda de una métrica"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        """Incrementa un contador"""
+        with self._lock:
+            self._counters[name][_label_key(labels)] += value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Fija el valor de un gauge"""
+        with self._lock:
+            self._gauges[name][_label_key(labels)] = value
+
+    def get(self, name: str, **labels) -> float:
+        """Valor actual de un contador o gauge (0 si no existe)"""
+        key = _label_key(labels)
+        with self._lock:
+            if name in self._gauges and key in self._gauges[name]:
+                return self._gauges[name][key]
+            return self._counters.get(name, {}).get(key, 0.0)
+
+    def render_prometheus(self) -> str:
+        """Serializa todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(series):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series[name].items():
+                        label_str = ",".join(f'{label}="{val}"' for label, val in key)
+                        lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Instancia global del registro de métricas
+metrics = MetricsRegistry()
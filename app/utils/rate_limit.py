@@ -0,0 +1,310 @@
+"""
+Rate limiting y cuotas diarias por idSistema y endpoint
+
+Cada combinación (idSistema, endpoint) tiene un token bucket (tasa sostenida
+y ráfaga) y, opcionalmente, una cuota diaria. El estado vive en memoria del
+worker o, con settings.rate_limit_backend = "sqlite", en un archivo SQLite
+local compartido por todos los workers del host.
+
+El idSistema viene del cliente: los backends descartan los buckets inactivos
+(el de memoria además acota su cantidad) y las métricas solo etiquetan los
+idSistema configurados (el resto se agrupa como "other").
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.utils.errors import RetryLaterError
+from app.utils.metrics import metrics
+
+
+metrics.describe("rate_limit_requests_total", "Requests admitidos por idSistema y endpoint")
+metrics.describe("rate_limit_rejected_total", "Requests rechazados por rate limit o cuota diaria")
+metrics.describe("rate_limit_buckets_evicted_total", "Buckets en memoria descartados por tamaño máximo")
+
+# Segundos entre purgas de buckets inactivos del backend SQLite (por proceso)
+SQLITE_PURGE_INTERVAL = 60.0
+
+# Etiqueta de métricas de los idSistema no configurados
+OTHER_SISTEMA = "other"
+
+
+class RateLimitExceededError(RetryLaterError):
+    """El idSistema superó su tasa de requests o su cuota diaria en el endpoint"""
+
+    status_code = 429
+    error = "Too Many Requests"
+    code = "RATE_LIMITED"
+
+    def __init__(self, id_sistema: str, endpoint: str, reason: str, retry_after: float):
+        if reason == "quota":
+            message = f"Cuota diaria agotada para idSistema {id_sistema} en {endpoint}"
+            code = "QUOTA_EXCEEDED"
+        else:
+            message = f"Límite de requests superado para idSistema {id_sistema} en {endpoint}"
+            code = None
+        super().__init__(message, retry_after=retry_after, code=code)
+        self.id_sistema = id_sistema
+        self.endpoint = endpoint
+        self.reason = reason
+
+
+class Limits(NamedTuple):
+    """Límites aplicables a un idSistema (0 = sin límite)"""
+    rate: float
+    burst: float
+    daily_quota: int
+
+
+class Decision(NamedTuple):
+    """Resultado de consumir un request del bucket"""
+    allowed: bool
+    reason: Optional[str]
+    retry_after: float
+    used_today: int
+
+
+# Estado de un bucket: (tokens, última actualización epoch, día ISO, usados en el día)
+BucketState = Tuple[float, float, str, int]
+
+
+def _seconds_until_midnight(now: float) -> float:
+    current = datetime.fromtimestamp(now)
+    midnight = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - current).total_seconds()
+
+
+def consume(state: Optional[BucketState], limits: Limits, now: float) -> Tuple[BucketState, Decision]:
+    """Aplica un request al estado del bucket y devuelve el nuevo estado y la decisión"""
+    today = date.fromtimestamp(now).isoformat()
+    if state is None:
+        state = (limits.burst, now, today, 0)
+    tokens, updated, day, used = state
+    if day != today:
+        day, used = today, 0
+    if limits.rate > 0:
+        tokens = min(limits.burst, tokens + (now - updated) * limits.rate)
+
+    if limits.daily_quota and used >= limits.daily_quota:
+        return (tokens, now, day, used), Decision(False, "quota", _seconds_until_midnight(now), used)
+    if limits.rate > 0:
+        if tokens < 1.0:
+            return (tokens, now, day, used), Decision(False, "rate", (1.0 - tokens) / limits.rate, used)
+        tokens -= 1.0
+    used += 1
+    return (tokens, now, day, used), Decision(True, None, 0.0, used)
+
+
+def _is_idle(state: BucketState, limits: Limits, now: float) -> bool:
+    """El bucket sin requests equivale a uno nuevo: ráfaga completa y sin cuota usada hoy"""
+    tokens, updated, day, used = state
+    if now - updated < settings.rate_limit_idle_ttl:
+        return False
+    if limits.rate > 0 and tokens + (now - updated) * limits.rate < limits.burst:
+        return False
+    return not (limits.daily_quota and used and day == date.fromtimestamp(now).isoformat())
+
+
+class MemoryRateLimitBackend:
+    """
+    Buckets en memoria del worker, en orden de último uso.
+
+    Los buckets inactivos que ya equivalen a uno nuevo se descartan desde la
+    cabeza; sobre settings.rate_limit_max_buckets se descarta el de uso más
+    antiguo aunque no lo esté.
+    """
+
+    def __init__(self):
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[BucketState, Limits]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        while self._buckets:
+            state, limits = next(iter(self._buckets.values()))
+            if len(self._buckets) > settings.rate_limit_max_buckets:
+                metrics.inc("rate_limit_buckets_evicted_total")
+            elif not _is_idle(state, limits, now):
+                break
+            self._buckets.popitem(last=False)
+
+    def consume(self, id_sistema: str, endpoint: str, limits: Limits) -> Decision:
+        key = (id_sistema, endpoint)
+        now = time.time()
+        with self._lock:
+            entry = self._buckets.pop(key, None)
+            state, decision = consume(entry[0] if entry else None, limits, now)
+            self._buckets[key] = (state, limits)
+            self._purge(now)
+        return decision
+
+    def usage(self) -> List[Dict[str, Any]]:
+        today = date.today().isoformat()
+        with self._lock:
+            items = list(self._buckets.items())
+        return [
+            {"idSistema": id_sistema, "endpoint": endpoint, "tokens": round(state[0], 2),
+             "used_today": state[3] if state[2] == today else 0}
+            for (id_sistema, endpoint), (state, _) in items
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SqliteRateLimitBackend:
+    """
+    Buckets en un archivo SQLite local compartido entre workers del mismo host.
+
+    Cada consumo es una transacción BEGIN IMMEDIATE, que serializa las
+    actualizaciones entre procesos. Cada SQLITE_PURGE_INTERVAL segundos el
+    consumo borra también los buckets inactivos (ver _is_idle), con los
+    límites de limits_for.
+    """
+
+    def __init__(self, path: str, limits_for: Optional[Callable[[str], Limits]] = None):
+        self.path = path
+        self._limits_for = limits_for or RateLimiter.limits_for
+        self._next_purge = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "id_sistema TEXT NOT NULL, endpoint TEXT NOT NULL, tokens REAL NOT NULL, "
+                "updated REAL NOT NULL, day TEXT NOT NULL, used INTEGER NOT NULL, "
+                "PRIMARY KEY (id_sistema, endpoint))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS rate_limits_updated ON rate_limits (updated)")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def consume(self, id_sistema: str, endpoint: str, limits: Limits) -> Decision:
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated, day, used FROM rate_limits WHERE id_sistema = ? AND endpoint = ?",
+                (id_sistema, endpoint),
+            ).fetchone()
+            now = time.time()
+            state, decision = consume(tuple(row) if row else None, limits, now)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limits (id_sistema, endpoint, tokens, updated, day, used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (id_sistema, endpoint, *state),
+            )
+            if now >= self._next_purge:
+                self._next_purge = now + SQLITE_PURGE_INTERVAL
+                self._purge(connection, now)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return decision
+
+    def _purge(self, connection: sqlite3.Connection, now: float) -> None:
+        rows = connection.execute(
+            "SELECT id_sistema, endpoint, tokens, updated, day, used FROM rate_limits WHERE updated < ?",
+            (now - settings.rate_limit_idle_ttl,),
+        ).fetchall()
+        idle = [
+            (id_sistema, endpoint)
+            for id_sistema, endpoint, *state in rows
+            if _is_idle(tuple(state), self._limits_for(id_sistema), now)
+        ]
+        if idle:
+            connection.executemany("DELETE FROM rate_limits WHERE id_sistema = ? AND endpoint = ?", idle)
+
+    def usage(self) -> List[Dict[str, Any]]:
+        today = date.today().isoformat()
+        rows = self._connect().execute(
+            "SELECT id_sistema, endpoint, tokens, day, used FROM rate_limits"
+        ).fetchall()
+        return [
+            {"idSistema": id_sistema, "endpoint": endpoint, "tokens": round(tokens, 2),
+             "used_today": used if day == today else 0}
+            for id_sistema, endpoint, tokens, day, used in rows
+        ]
+
+    def reset(self) -> None:
+        self._connect().execute("DELETE FROM rate_limits")
+
+
+class RateLimiter:
+    """Resuelve los límites de cada idSistema y los aplica con el backend configurado"""
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        with self._lock:
+            if self._backend is None:
+                if settings.rate_limit_backend == "sqlite":
+                    self._backend = SqliteRateLimitBackend(settings.rate_limit_sqlite_path, self.limits_for)
+                else:
+                    self._backend = MemoryRateLimitBackend()
+            return self._backend
+
+    @staticmethod
+    def limits_for(id_sistema: str) -> Limits:
+        """Límites por defecto con los reemplazos de settings.rate_limit_overrides"""
+        override = settings.rate_limit_overrides.get(id_sistema, {})
+        return Limits(
+            rate=float(override.get("rate", settings.rate_limit_rate)),
+            burst=float(override.get("burst", settings.rate_limit_burst)),
+            daily_quota=int(override.get("daily_quota", settings.rate_limit_daily_quota)),
+        )
+
+    @staticmethod
+    def metric_label(id_sistema: str) -> str:
+        """Etiqueta de métricas: el idSistema si está configurado, si no OTHER_SISTEMA"""
+        if id_sistema in settings.rate_limit_overrides or id_sistema in settings.rate_limit_known_systems:
+            return id_sistema
+        return OTHER_SISTEMA
+
+    def check(self, id_sistema: str, endpoint: str) -> Decision:
+        """Consume un request o lanza RateLimitExceededError"""
+        decision = self.backend.consume(id_sistema, endpoint, self.limits_for(id_sistema))
+        label = self.metric_label(id_sistema)
+        if not decision.allowed:
+            metrics.inc("rate_limit_rejected_total", id_sistema=label, endpoint=endpoint, reason=decision.reason)
+            logger.warning(f"idSistema {id_sistema} rechazado en {endpoint}: {decision.reason}")
+            raise RateLimitExceededError(id_sistema, endpoint, decision.reason, decision.retry_after)
+        metrics.inc("rate_limit_requests_total", id_sistema=label, endpoint=endpoint)
+        return decision
+
+    def usage(self) -> List[Dict[str, Any]]:
+        """Uso actual por idSistema y endpoint, con los límites aplicables"""
+        usage = self.backend.usage()
+        for item in usage:
+            item.update(self.limits_for(item["idSistema"])._asdict())
+        return usage
+
+    def reset(self) -> None:
+        """Descarta el estado y vuelve a leer el backend configurado"""
+        with self._lock:
+            if self._backend is not None:
+                self._backend.reset()
+            self._backend = None
+
+
+# Instancia global del rate limiter
+rate_limiter = RateLimiter()
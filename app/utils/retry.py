@@ -0,0 +1,144 @@
+"""
+Política de reintentos para llamadas SOAP
+
+Solo se reintentan operaciones de lectura idempotentes y solo ante errores
+transitorios de transporte. Un presupuesto de reintentos por servicio evita
+que los reintentos multipliquen la carga durante una caída.
+"""
+import random
+import threading
+from typing import Dict, Set
+
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout
+from zeep.exceptions import Fault, TransportError
+
+from app.config.settings import settings
+from app.utils.errors import RetryLaterError
+from app.utils.metrics import metrics
+
+
+metrics.describe("soap_retries_total", "Reintentos de llamadas SOAP por servicio y operación")
+metrics.describe("soap_retry_budget_exhausted_total", "Reintentos descartados por presupuesto agotado")
+
+
+# Operaciones de solo lectura que pueden repetirse sin efectos duplicados
+IDEMPOTENT_OPERATIONS: Dict[str, Set[str]] = {
+    "sii": {
+        "ConsultaRepresentanteLegal",
+        "ConsultaRelacionContribuyenteEmpresa",
+        "ConsultaMovimientoContribuyente",
+        "ConsultaNumeroEmpleados",
+        "ConsultaCategoriaEmpresa",
+        "ConsultaDatosContribuyente",
+        "ConsultaActividadEconomica",
+        "ConsultaEstadoGiro",
+        "ConsultaFechaInicioActividad",
+    },
+    "consulta_rc": {
+        "ConsultaRun",
+        "ConsultaNroSerieNroDocumento",
+        "ConsultaCertificadoNacimiento",
+        "ConsultaDiscapacidad",
+    },
+    "perfiles": {
+        "ConsultaUsuariosPorPerfilSistema",
+        "ConsultaPerfilUsuarioSistemaPorRut",
+        "ConsultaPerfilPorSistema",
+        "ConsultaFuncionesPorSistema",
+        "ConsultaFuncionesPorPerfilSistema",
+        "ConsultaEmpresasPorPerfilSistema",
+    },
+}
+
+# Status HTTP del upstream que indican una falla transitoria
+RETRYABLE_HTTP_STATUS = {502, 503, 504}
+
+
+def is_idempotent(service: str, operation: str) -> bool:
+    """Indica si la operación es de solo lectura y puede reintentarse"""
+    return operation in IDEMPOTENT_OPERATIONS.get(service, set())
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """
+    Clasifica un error de llamada SOAP.
+
+    - Fault de zeep: el upstream procesó y rechazó la petición, no se reintenta.
+    - Rechazos del gateway (circuito abierto, etc.): no se reintentan.
+    - Errores de conexión y timeouts de conexión: transitorios, se reintentan.
+    - TransportError con 502/503/504: transitorio, se reintenta.
+    """
+    if isinstance(exc, (Fault, RetryLaterError)):
+        return False
+    if isinstance(exc, TransportError):
+        return exc.status_code in RETRYABLE_HTTP_STATUS
+    return isinstance(exc, (RequestsConnectionError, ConnectTimeout, ConnectionError))
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Backoff exponencial con jitter completo: uniforme en [0, min(cap, base * 2^(attempt-1))]"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """
+    Presupuesto de reintentos tipo token bucket.
+
+    Cada llamada original deposita `ratio` tokens (hasta `max_tokens`) y cada
+    reintento consume uno. En una caída, cuando casi todo falla, los reintentos
+    quedan acotados a ~ratio × tráfico en lugar de multiplicarlo.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class RetryBudgetRegistry:
+    """
+    Un presupuesto por servicio
+
+    Los parámetros se leen de los settings indicados al crear cada presupuesto,
+    lo que permite reutilizar el registro para otros presupuestos de carga
+    adicional (ej: requests hedged).
+    """
+
+    def __init__(
+        self,
+        ratio_setting: str = "soap_retry_budget_ratio",
+        max_tokens_setting: str = "soap_retry_budget_max_tokens",
+    ):
+        self.ratio_setting = ratio_setting
+        self.max_tokens_setting = max_tokens_setting
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str) -> RetryBudget:
+        with self._lock:
+            if service not in self._budgets:
+                self._budgets[service] = RetryBudget(
+                    ratio=getattr(settings, self.ratio_setting),
+                    max_tokens=getattr(settings, self.max_tokens_setting),
+                )
+            return self._budgets[service]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._budgets.clear()
+
+
+# Instancia global de presupuestos de reintento
+retry_budgets = RetryBudgetRegistry()
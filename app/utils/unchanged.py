@@ -0,0 +1,105 @@
+"""
+Detección de actualizaciones sin cambios para escrituras de Registro
+
+Por cada (operación, RUT) se guarda un hash compacto del último payload
+enviado con éxito y la respuesta obtenida. Si llega la misma actualización
+antes de settings.registro_unchanged_ttl, se responde con el éxito guardado
+sin llamar al upstream. El TTL debe cubrir el intervalo de la sincronización
+(diaria) para que tenga efecto; vencido, la actualización se vuelve a enviar
+por si el registro cambió por otra vía.
+
+ActualizarRazonSocial y ActualizarRepLegales solo envían el RUT: el upstream
+vuelve a obtener los datos desde SII, así que un payload igual no implica que
+no haya cambios. Para ellas la omisión es un límite de frecuencia por RUT y
+solo se aplica con settings.registro_skip_sii_refresh_enabled.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config.settings import settings
+from app.models.registro import RespuestaProcesoBe, TipoEstado
+from app.utils.metrics import metrics
+
+
+metrics.describe("registro_unchanged_skips_total", "Actualizaciones de Registro omitidas por no tener cambios")
+
+# Operaciones cuyo payload es solo el RUT (los datos los obtiene el upstream desde SII)
+SII_REFRESH_OPERATIONS = frozenset({"ActualizarRazonSocial", "ActualizarRepLegales"})
+
+
+def _skip_enabled(operation: str) -> bool:
+    if not settings.registro_skip_unchanged_enabled:
+        return False
+    return operation not in SII_REFRESH_OPERATIONS or settings.registro_skip_sii_refresh_enabled
+
+
+def _ttl(operation: str) -> float:
+    if operation in SII_REFRESH_OPERATIONS:
+        return settings.registro_sii_refresh_ttl
+    return settings.registro_unchanged_ttl
+
+
+def payload_digest(payload: Dict[str, Any]) -> bytes:
+    """Hash de 16 bytes del payload normalizado"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+class UnchangedUpdateCache:
+    """Último payload exitoso por (operación, RUT), con TTL y tamaño acotado"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[bytes, float, RespuestaProcesoBe]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, operation: str, rut: int, payload: Dict[str, Any]) -> Optional[RespuestaProcesoBe]:
+        """Respuesta guardada si el payload es igual al último enviado con éxito"""
+        if not _skip_enabled(operation):
+            return None
+        key = (operation, rut)
+        digest = payload_digest(payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_digest, expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            if stored_digest != digest:
+                return None
+        metrics.inc("registro_unchanged_skips_total", operation=operation)
+        logger.info(f"{operation} para RUT {rut} sin cambios: se omite la llamada SOAP")
+        return response.model_copy()
+
+    def remember(self, operation: str, rut: int, payload: Dict[str, Any], response: RespuestaProcesoBe) -> None:
+        """Guarda el payload si la actualización fue exitosa; si no, descarta lo guardado"""
+        if not _skip_enabled(operation):
+            return
+        key = (operation, rut)
+        with self._lock:
+            if response.estadoProceso != TipoEstado.CORRECTO:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (
+                payload_digest(payload),
+                time.monotonic() + _ttl(operation),
+                response.model_copy(),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.registro_unchanged_max_entries:
+                self._entries.popitem(last=False)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Instancia global de actualizaciones sin cambios
+unchanged_updates = UnchangedUpdateCache()
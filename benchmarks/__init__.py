@@ -0,0 +1,3 @@
+"""
+Herramientas de benchmark y carga para el gateway SOAP
+"""
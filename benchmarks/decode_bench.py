@@ -0,0 +1,113 @@
+"""
+Micro-benchmark de decodificación de respuestas SOAP: zeep vs decodificación directa
+
+Para las operaciones con ModelDecoder (app/services/soap_fast_decode.py) mide,
+sobre respuestas del servidor SOAP simulado con listas de distinto tamaño:
+
+- zeep: parseo + árbol de objetos de zeep (operation.process_reply)
+- fast: parseo + ModelDecoder hasta el modelo pydantic validado
+
+En Perfiles los perfiles anidan funciones, por lo que el tamaño de la
+respuesta crece con el cuadrado de --sizes.
+
+Uso:
+    python -m benchmarks.decode_bench
+    python -m benchmarks.decode_bench --sizes 10 50 --only perfiles
+"""
+import argparse
+import datetime
+import json
+import platform
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from zeep.loader import parse_xml
+
+from app.models.consulta_rc import RespuestaConsultaRunBe
+from app.models.perfiles import RespuestaPerfilesBe
+from app.models.sii import RespuestaSiiDatosContribuyenteBe
+from app.services.soap_fast_decode import decoder_for
+from benchmarks.load_test import git_commit
+from benchmarks.mock_soap_server import DEFAULT_BEHAVIOR, MockSoapServer
+from benchmarks.models_bench import measure
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (1, 10, 50)
+
+
+class DecodeCase(NamedTuple):
+    service: str
+    operation: str
+    model: type
+
+
+CASES: List[DecodeCase] = [
+    DecodeCase("consulta_rc", "ConsultaRun", RespuestaConsultaRunBe),
+    DecodeCase("sii", "ConsultaDatosContribuyente", RespuestaSiiDatosContribuyenteBe),
+    DecodeCase("perfiles", "ConsultaPerfilPorSistema", RespuestaPerfilesBe),
+]
+
+
+def run_benchmarks(sizes: Sequence[int], repeat: int = 5, only: Optional[str] = None,
+                   min_time: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """Resultados por clave "servicio.operación/decodificador/tamaño" """
+    server = MockSoapServer()
+    results = {}
+    for case in CASES:
+        if only and only not in f"{case.service}.{case.operation}":
+            continue
+        client = server.client(case.service)
+        service = server.service(case.service)
+        binding_operation = client.service._binding.get(case.operation)
+        decoder = decoder_for(case.model)
+        for size in sizes:
+            content = service.response(service.operations[(False, case.operation)],
+                                       DEFAULT_BEHAVIOR._replace(list_size=size))
+            decoders = {
+                "zeep": lambda: binding_operation.process_reply(parse_xml(content, client.transport, settings=client.settings)),
+                "fast": lambda: decoder.decode(parse_xml(content, client.transport, settings=client.settings)),
+            }
+            for name, func in decoders.items():
+                result = measure(func, repeat, min_time)
+                result["bytes"] = len(content)
+                key = f"{case.service}.{case.operation}/{name}/{size}"
+                results[key] = result
+                print(f"{key:<55} {result['median_us']:>14.1f} µs  {len(content):>10} bytes")
+            zeep, fast = (results[f"{case.service}.{case.operation}/{name}/{size}"]["median_us"] for name in ("zeep", "fast"))
+            print(f"{'':<55} {zeep / fast:>13.1f}x")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Decodificación de respuestas SOAP: zeep vs ModelDecoder")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Cantidad de elementos de las listas de la respuesta")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medición (se usa la mediana)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--only", help="Medir solo las operaciones cuyo servicio.operación contiene este texto")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto en benchmarks/results/)")
+    args = parser.parse_args()
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    results = run_benchmarks(args.sizes, args.repeat, args.only, args.min_time)
+    report = {
+        "meta": {
+            "timestamp": started_at.isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"decode-{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark de armado de sobres SOAP: zeep vs plantillas precompiladas
+
+Para las operaciones con EnvelopeTemplate (app/services/soap_templates.py)
+mide, con los WSDL locales de SOAP/, el costo por request de:
+
+- zeep: binding._create + serialización del sobre
+- template: render de la plantilla con los valores escapados
+
+Uso:
+    python -m benchmarks.envelope_bench
+    python -m benchmarks.envelope_bench --only ConsultaRun
+"""
+import argparse
+import datetime
+import json
+import platform
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from zeep.wsdl.utils import etree_to_string
+
+from app.services.soap_templates import EnvelopeTemplate
+from benchmarks.load_test import git_commit
+from benchmarks.mock_soap_server import MockSoapServer
+from benchmarks.models_bench import measure
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+class EnvelopeCase(NamedTuple):
+    service: str
+    operation: str
+    kwargs: Dict[str, Any]
+
+
+CASES: List[EnvelopeCase] = [
+    EnvelopeCase("consulta_rc", "ConsultaRun", {"idSistema": 1, "rut": 12345678, "dv": "9"}),
+    EnvelopeCase("identificacion", "IniciarSesionToken", {"idSistema": 1, "token": "a" * 64}),
+    EnvelopeCase("sii", "ConsultaEstadoGiro", {"idSistema": 1, "rut": 12345678, "dv": "K"}),
+]
+
+
+def run_benchmarks(repeat: int = 5, only: Optional[str] = None,
+                   min_time: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """Resultados por clave "servicio.operación/armado" """
+    server = MockSoapServer()
+    results = {}
+    for case in CASES:
+        if only and only not in f"{case.service}.{case.operation}":
+            continue
+        client = server.client(case.service)
+        binding = client.service._binding
+        options = client.service._binding_options
+        template = EnvelopeTemplate(client, case.operation)
+
+        def zeep_envelope(case=case):
+            envelope, _ = binding._create(case.operation, (), case.kwargs, client=client, options=options)
+            return etree_to_string(envelope)
+
+        builders = {
+            "zeep": zeep_envelope,
+            "template": lambda case=case: template.render(case.kwargs),
+        }
+        for name, func in builders.items():
+            results[f"{case.service}.{case.operation}/{name}"] = measure(func, repeat, min_time)
+        zeep, fast = (results[f"{case.service}.{case.operation}/{name}"]["median_us"] for name in builders)
+        print(f"{case.service + '.' + case.operation:<45} zeep {zeep:>10.1f} µs  template {fast:>8.2f} µs  {zeep / fast:>8.1f}x")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Armado de sobres SOAP: zeep vs plantillas")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medición (se usa la mediana)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--only", help="Medir solo las operaciones cuyo servicio.operación contiene este texto")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto en benchmarks/results/)")
+    args = parser.parse_args()
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    results = run_benchmarks(args.repeat, args.only, args.min_time)
+    report = {
+        "meta": {
+            "timestamp": started_at.isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"envelope-{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark de serialización de respuestas: FastAPI por defecto vs FastJSONResponse
+
+Para las respuestas más grandes de los routers mide el costo de pasar del
+modelo pydantic retornado por el endpoint al cuerpo HTTP:
+
+- fastapi: validación y serialización de response_model (serialize_response)
+  + JSONResponse con json.dumps
+- gateway: FastJSONResponse con el modelo (camino de GatewayRoute, orjson)
+
+Uso:
+    python -m benchmarks.json_bench
+    python -m benchmarks.json_bench --sizes 100 1000 --only Perfiles
+"""
+import argparse
+import datetime
+import json
+import platform
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.models.sii import RespuestaSiiDatosContribuyenteBe
+from app.utils.fast_json import FastJSONResponse
+from benchmarks.load_test import git_commit
+from benchmarks.models_bench import CASES as MODEL_CASES, ModelCase, measure
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (10, 100, 1000)
+
+
+def datos_contribuyente_payload(n: int) -> Dict[str, Any]:
+    """RespuestaSiiDatosContribuyenteBe con un xmlRespuesta de n elementos"""
+    return {
+        "cabecera": {"estadoProceso": "CORRECTO", "respuestaProceso": "OK", "codigoProceso": 200},
+        "respuesta": {"estado": "ACTIVO", "glosa": "Contribuyente activo", "razonSocial": "Empresa SpA",
+                      "xml": "<contribuyente><rut>76123456</rut></contribuyente>"},
+        "xmlRespuesta": "<respuesta>" + "".join(f"<dato id=\"{i}\">valor {i}</dato>" for i in range(n)) + "</respuesta>",
+    }
+
+
+# Respuestas de routers (no los modelos de request de models_bench)
+CASES: List[ModelCase] = [case for case in MODEL_CASES if case.name.startswith("Respuesta")] + [
+    ModelCase("RespuestaSiiDatosContribuyenteBe", RespuestaSiiDatosContribuyenteBe, datos_contribuyente_payload),
+]
+
+
+def serializers(model: type, instance: BaseModel) -> Dict[str, Callable[[], bytes]]:
+    """Funciones sin argumentos que retornan el cuerpo de la respuesta"""
+    field = create_response_field(name=f"Response_{model.__name__}", type_=model)
+
+    def fastapi() -> bytes:
+        # serialize_response no espera nada con is_coroutine=True: se ejecuta sin event loop
+        coroutine = serialize_response(field=field, response_content=instance)
+        try:
+            coroutine.send(None)
+        except StopIteration as done:
+            return JSONResponse(done.value).body
+        raise RuntimeError("serialize_response quedó esperando")
+
+    return {
+        "fastapi": fastapi,
+        "gateway": lambda: FastJSONResponse(instance).body,
+    }
+
+
+def run_benchmarks(sizes: Sequence[int], repeat: int = 5, only: Optional[str] = None,
+                   min_time: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """Resultados por clave "Modelo/serializador/tamaño" """
+    results = {}
+    for case in CASES:
+        if only and only not in case.name:
+            continue
+        for size in sizes:
+            instance = case.model.model_validate(case.payload(size))
+            funcs = serializers(case.model, instance)
+            if json.loads(funcs["fastapi"]()) != json.loads(funcs["gateway"]()):
+                raise AssertionError(f"{case.name}: los cuerpos de fastapi y gateway difieren")
+            for name, func in funcs.items():
+                result = measure(func, repeat, min_time)
+                result["bytes"] = len(func())
+                key = f"{case.name}/{name}/{size}"
+                results[key] = result
+                print(f"{key:<55} {result['median_us']:>14.1f} µs  {result['bytes']:>10} bytes")
+            default, fast = (results[f"{case.name}/{name}/{size}"]["median_us"] for name in ("fastapi", "gateway"))
+            print(f"{'':<55} {default / fast:>13.1f}x")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialización de respuestas: FastAPI vs FastJSONResponse")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Cantidad de elementos de las listas (o del xmlRespuesta) de la respuesta")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medición (se usa la mediana)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--only", help="Medir solo los modelos cuyo nombre contiene este texto")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto en benchmarks/results/)")
+    args = parser.parse_args()
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    results = run_benchmarks(args.sizes, args.repeat, args.only, args.min_time)
+    report = {
+        "meta": {
+            "timestamp": started_at.isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"json-{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Prueba de carga de todos los endpoints de app/api/v1
+
+Levanta el servidor SOAP simulado (benchmarks.mock_soap_server) y el gateway
+con USE_SOAP_MOCKS=false apuntando a él, y ejecuta cada escenario de
+benchmarks.scenarios con N clientes concurrentes durante un tiempo fijo.
+Por endpoint registra throughput, latencias p50/p95/p99, errores y memoria
+(RSS) del proceso del gateway, y escribe los resultados en JSON.
+
+Con --baseline los resultados se comparan contra una corrida anterior y el
+proceso termina con código 1 si alguna métrica empeora más que --tolerance.
+
+Uso:
+    python -m benchmarks.load_test --concurrency 20 --duration 10
+    python -m benchmarks.load_test --baseline benchmarks/baseline.json
+    python -m benchmarks.load_test --target http://localhost:8000 --pid 1234
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import httpx
+
+from benchmarks.mock_soap_server import SERVICES
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Métricas comparadas contra la línea base: (clave, mayor es mejor)
+COMPARED_METRICS = (
+    ("throughput_rps", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("rss_peak_mb", False),
+)
+# Aumento absoluto de la tasa de errores tolerado respecto de la línea base
+ERROR_RATE_TOLERANCE = 0.01
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """Percentil q (0-100) por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, -(-q * len(sorted_values) // 100) - 1))
+    return sorted_values[int(index)]
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """RSS del proceso en bytes (Linux), o None si no se puede leer"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float,
+              rss: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Resumen de un endpoint; las latencias vienen en segundos"""
+    latencies = sorted(latencies)
+    requests = sum(statuses.values())
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(requests / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+    if rss:
+        result.update({key: round(value / (1024 * 1024), 2) for key, value in rss.items()})
+    return result
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, duration: float,
+                       warmup: float = 0.0, memory_probe: Optional[Callable[[], Optional[int]]] = None
+                       ) -> Dict[str, Any]:
+    """Ejecuta el escenario con `concurrency` clientes durante `duration` segundos"""
+
+    async def drive(seconds: float, latencies: List[float], statuses: Counter) -> None:
+        deadline = time.perf_counter() + seconds
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        scenario.method, scenario.path, params=scenario.params, json=scenario.json
+                    )
+                    await response.aread()
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError:
+                    statuses[0] += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    if warmup > 0:
+        await drive(warmup, [], Counter())
+
+    rss = {}
+    stop = asyncio.Event()
+
+    async def sample_memory() -> None:
+        while True:
+            value = memory_probe()
+            if value is not None:
+                rss.setdefault("rss_start_mb", value)
+                rss["rss_peak_mb"] = max(rss.get("rss_peak_mb", 0), value)
+                rss["rss_end_mb"] = value
+            if stop.is_set():
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), 0.05)
+            except asyncio.TimeoutError:
+                pass
+
+    sampler = asyncio.ensure_future(sample_memory()) if memory_probe else None
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    await drive(duration, latencies, statuses)
+    elapsed = time.perf_counter() - started
+    if sampler:
+        stop.set()
+        await sampler
+    return summarize(latencies, statuses, elapsed, rss)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[Dict[str, Any]]:
+    """Métricas que empeoraron más que la tolerancia relativa respecto de la línea base"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            before, after = base.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({
+                    "endpoint": name, "metric": metric, "baseline": before, "current": after,
+                    "change": round(change, 4),
+                })
+        before, after = base.get("error_rate", 0.0), current.get("error_rate", 0.0)
+        if after - before > ERROR_RATE_TOLERANCE:
+            regressions.append({
+                "endpoint": name, "metric": "error_rate", "baseline": before, "current": after,
+                "change": round(after - before, 4),
+            })
+    return regressions
+
+
+def select_scenarios(only: Optional[str], soap_mocks: bool) -> List[Scenario]:
+    """Escenarios a ejecutar; sin mocks internos se omiten los servicios no simulados"""
+    selected = []
+    for scenario in SCENARIOS:
+        if only and not re.search(only, scenario.name):
+            continue
+        if not soap_mocks and scenario.service is not None and scenario.service not in SERVICES:
+            print(f"Omitiendo {scenario.name}: el servidor simulado no cubre '{scenario.service}'")
+            continue
+        selected.append(scenario)
+    return selected
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El proceso terminó antes de responder en {url}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Sin respuesta de {url} tras {timeout}s")
+
+
+@contextmanager
+def _process(command: List[str], health_url: str, env: Optional[Dict[str, str]] = None) -> Iterator[subprocess.Popen]:
+    process = subprocess.Popen(command, cwd=ROOT, env={**os.environ, **(env or {})},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_up(health_url, process)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextmanager
+def local_stack(args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Servidor SOAP simulado y gateway en procesos locales"""
+    gateway_port = _free_port()
+    env = {
+        "RATE_LIMIT_ENABLED": "false",
+        "REGISTRO_SKIP_UNCHANGED_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+        "USE_SOAP_MOCKS": "true" if args.soap_mocks else "false",
+    }
+    gateway_command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                       "--port", str(gateway_port), "--log-level", "warning", "--no-access-log"]
+    gateway_url = f"http://127.0.0.1:{gateway_port}"
+
+    if args.soap_mocks:
+        with _process(gateway_command, f"{gateway_url}/api/v1/health/live", env) as gateway:
+            yield {"url": gateway_url, "pid": gateway.pid}
+        return
+
+    mock_port = _free_port()
+    mock_command = [sys.executable, "-m", "benchmarks.mock_soap_server", "--port", str(mock_port)]
+    if args.mock_config:
+        mock_command += ["--config", args.mock_config]
+    if args.seed is not None:
+        mock_command += ["--seed", str(args.seed)]
+    for service, (_, env_var) in SERVICES.items():
+        env[env_var] = f"http://127.0.0.1:{mock_port}/{service}?wsdl"
+    # Firma no tiene WSDL simulado y su cliente falla al iniciar sin uno: se le
+    # asigna otro WSDL solo para que el gateway levante (su escenario se omite)
+    env["FIRMA_WSDL_URL"] = f"http://127.0.0.1:{mock_port}/notificacion?wsdl"
+
+    with _process(mock_command, f"http://127.0.0.1:{mock_port}/sii?wsdl"):
+        with _process(gateway_command, f"{gateway_url}/api/v1/health/live", env) as gateway:
+            yield {"url": gateway_url, "pid": gateway.pid}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_all(url: str, pid: Optional[int], scenarios: List[Scenario],
+                  args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    memory_probe = (lambda: process_rss(pid)) if pid else None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        for scenario in scenarios:
+            result = await run_scenario(client, scenario, args.concurrency, args.duration, args.warmup,
+                                        memory_probe)
+            results[scenario.name] = result
+            print(
+                f"{scenario.name:<34} {result['throughput_rps']:>9.1f} rps  "
+                f"p50 {result['p50_ms'] or 0:>8.1f} ms  p95 {result['p95_ms'] or 0:>8.1f} ms  "
+                f"p99 {result['p99_ms'] or 0:>8.1f} ms  errores {result['error_rate']:.2%}"
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga de los endpoints de app/api/v1")
+    parser.add_argument("--concurrency", type=int, default=10, help="Clientes concurrentes por endpoint")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de medición por endpoint")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de calentamiento por endpoint")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por request en segundos")
+    parser.add_argument("--only", help="Regex sobre el nombre de los escenarios a ejecutar")
+    parser.add_argument("--mock-config", help="JSON de comportamiento del servidor SOAP simulado")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla del servidor SOAP simulado")
+    parser.add_argument("--soap-mocks", action="store_true",
+                        help="Usar los mocks internos de los servicios en lugar del servidor simulado")
+    parser.add_argument("--target", help="URL de un gateway ya levantado (no se inician procesos)")
+    parser.add_argument("--pid", type=int, help="PID del gateway de --target para medir memoria")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto en benchmarks/results/)")
+    parser.add_argument("--baseline", help="Resultados anteriores contra los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Empeoramiento relativo tolerado respecto de la línea base")
+    args = parser.parse_args()
+
+    scenarios = select_scenarios(args.only, args.soap_mocks)
+    if args.target:
+        results = asyncio.run(run_all(args.target, args.pid, scenarios, args))
+    else:
+        with local_stack(args) as stack:
+            results = asyncio.run(run_all(stack["url"], stack["pid"], scenarios, args))
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    report = {
+        "meta": {
+            "timestamp": started_at.isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "upstream": "soap_mocks" if args.soap_mocks else ("external" if args.target else "mock_soap_server"),
+            "mock_config": args.mock_config,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load_test-{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(
+                f"REGRESIÓN {regression['endpoint']} {regression['metric']}: "
+                f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"Sin regresiones respecto de {args.baseline} (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Servidor SOAP simulado a partir de los WSDL de SOAP/
+
+Reemplaza a los servicios SOAP reales para pruebas de carga en una sola
+máquina: los clientes zeep del gateway (USE_SOAP_MOCKS=false) cargan el WSDL
+desde este servidor y le envían los requests, por lo que se ejercita la
+serialización, el transporte HTTP y el parseo XML reales.
+
+- GET /{servicio} entrega el WSDL con soap:address apuntando a este servidor.
+- POST /{servicio} responde la operación (según SOAPAction o el primer
+  elemento del Body) con una respuesta válida según el schema, generada
+  recorriendo los tipos del WSDL.
+
+Por operación se configuran la distribución de latencia, la tasa de SOAP
+Faults, la tasa de errores HTTP 503 y el tamaño de listas y strings de la
+respuesta. La configuración es un JSON cuyas claves son "*" (todas), el
+servicio ("sii") o servicio.operación ("sii.ConsultaEstadoGiro"); las más
+específicas sobrescriben a las generales:
+
+    {
+      "*": {"latency": {"distribution": "lognormal", "median": 0.05, "sigma": 0.5}},
+      "perfiles": {"list_size": 200},
+      "sii.ConsultaEstadoGiro": {"fault_rate": 0.01, "error_rate": 0.02}
+    }
+
+Uso:
+    python -m benchmarks.mock_soap_server --port 8099 --config mock.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import random
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+from lxml import etree
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from zeep import Client, Settings
+from zeep.transports import Transport
+from zeep.xsd import AnySimpleType, ComplexType
+from zeep.xsd.types import builtins
+
+
+SOAP_DIR = Path(__file__).resolve().parent.parent / "SOAP"
+
+# WSDL de cada servicio y variable de entorno del gateway que lo configura.
+# Firma no tiene WSDL en SOAP/ (solo un envelope de ejemplo), por lo que no se simula.
+SERVICES: Dict[str, Tuple[str, str]] = {
+    "identificacion": ("Clave única.xml", "SENCE_WSDL_URL"),
+    "registro": ("Cus.xml", "REGISTRO_WSDL_URL"),
+    "consulta_rc": ("Registro civil.xml", "CONSULTA_RC_WSDL_URL"),
+    "perfiles": ("Sadper.xml", "PERFILES_WSDL_URL"),
+    "notificacion": ("Envío correos.xml", "NOTIFICACION_WSDL_URL"),
+    "sii": ("SII.xml", "SII_WSDL_URL"),
+}
+
+SOAP11_ENV = "http://schemas.xmlsoap.org/soap/envelope/"
+SOAP12_ENV = "http://www.w3.org/2003/05/soap-envelope"
+SOAP_ADDRESS_TAGS = (
+    "{http://schemas.xmlsoap.org/wsdl/soap/}address",
+    "{http://schemas.xmlsoap.org/wsdl/soap12/}address",
+)
+XSD_NS = "http://www.w3.org/2001/XMLSchema"
+
+# Niveles de anidamiento máximos al generar tipos recursivos
+MAX_DEPTH = 8
+
+
+class Behavior(NamedTuple):
+    """Comportamiento simulado de una operación"""
+    latency: Dict[str, Any]
+    fault_rate: float
+    error_rate: float
+    list_size: int
+    string_size: int
+
+
+DEFAULT_BEHAVIOR = Behavior(
+    latency={"distribution": "fixed", "value": 0.0},
+    fault_rate=0.0,
+    error_rate=0.0,
+    list_size=3,
+    string_size=12,
+)
+
+
+def sample_latency(spec: Dict[str, Any], rng: random.Random) -> float:
+    """Latencia en segundos según la distribución configurada"""
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "fixed":
+        return float(spec.get("value", 0.0))
+    if distribution == "uniform":
+        return rng.uniform(float(spec["min"]), float(spec["max"]))
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(float(spec["median"])), float(spec.get("sigma", 0.5)))
+    if distribution == "exponential":
+        return rng.expovariate(1.0 / float(spec["mean"]))
+    raise ValueError(f"Distribución de latencia desconocida: {distribution}")
+
+
+class _Operation(NamedTuple):
+    name: str
+    soap12: bool
+    binding_operation: Any
+
+
+class _MockService:
+    """WSDL cargado de un servicio y respuestas generadas por operación"""
+
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        self.path = path
+        self.wsdl = Client(str(path), settings=Settings(strict=False)).wsdl
+        self.enumerations = self._parse_enumerations(path)
+        self.operations: Dict[Tuple[bool, str], _Operation] = {}
+        self.by_action: Dict[Tuple[bool, str], _Operation] = {}
+        self.by_element: Dict[Tuple[bool, str], _Operation] = {}
+        for service in self.wsdl.services.values():
+            for port in service.ports.values():
+                soap12 = port.binding.__class__.__name__ == "Soap12Binding"
+                for name, binding_operation in port.binding._operations.items():
+                    operation = _Operation(name, soap12, binding_operation)
+                    self.operations.setdefault((soap12, name), operation)
+                    if binding_operation.soapaction:
+                        self.by_action.setdefault((soap12, binding_operation.soapaction), operation)
+                    if binding_operation.input.body is not None:
+                        self.by_element.setdefault((soap12, binding_operation.input.body.qname.localname), operation)
+        self._responses: Dict[Tuple[bool, str, int, int], bytes] = {}
+
+    @staticmethod
+    def _parse_enumerations(path: Path) -> Dict[etree.QName, List[str]]:
+        """Valores de cada simpleType enumerado; zeep no conserva las facetas"""
+        enumerations = {}
+        tree = etree.parse(str(path))
+        for schema in tree.iter(f"{{{XSD_NS}}}schema"):
+            namespace = schema.get("targetNamespace")
+            for simple_type in schema.iter(f"{{{XSD_NS}}}simpleType"):
+                values = [e.get("value") for e in simple_type.iter(f"{{{XSD_NS}}}enumeration")]
+                if simple_type.get("name") and values:
+                    enumerations[etree.QName(namespace, simple_type.get("name"))] = values
+        return enumerations
+
+    def wsdl_document(self, address: str) -> bytes:
+        """WSDL con las direcciones de los puertos apuntando a este servidor"""
+        tree = etree.parse(str(self.path))
+        for tag in SOAP_ADDRESS_TAGS:
+            for element in tree.iter(tag):
+                element.set("location", address)
+        return etree.tostring(tree, xml_declaration=True, encoding="utf-8")
+
+    def find_operation(self, soap12: bool, action: Optional[str], body: bytes) -> Optional[_Operation]:
+        if action:
+            operation = self.by_action.get((soap12, action))
+            if operation is not None:
+                return operation
+        try:
+            envelope = etree.fromstring(body)
+        except etree.XMLSyntaxError:
+            return None
+        for soap_body in envelope.iter(f"{{{SOAP12_ENV if soap12 else SOAP11_ENV}}}Body"):
+            for child in soap_body:
+                return self.by_element.get((soap12, etree.QName(child).localname))
+        return None
+
+    def response(self, operation: _Operation, behavior: Behavior) -> bytes:
+        """Envelope de respuesta (se genera una vez por operación y tamaño)"""
+        key = (operation.soap12, operation.name, behavior.list_size, behavior.string_size)
+        if key not in self._responses:
+            output = operation.binding_operation.output
+            values = self._complex_value(output.body.type, behavior, 0) if output.body is not None else {}
+            message = output.serialize(**values)
+            self._responses[key] = etree.tostring(message.content, xml_declaration=True, encoding="utf-8")
+        return self._responses[key]
+
+    def _complex_value(self, xsd_type: ComplexType, behavior: Behavior, depth: int) -> Dict[str, Any]:
+        values = {}
+        if depth > MAX_DEPTH:
+            return values
+        for name, element in xsd_type.elements:
+            if not hasattr(element, "type"):
+                continue
+            repeated = element.max_occurs == "unbounded" or (isinstance(element.max_occurs, int) and element.max_occurs > 1)
+            if repeated:
+                count = behavior.list_size
+                if isinstance(element.max_occurs, int):
+                    count = min(count, element.max_occurs)
+                values[name] = [self._value(name, element.type, behavior, depth + 1) for _ in range(count)]
+            else:
+                values[name] = self._value(name, element.type, behavior, depth + 1)
+        return values
+
+    def _value(self, name: str, xsd_type: Any, behavior: Behavior, depth: int) -> Any:
+        if isinstance(xsd_type, ComplexType):
+            return self._complex_value(xsd_type, behavior, depth)
+
+        enumeration = self.enumerations.get(getattr(xsd_type, "qname", None))
+        if enumeration:
+            return "CORRECTO" if "CORRECTO" in enumeration else enumeration[0]
+        if isinstance(xsd_type, builtins.Boolean):
+            return True
+        if isinstance(xsd_type, builtins.DateTime):
+            return datetime.datetime(2024, 1, 1, 12, 0, 0)
+        if isinstance(xsd_type, builtins.Date):
+            return datetime.date(2024, 1, 1)
+        if isinstance(xsd_type, builtins.Time):
+            return datetime.time(12, 0, 0)
+        # Integer hereda de Decimal en zeep, por lo que va primero
+        if isinstance(xsd_type, builtins.Integer):
+            return 200 if name.lower().startswith("codigo") else 12345678
+        if isinstance(xsd_type, builtins.Decimal):
+            return Decimal("1.5")
+        if isinstance(xsd_type, (builtins.Float, builtins.Double)):
+            return 1.5
+        if isinstance(xsd_type, builtins.Base64Binary):
+            return b"x" * behavior.string_size
+        if isinstance(xsd_type, AnySimpleType):
+            return (name * (behavior.string_size // max(len(name), 1) + 1))[:behavior.string_size]
+        return None
+
+
+class MockSoapServer:
+    """Aplicación ASGI que simula los servicios SOAP de SOAP/"""
+
+    def __init__(self, config: Optional[Dict[str, Dict[str, Any]]] = None, seed: Optional[int] = None,
+                 soap_dir: Path = SOAP_DIR):
+        self.config = config or {}
+        self.soap_dir = soap_dir
+        self.rng = random.Random(seed)
+        self._services: Dict[str, _MockService] = {}
+        self.app = Starlette(routes=[
+            Route("/{service}", self.wsdl_endpoint, methods=["GET"]),
+            Route("/{service}", self.soap_endpoint, methods=["POST"]),
+        ])
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.app(scope, receive, send)
+
+    def service(self, name: str) -> Optional[_MockService]:
+        if name not in SERVICES:
+            return None
+        if name not in self._services:
+            self._services[name] = _MockService(name, self.soap_dir / SERVICES[name][0])
+        return self._services[name]
+
+    def client(self, name: str, **kwargs) -> Client:
+        """Cliente zeep del servicio sobre el WSDL local que llama a este servidor sin HTTP"""
+        return Client(str(self.service(name).path), transport=InProcessTransport(self, name), **kwargs)
+
+    def behavior(self, service: str, operation: str) -> Behavior:
+        """Comportamiento combinando "*", servicio y servicio.operación"""
+        merged = DEFAULT_BEHAVIOR._asdict()
+        for key in ("*", service, f"{service}.{operation}"):
+            merged.update(self.config.get(key, {}))
+        merged["latency"] = dict(merged["latency"])
+        return Behavior(**merged)
+
+    async def wsdl_endpoint(self, request: Request) -> Response:
+        service = self.service(request.path_params["service"])
+        if service is None:
+            return Response("Servicio no simulado", status_code=404)
+        address = str(request.url.replace(query=""))
+        return Response(service.wsdl_document(address), media_type="text/xml; charset=utf-8")
+
+    async def soap_endpoint(self, request: Request) -> Response:
+        service = self.service(request.path_params["service"])
+        if service is None:
+            return Response("Servicio no simulado", status_code=404)
+
+        content_type = request.headers.get("content-type", "")
+        soap12 = content_type.startswith("application/soap+xml")
+        action = self._action(request, content_type, soap12)
+        body = await request.body()
+        operation = service.find_operation(soap12, action, body)
+        if operation is None:
+            return self._fault(soap12, "Client", f"Operación no reconocida en {service.name}")
+
+        behavior = self.behavior(service.name, operation.name)
+        latency = sample_latency(behavior.latency, self.rng)
+        if latency > 0:
+            await asyncio.sleep(latency)
+        if behavior.error_rate and self.rng.random() < behavior.error_rate:
+            return Response("Service Unavailable", status_code=503)
+        if behavior.fault_rate and self.rng.random() < behavior.fault_rate:
+            return self._fault(soap12, "Server", f"Fault simulado en {service.name}.{operation.name}")
+
+        media_type = "application/soap+xml; charset=utf-8" if soap12 else "text/xml; charset=utf-8"
+        return Response(service.response(operation, behavior), media_type=media_type)
+
+    @staticmethod
+    def _action(request: Request, content_type: str, soap12: bool) -> Optional[str]:
+        if not soap12:
+            action = request.headers.get("soapaction")
+            return action.strip('"') if action else None
+        for parameter in content_type.split(";")[1:]:
+            key, _, value = parameter.strip().partition("=")
+            if key == "action":
+                return value.strip('"')
+        return None
+
+    @staticmethod
+    def _fault(soap12: bool, code: str, message: str) -> Response:
+        if soap12:
+            value = "soap:Receiver" if code == "Server" else "soap:Sender"
+            body = (
+                f'<soap:Envelope xmlns:soap="{SOAP12_ENV}"><soap:Body><soap:Fault>'
+                f"<soap:Code><soap:Value>{value}</soap:Value></soap:Code>"
+                f'<soap:Reason><soap:Text xml:lang="es">{message}</soap:Text></soap:Reason>'
+                "</soap:Fault></soap:Body></soap:Envelope>"
+            )
+            media_type = "application/soap+xml; charset=utf-8"
+        else:
+            body = (
+                f'<soap:Envelope xmlns:soap="{SOAP11_ENV}"><soap:Body><soap:Fault>'
+                f"<faultcode>soap:{code}</faultcode><faultstring>{message}</faultstring>"
+                "</soap:Fault></soap:Body></soap:Envelope>"
+            )
+            media_type = "text/xml; charset=utf-8"
+        return Response(body, status_code=500, media_type=media_type)
+
+
+class InProcessTransport(Transport):
+    """Transporte zeep que envía los POST al servidor simulado dentro del mismo proceso"""
+
+    def __init__(self, server: MockSoapServer, service: str, **kwargs):
+        super().__init__(**kwargs)
+        self.service = service
+        self.http = TestClient(server)
+
+    def post(self, address, message, headers):
+        reply = self.http.post(f"/{self.service}", content=message, headers=headers)
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response.headers.update(reply.headers)
+        response._content = reply.content
+        response.encoding = reply.encoding
+        return response
+
+
+def load_config(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor SOAP simulado a partir de los WSDL de SOAP/")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--config", help="JSON con latencias, tasas de error y tamaños por operación")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla para latencias y errores reproducibles")
+    args = parser.parse_args()
+
+    server = MockSoapServer(load_config(args.config), seed=args.seed)
+    print("Variables de entorno para apuntar el gateway a este servidor:")
+    print("USE_SOAP_MOCKS=false")
+    for service, (_, env_var) in SERVICES.items():
+        print(f"{env_var}=http://{args.host}:{args.port}/{service}?wsdl")
+    uvicorn.run(server, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Micro-benchmarks de validación y serialización de modelos pydantic
+
+Mide, para los modelos anidados más grandes de app/models y tamaños de
+lista de 10 a 10.000 elementos, el costo de cada etapa por la que pasa un
+payload en un request:
+
+- validate_python: dict -> modelo (respuesta SOAP convertida o body ya parseado)
+- validate_json: bytes JSON -> modelo (body del request)
+- dump_python / dump_json: modelo -> dict / bytes JSON
+- response_model: validación + serialización que FastAPI aplica con response_model
+
+Los resultados (mediana en µs por operación y por elemento) se escriben en
+JSON y se pueden comparar contra una corrida anterior con --baseline.
+
+Uso:
+    python -m benchmarks.models_bench
+    python -m benchmarks.models_bench --sizes 10 1000 --baseline benchmarks/models_baseline.json
+"""
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import platform
+import statistics
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import pydantic
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.models.firma import FirmaDesatendidaRequest
+from app.models.perfiles import RespuestaPerfilesBe
+from app.models.sii import RespuestaSiiActividadEconomicaBe
+from benchmarks.load_test import git_commit
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+class ModelCase(NamedTuple):
+    """Modelo a medir y generador de un payload válido con n elementos"""
+    name: str
+    model: type
+    payload: Callable[[int], Dict[str, Any]]
+
+
+def perfiles_payload(n: int) -> Dict[str, Any]:
+    """RespuestaPerfilesBe con n usuarios, funciones y empresas, y n/10 perfiles de 10 funciones"""
+    def funcion(i: int) -> Dict[str, Any]:
+        return {"idFuncion": i, "nombreFuncion": f"Función {i}", "obligatorio": i % 2 == 0,
+                "denegado": False, "estado": "Activo"}
+
+    return {
+        "autorizacion": {"acceso": "CORRECTO", "codigo": 200, "descripcion": "Acceso autorizado"},
+        "usuario": [
+            {"idUsuario": i, "nombre": f"Nombre {i}", "apellidoPaterno": "Pérez", "apellidoMaterno": "González",
+             "tipoPersona": "PersonaNatural"}
+            for i in range(n)
+        ],
+        "perfil": {
+            "idSistema": 1,
+            "nombreSistema": "Sistema de prueba",
+            "perfil": [
+                {"idPerfil": i, "nombrePerfil": f"Perfil {i}", "estado": "Activo", "tipoPerfil": "Interno",
+                 "region": "Region_Metropolitana_de_Santiago", "funcion": [funcion(j) for j in range(10)]}
+                for i in range(max(1, n // 10))
+            ],
+        },
+        "funcion": [funcion(i) for i in range(n)],
+        "usuarioEmpresa": [
+            {"idUsuarioEmpresa": i, "razonSocial": f"Empresa {i} SpA", "tipoEmpresa": "EMPRESA",
+             "tipoPersona": "PersonaJuridica"}
+            for i in range(n)
+        ],
+    }
+
+
+def actividad_economica_payload(n: int) -> Dict[str, Any]:
+    """RespuestaSiiActividadEconomicaBe con n actividades económicas"""
+    return {
+        "cabecera": {"estadoProceso": "CORRECTO", "respuestaProceso": "OK", "codigoProceso": 200},
+        "respuesta": {
+            "fechaInicioActividad": "2020-01-01T00:00:00",
+            "glosa": "Contribuyente con actividades vigentes",
+            "estado": "ACTIVO",
+            "actividadEconomica": [
+                {"actividad": 620100 + i, "categoria": 1 + i % 2, "descripcion": f"Actividad económica {i}",
+                 "fechaInic": "2020-01-01T00:00:00"}
+                for i in range(n)
+            ],
+        },
+        "xmlRespuesta": None,
+    }
+
+
+_DOCUMENTO = base64.b64encode(b"%PDF-1.4 " + b"x" * 1024).decode()
+_CHECKSUM = hashlib.sha256(_DOCUMENTO.encode()).hexdigest()
+
+
+def firma_payload(n: int) -> Dict[str, Any]:
+    """FirmaDesatendidaRequest con n documentos de ~1 KB"""
+    return {
+        "documentos": [
+            {"base64": _DOCUMENTO, "checksum": _CHECKSUM, "descripcion": f"Resolución {i}", "folio": i,
+             "formato": "PDF", "nombre": f"resolucion_{i}.pdf", "region": 13, "tipoDocumento": "RESOLUCION_EXENTA"}
+            for i in range(n)
+        ],
+        "proposito": "Firmar",
+        "runFirmante": "12345678-9",
+    }
+
+
+CASES: List[ModelCase] = [
+    ModelCase("RespuestaPerfilesBe", RespuestaPerfilesBe, perfiles_payload),
+    ModelCase("RespuestaSiiActividadEconomicaBe", RespuestaSiiActividadEconomicaBe, actividad_economica_payload),
+    ModelCase("FirmaDesatendidaRequest", FirmaDesatendidaRequest, firma_payload),
+]
+
+
+def operations(model: type, payload: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    """Funciones sin argumentos para cada etapa medida"""
+    raw = json.dumps(payload).encode()
+    instance: BaseModel = model.model_validate(payload)
+    field = create_response_field(name=f"Response_{model.__name__}", type_=model)
+
+    def response_model() -> Any:
+        # serialize_response no espera nada con is_coroutine=True: se ejecuta sin event loop
+        # para no medir el costo de crearlo
+        coroutine = serialize_response(field=field, response_content=instance)
+        try:
+            coroutine.send(None)
+        except StopIteration as done:
+            return done.value
+        raise RuntimeError("serialize_response quedó esperando")
+
+    return {
+        "validate_python": lambda: model.model_validate(payload),
+        "validate_json": lambda: model.model_validate_json(raw),
+        "dump_python": lambda: instance.model_dump(),
+        "dump_json": lambda: instance.model_dump_json(),
+        "response_model": response_model,
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int, min_time: float = 0.2) -> Dict[str, float]:
+    """Mediana y mínimo en µs por llamada, con un número de iteraciones que dure al menos min_time"""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time and number < 1_000_000:
+        number *= 2
+    runs = [timer.timeit(number) / number * 1e6 for _ in range(repeat)]
+    return {"median_us": round(statistics.median(runs), 3), "min_us": round(min(runs), 3), "iterations": number}
+
+
+def run_benchmarks(sizes: Sequence[int], repeat: int = 5, only: Optional[str] = None,
+                   min_time: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """Resultados por clave "Modelo/operación/tamaño" """
+    results = {}
+    for case in CASES:
+        if only and only not in case.name:
+            continue
+        for size in sizes:
+            payload = case.payload(size)
+            for operation, func in operations(case.model, payload).items():
+                result = measure(func, repeat, min_time)
+                result["per_item_us"] = round(result["median_us"] / size, 4)
+                key = f"{case.name}/{operation}/{size}"
+                results[key] = result
+                print(f"{key:<55} {result['median_us']:>14.1f} µs  {result['per_item_us']:>10.3f} µs/elemento")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[Dict[str, Any]]:
+    """Mediciones cuya mediana creció más que la tolerancia relativa"""
+    regressions = []
+    for key, current in results.items():
+        before = baseline.get(key, {}).get("median_us")
+        if not before:
+            continue
+        change = (current["median_us"] - before) / before
+        if change > tolerance:
+            regressions.append({"key": key, "baseline": before, "current": current["median_us"],
+                                "change": round(change, 4)})
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de modelos pydantic de app/models")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Cantidad de elementos de las listas del payload")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medición (se usa la mediana)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--only", help="Medir solo los modelos cuyo nombre contiene este texto")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto en benchmarks/results/)")
+    parser.add_argument("--baseline", help="Resultados anteriores contra los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Aumento relativo tolerado de la mediana respecto de la línea base")
+    args = parser.parse_args()
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    results = run_benchmarks(args.sizes, args.repeat, args.only, args.min_time)
+    report = {
+        "meta": {
+            "timestamp": started_at.isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pydantic": pydantic.VERSION,
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"models-{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression['key']}: {regression['baseline']} -> {regression['current']} µs "
+                  f"({regression['change']:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"Sin regresiones respecto de {args.baseline} (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Escenarios de carga: un request válido por cada endpoint de app/api/v1
+
+Cada escenario indica el servicio SOAP que ejercita (None si no llama a
+ninguno) para poder omitir los que el servidor simulado no cubre.
+"""
+import base64
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class Scenario(NamedTuple):
+    """Request que se repite durante la prueba de carga de un endpoint"""
+    name: str
+    method: str
+    path: str
+    service: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    json: Optional[Any] = None
+
+
+_DOCUMENTO = b"%PDF-1.4 documento de prueba de carga"
+
+DATOS_EMPRESA = {
+    "RutEmpresa": 76543210,
+    "DvEmpresa": "K",
+    "TipoEmpresa": 1,
+    "IdComuna": 13101,
+    "DireccionCalle": "Av. Principal",
+    "DireccionNumero": "123",
+    "NumeroCelular": 987654321,
+    "CodigoCelular": "+56",
+    "MailEmpresa": "contacto@empresa.cl",
+    "IdPreguntaSecreta": 1,
+    "RespuestaSecreta": "respuesta",
+    "RutRepresentante": 12345678,
+    "DvRepresentante": "9",
+    "MailRepresentante": "representante@empresa.cl",
+    "NumeroCelularRepresentante": 987654321,
+    "CodigoCelularRepresentante": "+56",
+}
+
+PERSONA = {
+    "Rut": 12345678,
+    "Dv": "9",
+    "ApellidoPaterno": "Pérez",
+    "ApellidoMaterno": "González",
+    "Nombres": "Juan Carlos",
+    "NroSerie": "123456789",
+    "CodigoCelular": "+56",
+    "NumeroCelular": 987654321,
+    "Mail": "juan.perez@example.com",
+    "FechaNacimiento": "1990-05-15T00:00:00Z",
+    "IdNacionalidad": 1,
+    "Comuna": 13101,
+    "Direccion": "Av. Principal",
+    "NroDireccion": "123",
+    "IdSexo": 1,
+}
+
+CONSULTA_RUT = {"idSistema": 1, "rut": 12345678, "dv": "9"}
+
+
+SCENARIOS: List[Scenario] = [
+    # Salud y métricas
+    Scenario("health", "GET", "/api/v1/health/"),
+    Scenario("health_ready", "GET", "/api/v1/health/ready"),
+    Scenario("health_live", "GET", "/api/v1/health/live"),
+    Scenario("metrics", "GET", "/api/v1/metrics"),
+    Scenario("metrics_rate_limits", "GET", "/api/v1/metrics/rate-limits"),
+
+    # Identificación (Clave Única)
+    Scenario("auth_login", "POST", "/api/v1/auth/login", "identificacion",
+             json={"usuario": "12345678-9", "clave": "clave"}),
+    Scenario("auth_login_guid", "POST", "/api/v1/auth/login/guid", "identificacion",
+             json={"guid": "123e4567-e89b-12d3-a456-426614174000"}),
+    Scenario("auth_login_token", "POST", "/api/v1/auth/login/token", "identificacion",
+             json={"token": "token-de-prueba"}),
+    Scenario("auth_systems", "GET", "/api/v1/auth/systems/12345678-9", "identificacion"),
+
+    # Registro
+    Scenario("registro_persona", "POST", "/api/v1/registro/persona", "registro",
+             json={"idSistema": 1, "datosPersona": PERSONA}),
+    Scenario("registro_persona_crm", "POST", "/api/v1/registro/persona/crm", "registro",
+             json={"idSistema": 1, "datosPersona": {"Rut": 12345678, "Dv": "9", "Contacto": {
+                 "IdComuna": 13101, "NumeroCelular": 987654321, "CodigoTelefonoFijo": 2, "TelefonoFijo": 22345678,
+                 "Email": "juan.perez@example.com"}}}),
+    Scenario("registro_persona_siac", "POST", "/api/v1/registro/persona/siac", "registro",
+             json={"idSistema": 1, "datosPersona": {"Rut": 12345678, "Dv": "9", "Contacto": {"IdComuna": 13101}}}),
+    Scenario("registro_empresa", "POST", "/api/v1/registro/empresa", "registro",
+             json={"idSistema": 1, "datosEmpresa": DATOS_EMPRESA}),
+    Scenario("registro_empresa_actualizar", "PUT", "/api/v1/registro/empresa", "registro",
+             json={"idSistema": 1, "datosEmpresa": {"RutEmpresa": 76543210, "DvEmpresa": "K", "TipoEmpresa": 1,
+                                                     "IdComuna": 13101, "Telefono": 987654321}}),
+    Scenario("registro_empresa_razon", "PATCH", "/api/v1/registro/empresa/razon", "registro",
+             json={"idSistema": 1, "rutEmpresa": 76543210, "dvEmpresa": "K"}),
+    Scenario("registro_empresa_rep_legal", "PATCH", "/api/v1/registro/empresa/rep-legal", "registro",
+             json={"idSistema": 1, "rutEmpresa": 76543210, "dvEmpresa": "K"}),
+    Scenario("registro_empresa_tipo", "PATCH", "/api/v1/registro/empresa/tipo", "registro",
+             json={"idSistema": 1, "rutEmpresa": 76543210, "dvEmpresa": "K", "tipoEntidad": "OTEC"}),
+    Scenario("registro_empresa_con_cus", "POST", "/api/v1/registro/empresa/con-cus", "registro",
+             json={"idSistema": 1, "datosEmpresa": {**DATOS_EMPRESA, "Cus": "CUS123"}}),
+    Scenario("registro_empresa_cambio_cus", "PATCH", "/api/v1/registro/empresa/cambio-cus", "registro",
+             json={"idSistema": 1, "rutEmpresa": 76543210, "dvRutEmpresa": "K", "cusActual": "CUS123",
+                   "nuevaCus": "CUS456"}),
+    Scenario("registro_empresa_oracle", "POST", "/api/v1/registro/empresa/oracle", "registro",
+             json={"idSistema": 1, "datosEmpresa": {"PerJur": {"RutEmpresa": 76543210, "DvEmpresa": "K"}}}),
+    Scenario("registro_empresa_masivo", "POST", "/api/v1/registro/empresa/masivo", "registro",
+             json={"idSistema": 1, "force": True,
+                   "empresas": [{"rutEmpresa": 76000000 + i, "dvEmpresa": "K"} for i in range(20)]}),
+
+    # Consulta Registro Civil
+    Scenario("rc_run", "GET", "/api/v1/rc/run", "consulta_rc",
+             params={"id_sistema": 1, "rut": 12345678, "dv": "9"}),
+    Scenario("rc_run_documento", "GET", "/api/v1/rc/run/documento", "consulta_rc",
+             params={"id_sistema": 1, "rut": 12345678, "dv": "9", "nro_serie_doc": "123456789",
+                     "tipo_documento": "C"}),
+    Scenario("rc_cert_nac", "GET", "/api/v1/rc/cert-nac", "consulta_rc",
+             params={"id_sistema": 1, "rut": 12345678, "dv": "9"}),
+    Scenario("rc_discapacidad", "GET", "/api/v1/rc/discapacidad", "consulta_rc",
+             params={"id_sistema": 1, "run": 12345678, "dv": "9"}),
+    Scenario("rc_verify", "POST", "/api/v1/rc/verify", "consulta_rc",
+             json={"xmlparamin": "<consulta><rut>12345678</rut></consulta>"}),
+    Scenario("rc_huella", "POST", "/api/v1/rc/huella", "consulta_rc",
+             json={"IdSistema": 1, "Datos": {"RutEmpresa": 76543210, "IdTransaccion": 1, "Ip": "127.0.0.1",
+                                             "UsuarioFinal": "usuario", "RutPersona": 12345678, "NumeroDedo": 1,
+                                             "Formato": 1, "ImagenBase64": base64.b64encode(b"huella").decode()}}),
+
+    # Perfiles
+    Scenario("perfiles_usuarios", "GET", "/api/v1/perfiles/usuarios", "perfiles",
+             params={"id_sistema": 1, "id_perfil": 1}),
+    Scenario("perfiles_usuario", "GET", "/api/v1/perfiles/usuarios/12345678", "perfiles",
+             params={"id_sistema": 1, "tipo_persona": "PersonaNatural"}),
+    Scenario("perfiles_perfiles", "GET", "/api/v1/perfiles/perfiles", "perfiles", params={"id_sistema": 1}),
+    Scenario("perfiles_funciones", "GET", "/api/v1/perfiles/funciones", "perfiles", params={"id_sistema": 1}),
+    Scenario("perfiles_funciones_por_perfil", "GET", "/api/v1/perfiles/funciones/por-perfil", "perfiles",
+             params={"id_sistema": 1, "id_perfil": 1}),
+    Scenario("perfiles_empresas", "GET", "/api/v1/perfiles/empresas", "perfiles",
+             params={"id_sistema": 1, "id_perfil": 1}),
+    Scenario("perfiles_solicitar", "POST", "/api/v1/perfiles/solicitar", "perfiles",
+             json={"idSistema": 1, "idPerfil": 1, "rutUsuario": 12345678, "motivoSolicitud": "Carga",
+                   "idRegion": 13, "tipoPersona": "PersonaNatural", "rutUsrUpdate": 12345678}),
+    Scenario("perfiles_bloquear", "POST", "/api/v1/perfiles/bloquear", "perfiles",
+             json={"idSistema": 1, "idPerfil": 1, "rutUsuario": 12345678, "tipoPersona": "PersonaNatural",
+                   "rutUsrUpdate": 12345678}),
+    Scenario("perfiles_asignar", "POST", "/api/v1/perfiles/asignar", "perfiles",
+             json={"idSistema": 1, "idPerfil": 1, "region": "Region_Metropolitana_de_Santiago",
+                   "rutUsuario": 12345678, "tipoPersona": "PersonaNatural", "rutUsrUpdate": 12345678}),
+
+    # Notificación
+    Scenario("notificacion_sms", "POST", "/api/v1/notificacion/sms", "notificacion",
+             json={"idSistema": 1, "ambiente": "desarrollo", "celular": 987654321, "mensaje": "Mensaje de prueba"}),
+    Scenario("notificacion_correo", "POST", "/api/v1/notificacion/correo/publico", "notificacion",
+             json={"idSistema": 1, "ambiente": "desarrollo", "mail": "juan.perez@example.com",
+                   "asunto": "Prueba", "mensaje": "Mensaje de prueba"}),
+    Scenario("notificacion_correo_lista", "POST", "/api/v1/notificacion/correo/publico/lista", "notificacion",
+             json={"idSistema": 1, "ambiente": "desarrollo",
+                   "lstMails": [f"usuario{i}@example.com" for i in range(10)],
+                   "asunto": "Prueba", "mensaje": "Mensaje de prueba"}),
+    Scenario("notificacion_correo_rm", "POST", "/api/v1/notificacion/correo/publico/rm", "notificacion",
+             json={"idSistema": 1, "ambiente": "desarrollo", "mail": "juan.perez@example.com",
+                   "asunto": "Prueba", "mensaje": "Mensaje de prueba"}),
+
+    # SII
+    Scenario("sii_representante_legal", "POST", "/api/v1/sii/representante-legal", "sii",
+             json={"idSistema": 1, "rut": "76543210", "dv": "K"}),
+    Scenario("sii_relacion_empresa", "POST", "/api/v1/sii/relacion-empresa", "sii",
+             json={"idSistema": 1, "rutEmp": 76543210, "dvEmp": "K", "rutSoc": 12345678, "dvSoc": "9"}),
+    Scenario("sii_movimiento_contribuyente", "POST", "/api/v1/sii/movimiento-contribuyente", "sii",
+             json={"idSistema": 1, "rutCont": 12345678, "dvCont": "9", "periodoTrib": "202401"}),
+    Scenario("sii_numero_empleados", "POST", "/api/v1/sii/numero-empleados", "sii",
+             json={**CONSULTA_RUT, "periodo": 202401}),
+    Scenario("sii_categoria_empresa", "POST", "/api/v1/sii/categoria-empresa", "sii",
+             json={**CONSULTA_RUT, "fecha": "2024-01-01T00:00:00", "tipoConsulta": 1}),
+    Scenario("sii_datos_contribuyente", "POST", "/api/v1/sii/datos-contribuyente", "sii", json=CONSULTA_RUT),
+    Scenario("sii_actividad_economica", "POST", "/api/v1/sii/actividad-economica", "sii", json=CONSULTA_RUT),
+    Scenario("sii_estado_giro", "POST", "/api/v1/sii/estado-giro", "sii", json=CONSULTA_RUT),
+    Scenario("sii_fecha_inicio_actividad", "POST", "/api/v1/sii/fecha-inicio-actividad", "sii", json=CONSULTA_RUT),
+
+    # Firma
+    Scenario("firma_desatendida", "POST", "/api/v1/firma/desatendida", "firma",
+             json={"runFirmante": "12345678-9", "proposito": "Firmar", "documentos": [{
+                 "base64": base64.b64encode(_DOCUMENTO).decode(),
+                 "checksum": hashlib.sha256(_DOCUMENTO).hexdigest(),
+                 "descripcion": "Documento de prueba",
+                 "folio": 1,
+                 "formato": "PDF",
+                 "nombre": "documento.pdf",
+                 "region": 13,
+                 "tipoDocumento": "OTRO",
+             }]}),
+]
@@ -0,0 +1,125 @@
+"""
+Tests para el control de admisión de requests
+"""
+import asyncio
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.config.settings import settings
+from app.utils.admission import AdmissionController, AdmissionRejectedError, Priority, classify
+from app.utils.loop_monitor import event_loop_monitor
+
+
+class TestClasificacion:
+    """Tests de clases de prioridad"""
+
+    def test_health_y_metricas_son_criticos(self):
+        assert classify("/api/v1/health/ready") is Priority.CRITICAL
+        assert classify("/api/v1/metrics/") is Priority.CRITICAL
+
+    def test_por_defecto_interactive(self):
+        assert classify("/api/v1/sii/estado-giro") is Priority.INTERACTIVE
+
+    def test_bulk_por_header_o_ruta(self, monkeypatch):
+        assert classify("/api/v1/sii/estado-giro", "bulk") is Priority.BULK
+        monkeypatch.setattr(settings, "admission_bulk_paths", ["/api/v1/registro/empresa/bulk"])
+        assert classify("/api/v1/registro/empresa/bulk/refresh") is Priority.BULK
+
+    def test_header_no_eleva_prioridad(self):
+        assert classify("/api/v1/sii/estado-giro", "critical") is Priority.INTERACTIVE
+
+
+class TestAdmissionController:
+    """Tests de cupos, colas y rechazos"""
+
+    def test_interactive_se_atiende_antes_que_bulk(self, monkeypatch):
+        monkeypatch.setattr(settings, "admission_max_in_flight", 1)
+        controller = AdmissionController()
+        order = []
+
+        async def enter(priority):
+            await controller.acquire(priority)
+            order.append(priority)
+
+        async def scenario():
+            await controller.acquire(Priority.INTERACTIVE)
+            bulk = asyncio.ensure_future(enter(Priority.BULK))
+            await asyncio.sleep(0.01)
+            interactive = asyncio.ensure_future(enter(Priority.INTERACTIVE))
+            await asyncio.sleep(0.01)
+            controller.release(Priority.INTERACTIVE)
+            await interactive
+            controller.release(Priority.INTERACTIVE)
+            await bulk
+            controller.release(Priority.BULK)
+
+        asyncio.run(scenario())
+        assert order == [Priority.INTERACTIVE, Priority.BULK]
+        assert controller.snapshot()["in_flight"] == {"critical": 0, "interactive": 0, "bulk": 0}
+
+    def test_rechazo_por_espera_en_cola(self, monkeypatch):
+        monkeypatch.setattr(settings, "admission_max_in_flight", 1)
+        monkeypatch.setattr(settings, "admission_queue_timeout", 0.02)
+        controller = AdmissionController()
+
+        async def scenario():
+            await controller.acquire(Priority.INTERACTIVE)
+            with pytest.raises(AdmissionRejectedError) as exc_info:
+                await controller.acquire(Priority.INTERACTIVE)
+            return exc_info.value
+
+        error = asyncio.run(scenario())
+        assert error.reason == "queue_timeout"
+        assert error.code == "OVERLOADED"
+
+    def test_bulk_limitado_a_su_fraccion(self, monkeypatch):
+        monkeypatch.setattr(settings, "admission_max_in_flight", 4)
+        monkeypatch.setattr(settings, "admission_bulk_ratio", 0.5)
+        monkeypatch.setattr(settings, "admission_queue_timeout", 0.02)
+        controller = AdmissionController()
+
+        async def scenario():
+            await controller.acquire(Priority.BULK)
+            await controller.acquire(Priority.BULK)
+            with pytest.raises(AdmissionRejectedError):
+                await controller.acquire(Priority.BULK)
+            await controller.acquire(Priority.INTERACTIVE)
+
+        asyncio.run(scenario())
+
+    def test_latencia_del_loop_rechaza_bulk_primero(self, monkeypatch):
+        monkeypatch.setattr(event_loop_monitor, "lag_ms", settings.admission_max_loop_lag_ms + 1)
+        controller = AdmissionController()
+
+        async def scenario():
+            with pytest.raises(AdmissionRejectedError):
+                await controller.acquire(Priority.BULK)
+            await controller.acquire(Priority.INTERACTIVE)
+            await controller.acquire(Priority.CRITICAL)
+
+        asyncio.run(scenario())
+
+
+@pytest.mark.unit
+def test_middleware_responde_503_con_retry_after(client: TestClient, monkeypatch):
+    """Sin capacidad, los requests de /api/v1 se rechazan salvo health"""
+    monkeypatch.setattr(settings, "admission_max_in_flight", 0)
+    monkeypatch.setattr(settings, "admission_queue_timeout", 0.01)
+
+    response = client.post("/api/v1/sii/estado-giro", json={"idSistema": 1, "rut": 12345678, "dv": "9"})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["code"] == "OVERLOADED"
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/api/v1/health/").status_code == status.HTTP_200_OK
+
+
+@pytest.mark.unit
+def test_middleware_deshabilitado(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "admission_control_enabled", False)
+    monkeypatch.setattr(settings, "admission_max_in_flight", 0)
+
+    response = client.post("/api/v1/sii/estado-giro", json={"idSistema": 1, "rut": 12345678, "dv": "9"})
+
+    assert response.status_code == status.HTTP_200_OK
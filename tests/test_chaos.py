@@ -0,0 +1,155 @@
+"""
+Tests para la inyección de fallas y latencia en las llamadas SOAP
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from requests.exceptions import ConnectionError as RequestsConnectionError, ReadTimeout
+from zeep.exceptions import Fault
+
+from app.api.v1 import chaos
+from app.config.settings import settings
+from app.models.chaos import ReglaCaos
+from app.services.soap_executor import run_soap_call
+from app.utils.chaos import ChaosInjector, chaos_injector
+from app.utils.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.utils.deadline import DeadlineExceededError, reset_deadline, set_deadline
+
+
+@pytest.fixture(autouse=True)
+def chaos_enabled(monkeypatch):
+    """Caos habilitado, sin reintentos ni hedging y estado global limpio"""
+    monkeypatch.setattr(settings, "chaos_enabled", True)
+    monkeypatch.setattr(settings, "soap_retry_attempts", 1)
+    monkeypatch.setattr(settings, "soap_hedging_enabled", False)
+    circuit_breakers.reset()
+    chaos_injector.configure([])
+    yield
+    chaos_injector.configure([])
+    circuit_breakers.reset()
+
+
+def regla(**values) -> ReglaCaos:
+    return ReglaCaos.model_validate(values)
+
+
+class TestReglas:
+    """Tests de validación de reglas"""
+
+    def test_latencia_requiere_distribucion(self):
+        with pytest.raises(ValidationError):
+            regla(kind="latency", percentage=10)
+        with pytest.raises(ValidationError):
+            regla(kind="latency", percentage=10, latency={"distribution": "uniform", "min": 0.2})
+        with pytest.raises(ValidationError):
+            regla(kind="fault", percentage=101)
+
+    def test_porcentaje_y_filtro_por_operacion(self):
+        injector = ChaosInjector([regla(service="sii", operation="ConsultaEstadoGiro", kind="fault", percentage=30)], seed=1)
+        faults = 0
+        for _ in range(1000):
+            try:
+                injector.inject("sii", "ConsultaEstadoGiro")
+                injector.inject("sii", "ConsultaDatosContribuyente")
+                injector.inject("registro", "ConsultaEstadoGiro")
+            except Fault:
+                faults += 1
+
+        assert 250 < faults < 350
+        assert injector.injected() == {"sii/ConsultaEstadoGiro/fault": faults}
+
+
+class TestInyeccion:
+    """Tests de las inyecciones a través del pool SOAP"""
+
+    def test_latencia(self):
+        chaos_injector.configure([regla(kind="latency", percentage=100, latency={"distribution": "fixed", "value": 0.1})])
+
+        started = time.perf_counter()
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", lambda: "ok")) == "ok"
+        assert time.perf_counter() - started >= 0.1
+
+    def test_latencia_mayor_al_timeout(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_timeout", 0.05)
+        chaos_injector.configure([regla(kind="latency", percentage=100, latency={"distribution": "fixed", "value": 5})])
+
+        started = time.perf_counter()
+        with pytest.raises(ReadTimeout):
+            asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", lambda: "ok"))
+        assert time.perf_counter() - started < 1
+
+    def test_timeout_respeta_deadline(self):
+        chaos_injector.configure([regla(kind="timeout", percentage=100)])
+
+        async def call():
+            token = set_deadline(0.1)
+            try:
+                return await run_soap_call("registro", "ActualizarRazonSocial", lambda: "ok")
+            finally:
+                reset_deadline(token)
+
+        started = time.perf_counter()
+        with pytest.raises((ReadTimeout, DeadlineExceededError)):
+            asyncio.run(call())
+        assert time.perf_counter() - started < 1
+
+    def test_fault_y_error_de_conexion(self):
+        chaos_injector.configure([
+            regla(service="sii", kind="fault", percentage=100, message="RUT inválido"),
+            regla(service="registro", kind="connection_error", percentage=100),
+        ])
+
+        with pytest.raises(Fault, match="RUT inválido"):
+            asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", lambda: "ok"))
+        with pytest.raises(RequestsConnectionError):
+            asyncio.run(run_soap_call("registro", "ActualizarRazonSocial", lambda: "ok"))
+
+    def test_errores_abren_el_circuit_breaker(self, monkeypatch):
+        monkeypatch.setattr(settings, "circuit_minimum_calls", 2)
+        chaos_injector.configure([regla(service="registro", kind="connection_error", percentage=100)])
+
+        for _ in range(2):
+            with pytest.raises(RequestsConnectionError):
+                asyncio.run(run_soap_call("registro", "RegistroPersona", lambda: "ok"))
+
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(run_soap_call("registro", "RegistroPersona", lambda: "ok"))
+
+    def test_deshabilitado_no_inyecta(self, monkeypatch):
+        monkeypatch.setattr(settings, "chaos_enabled", False)
+        chaos_injector.configure([regla(kind="fault", percentage=100)])
+
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", lambda: "ok")) == "ok"
+
+
+class TestAdminEndpoint:
+    """Tests del endpoint de administración"""
+
+    def test_configura_en_caliente(self):
+        app = FastAPI()
+        app.include_router(chaos.router, prefix="/api/v1")
+        client = TestClient(app)
+        rules = [{"service": "sii", "operation": "ConsultaEstadoGiro", "kind": "fault", "percentage": 100}]
+
+        assert client.put("/api/v1/admin/chaos", json={"rules": rules}).status_code == 200
+        with pytest.raises(Fault):
+            asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", lambda: "ok"))
+
+        state = client.get("/api/v1/admin/chaos").json()
+        assert state["rules"][0]["kind"] == "fault"
+        assert state["injected"] == {"sii/ConsultaEstadoGiro/fault": 1}
+
+        assert client.delete("/api/v1/admin/chaos").json() == {"rules": [], "injected": {}}
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", lambda: "ok")) == "ok"
+
+    def test_rechaza_reglas_invalidas(self):
+        app = FastAPI()
+        app.include_router(chaos.router, prefix="/api/v1")
+
+        response = TestClient(app).put("/api/v1/admin/chaos", json={"rules": [{"kind": "latency", "percentage": 5}]})
+
+        assert response.status_code == 422
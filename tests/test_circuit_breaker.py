@@ -0,0 +1,221 @@
+"""
+Tests para los circuit breakers de llamadas SOAP
+"""
+import asyncio
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from unittest.mock import Mock, AsyncMock
+from zeep.exceptions import Fault
+
+from app.main import app
+from app.services.soap_executor import run_soap_call
+from app.services.sii_soap_client import SiiSoapClientService
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState, circuit_breakers
+from app.utils.metrics import metrics
+
+
+def make_breaker(**overrides) -> CircuitBreaker:
+    """Crea un breaker con umbrales pequeños para tests"""
+    params = dict(
+        failure_rate_threshold=0.5,
+        slow_call_threshold=10.0,
+        slow_call_rate_threshold=1.0,
+        minimum_calls=4,
+        window_seconds=60,
+        open_seconds=30,
+        half_open_max_calls=1,
+    )
+    params.update(overrides)
+    return CircuitBreaker("test", "Operacion", **params)
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    """Aislar los breakers globales entre tests"""
+    circuit_breakers.reset()
+    yield
+    circuit_breakers.reset()
+
+
+class TestCircuitBreaker:
+    """Tests de transiciones de estado"""
+    
+    def test_abre_al_superar_tasa_de_errores(self):
+        breaker = make_breaker()
+        for success in (True, False, True, False):
+            breaker.before_call()
+            breaker.record(success, 0.1)
+        
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert exc_info.value.retry_after >= 1
+    
+    def test_no_abre_bajo_minimo_de_llamadas(self):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record(False, 0.1)
+        
+        assert breaker.state == CircuitState.CLOSED
+    
+    def test_abre_por_llamadas_lentas(self):
+        breaker = make_breaker(slow_call_threshold=1.0, slow_call_rate_threshold=0.75)
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(True, 2.0)
+        
+        assert breaker.state == CircuitState.OPEN
+    
+    def test_half_open_cierra_tras_llamada_exitosa(self):
+        breaker = make_breaker(open_seconds=0)
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(False, 0.1)
+        assert breaker.state == CircuitState.OPEN
+        
+        permit = breaker.before_call()
+        assert breaker.state == CircuitState.HALF_OPEN
+        # Solo una llamada de prueba a la vez
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        breaker.record(True, 0.1, permit)
+        assert breaker.state == CircuitState.CLOSED
+    
+    def test_half_open_reabre_tras_fallo(self):
+        breaker = make_breaker(open_seconds=0)
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(False, 0.1)
+        
+        permit = breaker.before_call()
+        breaker.record(False, 0.1, permit)
+        assert breaker.state == CircuitState.OPEN
+    
+    def test_half_open_ignora_llamadas_admitidas_antes(self):
+        breaker = make_breaker(open_seconds=0)
+        # Llamada admitida con el circuito cerrado que responde tarde
+        tardia = breaker.before_call()
+        assert tardia is None
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(False, 0.1)
+        
+        permit = breaker.before_call()
+        assert breaker.state == CircuitState.HALF_OPEN
+        
+        breaker.record(True, 0.1, tardia)
+        breaker.release(tardia)
+        # No cierra el circuito ni libera el cupo de la llamada de prueba
+        assert breaker.state == CircuitState.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        breaker.record(True, 0.1, permit)
+        assert breaker.state == CircuitState.CLOSED
+    
+    def test_half_open_ignora_pruebas_de_un_half_open_anterior(self):
+        breaker = make_breaker(open_seconds=0, half_open_max_calls=2)
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(False, 0.1)
+        
+        anterior = breaker.before_call()
+        fallida = breaker.before_call()
+        breaker.record(False, 0.1, fallida)
+        assert breaker.state == CircuitState.OPEN
+        
+        primera = breaker.before_call()
+        breaker.record(True, 0.1, anterior)
+        breaker.record(True, 0.1, primera)
+        # Falta la segunda prueba del half_open actual
+        assert breaker.state == CircuitState.HALF_OPEN
+        
+        breaker.record(True, 0.1, breaker.before_call())
+        assert breaker.state == CircuitState.CLOSED
+    
+    def test_transiciones_expuestas_como_metricas(self):
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(False, 0.1)
+        
+        assert metrics.get("soap_circuit_state", service="test", operation="Operacion") == 2
+        assert metrics.get(
+            "soap_circuit_transitions_total",
+            service="test", operation="Operacion", from_state="closed", to_state="open"
+        ) >= 1
+
+
+class TestRunSoapCall:
+    """Tests de integración del breaker en el camino de llamada SOAP"""
+    
+    def test_fault_no_cuenta_como_fallo(self, monkeypatch):
+        from app.config.settings import settings
+        monkeypatch.setattr(settings, "circuit_minimum_calls", 2)
+        
+        def raise_fault():
+            raise Fault("RUT inválido")
+        
+        for _ in range(3):
+            with pytest.raises(Fault):
+                asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", raise_fault))
+        
+        assert circuit_breakers.get("sii", "ConsultaEstadoGiro").state == CircuitState.CLOSED
+    
+    def test_errores_de_transporte_abren_el_circuito(self, monkeypatch):
+        from app.config.settings import settings
+        monkeypatch.setattr(settings, "circuit_minimum_calls", 2)
+        calls = []
+        
+        def raise_connection_error():
+            calls.append(1)
+            raise ConnectionError("srv-ws-ora:8090 no responde")
+        
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                asyncio.run(run_soap_call("registro", "RegistroPersona", raise_connection_error))
+        
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(run_soap_call("registro", "RegistroPersona", raise_connection_error))
+        assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_circuito_abierto_retorna_503_con_retry_after():
+    """
+    Test de que un circuito abierto se traduce en 503 con Retry-After
+    """
+    from app.api.v1.sii import get_sii_soap_client
+    
+    mock_client = Mock(spec=SiiSoapClientService)
+    mock_client.consulta_estado_giro = AsyncMock(side_effect=CircuitOpenError("sii", "ConsultaEstadoGiro", 12))
+    app.dependency_overrides[get_sii_soap_client] = lambda: mock_client
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/sii/estado-giro",
+            json={"idSistema": 1, "rut": 12345678, "dv": "9"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "12"
+    assert response.json()["code"] == "CIRCUIT_OPEN"
+
+
+@pytest.mark.unit
+def test_metrics_endpoint(client: TestClient):
+    """
+    Test del endpoint de métricas en formato Prometheus
+    """
+    circuit_breakers.get("sii", "ConsultaEstadoGiro")
+    
+    response = client.get("/api/v1/metrics")
+    
+    assert response.status_code == status.HTTP_200_OK
+    assert "text/plain" in response.headers["content-type"]
+    assert 'soap_circuit_state{operation="ConsultaEstadoGiro",service="sii"}' in response.text
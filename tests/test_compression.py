@@ -0,0 +1,147 @@
+"""
+Tests para la compresión de respuestas
+"""
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.config.settings import settings
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware, Encoder, negotiate
+from app.utils.metrics import metrics
+
+
+BIG_JSON = '{"xmlRespuesta": "' + "<dato>valor</dato>" * 500 + '"}'
+
+
+def ndjson_lines():
+    for i in range(3):
+        yield f'{{"linea": {i}, "relleno": "{"x" * 100}"}}\n'
+
+
+demo = FastAPI()
+demo.add_middleware(CompressionMiddleware)
+
+
+@demo.get("/grande")
+async def grande():
+    return Response(BIG_JSON, media_type="application/json")
+
+
+@demo.get("/chica")
+async def chica():
+    return PlainTextResponse("ok")
+
+
+@demo.get("/imagen")
+async def imagen():
+    return Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+
+@demo.get("/stream")
+async def stream():
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@pytest.fixture
+def demo_client():
+    return TestClient(demo)
+
+
+class TestNegotiate:
+    """Tests de la negociación de Accept-Encoding"""
+
+    @pytest.mark.parametrize("header, expected", [
+        ("gzip, deflate", "gzip"),
+        ("deflate", None),
+        ("", None),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+        ("*, gzip;q=0", None),
+        ("identity", None),
+    ])
+    def test_gzip(self, monkeypatch, header, expected):
+        monkeypatch.setattr(compression, "brotli", None)
+        assert negotiate(header) == expected
+
+    def test_prefiere_brotli_si_esta_instalado(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", object())
+        assert negotiate("gzip, br") == "br"
+        assert negotiate("gzip, br;q=0.5") == "gzip"
+        monkeypatch.setattr(settings, "compression_brotli_enabled", False)
+        assert negotiate("gzip, br") == "gzip"
+
+
+class TestCompressionMiddleware:
+    """Tests del middleware"""
+
+    @pytest.fixture(autouse=True)
+    def solo_gzip(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+
+    def test_comprime_json_grande(self, demo_client):
+        before = metrics.get("http_compression_bytes_in_total", encoding="gzip")
+
+        response = demo_client.get("/grande", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(BIG_JSON) / 5
+        assert response.text == BIG_JSON
+        assert metrics.get("http_compression_bytes_in_total", encoding="gzip") == before + len(BIG_JSON)
+        assert metrics.get("http_compression_cpu_seconds_total", encoding="gzip") > 0
+
+    @pytest.mark.parametrize("path, reason", [("/chica", "small"), ("/imagen", "type")])
+    def test_no_comprime(self, demo_client, path, reason):
+        before = metrics.get("http_compression_skipped_total", reason=reason)
+
+        response = demo_client.get(path, headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert metrics.get("http_compression_skipped_total", reason=reason) == before + 1
+
+    def test_sin_accept_encoding(self, demo_client):
+        response = demo_client.get("/grande", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == BIG_JSON
+
+    def test_streaming_con_flush_por_chunk(self, demo_client):
+        with demo_client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+            raw = b"".join(response.iter_raw())
+
+        assert gzip.decompress(raw).decode() == "".join(ndjson_lines())
+
+    def test_cada_chunk_se_puede_decodificar_sin_el_resto(self):
+        encoder = Encoder("gzip")
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        for line in ndjson_lines():
+            assert decoder.decompress(encoder.compress(line.encode(), final=False)).decode() == line
+        decoder.decompress(encoder.compress(b"", final=True))
+        assert decoder.eof
+
+    def test_brotli(self, demo_client, monkeypatch):
+        brotli = pytest.importorskip("brotli")
+        monkeypatch.setattr(compression, "brotli", brotli)
+
+        with demo_client.stream("GET", "/grande", headers={"Accept-Encoding": "br"}) as response:
+            assert response.headers["content-encoding"] == "br"
+            raw = b"".join(response.iter_raw())
+
+        assert brotli.decompress(raw).decode() == BIG_JSON
+
+
+@pytest.mark.unit
+def test_app_comprime_openapi(client: TestClient):
+    """La app principal comprime las respuestas grandes"""
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["info"]["title"] == settings.app_name
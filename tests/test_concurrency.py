@@ -0,0 +1,181 @@
+"""
+Tests para el límite adaptativo de concurrencia por servicio SOAP
+"""
+import asyncio
+import threading
+import time
+import pytest
+from requests.exceptions import ReadTimeout
+from zeep.exceptions import Fault
+
+from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.concurrency import AdaptiveLimiter, ConcurrencyLimitError, adaptive_limiters
+from app.utils.deadline import DeadlineExceededError, reset_deadline, set_deadline
+from app.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_limiters():
+    """Estado global limpio"""
+    adaptive_limiters.reset()
+    circuit_breakers.reset()
+    yield
+    adaptive_limiters.reset()
+    circuit_breakers.reset()
+
+
+def make_limiter(initial_limit=4, min_limit=1, max_limit=8):
+    return AdaptiveLimiter(
+        "test",
+        initial_limit=initial_limit,
+        min_limit=min_limit,
+        max_limit=max_limit,
+        backoff_ratio=0.5,
+        latency_threshold=1.0,
+    )
+
+
+class TestAdaptiveLimiter:
+    """Tests del ajuste AIMD"""
+
+    def test_aumenta_con_exitos_y_limite_en_uso(self):
+        limiter = make_limiter(initial_limit=2)
+
+        async def scenario():
+            await limiter.acquire(0.1, 10)
+            await limiter.acquire(0.1, 10)
+            limiter.release(0.01)
+            limiter.release(0.01)
+
+        asyncio.run(scenario())
+        assert limiter.limit > 2
+        assert limiter.in_flight == 0
+
+    def test_reduce_ante_lentitud_y_errores(self):
+        limiter = make_limiter(initial_limit=8)
+
+        async def scenario():
+            await limiter.acquire(0.1, 10)
+            limiter.release(5.0)
+            await limiter.acquire(0.1, 10)
+            limiter.release(0.01, dropped=True)
+
+        asyncio.run(scenario())
+        assert limiter.limit == 2
+        assert metrics.get("soap_concurrency_limit", service="test") == 2
+
+    def test_respeta_minimo_y_maximo(self):
+        limiter = make_limiter(initial_limit=1, min_limit=1, max_limit=2)
+
+        async def scenario():
+            for _ in range(5):
+                await limiter.acquire(0.1, 10)
+                limiter.release(0.01)
+            for _ in range(5):
+                await limiter.acquire(0.1, 10)
+                limiter.release(0.01, dropped=True)
+
+        asyncio.run(scenario())
+        assert limiter.limit == 1
+
+    def test_sin_latencia_no_ajusta(self):
+        limiter = make_limiter(initial_limit=4)
+
+        async def scenario():
+            await limiter.acquire(0.1, 10)
+            limiter.release()
+
+        asyncio.run(scenario())
+        assert limiter.limit == 4
+
+    def test_cola_y_rechazo(self):
+        limiter = make_limiter(initial_limit=1, max_limit=1)
+
+        async def scenario():
+            await limiter.acquire(0.1, 10)
+            with pytest.raises(ConcurrencyLimitError):
+                await limiter.acquire(0.05, 10)
+            with pytest.raises(ConcurrencyLimitError):
+                await limiter.acquire(0.05, 0)
+
+            waiter = asyncio.ensure_future(limiter.acquire(1.0, 10))
+            await asyncio.sleep(0.01)
+            assert limiter.snapshot()["queued"] == 1
+            limiter.release(0.01)
+            await waiter
+            assert limiter.in_flight == 1
+
+        asyncio.run(scenario())
+
+
+class TestRunSoapCallConLimite:
+    """Tests del camino de llamada SOAP con límite adaptativo"""
+
+    def test_llamadas_sobre_el_limite_se_rechazan(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_concurrency_initial_limit", 1)
+        monkeypatch.setattr(settings, "soap_concurrency_max_limit", 1)
+        monkeypatch.setattr(settings, "soap_concurrency_queue_timeout", 0.05)
+
+        def slow():
+            time.sleep(0.3)
+            return "ok"
+
+        async def scenario():
+            return await asyncio.gather(
+                run_soap_call("registro", "RegistroPersona", slow),
+                run_soap_call("registro", "RegistroPersona", slow),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(scenario())
+        assert "ok" in results
+        assert any(isinstance(result, ConcurrencyLimitError) for result in results)
+        assert adaptive_limiters.get("registro").in_flight == 0
+
+    def test_fault_no_reduce_el_limite(self):
+        def fault():
+            raise Fault("RUT inválido")
+
+        with pytest.raises(Fault):
+            asyncio.run(run_soap_call("registro", "RegistroPersona", fault))
+        assert adaptive_limiters.get("registro").limit >= settings.soap_concurrency_initial_limit
+
+    def test_error_de_transporte_reduce_el_limite(self):
+        def timeout():
+            raise ReadTimeout("timeout")
+
+        with pytest.raises(ReadTimeout):
+            asyncio.run(run_soap_call("registro", "RegistroPersona", timeout))
+        assert adaptive_limiters.get("registro").limit < settings.soap_concurrency_initial_limit
+
+    def test_llamada_vencida_ocupa_el_cupo_hasta_que_termina_el_hilo(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_retry_attempts", 0)
+        finished = threading.Event()
+
+        def slow():
+            time.sleep(0.3)
+            finished.set()
+            return "ok"
+
+        async def scenario():
+            token = set_deadline(0.05)
+            try:
+                with pytest.raises(DeadlineExceededError):
+                    await run_soap_call("registro", "RegistroPersona", slow)
+            finally:
+                reset_deadline(token)
+            # El upstream sigue atendiendo la llamada en el hilo del pool
+            assert adaptive_limiters.get("registro").in_flight == 1
+            await asyncio.get_running_loop().run_in_executor(None, finished.wait)
+            await asyncio.sleep(0.05)
+
+        asyncio.run(scenario())
+        assert adaptive_limiters.get("registro").in_flight == 0
+
+    def test_deshabilitado(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_adaptive_concurrency_enabled", False)
+
+        assert asyncio.run(run_soap_call("registro", "RegistroPersona", lambda: "ok")) == "ok"
+        assert "registro" not in adaptive_limiters.snapshot()
@@ -0,0 +1,122 @@
+"""
+Tests para la propagación de deadlines hasta las llamadas SOAP
+"""
+import asyncio
+import time
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from unittest.mock import Mock
+
+from app.main import app
+from app.config.settings import settings
+from app.middleware.deadline import parse_timeout
+from app.services.sii_soap_client import SiiSoapClientService
+from app.services.soap_executor import run_soap_call
+from app.services.soap_transport import DeadlineAwareTransport
+from app.utils.deadline import DeadlineExceededError, remaining, reset_deadline, set_deadline
+
+
+async def call_with_deadline(timeout, coro_factory):
+    """Ejecuta una corrutina con un deadline fijado en el contexto"""
+    token = set_deadline(timeout)
+    try:
+        return await coro_factory()
+    finally:
+        reset_deadline(token)
+
+
+class TestParseTimeout:
+    """Tests de lectura de headers de deadline"""
+    
+    def test_sin_headers_usa_default(self, monkeypatch):
+        monkeypatch.setattr(settings, "request_timeout_default", None)
+        assert parse_timeout({}) is None
+    
+    def test_timeout_en_segundos(self):
+        assert parse_timeout({b"x-request-timeout": b"2.5"}) == 2.5
+    
+    def test_deadline_absoluto_y_mas_restrictivo(self):
+        deadline = str(time.time() + 1).encode()
+        timeout = parse_timeout({b"x-request-timeout": b"10", b"x-request-deadline": deadline})
+        assert 0 < timeout <= 1
+    
+    def test_acotado_al_maximo(self, monkeypatch):
+        monkeypatch.setattr(settings, "request_timeout_max", 5.0)
+        assert parse_timeout({b"x-request-timeout": b"600"}) == 5.0
+    
+    def test_header_invalido_se_ignora(self, monkeypatch):
+        monkeypatch.setattr(settings, "request_timeout_default", None)
+        assert parse_timeout({b"x-request-timeout": b"abc"}) is None
+
+
+class TestRunSoapCallConDeadline:
+    """Tests del deadline en el camino de llamada SOAP"""
+    
+    def test_deadline_vencido_no_llama_al_upstream(self):
+        calls = []
+        
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(call_with_deadline(
+                -1, lambda: run_soap_call("sii", "ConsultaEstadoGiro", lambda: calls.append(1))
+            ))
+        assert calls == []
+    
+    def test_deadline_se_propaga_al_hilo_del_pool(self):
+        result = asyncio.run(call_with_deadline(
+            5, lambda: run_soap_call("sii", "ConsultaEstadoGiro", remaining)
+        ))
+        assert 0 < result <= 5
+    
+    def test_espera_acotada_al_deadline(self):
+        start = time.monotonic()
+        
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(call_with_deadline(
+                0.05, lambda: run_soap_call("sii", "ConsultaEstadoGiro", time.sleep, 0.5)
+            ))
+        assert time.monotonic() - start < 0.5
+    
+    def test_transporte_acota_operation_timeout(self):
+        transport = DeadlineAwareTransport(operation_timeout=30)
+        captured = {}
+        transport.session = Mock()
+        transport.session.post.side_effect = lambda address, data, headers, timeout: captured.update(timeout=timeout)
+        
+        token = set_deadline(2)
+        try:
+            transport.post("http://upstream/ws.asmx", b"<xml/>", {})
+        finally:
+            reset_deadline(token)
+        
+        assert 0 < captured["timeout"] <= 2
+
+
+@pytest.mark.unit
+def test_request_con_deadline_agotado_retorna_504():
+    """
+    Test de que el middleware corta el request al vencer el deadline
+    """
+    from app.api.v1.sii import get_sii_soap_client
+    
+    async def slow_call(request):
+        await asyncio.sleep(2)
+    
+    mock_client = Mock(spec=SiiSoapClientService)
+    mock_client.consulta_estado_giro = slow_call
+    app.dependency_overrides[get_sii_soap_client] = lambda: mock_client
+    try:
+        client = TestClient(app)
+        start = time.monotonic()
+        response = client.post(
+            "/api/v1/sii/estado-giro",
+            json={"idSistema": 1, "rut": 12345678, "dv": "9"},
+            headers={"X-Request-Timeout": "0.1"}
+        )
+        elapsed = time.monotonic() - start
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+    assert response.json()["code"] == "DEADLINE_EXCEEDED"
+    assert elapsed < 2
@@ -0,0 +1,96 @@
+"""
+Tests para la serialización JSON rápida de las respuestas
+"""
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi import APIRouter, FastAPI, status
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.api.routing import GatewayRoute
+from app.models.sii import ETipoEstado, RespuestaProcesoBe, RespuestaSiiDatosGlosa, RespuestaSiiEstadoGiroBe
+from app.utils.fast_json import FastJSONResponse, dumps
+from benchmarks.json_bench import CASES, run_benchmarks, serializers
+
+
+ESTADO_GIRO = RespuestaSiiEstadoGiroBe(
+    cabecera=RespuestaProcesoBe(estadoProceso=ETipoEstado.CORRECTO, codigoProceso=200),
+    respuesta=RespuestaSiiDatosGlosa(fechaInicioActividad=datetime(2020, 1, 2, 3, 4, 5, 678000), glosa="Activo"),
+)
+
+
+class TestDumps:
+    """Tests del serializador orjson"""
+
+    def test_mismo_json_que_fastapi(self):
+        body = json.loads(FastJSONResponse(ESTADO_GIRO).body)
+
+        assert body == ESTADO_GIRO.model_dump(mode="json")
+        assert body["respuesta"]["fechaInicioActividad"] == "2020-01-02T03:04:05.678000"
+        assert body["cabecera"]["estadoProceso"] == "CORRECTO"
+
+    def test_tipos_que_orjson_no_conoce(self):
+        content = {"monto": Decimal("1.50"), 12: "clave int", "fecha": datetime(2020, 1, 1, tzinfo=timezone.utc)}
+
+        assert json.loads(dumps(content)) == {"monto": "1.50", "12": "clave int", "fecha": "2020-01-01T00:00:00Z"}
+
+
+router = APIRouter(route_class=GatewayRoute)
+
+
+@router.get("/modelo", response_model=RespuestaSiiEstadoGiroBe)
+async def modelo():
+    return ESTADO_GIRO
+
+
+@router.post("/creado", response_model=RespuestaSiiEstadoGiroBe, status_code=status.HTTP_201_CREATED)
+async def creado():
+    return ESTADO_GIRO
+
+
+@router.get("/error", response_model=RespuestaSiiEstadoGiroBe)
+async def error():
+    return JSONResponse(status_code=status.HTTP_502_BAD_GATEWAY, content={"detail": "Error"})
+
+
+demo = FastAPI()
+demo.include_router(router)
+
+
+class TestGatewayRoute:
+    """Tests de la ruta con serialización directa"""
+
+    def test_serializa_el_modelo_con_orjson(self):
+        response = TestClient(demo).get("/modelo")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == ESTADO_GIRO.model_dump(mode="json")
+        assert response.headers["content-type"] == "application/json"
+
+    def test_respeta_status_code(self):
+        assert TestClient(demo).post("/creado").status_code == status.HTTP_201_CREATED
+
+    def test_otros_resultados_siguen_el_camino_normal(self):
+        response = TestClient(demo).get("/error")
+
+        assert response.status_code == status.HTTP_502_BAD_GATEWAY
+        assert response.json() == {"detail": "Error"}
+
+
+class TestJsonBench:
+    """Tests del micro-benchmark de serialización"""
+
+    @pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+    def test_mismo_cuerpo(self, case):
+        instance = case.model.model_validate(case.payload(5))
+        funcs = serializers(case.model, instance)
+
+        assert json.loads(funcs["fastapi"]()) == json.loads(funcs["gateway"]())
+
+    def test_mide_fastapi_y_gateway(self):
+        results = run_benchmarks([10], repeat=1, only="DatosContribuyente", min_time=0.001)
+
+        assert set(results) == {f"RespuestaSiiDatosContribuyenteBe/{name}/10" for name in ("fastapi", "gateway")}
@@ -0,0 +1,122 @@
+"""
+Tests para la selección de campos de la respuesta (?fields= / ?exclude=)
+"""
+import pickle
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from lxml import etree
+
+from app.models.consulta_rc import RespuestaConsultaRunBe
+from app.models.perfiles import RespuestaPerfilesBe
+from app.models.sii import RespuestaSiiDatosContribuyenteBe
+from app.services.soap_fast_decode import decoder_for
+from app.utils.field_selection import FieldSelectionError, build_selection, parse_paths
+
+
+DATOS_CONTRIBUYENTE = "/api/v1/sii/datos-contribuyente"
+DATOS_CONTRIBUYENTE_BODY = {"idSistema": 1, "rut": 12345678, "dv": "9"}
+
+CONSULTA_RUN = (
+    '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+    '<ConsultaRunResponse xmlns="http://webservices/WsMiddleware/"><ConsultaRunResult>'
+    "<cabecera><estadoProceso>CORRECTO</estadoProceso><codigoProceso>200</codigoProceso></cabecera>"
+    "<respuesta><rut>12345678</rut><dv>9</dv><nombres>Juan</nombres><cantidadHijos>2</cantidadHijos></respuesta>"
+    "<xmlRespuesta>&lt;raw/&gt;</xmlRespuesta>"
+    "</ConsultaRunResult></ConsultaRunResponse></s:Body></s:Envelope>"
+)
+
+
+class TestBuildSelection:
+    """Tests del parseo y validación de rutas"""
+
+    def test_arbol_de_rutas(self):
+        assert parse_paths("cabecera, respuesta.nombres,respuesta.dv") == {
+            "cabecera": True, "respuesta": {"nombres": True, "dv": True}
+        }
+        assert parse_paths("respuesta.nombres,respuesta") == {"respuesta": True}
+        assert parse_paths("") is None
+
+    @pytest.mark.parametrize("fields", ["noExiste", "respuesta.noExiste", "xmlRespuesta.algo", "respuesta..rut"])
+    def test_rutas_invalidas(self, fields):
+        with pytest.raises(FieldSelectionError):
+            build_selection(RespuestaConsultaRunBe, fields, None)
+
+    def test_dump_con_listas(self):
+        selection = build_selection(RespuestaPerfilesBe, "usuario.idUsuario", None)
+        model = RespuestaPerfilesBe.model_validate({"usuario": [
+            {"idUsuario": 1, "nombre": "Ana", "tipoPersona": "N"},
+            {"idUsuario": 2, "nombre": "Luis", "tipoPersona": "N"},
+        ]})
+
+        assert selection.dump(model) == {"usuario": [{"idUsuario": 1}, {"idUsuario": 2}]}
+
+    def test_se_puede_enviar_al_pool_de_procesos(self):
+        selection = build_selection(RespuestaConsultaRunBe, None, "xmlRespuesta")
+        copy = pickle.loads(pickle.dumps(selection))
+
+        assert copy.model is RespuestaConsultaRunBe
+        assert copy.skips("xmlRespuesta")
+
+
+class TestDecodeWithSelection:
+    """Tests de la decodificación directa con selección"""
+
+    def test_no_construye_los_campos_excluidos(self):
+        doc = etree.fromstring(CONSULTA_RUN.encode())
+        selection = build_selection(RespuestaConsultaRunBe, None, "xmlRespuesta,respuesta.nombres")
+
+        result = decoder_for(RespuestaConsultaRunBe).decode(doc, selection)
+
+        assert result.xmlRespuesta is None
+        assert result.respuesta.nombres is None
+        assert result.respuesta.dv == "9"
+
+    def test_decodifica_igual_los_campos_obligatorios(self):
+        doc = etree.fromstring(CONSULTA_RUN.encode())
+        selection = build_selection(RespuestaConsultaRunBe, "respuesta.nombres", None)
+
+        result = decoder_for(RespuestaConsultaRunBe).decode(doc, selection)
+
+        assert result.cabecera is None
+        assert result.respuesta.rut == 12345678
+        assert result.respuesta.cantidadHijos == 2
+        assert result.respuesta.dv is None
+
+
+@pytest.mark.unit
+class TestEndpoints:
+    """Tests de fields/exclude en los routers"""
+
+    def test_sin_seleccion_responde_completo(self, client: TestClient):
+        response = client.post(DATOS_CONTRIBUYENTE, json=DATOS_CONTRIBUYENTE_BODY)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "xmlRespuesta" in response.json()
+
+    def test_exclude(self, client: TestClient):
+        response = client.post(f"{DATOS_CONTRIBUYENTE}?exclude=xmlRespuesta,respuesta.xml", json=DATOS_CONTRIBUYENTE_BODY)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert "xmlRespuesta" not in data
+        assert "xml" not in data["respuesta"]
+        assert data["respuesta"]["razonSocial"] == "Empresa Mock S.A."
+
+    def test_fields(self, client: TestClient):
+        response = client.post(f"{DATOS_CONTRIBUYENTE}?fields=respuesta.razonSocial", json=DATOS_CONTRIBUYENTE_BODY)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"respuesta": {"razonSocial": "Empresa Mock S.A."}}
+
+    def test_campo_inexistente(self, client: TestClient):
+        response = client.post(f"{DATOS_CONTRIBUYENTE}?fields=noExiste", json=DATOS_CONTRIBUYENTE_BODY)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert RespuestaSiiDatosContribuyenteBe.__name__ in response.json()["detail"]
+
+    def test_documentado_en_openapi(self, client: TestClient):
+        parameters = client.get("/openapi.json").json()["paths"][DATOS_CONTRIBUYENTE]["post"]["parameters"]
+
+        assert {"fields", "exclude"} <= {p["name"] for p in parameters}
@@ -81,4 +81,114 @@ def test_health_endpoints_response_time(client: TestClient):
     end_time = time.time()
     
     assert response.status_code == status.HTTP_200_OK
-    assert (end_time - start_time) < 1.0  # Debe responder en menos de 1 segundo 
\ No newline at end of file
+    assert (end_time - start_time) < 1.0  # Debe responder en menos de 1 segundo 
+
+@pytest.mark.unit
+def test_readiness_check_incluye_metricas_runtime(client: TestClient):
+    """
+    Test de que readiness expone latencia del event loop y estado del pool SOAP
+    """
+    response = client.get("/api/v1/health/ready")
+    
+    assert response.status_code == status.HTTP_200_OK
+    
+    runtime = response.json()["runtime"]
+    assert "event_loop_lag_ms" in runtime
+    assert "queued" in runtime["soap_executor"]
+    assert "in_flight" in runtime["soap_executor"]
+
+
+@pytest.mark.unit
+def test_readiness_check_saturado_retorna_503(client: TestClient, monkeypatch):
+    """
+    Test de que readiness retorna 503 cuando se supera un umbral
+    """
+    from app.config.settings import settings
+    from app.utils.loop_monitor import event_loop_monitor
+    
+    monkeypatch.setattr(settings, "readiness_max_loop_lag_ms", 10.0)
+    monkeypatch.setattr(event_loop_monitor, "lag_ms", 50.0)
+    
+    response = client.get("/api/v1/health/ready")
+    
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    data = response.json()
+    assert data["status"] == "not_ready"
+    assert data["checks"]["runtime"] == "saturated"
+    assert data["reasons"]
+
+
+@pytest.mark.unit
+def test_soap_executor_cuenta_llamadas_en_curso():
+    """
+    Test de contadores del pool SOAP durante una llamada
+    """
+    import asyncio
+    from app.services.soap_executor import SoapExecutor
+    
+    executor = SoapExecutor(max_workers=1)
+    observed = {}
+    
+    def blocking_call(value):
+        observed.update(executor.stats())
+        return value * 2
+    
+    result = asyncio.run(executor.run("registro", "RegistroPersona", blocking_call, 21))
+    
+    assert result == 42
+    assert observed["running"] == 1
+    assert observed["in_flight"] == {"registro": 1}
+    assert executor.stats()["in_flight"] == {}
+    assert executor.stats()["queued"] == 0
+
+
+@pytest.mark.unit
+def test_upstream_prober_registra_disponibilidad(monkeypatch):
+    """
+    Test del sondeo de upstreams con respuestas simuladas
+    """
+    import asyncio
+    from types import SimpleNamespace
+    from app.config.settings import settings
+    from app.services.upstream_probe import UpstreamProber
+    
+    prober = UpstreamProber(interval=60, timeout=1)
+    
+    def fake_head(url, **kwargs):
+        if "srv-ws-ora" in url:
+            raise ConnectionError("connection refused")
+        return SimpleNamespace(status_code=200)
+    
+    monkeypatch.setattr(prober._session, "head", fake_head)
+    monkeypatch.setattr(settings, "use_soap_mocks", False)
+    
+    asyncio.run(prober.probe_all())
+    snapshot = prober.snapshot()
+    
+    assert snapshot["registro"]["status"] == "down"
+    assert snapshot["registro"]["consecutive_failures"] == 1
+    assert snapshot["sii"]["status"] == "up"
+    assert "latency_ms" in snapshot["sii"]
+    assert prober.overall_status(snapshot) == "degraded"
+
+
+@pytest.mark.unit
+def test_readiness_check_usa_snapshot_de_upstreams(client: TestClient, monkeypatch):
+    """
+    Test de que readiness sirve el snapshot cacheado y puede exigir upstreams
+    """
+    from app.config.settings import settings
+    from app.services.upstream_probe import upstream_prober
+    
+    snapshot = {"registro": {"status": "down"}, "sii": {"status": "up"}}
+    monkeypatch.setattr(upstream_prober, "snapshot", lambda: snapshot)
+    
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["checks"]["soap_services"] == "degraded"
+    assert response.json()["upstreams"] == snapshot
+    
+    monkeypatch.setattr(settings, "readiness_require_upstreams", True)
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["checks"]["runtime"] == "ok"
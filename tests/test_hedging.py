@@ -0,0 +1,133 @@
+"""
+Tests para requests hedged en lecturas SOAP idempotentes
+"""
+import asyncio
+import threading
+import time
+import pytest
+from zeep.exceptions import Fault
+
+from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.hedging import hedge_budgets, hedge_delay
+from app.utils.latency import LatencyTracker, latency_trackers
+from app.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def hedging(monkeypatch):
+    """Hedging habilitado con latencias observadas de 10ms y estado global limpio"""
+    monkeypatch.setattr(settings, "soap_hedging_enabled", True)
+    monkeypatch.setattr(settings, "soap_hedge_min_delay", 0.01)
+    latency_trackers.reset()
+    hedge_budgets.reset()
+    circuit_breakers.reset()
+    for _ in range(settings.soap_hedge_min_samples):
+        latency_trackers.get("sii", "ConsultaEstadoGiro").record(0.01)
+    yield
+    latency_trackers.reset()
+    hedge_budgets.reset()
+    circuit_breakers.reset()
+
+
+def slow_first(first_result="lenta", delay=0.3):
+    """Callable cuya primera llamada tarda `delay` segundos y las siguientes responden de inmediato"""
+    calls = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            calls.append(1)
+            number = len(calls)
+        if number == 1:
+            time.sleep(delay)
+            return first_result
+        return "rapida"
+
+    return call, calls
+
+
+class TestLatencyTracker:
+    """Tests del registro de latencias"""
+
+    def test_percentil(self):
+        tracker = LatencyTracker(size=100)
+        assert tracker.percentile(95) is None
+        for value in range(1, 101):
+            tracker.record(value / 100)
+        assert tracker.percentile(95) == 0.95
+        assert tracker.percentile(50) == 0.5
+
+    def test_ventana_acotada(self):
+        tracker = LatencyTracker(size=10)
+        for _ in range(50):
+            tracker.record(1.0)
+        assert tracker.count == 10
+
+
+class TestHedgeDelay:
+    """Tests de la decisión de hedgear"""
+
+    def test_usa_percentil_observado(self):
+        assert hedge_delay("sii", "ConsultaEstadoGiro") == pytest.approx(0.01)
+
+    def test_deshabilitado(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_hedging_enabled", False)
+        assert hedge_delay("sii", "ConsultaEstadoGiro") is None
+
+    def test_sin_muestras_suficientes(self):
+        assert hedge_delay("sii", "ConsultaDatosContribuyente") is None
+
+    def test_solo_servicios_configurados_e_idempotentes(self):
+        for _ in range(settings.soap_hedge_min_samples):
+            latency_trackers.get("perfiles", "ConsultaPerfilPorSistema").record(0.01)
+            latency_trackers.get("registro", "RegistroPersona").record(0.01)
+        assert hedge_delay("perfiles", "ConsultaPerfilPorSistema") is None
+        assert hedge_delay("registro", "RegistroPersona") is None
+
+
+class TestRunSoapCallHedged:
+    """Tests del camino de llamada SOAP con hedging"""
+
+    def test_gana_la_llamada_hedged(self):
+        call, calls = slow_first()
+        before = metrics.get("soap_hedge_wins_total", service="sii", operation="ConsultaEstadoGiro")
+
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", call)) == "rapida"
+        assert len(calls) == 2
+        assert metrics.get("soap_hedge_wins_total", service="sii", operation="ConsultaEstadoGiro") == before + 1
+
+    def test_respuesta_rapida_no_se_hedgea(self):
+        calls = []
+
+        def call():
+            calls.append(1)
+            return "ok"
+
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", call)) == "ok"
+        assert len(calls) == 1
+
+    def test_fault_de_la_hedged_gana(self):
+        calls = []
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                calls.append(1)
+                number = len(calls)
+            if number == 1:
+                time.sleep(0.3)
+                return "lenta"
+            raise Fault("RUT inválido")
+
+        with pytest.raises(Fault):
+            asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", call))
+
+    def test_presupuesto_agotado_espera_la_original(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_hedge_budget_max_tokens", 0.0)
+        monkeypatch.setattr(settings, "soap_hedge_budget_ratio", 0.0)
+        call, calls = slow_first(delay=0.05)
+
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", call)) == "lenta"
+        assert len(calls) == 1
@@ -0,0 +1,185 @@
+"""
+Tests para el soporte de Idempotency-Key en escrituras de registro
+"""
+import asyncio
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, Mock
+
+from app.main import app
+from app.api.v1.registro import get_registro_soap_client
+from app.config.settings import settings
+from app.models.registro import RespuestaProcesoBe, TipoEstado
+from app.services.registro_soap_client import RegistroSoapClientService
+from app.utils.idempotency import (
+    IdempotencyInProgressError,
+    IdempotencyKeyReusedError,
+    IdempotencyStore,
+    StoredResponse,
+    idempotency_store,
+)
+
+
+client = TestClient(app)
+
+PERSONA = {
+    "Rut": 12345678,
+    "Dv": "9",
+    "ApellidoPaterno": "Pérez",
+    "ApellidoMaterno": "González",
+    "Nombres": "Juan Carlos",
+    "NroSerie": "123456789",
+    "CodigoCelular": "+56",
+    "NumeroCelular": 987654321,
+    "Mail": "juan.perez@example.com",
+    "FechaNacimiento": "1990-05-15T00:00:00Z",
+    "FechaDefuncion": None,
+    "IdNacionalidad": 1,
+    "Comuna": 13101,
+    "Direccion": "Av. Principal",
+    "NroDireccion": "123",
+    "IdSexo": 1
+}
+
+
+@pytest.fixture
+def mock_registro():
+    """Cliente SOAP de registro simulado y almacén limpio"""
+    mock_client = Mock(spec=RegistroSoapClientService)
+    mock_client.registro_persona = AsyncMock(return_value=RespuestaProcesoBe(
+        estadoProceso=TipoEstado.CORRECTO,
+        codigoProceso=200,
+        respuestaProceso="Persona registrada correctamente"
+    ))
+    app.dependency_overrides[get_registro_soap_client] = lambda: mock_client
+    idempotency_store.reset()
+    yield mock_client
+    app.dependency_overrides.clear()
+    idempotency_store.reset()
+
+
+def registrar(key=None, rut=12345678):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post(
+        "/api/v1/registro/persona",
+        json={"idSistema": 1, "datosPersona": {**PERSONA, "Rut": rut}},
+        headers=headers,
+    )
+
+
+class TestIdempotencyStore:
+    """Tests del almacén de respuestas"""
+
+    def test_duplicado_concurrente_espera_la_respuesta(self):
+        store = IdempotencyStore()
+        stored = StoredResponse(200, [], b"{}")
+
+        async def scenario():
+            assert await store.begin("k", "hash") is None
+            duplicate = asyncio.ensure_future(store.begin("k", "hash"))
+            await asyncio.sleep(0.01)
+            assert not duplicate.done()
+            store.complete("k", stored)
+            return await duplicate
+
+        assert asyncio.run(scenario()) == stored
+
+    def test_error_libera_la_clave(self):
+        store = IdempotencyStore()
+
+        async def scenario():
+            await store.begin("k", "hash")
+            store.complete("k", None)
+            return await store.begin("k", "hash")
+
+        assert asyncio.run(scenario()) is None
+
+    def test_clave_con_otro_cuerpo(self):
+        store = IdempotencyStore()
+
+        async def scenario():
+            await store.begin("k", "hash")
+            store.complete("k", StoredResponse(200, [], b"{}"))
+            await store.begin("k", "otro")
+
+        with pytest.raises(IdempotencyKeyReusedError):
+            asyncio.run(scenario())
+
+    def test_espera_acotada(self, monkeypatch):
+        monkeypatch.setattr(settings, "idempotency_wait_timeout", 0.01)
+        store = IdempotencyStore()
+
+        async def scenario():
+            await store.begin("k", "hash")
+            await store.begin("k", "hash")
+
+        with pytest.raises(IdempotencyInProgressError):
+            asyncio.run(scenario())
+
+    def test_ttl(self, monkeypatch):
+        monkeypatch.setattr(settings, "idempotency_ttl", 0.0)
+        store = IdempotencyStore()
+
+        async def scenario():
+            await store.begin("k", "hash")
+            store.complete("k", StoredResponse(200, [], b"{}"))
+            return await store.begin("k", "hash")
+
+        assert asyncio.run(scenario()) is None
+
+    def test_tamano_maximo_no_se_bloquea_con_claves_en_curso(self, monkeypatch):
+        monkeypatch.setattr(settings, "idempotency_max_entries", 2)
+        store = IdempotencyStore()
+
+        async def scenario():
+            await store.begin("en-curso", "hash")
+            for key in ("a", "b", "c"):
+                await store.begin(key, "hash")
+                store.complete(key, StoredResponse(200, [], key.encode()))
+            await store.begin("d", "hash")
+            replay = await store.begin("c", "hash")
+            evicted = await store.begin("a", "hash")
+            return replay, evicted
+
+        replay, evicted = asyncio.run(scenario())
+        assert replay.body == b"c"
+        assert evicted is None
+
+
+class TestIdempotencyMiddleware:
+    """Tests del header Idempotency-Key en los endpoints"""
+
+    def test_repite_la_primera_respuesta(self, mock_registro):
+        first = registrar("abc-123")
+        second = registrar("abc-123")
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert mock_registro.registro_persona.await_count == 1
+
+    def test_sin_header_no_aplica(self, mock_registro):
+        registrar()
+        registrar()
+
+        assert mock_registro.registro_persona.await_count == 2
+
+    def test_clave_reutilizada_con_otro_cuerpo(self, mock_registro):
+        registrar("abc-123")
+        response = registrar("abc-123", rut=87654321)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["code"] == "IDEMPOTENCY_KEY_REUSED"
+        assert mock_registro.registro_persona.await_count == 1
+
+    def test_error_del_upstream_no_se_guarda(self, mock_registro):
+        mock_registro.registro_persona = AsyncMock(return_value=RespuestaProcesoBe(
+            estadoProceso=TipoEstado.ERROR,
+            codigoProceso=502,
+            respuestaProceso="Error SOAP"
+        ))
+
+        assert registrar("abc-123").status_code == status.HTTP_502_BAD_GATEWAY
+        assert registrar("abc-123").status_code == status.HTTP_502_BAD_GATEWAY
+        assert mock_registro.registro_persona.await_count == 2
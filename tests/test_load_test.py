@@ -0,0 +1,120 @@
+"""
+Tests para la suite de carga de benchmarks
+"""
+import asyncio
+import re
+from collections import Counter
+
+import httpx
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.config.settings import settings
+from benchmarks.load_test import compare, percentile, run_scenario, select_scenarios, summarize
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+
+def route_pattern(path: str) -> "re.Pattern":
+    return re.compile("^" + re.sub(r"\{[^}]+\}", "[^/]+", path) + "$")
+
+
+class TestScenarios:
+    """Tests de cobertura y validez de los escenarios"""
+
+    def test_todos_los_endpoints_tienen_escenario(self):
+        routes = [
+            (method, route.path)
+            for route in app.routes
+            if isinstance(route, APIRoute) and route.path.startswith("/api/v1")
+            for method in route.methods
+        ]
+        missing = [
+            f"{method} {path}"
+            for method, path in routes
+            if not any(s.method == method and route_pattern(path).match(s.path) for s in SCENARIOS)
+        ]
+
+        assert missing == []
+
+    def test_nombres_unicos(self):
+        names = [scenario.name for scenario in SCENARIOS]
+
+        assert len(names) == len(set(names))
+
+    def test_escenarios_validos(self, monkeypatch):
+        monkeypatch.setattr(settings, "rate_limit_enabled", False)
+        with TestClient(app) as client:
+            rejected = {
+                scenario.name: client.request(
+                    scenario.method, scenario.path, params=scenario.params, json=scenario.json
+                ).status_code
+                for scenario in SCENARIOS
+            }
+
+        assert {name: code for name, code in rejected.items() if code >= 300} == {}
+
+    def test_omite_servicios_no_simulados(self):
+        names = [scenario.name for scenario in select_scenarios(None, soap_mocks=False)]
+
+        assert "firma_desatendida" not in names
+        assert "firma_desatendida" in [s.name for s in select_scenarios(None, soap_mocks=True)]
+        assert [s.name for s in select_scenarios("^sii_estado", soap_mocks=False)] == ["sii_estado_giro"]
+
+
+class TestResultados:
+    """Tests del resumen y la comparación contra la línea base"""
+
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+
+        assert percentile(values, 50) == 0.05
+        assert percentile(values, 99) == 0.099
+        assert percentile([], 50) is None
+
+    def test_resumen(self):
+        result = summarize([0.01, 0.02, 0.03, 0.04], Counter({200: 3, 503: 1}), elapsed=2.0)
+
+        assert result["requests"] == 4
+        assert result["errors"] == 1
+        assert result["error_rate"] == 0.25
+        assert result["throughput_rps"] == 2.0
+        assert result["p50_ms"] == 20.0
+        assert result["statuses"] == {"200": 3, "503": 1}
+
+    def test_compara_contra_linea_base(self):
+        baseline = {
+            "a": {"throughput_rps": 100, "p95_ms": 10, "p99_ms": 20, "error_rate": 0.0},
+            "b": {"throughput_rps": 100, "p95_ms": 10, "p99_ms": 20, "error_rate": 0.0},
+        }
+        results = {
+            "a": {"throughput_rps": 95, "p95_ms": 11, "p99_ms": 21, "error_rate": 0.0},
+            "b": {"throughput_rps": 70, "p95_ms": 15, "p99_ms": 20, "error_rate": 0.05},
+            "nuevo": {"throughput_rps": 1, "p95_ms": 1000, "error_rate": 1.0},
+        }
+
+        regressions = compare(results, baseline, tolerance=0.15)
+
+        assert {(r["endpoint"], r["metric"]) for r in regressions} == {
+            ("b", "throughput_rps"), ("b", "p95_ms"), ("b", "error_rate"),
+        }
+
+
+class TestRunScenario:
+    """Tests de la ejecución de un escenario"""
+
+    def test_ejecuta_con_concurrencia(self):
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await run_scenario(
+                    client, Scenario("health_live", "GET", "/api/v1/health/live"), concurrency=3, duration=0.2,
+                    memory_probe=lambda: 1024 * 1024,
+                )
+
+        result = asyncio.run(scenario())
+
+        assert result["requests"] > 0
+        assert result["errors"] == 0
+        assert result["statuses"] == {"200": result["requests"]}
+        assert result["rss_peak_mb"] == 1.0
@@ -0,0 +1,47 @@
+"""
+Tests para la configuración de logging
+"""
+import pytest
+
+from app.config import logging as app_logging
+from app.config.settings import settings
+
+
+@pytest.mark.unit
+def test_setup_logging_es_idempotente():
+    """
+    Test de que setup_logging no vuelve a registrar handlers
+    """
+    first = app_logging.setup_logging()
+    handlers = dict(first._core.handlers)
+    
+    second = app_logging.setup_logging()
+    
+    assert second is first
+    assert dict(second._core.handlers) == handlers
+
+
+@pytest.mark.unit
+def test_get_sample_rate_usa_prefijo_mas_largo(monkeypatch):
+    """
+    Test de selección de tasa de muestreo por prefijo de ruta
+    """
+    monkeypatch.setattr(settings, "log_sample_rates", {"/api/v1": 0.5, "/api/v1/health": 0.0})
+    
+    assert app_logging.get_sample_rate("/api/v1/health/ready") == 0.0
+    assert app_logging.get_sample_rate("/api/v1/sii/estado-giro") == 0.5
+    assert app_logging.get_sample_rate("/docs") == 1.0
+
+
+@pytest.mark.unit
+def test_sample_request_marca_contexto(monkeypatch):
+    """
+    Test de que el muestreo descarta logs INFO pero no WARNING
+    """
+    monkeypatch.setattr(settings, "log_sample_rates", {"/api/v1/health": 0.0})
+    
+    assert app_logging.sample_request("/api/v1/health/") is False
+    assert app_logging._sampling_filter({"level": type("L", (), {"no": 20})()}) is False
+    assert app_logging._sampling_filter({"level": type("L", (), {"no": 30})()}) is True
+    
+    assert app_logging.sample_request("/api/v1/sii/estado-giro") is True
@@ -0,0 +1,133 @@
+"""
+Tests para el servidor SOAP simulado de benchmarks
+"""
+import random
+import pytest
+from lxml import etree
+from starlette.testclient import TestClient
+from zeep.exceptions import Fault
+
+from benchmarks.mock_soap_server import SERVICES, MockSoapServer, sample_latency
+
+
+def soap_request(client, server, service, operation, soap12=False, action=True, **values):
+    """Envía a la operación un envelope generado por zeep y retorna la respuesta HTTP y la operación"""
+    binding_operation = server.service(service).operations[(soap12, operation)].binding_operation
+    envelope = etree.tostring(binding_operation.input.serialize(**values).content)
+    if soap12:
+        content_type = "application/soap+xml; charset=utf-8"
+        if action:
+            content_type += f'; action="{binding_operation.soapaction}"'
+        headers = {"content-type": content_type}
+    else:
+        headers = {"content-type": "text/xml; charset=utf-8"}
+        if action:
+            headers["SOAPAction"] = f'"{binding_operation.soapaction}"'
+    response = client.post(f"/{service}", content=envelope, headers=headers)
+    return response, binding_operation
+
+
+def parse(response, binding_operation):
+    return binding_operation.process_reply(etree.fromstring(response.content))
+
+
+class TestMockSoapServer:
+    """Tests de WSDL y respuestas generadas"""
+
+    def test_wsdl_apunta_al_servidor(self):
+        server = MockSoapServer()
+        response = TestClient(server).get("/sii?wsdl")
+
+        assert response.status_code == 200
+        locations = etree.fromstring(response.content).xpath("//*[local-name()='address']/@location")
+        assert locations and all(location == "http://testserver/sii" for location in locations)
+
+    def test_servicio_desconocido(self):
+        server = MockSoapServer()
+        client = TestClient(server)
+
+        assert client.get("/firma?wsdl").status_code == 404
+        assert client.post("/firma", content=b"<x/>").status_code == 404
+
+    @pytest.mark.parametrize("soap12", [False, True])
+    def test_respuesta_valida_segun_wsdl(self, soap12):
+        server = MockSoapServer()
+        response, operation = soap_request(
+            TestClient(server), server, "sii", "ConsultaEstadoGiro", soap12=soap12, idSistema=1, rut=12345678, dv="9"
+        )
+
+        assert response.status_code == 200
+        result = parse(response, operation)
+        assert result.cabecera.estadoProceso == "CORRECTO"
+        assert result.cabecera.codigoProceso == 200
+
+    def test_operacion_por_elemento_del_body(self):
+        server = MockSoapServer()
+        response, operation = soap_request(
+            TestClient(server), server, "consulta_rc", "ConsultaRun", action=False, idSistema=1, rut=12345678, dv="9"
+        )
+
+        assert response.status_code == 200
+        assert parse(response, operation) is not None
+
+    def test_tamano_de_listas_y_strings(self):
+        server = MockSoapServer({"perfiles": {"list_size": 25, "string_size": 40}})
+        response, operation = soap_request(
+            TestClient(server), server, "perfiles", "ConsultaUsuariosPorPerfilSistema", idSistema=1, idPerfil=2
+        )
+
+        result = parse(response, operation)
+        assert len(result.Usuario.UsuarioBe) == 25
+        assert len(result.Usuario.UsuarioBe[0].nombre) == 40
+
+    def test_fault_simulado(self):
+        server = MockSoapServer({"sii.ConsultaEstadoGiro": {"fault_rate": 1.0}})
+        response, operation = soap_request(
+            TestClient(server), server, "sii", "ConsultaEstadoGiro", idSistema=1, rut=12345678, dv="9"
+        )
+
+        assert response.status_code == 500
+        with pytest.raises(Fault):
+            operation.binding.process_error(etree.fromstring(response.content), operation)
+
+    def test_error_http_simulado(self):
+        server = MockSoapServer({"sii": {"error_rate": 1.0}})
+        response, _ = soap_request(
+            TestClient(server), server, "sii", "ConsultaEstadoGiro", idSistema=1, rut=12345678, dv="9"
+        )
+
+        assert response.status_code == 503
+
+    def test_comportamiento_mas_especifico_gana(self):
+        server = MockSoapServer({
+            "*": {"list_size": 5, "fault_rate": 0.1},
+            "sii": {"list_size": 7},
+            "sii.ConsultaEstadoGiro": {"list_size": 9},
+        })
+
+        assert server.behavior("perfiles", "X").list_size == 5
+        assert server.behavior("sii", "ConsultaActividadEconomica").list_size == 7
+        assert server.behavior("sii", "ConsultaEstadoGiro").list_size == 9
+        assert server.behavior("sii", "ConsultaEstadoGiro").fault_rate == 0.1
+
+    @pytest.mark.parametrize("service", sorted(SERVICES))
+    def test_todos_los_wsdl_cargan(self, service):
+        server = MockSoapServer()
+
+        assert server.service(service).operations
+
+
+class TestSampleLatency:
+    """Tests de las distribuciones de latencia"""
+
+    def test_distribuciones(self):
+        rng = random.Random(1)
+
+        assert sample_latency({"distribution": "fixed", "value": 0.2}, rng) == 0.2
+        assert 0.1 <= sample_latency({"distribution": "uniform", "min": 0.1, "max": 0.3}, rng) <= 0.3
+        assert sample_latency({"distribution": "lognormal", "median": 0.05, "sigma": 0.5}, rng) > 0
+        assert sample_latency({"distribution": "exponential", "mean": 0.05}, rng) >= 0
+
+    def test_distribucion_desconocida(self):
+        with pytest.raises(ValueError):
+            sample_latency({"distribution": "pareto"}, random.Random())
@@ -0,0 +1,44 @@
+"""
+Tests para los micro-benchmarks de modelos pydantic
+"""
+import pytest
+
+from benchmarks.models_bench import CASES, compare, operations, run_benchmarks
+
+
+class TestPayloads:
+    """Tests de los payloads generados"""
+
+    @pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+    def test_payload_valido_en_cada_etapa(self, case):
+        payload = case.payload(25)
+
+        for name, func in operations(case.model, payload).items():
+            assert func() is not None, name
+
+    def test_tamano_de_las_listas(self):
+        perfiles, actividad, firma = (case.model.model_validate(case.payload(50)) for case in CASES)
+
+        assert len(perfiles.usuario) == len(perfiles.funcion) == len(perfiles.usuarioEmpresa) == 50
+        assert len(perfiles.perfil.perfil) == 5
+        assert len(actividad.respuesta.actividadEconomica) == 50
+        assert len(firma.documentos) == 50
+
+
+class TestModelsBench:
+    """Tests de la medición y la comparación"""
+
+    def test_resultados_por_modelo_operacion_y_tamano(self):
+        results = run_benchmarks([10], repeat=1, only="ActividadEconomica", min_time=0.001)
+
+        assert set(results) == {
+            f"RespuestaSiiActividadEconomicaBe/{operation}/10"
+            for operation in ("validate_python", "validate_json", "dump_python", "dump_json", "response_model")
+        }
+        assert all(result["median_us"] > 0 for result in results.values())
+
+    def test_compara_contra_linea_base(self):
+        baseline = {"a": {"median_us": 100.0}, "b": {"median_us": 100.0}}
+        results = {"a": {"median_us": 110.0}, "b": {"median_us": 150.0}, "c": {"median_us": 1.0}}
+
+        assert [r["key"] for r in compare(results, baseline, tolerance=0.2)] == ["b"]
@@ -0,0 +1,197 @@
+"""
+Tests para el rate limiting y cuotas por idSistema
+"""
+import time
+from datetime import date
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.config.settings import settings
+from app.middleware.rate_limit import normalize_id_sistema
+from app.utils.metrics import metrics
+from app.utils.rate_limit import Limits, MemoryRateLimitBackend, SqliteRateLimitBackend, consume, rate_limiter
+
+
+ESTADO_GIRO = "/api/v1/sii/estado-giro"
+
+
+def estado_giro_body(id_sistema=1):
+    return {"idSistema": id_sistema, "rut": 12345678, "dv": "9"}
+
+
+@pytest.fixture(autouse=True)
+def clean_rate_limiter(monkeypatch):
+    """Límites bajos y estado limpio"""
+    monkeypatch.setattr(settings, "rate_limit_rate", 0.001)
+    monkeypatch.setattr(settings, "rate_limit_burst", 2.0)
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
+
+
+class TestTokenBucket:
+    """Tests de la lógica del bucket"""
+
+    def test_rafaga_y_recarga(self):
+        limits = Limits(rate=1.0, burst=2.0, daily_quota=0)
+        state, decision = consume(None, limits, 1000.0)
+        assert decision.allowed
+        state, decision = consume(state, limits, 1000.0)
+        assert decision.allowed
+        state, decision = consume(state, limits, 1000.0)
+        assert not decision.allowed
+        assert decision.reason == "rate"
+        assert decision.retry_after == pytest.approx(1.0)
+        state, decision = consume(state, limits, 1001.0)
+        assert decision.allowed
+
+    def test_cuota_diaria(self):
+        limits = Limits(rate=0, burst=0, daily_quota=2)
+        state, _ = consume(None, limits, 1000.0)
+        state, decision = consume(state, limits, 1000.0)
+        assert decision.used_today == 2
+        state, decision = consume(state, limits, 1000.0)
+        assert not decision.allowed
+        assert decision.reason == "quota"
+        assert decision.retry_after > 0
+
+    def test_cuota_se_reinicia_al_cambiar_de_dia(self):
+        limits = Limits(rate=0, burst=0, daily_quota=1)
+        state, _ = consume(None, limits, 1000.0)
+        _, decision = consume(state, limits, 1000.0 + 86400)
+        assert decision.allowed
+
+    def test_sqlite_compartido_entre_workers(self, tmp_path):
+        path = str(tmp_path / "limits.sqlite")
+        worker_a = SqliteRateLimitBackend(path)
+        worker_b = SqliteRateLimitBackend(path)
+        limits = Limits(rate=0.001, burst=2.0, daily_quota=0)
+
+        assert worker_a.consume("1", "POST /x", limits).allowed
+        assert worker_b.consume("1", "POST /x", limits).allowed
+        assert not worker_a.consume("1", "POST /x", limits).allowed
+        assert worker_b.usage()[0]["used_today"] == 2
+
+    def test_memoria_acotada(self, monkeypatch):
+        monkeypatch.setattr(settings, "rate_limit_max_buckets", 2)
+        backend = MemoryRateLimitBackend()
+        limits = Limits(rate=1.0, burst=2.0, daily_quota=0)
+
+        for id_sistema in ("1", "2", "3"):
+            backend.consume(id_sistema, "POST /x", limits)
+
+        assert [item["idSistema"] for item in backend.usage()] == ["2", "3"]
+
+    def test_descarta_buckets_inactivos(self, monkeypatch):
+        monkeypatch.setattr(settings, "rate_limit_idle_ttl", 0.0)
+        backend = MemoryRateLimitBackend()
+
+        backend.consume("sin-cuota", "POST /x", Limits(rate=0, burst=0, daily_quota=0))
+        backend.consume("con-cuota", "POST /x", Limits(rate=0, burst=0, daily_quota=10))
+        backend.consume("otro", "POST /x", Limits(rate=0, burst=0, daily_quota=0))
+
+        # El bucket con cuota usada hoy se conserva hasta el cambio de día
+        assert [item["idSistema"] for item in backend.usage()] == ["con-cuota", "otro"]
+
+    def test_sqlite_descarta_buckets_inactivos(self, tmp_path):
+        backend = SqliteRateLimitBackend(
+            str(tmp_path / "limits.sqlite"),
+            lambda id_sistema: Limits(rate=1.0, burst=2.0, daily_quota=10 if id_sistema == "con-cuota" else 0),
+        )
+        now = time.time()
+        today = date.today().isoformat()
+
+        def insert(id_sistema, updated):
+            backend._connect().execute(
+                "INSERT INTO rate_limits VALUES (?, 'POST /x', 0.0, ?, ?, 1)", (id_sistema, updated, today)
+            )
+
+        insert("inactivo", now - 2 * settings.rate_limit_idle_ttl)
+        insert("con-cuota", now - 2 * settings.rate_limit_idle_ttl)
+        insert("reciente", now - 10)
+        backend.consume("nuevo", "POST /x", Limits(rate=1.0, burst=2.0, daily_quota=0))
+
+        assert {item["idSistema"] for item in backend.usage()} == {"con-cuota", "reciente", "nuevo"}
+
+        # La purga se repite a lo más cada SQLITE_PURGE_INTERVAL segundos
+        insert("inactivo", now - 2 * settings.rate_limit_idle_ttl)
+        backend.consume("nuevo", "POST /x", Limits(rate=1.0, burst=2.0, daily_quota=0))
+        assert "inactivo" in {item["idSistema"] for item in backend.usage()}
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("12", "12"), (12, "12"), ("007", "7"), (" 3 ", "3"),
+    ("abc", None), ("-1", None), ("1" * 11, None), (True, None), (None, None), ("²", None),
+])
+def test_normaliza_id_sistema(value, expected):
+    assert normalize_id_sistema(value) == expected
+
+
+def test_metricas_agrupan_sistemas_no_configurados(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_overrides", {"5": {"rate": 100, "burst": 100}})
+    before_other = metrics.get("rate_limit_requests_total", id_sistema="other", endpoint="POST /x")
+    before_known = metrics.get("rate_limit_requests_total", id_sistema="5", endpoint="POST /x")
+
+    rate_limiter.check("987654", "POST /x")
+    rate_limiter.check("5", "POST /x")
+
+    assert metrics.get("rate_limit_requests_total", id_sistema="other", endpoint="POST /x") == before_other + 1
+    assert metrics.get("rate_limit_requests_total", id_sistema="5", endpoint="POST /x") == before_known + 1
+    assert metrics.get("rate_limit_requests_total", id_sistema="987654", endpoint="POST /x") == 0
+
+
+@pytest.mark.unit
+def test_limite_por_id_sistema(client: TestClient):
+    """Un idSistema que supera su ráfaga recibe 429 sin afectar a otros"""
+    for _ in range(2):
+        assert client.post(ESTADO_GIRO, json=estado_giro_body()).status_code == status.HTTP_200_OK
+
+    response = client.post(ESTADO_GIRO, json=estado_giro_body())
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.json()["code"] == "RATE_LIMITED"
+    assert "Retry-After" in response.headers
+
+    assert client.post(ESTADO_GIRO, json=estado_giro_body(id_sistema=2)).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.unit
+def test_limite_en_query_params(client: TestClient):
+    params = {"id_sistema": 1, "rut": 12345678, "dv": "9"}
+    for _ in range(2):
+        assert client.get("/api/v1/rc/run", params=params).status_code == status.HTTP_200_OK
+    assert client.get("/api/v1/rc/run", params=params).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@pytest.mark.unit
+def test_override_y_cuota(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_overrides", {"7": {"rate": 0, "daily_quota": 1}})
+
+    assert client.post(ESTADO_GIRO, json=estado_giro_body(7)).status_code == status.HTTP_200_OK
+    response = client.post(ESTADO_GIRO, json=estado_giro_body(7))
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.json()["code"] == "QUOTA_EXCEEDED"
+
+
+@pytest.mark.unit
+def test_uso_expuesto(client: TestClient):
+    client.post(ESTADO_GIRO, json=estado_giro_body())
+
+    usage = client.get("/api/v1/metrics/rate-limits").json()["usage"]
+    assert usage == [{
+        "idSistema": "1",
+        "endpoint": "POST /api/v1/sii/estado-giro",
+        "tokens": 1.0,
+        "used_today": 1,
+        "rate": 0.001,
+        "burst": 2.0,
+        "daily_quota": 0,
+    }]
+
+
+@pytest.mark.unit
+def test_deshabilitado(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    for _ in range(3):
+        assert client.post(ESTADO_GIRO, json=estado_giro_body()).status_code == status.HTTP_200_OK
@@ -1,12 +1,17 @@
 """
 Tests para el módulo de registro de SENCE
 """
+import asyncio
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, AsyncMock
 from fastapi import status
 
 from app.main import app
+from app.config.settings import settings
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.rate_limit import rate_limiter
 from app.models.registro import (
     RespuestaProcesoBe,
     TipoEstado,
@@ -477,6 +482,118 @@ class TestRegistroEmpresaOracle:
         assert data["codigoProceso"] == 200
 
 
+class TestActualizacionMasiva:
+    """Tests para el endpoint de actualización masiva de empresas"""
+    
+    @staticmethod
+    def _lineas(response):
+        return [json.loads(line) for line in response.text.splitlines() if line]
+    
+    def test_actualizacion_masiva_exitosa(self, mock_registro_soap_client_dependency):
+        """Test de una línea NDJSON por empresa con ambas operaciones"""
+        ok = RespuestaProcesoBe(estadoProceso=TipoEstado.CORRECTO, codigoProceso=200, respuestaProceso="OK")
+        mock_registro_soap_client_dependency.actualizar_razon_social = AsyncMock(return_value=ok)
+        mock_registro_soap_client_dependency.actualizar_rep_legales = AsyncMock(return_value=ok)
+        
+        response = client.post("/api/v1/registro/empresa/masivo", json={
+            "idSistema": 1,
+            "empresas": [{"rutEmpresa": 76543210 + i, "dvEmpresa": "K"} for i in range(5)]
+        })
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lineas = self._lineas(response)
+        assert sorted(linea["rutEmpresa"] for linea in lineas) == [76543210 + i for i in range(5)]
+        for linea in lineas:
+            assert linea["resultados"]["razon_social"]["estadoProceso"] == "CORRECTO"
+            assert linea["resultados"]["rep_legales"]["estadoProceso"] == "CORRECTO"
+            assert linea["error"] is None
+        assert mock_registro_soap_client_dependency.actualizar_razon_social.await_count == 5
+    
+    def test_concurrencia_acotada(self, mock_registro_soap_client_dependency, monkeypatch):
+        """Test de que no se superan REGISTRO_BULK_CONCURRENCY empresas en paralelo"""
+        monkeypatch.setattr(settings, "registro_bulk_concurrency", 2)
+        en_curso = 0
+        maximo = 0
+        
+        async def actualizar(**kwargs):
+            nonlocal en_curso, maximo
+            en_curso += 1
+            maximo = max(maximo, en_curso)
+            await asyncio.sleep(0.01)
+            en_curso -= 1
+            return RespuestaProcesoBe(estadoProceso=TipoEstado.CORRECTO, codigoProceso=200, respuestaProceso="OK")
+        
+        mock_registro_soap_client_dependency.actualizar_razon_social = AsyncMock(side_effect=actualizar)
+        
+        response = client.post("/api/v1/registro/empresa/masivo", json={
+            "idSistema": 1,
+            "empresas": [{"rutEmpresa": 76543210 + i} for i in range(6)],
+            "operaciones": ["razon_social"],
+            "force": True
+        })
+        
+        assert len(self._lineas(response)) == 6
+        assert maximo == 2
+        assert mock_registro_soap_client_dependency.actualizar_razon_social.await_args.kwargs["force"] is True
+    
+    def test_rechazo_del_gateway_por_empresa(self, mock_registro_soap_client_dependency):
+        """Test de que un rechazo del gateway se informa en la línea de la empresa"""
+        mock_registro_soap_client_dependency.actualizar_razon_social = AsyncMock(
+            side_effect=CircuitOpenError("registro", "ActualizarRazonSocial", 5)
+        )
+        mock_registro_soap_client_dependency.actualizar_rep_legales = AsyncMock()
+        
+        response = client.post("/api/v1/registro/empresa/masivo", json={
+            "idSistema": 1,
+            "empresas": [{"rutEmpresa": 76543210, "dvEmpresa": "K"}]
+        })
+        
+        lineas = self._lineas(response)
+        assert lineas[0]["error"] == "CIRCUIT_OPEN"
+        assert lineas[0]["resultados"] == {}
+        mock_registro_soap_client_dependency.actualizar_rep_legales.assert_not_awaited()
+    
+    def test_rate_limit_por_operacion(self, mock_registro_soap_client_dependency, monkeypatch):
+        """Test de que cada operación consume el bucket de su endpoint individual"""
+        monkeypatch.setattr(settings, "rate_limit_rate", 0.001)
+        monkeypatch.setattr(settings, "rate_limit_burst", 3.0)
+        monkeypatch.setattr(settings, "registro_bulk_concurrency", 2)
+        rate_limiter.reset()
+        ok = RespuestaProcesoBe(estadoProceso=TipoEstado.CORRECTO, codigoProceso=200, respuestaProceso="OK")
+        mock_registro_soap_client_dependency.actualizar_razon_social = AsyncMock(return_value=ok)
+
+        try:
+            response = client.post("/api/v1/registro/empresa/masivo", json={
+                "idSistema": 1,
+                "empresas": [{"rutEmpresa": 76543210 + i} for i in range(5)],
+                "operaciones": ["razon_social"]
+            })
+            individual = client.patch("/api/v1/registro/empresa/razon", json={"idSistema": 1, "rutEmpresa": 76543210})
+        finally:
+            rate_limiter.reset()
+
+        lineas = self._lineas(response)
+        rechazadas = [linea for linea in lineas if linea["error"]]
+        assert len(lineas) == 5
+        assert len(rechazadas) == 2
+        assert all(linea["error"] == "RATE_LIMITED" and linea["retryAfter"] > 0 for linea in rechazadas)
+        assert mock_registro_soap_client_dependency.actualizar_razon_social.await_count == 3
+        assert individual.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_demasiadas_empresas(self, mock_registro_soap_client_dependency, monkeypatch):
+        """Test del límite de empresas por request"""
+        monkeypatch.setattr(settings, "registro_bulk_max_items", 2)
+        
+        response = client.post("/api/v1/registro/empresa/masivo", json={
+            "idSistema": 1,
+            "empresas": [{"rutEmpresa": 76543210 + i} for i in range(3)]
+        })
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["codigo_error"] == "TOO_MANY_ITEMS"
+
+
 class TestIntegracionCompleta:
     """Tests de integración completa del módulo de registro"""
     
@@ -494,6 +611,7 @@ class TestIntegracionCompleta:
             ("POST", "/api/v1/registro/empresa/con-cus"),
             ("PATCH", "/api/v1/registro/empresa/cambio-cus"),
             ("POST", "/api/v1/registro/empresa/oracle"),
+            ("POST", "/api/v1/registro/empresa/masivo"),
         ]
         
         for method, endpoint in endpoints:
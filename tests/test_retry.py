@@ -0,0 +1,108 @@
+"""
+Tests para la política de reintentos de llamadas SOAP
+"""
+import asyncio
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError, ReadTimeout
+from zeep.exceptions import Fault, TransportError
+
+from app.config.settings import settings
+from app.services.soap_executor import run_soap_call
+from app.utils.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.utils.retry import RetryBudget, backoff_delay, is_idempotent, is_retryable_error, retry_budgets
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Reintentos sin espera y estado global limpio"""
+    monkeypatch.setattr(settings, "soap_retry_backoff_base", 0.0)
+    retry_budgets.reset()
+    circuit_breakers.reset()
+    yield
+    retry_budgets.reset()
+    circuit_breakers.reset()
+
+
+def flaky(failures, exc):
+    """Callable que falla `failures` veces y luego responde"""
+    calls = []
+    
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise exc
+        return "ok"
+    
+    return call, calls
+
+
+class TestClasificacion:
+    """Tests de clasificación de errores y operaciones"""
+    
+    def test_operaciones_idempotentes(self):
+        assert is_idempotent("sii", "ConsultaEstadoGiro")
+        assert is_idempotent("consulta_rc", "ConsultaRun")
+        assert is_idempotent("perfiles", "ConsultaPerfilPorSistema")
+        assert not is_idempotent("perfiles", "AsignarPerfilSistemaUsuarioPorRut")
+        assert not is_idempotent("registro", "RegistroPersona")
+    
+    def test_errores_reintentables(self):
+        assert is_retryable_error(RequestsConnectionError("reset"))
+        assert is_retryable_error(TransportError(status_code=503))
+        assert not is_retryable_error(TransportError(status_code=500))
+        assert not is_retryable_error(Fault("RUT inválido"))
+        assert not is_retryable_error(ReadTimeout("timeout"))
+        assert not is_retryable_error(CircuitOpenError("sii", "ConsultaEstadoGiro", 5))
+    
+    def test_backoff_acotado(self):
+        for attempt in range(1, 10):
+            assert 0 <= backoff_delay(attempt, 0.1, 2.0) <= 2.0
+    
+    def test_presupuesto_de_reintentos(self):
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+
+
+class TestRunSoapCallConReintentos:
+    """Tests del camino de llamada SOAP con reintentos"""
+    
+    def test_reintenta_lectura_ante_error_transitorio(self):
+        call, calls = flaky(2, RequestsConnectionError("reset"))
+        
+        assert asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", call)) == "ok"
+        assert len(calls) == 3
+    
+    def test_respeta_soap_retry_attempts(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_retry_attempts", 1)
+        call, calls = flaky(5, RequestsConnectionError("reset"))
+        
+        with pytest.raises(RequestsConnectionError):
+            asyncio.run(run_soap_call("consulta_rc", "ConsultaRun", call))
+        assert len(calls) == 2
+    
+    def test_no_reintenta_escrituras(self):
+        call, calls = flaky(1, RequestsConnectionError("reset"))
+        
+        with pytest.raises(RequestsConnectionError):
+            asyncio.run(run_soap_call("registro", "RegistroPersona", call))
+        assert len(calls) == 1
+    
+    def test_no_reintenta_fault(self):
+        call, calls = flaky(1, Fault("RUT inválido"))
+        
+        with pytest.raises(Fault):
+            asyncio.run(run_soap_call("sii", "ConsultaEstadoGiro", call))
+        assert len(calls) == 1
+    
+    def test_presupuesto_agotado_corta_reintentos(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_retry_budget_max_tokens", 1.0)
+        call, calls = flaky(10, RequestsConnectionError("reset"))
+        
+        with pytest.raises(RequestsConnectionError):
+            asyncio.run(run_soap_call("perfiles", "ConsultaPerfilPorSistema", call))
+        # Un intento original más el único reintento del presupuesto
+        assert len(calls) == 2
@@ -0,0 +1,106 @@
+"""
+Tests para los stubs generados de las operaciones SOAP con camino directo
+"""
+import re
+from pathlib import Path
+
+import pytest
+from lxml import etree
+from zeep.wsdl.utils import etree_to_string
+
+from app.models.consulta_rc import RespuestaConsultaRunBe
+from app.services import soap_stubs
+from app.services.soap_codegen import OPERATIONS, STUBS_PATH, generate
+from app.services.soap_fast_decode import FastDecodeError, decoder_for
+from app.services.soap_templates import (
+    EnvelopeTemplate, GeneratedTemplate, TemplateError, request_element, template_for,
+)
+from benchmarks.mock_soap_server import MockSoapServer
+
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+
+SAMPLES = {str: "<K&'\">ñ", int: -5, bool: True}
+
+STUB_OPERATIONS = [
+    (service, operation)
+    for service, (_, operations) in OPERATIONS.items()
+    for operation in operations
+]
+
+
+def zeep_envelope(client, operation, kwargs) -> bytes:
+    binding = client.service._binding
+    envelope, _ = binding._create(operation, (), kwargs, client=client, options=client.service._binding_options)
+    return etree_to_string(envelope)
+
+
+class TestGeneratedStubs:
+    """Tests de soap_stubs.py contra los WSDL locales"""
+
+    def test_stubs_al_dia(self):
+        assert STUBS_PATH.read_text(encoding="utf-8") == generate()
+
+    def test_cubre_las_operaciones_con_camino_directo(self):
+        called = set()
+        for path in APP_DIR.rglob("*.py"):
+            source = path.read_text(encoding="utf-8")
+            called.update(re.findall(r'template_operation\(self\.client, "(\w+)"', source))
+            called.update(re.findall(r'fast_operation\(self\.client, "\w+", "(\w+)"', source))
+
+        assert called
+        assert called == {operation for _, operation in STUB_OPERATIONS}
+
+    @pytest.mark.parametrize("service,operation", STUB_OPERATIONS, ids=lambda value: value)
+    def test_identico_a_zeep(self, service, operation):
+        client = MockSoapServer().client(service)
+        element = request_element(client, operation)
+        stub = soap_stubs.REQUESTS.get(element)
+        if stub is None:
+            # Parámetros que la plantilla no admite: el request se arma con zeep
+            pytest.raises(TemplateError, EnvelopeTemplate, client, operation)
+            assert element in soap_stubs.RESULTS
+            return
+        kwargs = {name: SAMPLES[kind] for name, kind in stub.params}
+
+        template = template_for(client, operation)
+
+        assert isinstance(template, GeneratedTemplate)
+        assert template.accepts(kwargs)
+        assert template.render(kwargs) == zeep_envelope(client, operation, kwargs)
+        assert template.headers == EnvelopeTemplate(client, operation).headers
+        assert not hasattr(stub(**kwargs), "__dict__")
+
+    def test_no_acepta_tipos_distintos(self):
+        template = template_for(MockSoapServer().client("consulta_rc"), "ConsultaRun")
+
+        assert not template.accepts({"idSistema": True, "rut": 1, "dv": "9"})
+        assert not template.accepts({"idSistema": 1, "rut": "1", "dv": "9"})
+        assert not template.accepts({"idSistema": 1, "rut": 1, "dv": "\x01"})
+
+    def test_wsdl_distinto_compila_con_zeep(self, monkeypatch):
+        client = MockSoapServer().client("consulta_rc")
+        stub = soap_stubs.REQUESTS[request_element(client, "ConsultaRun")]
+        monkeypatch.setattr(stub, "soap_action", "http://otro/ConsultaRun")
+
+        template = template_for(client, "ConsultaRun")
+
+        assert isinstance(template, EnvelopeTemplate)
+
+
+class TestResultPath:
+    """Tests de la ruta Response/Result generada en la decodificación directa"""
+
+    def test_result_path_distinto_del_body(self):
+        path = soap_stubs.RESULTS["{http://webservices/WsMiddleware/}ConsultaRun"]
+        doc = etree.fromstring(
+            '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+            '<OtraResponse xmlns="http://webservices/WsMiddleware/"><OtraResult>'
+            "<cabecera><estadoProceso>CORRECTO</estadoProceso><codigoProceso>200</codigoProceso></cabecera>"
+            "</OtraResult></OtraResponse></s:Body></s:Envelope>"
+        )
+        decoder = decoder_for(RespuestaConsultaRunBe)
+
+        assert decoder.decode(doc).cabecera.codigoProceso == 200
+        with pytest.raises(FastDecodeError, match="ConsultaRunResult"):
+            decoder.decode(doc, result_path=path)
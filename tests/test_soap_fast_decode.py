@@ -0,0 +1,125 @@
+"""
+Tests para la decodificación directa de respuestas SOAP a modelos
+"""
+import pytest
+from lxml import etree
+from zeep.exceptions import Fault
+
+from app.config.settings import settings
+from app.models.consulta_rc import RespuestaConsultaRunBe
+from app.models.perfiles import RespuestaPerfilesBe
+from app.models.sii import RespuestaSiiDatosContribuyenteBe
+from app.services.soap_fast_decode import FastDecodeError, decoder_for, fast_operation
+from app.utils.metrics import metrics
+from benchmarks.decode_bench import run_benchmarks
+from benchmarks.mock_soap_server import MockSoapServer
+
+
+def envelope(result: str) -> etree._Element:
+    return etree.fromstring(
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"><s:Body>'
+        f'<ConsultaRunResponse xmlns="http://webservices/WsMiddleware/"><ConsultaRunResult>{result}'
+        "</ConsultaRunResult></ConsultaRunResponse></s:Body></s:Envelope>"
+    )
+
+
+class TestModelDecoder:
+    """Tests del decodificador precompilado"""
+
+    def test_decodifica_con_nombres_en_otras_mayusculas(self):
+        doc = envelope(
+            "<cabecera><estadoProceso>CORRECTO</estadoProceso><codigoProceso>200</codigoProceso></cabecera>"
+            "<respuesta><Rut>12345678</Rut><dv>9</dv><Nombres>Juan</Nombres><cantidadHijos>2</cantidadHijos>"
+            '<fechaDefuncion xsi:nil="true"/></respuesta>'
+        )
+
+        result = decoder_for(RespuestaConsultaRunBe).decode(doc)
+
+        assert result.cabecera.codigoProceso == 200
+        assert result.respuesta.rut == 12345678
+        assert result.respuesta.nombres == "Juan"
+        assert result.respuesta.fechaDefuncion is None
+
+    def test_listas_con_y_sin_arrayof(self):
+        decoder = decoder_for(RespuestaPerfilesBe)
+        funcion = "<idFuncion>{}</idFuncion><obligatorio>true</obligatorio><denegado>false</denegado><Estado>Activo</Estado>"
+
+        wrapped = decoder.values(etree.fromstring(
+            f"<r><Funcion><FuncionBe>{funcion.format(1)}</FuncionBe><FuncionBe>{funcion.format(2)}</FuncionBe></Funcion></r>"
+        ))
+        repeated = decoder.values(etree.fromstring(
+            f"<r><Funcion>{funcion.format(1)}</Funcion><Funcion>{funcion.format(2)}</Funcion></r>"
+        ))
+
+        assert [f["idFuncion"] for f in wrapped["funcion"]] == ["1", "2"]
+        assert wrapped == repeated
+
+    def test_sorpresas_de_esquema(self):
+        decoder = decoder_for(RespuestaConsultaRunBe)
+
+        with pytest.raises(FastDecodeError, match="inesperado"):
+            decoder.decode(envelope("<cabecera><nuevoCampo>1</nuevoCampo></cabecera>"))
+        with pytest.raises(FastDecodeError, match="no valida"):
+            decoder.decode(envelope("<respuesta><rut>no-numerico</rut><cantidadHijos>0</cantidadHijos></respuesta>"))
+
+
+class TestFastOperation:
+    """Tests de la llamada con decodificación directa contra el servidor simulado"""
+
+    @pytest.mark.parametrize("service,operation,model,kwargs", [
+        ("consulta_rc", "ConsultaRun", RespuestaConsultaRunBe, {"idSistema": 1, "rut": 1, "dv": "9"}),
+        ("sii", "ConsultaDatosContribuyente", RespuestaSiiDatosContribuyenteBe, {"idSistema": 1, "rut": 1, "dv": "9"}),
+        ("perfiles", "ConsultaUsuariosPorPerfilSistema", RespuestaPerfilesBe, {"idSistema": 1, "idPerfil": 1}),
+    ])
+    def test_retorna_el_modelo(self, service, operation, model, kwargs):
+        client = MockSoapServer({"*": {"list_size": 3}}).client(service)
+        before = metrics.get("soap_fast_decode_total", service=service, operation=operation, result="fast")
+
+        result = fast_operation(client, service, operation, model)(**kwargs)
+
+        assert isinstance(result, model)
+        assert model.model_validate(result) is result
+        assert metrics.get("soap_fast_decode_total", service=service, operation=operation, result="fast") == before + 1
+
+    def test_listas_de_perfiles(self):
+        client = MockSoapServer({"*": {"list_size": 3}}).client("perfiles")
+
+        result = fast_operation(client, "perfiles", "ConsultaPerfilPorSistema", RespuestaPerfilesBe)(idSistema=1)
+
+        assert len(result.usuario) == len(result.funcion) == len(result.usuarioEmpresa) == 3
+        assert len(result.perfil.perfil) == 3 and len(result.perfil.perfil[0].funcion) == 3
+
+    def test_fallback_a_zeep(self):
+        client = MockSoapServer().client("sii")
+        before = metrics.get("soap_fast_decode_total", service="sii", operation="ConsultaEstadoGiro", result="fallback")
+
+        # El modelo de otra operación no calza con la respuesta: se usa el objeto de zeep
+        result = fast_operation(client, "sii", "ConsultaEstadoGiro", RespuestaConsultaRunBe)(idSistema=1, rut=1, dv="9")
+
+        assert not isinstance(result, RespuestaConsultaRunBe)
+        assert result.cabecera.codigoProceso == 200
+        assert metrics.get("soap_fast_decode_total", service="sii", operation="ConsultaEstadoGiro", result="fallback") == before + 1
+
+    def test_fault(self):
+        client = MockSoapServer({"consulta_rc": {"fault_rate": 1.0}}).client("consulta_rc")
+
+        with pytest.raises(Fault, match="Fault simulado"):
+            fast_operation(client, "consulta_rc", "ConsultaRun", RespuestaConsultaRunBe)(idSistema=1, rut=1, dv="9")
+
+    def test_deshabilitado(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_fast_decode_enabled", False)
+        client = MockSoapServer().client("consulta_rc")
+
+        result = fast_operation(client, "consulta_rc", "ConsultaRun", RespuestaConsultaRunBe)(idSistema=1, rut=1, dv="9")
+
+        assert not isinstance(result, RespuestaConsultaRunBe)
+
+
+class TestDecodeBench:
+    """Tests del micro-benchmark de decodificación"""
+
+    def test_mide_zeep_y_fast(self):
+        results = run_benchmarks([1], repeat=1, only="ConsultaRun", min_time=0.001)
+
+        assert set(results) == {"consulta_rc.ConsultaRun/zeep/1", "consulta_rc.ConsultaRun/fast/1"}
@@ -0,0 +1,88 @@
+"""
+Tests para el pool de procesos de respuestas SOAP grandes
+"""
+import os
+
+import pytest
+
+from app.config.settings import settings
+from app.models.perfiles import RespuestaPerfilesBe
+from app.services.soap_fast_decode import decode_in_process, fast_operation
+from app.services.soap_process_pool import SoapProcessPool, soap_process_pool
+from app.utils.metrics import metrics
+from benchmarks.mock_soap_server import DEFAULT_BEHAVIOR, MockSoapServer
+
+
+def perfiles_response(list_size: int = 3) -> bytes:
+    service = MockSoapServer().service("perfiles")
+    operation = service.operations[(False, "ConsultaPerfilPorSistema")]
+    return service.response(operation, DEFAULT_BEHAVIOR._replace(list_size=list_size))
+
+
+def _crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pool = SoapProcessPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+class TestDecodeInProcess:
+    """Tests del trabajo que se ejecuta en el proceso hijo"""
+
+    def test_decodifica_el_modelo(self):
+        result = decode_in_process(perfiles_response(), RespuestaPerfilesBe, True)
+
+        assert isinstance(result, RespuestaPerfilesBe)
+        assert len(result.usuario) == 3
+
+    @pytest.mark.parametrize("content", [
+        b"no es xml",
+        b'<!DOCTYPE x [<!ENTITY e "y">]><x>&e;</x>',
+        b'<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body><s:Fault/></s:Body></s:Envelope>',
+    ])
+    def test_retorna_none_para_procesar_en_el_llamador(self, content):
+        assert decode_in_process(content, RespuestaPerfilesBe, True) is None
+
+
+class TestSoapProcessPool:
+    """Tests del pool de procesos"""
+
+    def test_umbral(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_process_pool_enabled", True)
+        monkeypatch.setattr(settings, "soap_process_pool_threshold_bytes", 100)
+
+        assert soap_process_pool.accepts(100)
+        assert not soap_process_pool.accepts(99)
+        monkeypatch.setattr(settings, "soap_process_pool_enabled", False)
+        assert not soap_process_pool.accepts(10_000)
+
+    def test_ejecuta_en_otro_proceso(self, pool):
+        assert pool.run("perfiles", "Test", os.getpid) != os.getpid()
+        assert pool.stats()["started"] and pool.stats()["running"] == 0
+
+    def test_se_recrea_si_un_proceso_muere(self, pool):
+        before = metrics.get("soap_process_pool_total", service="perfiles", operation="Test", result="error")
+
+        assert pool.run("perfiles", "Test", _crash) is None
+        assert metrics.get("soap_process_pool_total", service="perfiles", operation="Test", result="error") == before + 1
+        assert pool.run("perfiles", "Test", os.getpid) != os.getpid()
+
+    def test_fast_operation_usa_el_pool(self, monkeypatch):
+        monkeypatch.setattr(settings, "soap_process_pool_enabled", True)
+        monkeypatch.setattr(settings, "soap_process_pool_threshold_bytes", 0)
+        client = MockSoapServer({"*": {"list_size": 3}}).client("perfiles")
+        labels = {"service": "perfiles", "operation": "ConsultaPerfilPorSistema"}
+        before = metrics.get("soap_process_pool_total", result="ok", **labels)
+
+        try:
+            result = fast_operation(client, "perfiles", "ConsultaPerfilPorSistema", RespuestaPerfilesBe)(idSistema=1)
+        finally:
+            soap_process_pool.shutdown()
+
+        assert isinstance(result, RespuestaPerfilesBe)
+        assert len(result.usuario) == 3
+        assert metrics.get("soap_process_pool_total", result="ok", **labels) == before + 1
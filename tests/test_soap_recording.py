@@ -0,0 +1,173 @@
+"""
+Tests para la grabación y el replay de tráfico SOAP
+"""
+import gzip
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+
+import pytest
+import requests
+from lxml import etree
+from zeep import Client
+from zeep.exceptions import Fault
+from zeep.helpers import serialize_object
+
+from app.services.soap_recording import (
+    PiiScrubber, ReplayTransport, SoapRecorder, SoapRecorderPlugin, load_recordings,
+)
+from app.config.settings import settings
+from benchmarks.mock_soap_server import MockSoapServer
+
+
+SII_WSDL = str(Path(__file__).resolve().parent.parent / "SOAP" / "SII.xml")
+
+
+def record_calls(tmp_path, server, calls):
+    recorder = SoapRecorder(str(tmp_path))
+    scrubber = PiiScrubber(settings.soap_record_scrub_fields, salt="test")
+    client = server.client("sii", plugins=[SoapRecorderPlugin("sii", recorder, scrubber)])
+    for rut in calls:
+        try:
+            client.service.ConsultaEstadoGiro(idSistema=1, rut=rut, dv="9")
+        except Fault:
+            pass
+    recorder.flush()
+    return list(load_recordings(str(tmp_path), "sii"))
+
+
+class TestPiiScrubber:
+    """Tests de la seudonimización de datos personales"""
+
+    def test_seudonimiza_campos_y_rut_en_texto(self):
+        scrubber = PiiScrubber(settings.soap_record_scrub_fields, salt="test")
+        envelope = etree.fromstring(
+            "<Envelope><Body><Consulta><RutEmpresa>76123456</RutEmpresa><dv>K</dv>"
+            "<Nombres>Juan Pablo</Nombres><nombreSistema>SENCE</nombreSistema>"
+            "<glosa>Contribuyente 12.345.678-9 sin deuda</glosa></Consulta></Body></Envelope>"
+        )
+
+        scrubbed = scrubber.scrub(envelope)
+        values = {element.tag: element.text for element in scrubbed.iter()}
+
+        assert values["RutEmpresa"] != "76123456" and values["RutEmpresa"].isdigit() and len(values["RutEmpresa"]) == 8
+        assert values["dv"].isalpha() and values["dv"].isupper()
+        assert values["Nombres"] != "Juan Pablo" and len(values["Nombres"]) == 10 and values["Nombres"][4] == " "
+        assert values["nombreSistema"] == "SENCE"
+        assert "12.345.678-9" not in values["glosa"] and values["glosa"].startswith("Contribuyente ")
+        assert envelope.find(".//Nombres").text == "Juan Pablo"
+
+    def test_seudonimiza_xml_embebido(self):
+        scrubber = PiiScrubber(settings.soap_record_scrub_fields, salt="test")
+        embedded = (
+            "<contribuyente><rut>12345678</rut><dv>9</dv><razonSocial>Comercial Pérez SpA</razonSocial>"
+            "<domicilio>Av. Siempre Viva 742</domicilio><glosa>Socio 9.876.543-2</glosa>"
+            "<estado>ACTIVO</estado></contribuyente>"
+        )
+        envelope = etree.fromstring(
+            "<Envelope><Body><ConsultaDatosContribuyenteResponse><ConsultaDatosContribuyenteResult>"
+            f"<xmlRespuesta>{escape(embedded)}</xmlRespuesta><XmlRespuesta>&lt;roto&gt; 12345678</XmlRespuesta>"
+            "</ConsultaDatosContribuyenteResult></ConsultaDatosContribuyenteResponse></Body></Envelope>"
+        )
+
+        scrubbed = scrubber.scrub(envelope)
+        recorded = etree.tostring(scrubbed, encoding="unicode")
+        inner = etree.fromstring(scrubbed.find(".//xmlRespuesta").text)
+
+        for value in ("12345678", "Comercial", "Pérez", "Siempre Viva", "9.876.543-2"):
+            assert value not in recorded
+        assert inner.findtext("estado") == "ACTIVO"
+        assert inner.findtext("rut").isdigit() and len(inner.findtext("rut")) == 8
+        assert scrubbed.find(".//XmlRespuesta").text.startswith("<")
+
+    def test_seudonimo_determinista_por_salt(self):
+        scrubber = PiiScrubber(["rut"], salt="a")
+
+        assert scrubber.pseudonym("12345678") == scrubber.pseudonym("12345678")
+        assert scrubber.pseudonym("12345678") != PiiScrubber(["rut"], salt="b").pseudonym("12345678")
+
+
+class TestRecordReplay:
+    """Tests de grabación con el plugin y replay con el transporte"""
+
+    def test_archivo_sin_datos_personales_de_consulta_run(self, tmp_path):
+        personales = {
+            "nombreCompleto": "Juan Pablo Soto", "nombrePadre": "Pedro Soto", "nombreMadre": "Ana Rojas",
+            "apPaterno": "Soto", "apMaterno": "Rojas", "NumeroCelular": "987654321", "CodigoCelular": "569",
+            "celular": "912345678", "fechaNacimiento": "1985-03-17T00:00:00", "sexo": "MASCULINO",
+        }
+        datos = "".join(f"<{name}>{value}</{name}>" for name, value in personales.items())
+        embedded = f"<persona><run>12345678</run>{datos}</persona>"
+        request = etree.fromstring(
+            '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+            "<ConsultaRun><idSistema>1</idSistema><rut>12345678</rut><dv>9</dv></ConsultaRun></s:Body></s:Envelope>"
+        )
+        response = etree.fromstring(
+            '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+            f"<ConsultaRunResponse><ConsultaRunResult><respuesta>{datos}</respuesta>"
+            f"<xmlRespuesta>{escape(embedded)}</xmlRespuesta></ConsultaRunResult></ConsultaRunResponse>"
+            "</s:Body></s:Envelope>"
+        )
+        recorder = SoapRecorder(str(tmp_path))
+        plugin = SoapRecorderPlugin("consulta_rc", recorder, PiiScrubber(settings.soap_record_scrub_fields, salt="test"))
+
+        plugin.egress(request, {}, None, {})
+        plugin.ingress(response, {}, SimpleNamespace(name="ConsultaRun"))
+        recorder.flush()
+
+        [path] = tmp_path.glob("consulta_rc-*.jsonl.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+            archive = archive_file.read()
+        assert "ConsultaRunResponse" in archive
+        for value in ["12345678", "Juan Pablo", "Soto", "Rojas", "987654321", "912345678", "1985-03-17", "MASCULINO"]:
+            assert value not in archive
+        fecha = etree.fromstring(json.loads(archive.splitlines()[0])["response"]).find(".//fechaNacimiento").text
+        assert datetime.fromisoformat(fecha).year >= 1940
+
+    def test_graba_operacion_sin_datos_personales(self, tmp_path):
+        recordings = record_calls(tmp_path, MockSoapServer(), [11111111, 22222222])
+
+        assert len(recordings) == 2
+        assert {r["operation"] for r in recordings} == {"ConsultaEstadoGiro"}
+        assert {r["element"] for r in recordings} == {"ConsultaEstadoGiro"}
+        assert all(r["status"] == 200 and r["elapsed"] > 0 for r in recordings)
+        assert "11111111" not in recordings[0]["request"]
+        assert "ConsultaEstadoGiroResponse" in recordings[0]["response"]
+
+    def test_graba_faults(self, tmp_path):
+        server = MockSoapServer({"sii": {"fault_rate": 1.0}})
+
+        recordings = record_calls(tmp_path, server, [11111111])
+
+        assert recordings[0]["status"] == 500
+        assert "Fault" in recordings[0]["response"]
+
+    def test_replay_con_latencia_original(self, tmp_path):
+        record_calls(tmp_path, MockSoapServer(), [11111111])
+        recording = next(load_recordings(str(tmp_path), "sii"))
+        expected = MockSoapServer().client("sii").service.ConsultaEstadoGiro(idSistema=1, rut=1, dv="9")
+        client = Client(SII_WSDL, transport=ReplayTransport("sii", str(tmp_path), speed=0))
+
+        result = client.service.ConsultaEstadoGiro(idSistema=1, rut=99999999, dv="1")
+
+        assert serialize_object(result) == serialize_object(expected)
+        transport = ReplayTransport("sii", str(tmp_path), speed=recording["elapsed"] / 0.05)
+        started = time.perf_counter()
+        Client(SII_WSDL, transport=transport).service.ConsultaEstadoGiro(idSistema=1, rut=1, dv="9")
+        assert time.perf_counter() - started >= 0.05
+
+    def test_replay_excede_timeout(self, tmp_path):
+        record_calls(tmp_path, MockSoapServer(), [11111111])
+        transport = ReplayTransport("sii", str(tmp_path), speed=1e-9, operation_timeout=0.05)
+
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            Client(SII_WSDL, transport=transport).service.ConsultaEstadoGiro(idSistema=1, rut=1, dv="9")
+
+    def test_replay_sin_grabaciones(self, tmp_path):
+        transport = ReplayTransport("sii", str(tmp_path), speed=0)
+
+        with pytest.raises(Exception, match="404"):
+            Client(SII_WSDL, transport=transport).service.ConsultaEstadoGiro(idSistema=1, rut=1, dv="9")
@@ -0,0 +1,106 @@
+"""
+Tests para las plantillas precompiladas de sobres SOAP
+"""
+import pytest
+from zeep import Plugin
+from zeep.exceptions import Fault
+from zeep.wsdl.utils import etree_to_string
+
+from app.config.settings import settings
+from app.services.soap_templates import EnvelopeTemplate, TemplateError, send_raw, template_for, template_operation
+from benchmarks.envelope_bench import CASES, run_benchmarks
+from benchmarks.mock_soap_server import MockSoapServer
+
+
+def zeep_envelope(client, operation, kwargs) -> bytes:
+    binding = client.service._binding
+    envelope, _ = binding._create(operation, (), kwargs, client=client, options=client.service._binding_options)
+    return etree_to_string(envelope)
+
+
+class TestEnvelopeTemplate:
+    """Tests de compilación y render contra los WSDL locales"""
+
+    @pytest.mark.parametrize("case", CASES, ids=lambda case: case.operation)
+    def test_identico_a_zeep(self, case):
+        client = MockSoapServer().client(case.service)
+
+        template = template_for(client, case.operation)
+
+        assert template is not None
+        assert template.accepts(case.kwargs)
+        assert template.render(case.kwargs) == zeep_envelope(client, case.operation, case.kwargs)
+
+    def test_escapa_caracteres_especiales(self):
+        client = MockSoapServer().client("sii")
+        kwargs = {"idSistema": -5, "rut": 0, "dv": "<K&'\">ñ"}
+
+        rendered = EnvelopeTemplate(client, "ConsultaEstadoGiro").render(kwargs)
+
+        assert b"&lt;K&amp;'\"&gt;" in rendered
+        assert rendered == zeep_envelope(client, "ConsultaEstadoGiro", kwargs)
+
+    @pytest.mark.parametrize("kwargs", [
+        {"idSistema": 1, "rut": 1},
+        {"idSistema": 1, "rut": 1, "dv": None},
+        {"idSistema": 1, "rut": "1", "dv": "9"},
+        {"idSistema": True, "rut": 1, "dv": "9"},
+        {"idSistema": 1, "rut": 1, "dv": "\x01"},
+    ])
+    def test_no_acepta_argumentos_fuera_de_la_plantilla(self, kwargs):
+        template = EnvelopeTemplate(MockSoapServer().client("consulta_rc"), "ConsultaRun")
+
+        assert not template.accepts(kwargs)
+
+    def test_operacion_con_tipos_complejos(self):
+        with pytest.raises(TemplateError):
+            EnvelopeTemplate(MockSoapServer().client("registro"), "RegistroPersona")
+
+
+class TestSendRaw:
+    """Tests del envío con plantilla o con zeep"""
+
+    def test_sin_plantilla_con_plugins_o_deshabilitado(self, monkeypatch):
+        client = MockSoapServer().client("consulta_rc")
+        client.plugins = [Plugin()]
+        assert template_for(client, "ConsultaRun") is None
+
+        client.plugins = []
+        monkeypatch.setattr(settings, "soap_envelope_templates_enabled", False)
+        assert template_for(client, "ConsultaRun") is None
+
+    def test_fallback_a_zeep_con_la_misma_respuesta(self, monkeypatch):
+        client = MockSoapServer().client("consulta_rc")
+        posted = []
+        original_post = client.transport.post
+        monkeypatch.setattr(client.transport, "post", lambda *args: posted.append(args) or original_post(*args))
+
+        templated = send_raw(client, "ConsultaRun", idSistema=1, rut=1, dv="9")
+        fallback = send_raw(client, "ConsultaRun", idSistema=1, rut=1, dv=None)
+
+        assert templated.status_code == fallback.status_code == 200
+        assert len(posted) == 2
+        assert posted[0][1] == zeep_envelope(client, "ConsultaRun", {"idSistema": 1, "rut": 1, "dv": "9"})
+
+    def test_template_operation_retorna_el_objeto_de_zeep(self):
+        client = MockSoapServer().client("sii")
+
+        result = template_operation(client, "ConsultaEstadoGiro")(idSistema=1, rut=1, dv="9")
+
+        assert result.cabecera.codigoProceso == 200
+        assert result == client.service.ConsultaEstadoGiro(idSistema=1, rut=1, dv="9")
+
+    def test_fault(self):
+        client = MockSoapServer({"identificacion": {"fault_rate": 1.0}}).client("identificacion")
+
+        with pytest.raises(Fault, match="Fault simulado"):
+            template_operation(client, "IniciarSesionToken")(idSistema=1, token="t")
+
+
+class TestEnvelopeBench:
+    """Tests del micro-benchmark de armado de sobres"""
+
+    def test_mide_zeep_y_template(self):
+        results = run_benchmarks(repeat=1, only="ConsultaRun", min_time=0.001)
+
+        assert set(results) == {"consulta_rc.ConsultaRun/zeep", "consulta_rc.ConsultaRun/template"}
@@ -0,0 +1,113 @@
+"""
+Tests para la omisión de actualizaciones de Registro sin cambios
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from app.config.settings import settings
+from app.models.registro import DatosEmpresaRudo, TipoEmpresa, TipoEstado
+from app.services.registro_soap_client import RegistroSoapClientService
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.unchanged import unchanged_updates
+
+
+@pytest.fixture
+def registro():
+    """Cliente de registro con un upstream simulado que responde CORRECTO"""
+    unchanged_updates.reset()
+    circuit_breakers.reset()
+    service = RegistroSoapClientService()
+    service.use_mocks = False
+    service.client = Mock()
+    ok = SimpleNamespace(estadoProceso="CORRECTO", codigoProceso=200, respuestaProceso="OK")
+    for operation in ("ActualizarEmpresa", "ActualizarRazonSocial", "ActualizarRepLegales", "ActualizarTipoEntidad"):
+        getattr(service.client.service, operation).return_value = ok
+    yield service
+    unchanged_updates.reset()
+    circuit_breakers.reset()
+
+
+@pytest.fixture
+def sii_refresh(monkeypatch):
+    """Omisión opt-in de razón social / rep. legales"""
+    monkeypatch.setattr(settings, "registro_skip_sii_refresh_enabled", True)
+
+
+def datos_empresa(telefono=987654321):
+    return DatosEmpresaRudo(RutEmpresa=76543210, DvEmpresa="K", TipoEmpresa=1, IdComuna=13101, Telefono=telefono)
+
+
+class TestActualizacionesSinCambios:
+    """Tests del short-circuit de actualizaciones repetidas"""
+
+    def test_payload_igual_no_llama_al_upstream(self, registro):
+        first = asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+        second = asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+
+        assert first == second
+        assert second.estadoProceso == TipoEstado.CORRECTO
+        assert registro.client.service.ActualizarEmpresa.call_count == 1
+
+    def test_payload_distinto_se_envia(self, registro):
+        asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+        asyncio.run(registro.actualizar_empresa(1, datos_empresa(telefono=123456789)))
+
+        assert registro.client.service.ActualizarEmpresa.call_count == 2
+
+    def test_razon_social_y_rep_legales_se_envian_por_defecto(self, registro):
+        for _ in range(2):
+            asyncio.run(registro.actualizar_razon_social(1, 76543210, "K"))
+            asyncio.run(registro.actualizar_rep_legales(1, 76543210, "K"))
+
+        assert registro.client.service.ActualizarRazonSocial.call_count == 2
+        assert registro.client.service.ActualizarRepLegales.call_count == 2
+
+    def test_ttl_cubre_la_sincronizacion_diaria(self):
+        assert settings.registro_unchanged_ttl >= 86400
+
+    def test_force_envia_igual(self, registro, sii_refresh):
+        asyncio.run(registro.actualizar_razon_social(1, 76543210, "K"))
+        asyncio.run(registro.actualizar_razon_social(1, 76543210, "K", force=True))
+
+        assert registro.client.service.ActualizarRazonSocial.call_count == 2
+
+    def test_por_operacion_y_rut(self, registro, sii_refresh):
+        asyncio.run(registro.actualizar_rep_legales(1, 76543210, "K"))
+        asyncio.run(registro.actualizar_rep_legales(1, 11222333, "4"))
+        asyncio.run(registro.actualizar_tipo_entidad(1, 76543210, "K", TipoEmpresa.OTEC))
+        asyncio.run(registro.actualizar_rep_legales(1, 76543210, "K"))
+
+        assert registro.client.service.ActualizarRepLegales.call_count == 2
+        assert registro.client.service.ActualizarTipoEntidad.call_count == 1
+
+    def test_error_no_se_recuerda(self, registro, sii_refresh):
+        registro.client.service.ActualizarRazonSocial.return_value = SimpleNamespace(
+            estadoProceso="ERROR", codigoProceso=400, respuestaProceso="RUT no encontrado"
+        )
+        asyncio.run(registro.actualizar_razon_social(1, 76543210, "K"))
+        asyncio.run(registro.actualizar_razon_social(1, 76543210, "K"))
+
+        assert registro.client.service.ActualizarRazonSocial.call_count == 2
+
+    def test_ttl_vencido(self, registro, monkeypatch):
+        monkeypatch.setattr(settings, "registro_unchanged_ttl", 0.0)
+        asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+        asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+
+        assert registro.client.service.ActualizarEmpresa.call_count == 2
+
+    def test_frecuencia_de_razon_social_con_su_propio_ttl(self, registro, sii_refresh, monkeypatch):
+        monkeypatch.setattr(settings, "registro_sii_refresh_ttl", 0.0)
+        asyncio.run(registro.actualizar_razon_social(1, 76543210, "K"))
+        asyncio.run(registro.actualizar_razon_social(1, 76543210, "K"))
+
+        assert registro.client.service.ActualizarRazonSocial.call_count == 2
+
+    def test_deshabilitado(self, registro, monkeypatch):
+        monkeypatch.setattr(settings, "registro_skip_unchanged_enabled", False)
+        asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+        asyncio.run(registro.actualizar_empresa(1, datos_empresa()))
+
+        assert registro.client.service.ActualizarEmpresa.call_count == 2